@@ -0,0 +1,9 @@
+"""
+UNIBOS P2P
+
+LAN peer discovery over mDNS/zeroconf (see discovery).
+"""
+
+from .discovery import Peer, browse_peers, get_discovery_service
+
+__all__ = ['Peer', 'browse_peers', 'get_discovery_service']
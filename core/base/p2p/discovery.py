@@ -0,0 +1,425 @@
+"""
+mDNS Peer Discovery
+
+Advertises this node on the LAN as a zeroconf service (UNIBOS_MDNS_SERVICE_TYPE)
+with its InstanceIdentity in the TXT record, and browses for other nodes:
+
+- Peers land in an in-memory table as soon as their announcement arrives,
+  with no round-trip to the central registry
+- Every UNIBOS_P2P_PROBE_INTERVAL seconds each peer's API port is probed with a
+  TCP connect; latency is kept as a moving average and a successful probe
+  refreshes the peer. Peers silent for UNIBOS_P2P_PEER_TIMEOUT are dropped.
+- best_peer(capability=...) returns the lowest-latency live peer
+
+One process per host runs zeroconf (cache.add lock) and publishes the table
+to the cache; other worker processes read it from there. browse_peers() is a
+Django-free one-shot browse for the CLI.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_TYPE = '_unibos._tcp.local.'
+LATENCY_SMOOTHING = 0.3  # Weight of the newest probe in the moving average
+MAX_PROBE_FAILURES = 3  # Consecutive failed probes before a peer is dropped
+LOCAL_TABLE_TTL = 2  # Seconds a non-leader process reuses its copy of the table
+TXT_VALUE_LIMIT = 200  # TXT strings are capped at 255 bytes including the key
+
+
+def capability_names(capabilities) -> List[str]:
+    """Capability tags for a NodeCapabilities ('gpu', 'camera', 'django', ...)"""
+    names = []
+    for attr, name in (
+        ('has_gpu', 'gpu'), ('has_camera', 'camera'), ('has_gpio', 'gpio'), ('has_lora', 'lora'),
+        ('can_run_django', 'django'), ('can_run_celery', 'celery'), ('can_run_websocket', 'websocket'),
+    ):
+        if getattr(capabilities, attr, False):
+            names.append(name)
+    return names
+
+
+def _join_limited(values) -> str:
+    """Comma-joined values that fit in one TXT string"""
+    joined = ''
+    for value in values:
+        candidate = f'{joined},{value}' if joined else value
+        if len(candidate.encode('utf-8')) > TXT_VALUE_LIMIT:
+            break
+        joined = candidate
+    return joined
+
+
+def build_properties(identity, extra_capabilities=()) -> Dict[str, str]:
+    """TXT record for an InstanceIdentity"""
+    capabilities = identity.get_capabilities()
+    return {
+        'uuid': identity.get_uuid(),
+        'type': identity.get_node_type().value,
+        'host': identity.identity.hostname,
+        'caps': _join_limited([*capability_names(capabilities), *extra_capabilities]),
+        'modules': _join_limited(capabilities.available_modules or []),
+    }
+
+
+def _decode(value) -> str:
+    if value is None:
+        return ''
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+
+
+def local_ip() -> str:
+    """Address of the interface used for outbound traffic (no packets are sent)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(('8.8.8.8', 80))
+        return sock.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+    finally:
+        sock.close()
+
+
+def measure_latency(address, port, timeout=1.0) -> Optional[float]:
+    """TCP connect time in ms, or None if unreachable"""
+    started = time.perf_counter()
+    try:
+        socket.create_connection((address, port), timeout=timeout).close()
+    except OSError:
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+@dataclass
+class Peer:
+    """A node seen on the LAN"""
+    uuid: str
+    name: str  # mDNS service name
+    hostname: str = ''
+    node_type: str = 'unknown'
+    addresses: List[str] = field(default_factory=list)
+    port: int = 0
+    capabilities: List[str] = field(default_factory=list)
+    modules: List[str] = field(default_factory=list)
+    last_seen: float = 0.0  # time.time()
+    latency_ms: Optional[float] = None
+    failures: int = 0
+
+    @classmethod
+    def from_service_info(cls, info) -> Optional['Peer']:
+        properties = {_decode(key): _decode(value) for key, value in (info.properties or {}).items()}
+        uuid = properties.get('uuid')
+        if not uuid:
+            return None
+        return cls(
+            uuid=uuid,
+            name=info.name,
+            hostname=properties.get('host', ''),
+            node_type=properties.get('type', 'unknown'),
+            addresses=info.parsed_addresses(),
+            port=info.port,
+            capabilities=[name for name in properties.get('caps', '').split(',') if name],
+            modules=[name for name in properties.get('modules', '').split(',') if name],
+            last_seen=time.time(),
+        )
+
+    @property
+    def base_url(self) -> Optional[str]:
+        if not self.addresses:
+            return None
+        address = self.addresses[0]
+        host = f'[{address}]' if ':' in address else address
+        return f'http://{host}:{self.port}'
+
+    def matches(self, capability=None, module=None) -> bool:
+        if capability and capability not in self.capabilities:
+            return False
+        if module and module not in self.modules:
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'base_url': self.base_url}
+
+
+class PeerTable:
+    """Thread-safe peer map keyed by node uuid"""
+
+    def __init__(self):
+        self._peers: Dict[str, Peer] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, peer: Peer):
+        with self._lock:
+            previous = self._peers.get(peer.uuid)
+            if previous is not None:
+                peer.latency_ms = previous.latency_ms  # Keep the measured latency across re-announcements
+            self._peers[peer.uuid] = peer
+
+    def remove_service(self, name):
+        with self._lock:
+            for uuid, peer in list(self._peers.items()):
+                if peer.name == name:
+                    del self._peers[uuid]
+
+    def record_probe(self, uuid, latency_ms):
+        with self._lock:
+            peer = self._peers.get(uuid)
+            if peer is None:
+                return
+            if latency_ms is None:
+                peer.failures += 1
+                if peer.failures >= MAX_PROBE_FAILURES:
+                    del self._peers[uuid]
+                return
+            peer.failures = 0
+            peer.last_seen = time.time()
+            if peer.latency_ms is None:
+                peer.latency_ms = latency_ms
+            else:
+                peer.latency_ms += LATENCY_SMOOTHING * (latency_ms - peer.latency_ms)
+
+    def expire(self, ttl, now=None) -> int:
+        now = now or time.time()
+        with self._lock:
+            stale = [uuid for uuid, peer in self._peers.items() if now - peer.last_seen > ttl]
+            for uuid in stale:
+                del self._peers[uuid]
+        return len(stale)
+
+    def replace(self, peers):
+        with self._lock:
+            self._peers = {peer.uuid: peer for peer in peers}
+
+    def peers(self, capability=None, module=None) -> List[Peer]:
+        with self._lock:
+            peers = [peer for peer in self._peers.values() if peer.matches(capability, module)]
+        # Measured peers first, fastest first
+        return sorted(peers, key=lambda peer: (peer.latency_ms is None, peer.latency_ms or 0))
+
+
+def probe_table(table: PeerTable, timeout=1.0):
+    """Probe every peer's API port and record the results"""
+    for peer in table.peers():
+        if peer.addresses and peer.port:
+            table.record_probe(peer.uuid, measure_latency(peer.addresses[0], peer.port, timeout))
+
+
+class _Listener:
+    """zeroconf ServiceListener feeding a PeerTable"""
+
+    def __init__(self, table: PeerTable, own_uuid=None):
+        self.table = table
+        self.own_uuid = own_uuid
+
+    def _resolve(self, zc, type_, name):
+        info = zc.get_service_info(type_, name, timeout=3000)
+        if info is None:
+            return
+        peer = Peer.from_service_info(info)
+        if peer is None or peer.uuid == self.own_uuid:
+            return
+        self.table.upsert(peer)
+        if peer.addresses and peer.port:
+            # First measurement right away, so a new peer is selectable immediately
+            self.table.record_probe(peer.uuid, measure_latency(peer.addresses[0], peer.port))
+
+    def add_service(self, zc, type_, name):
+        self._resolve(zc, type_, name)
+
+    def update_service(self, zc, type_, name):
+        self._resolve(zc, type_, name)
+
+    def remove_service(self, zc, type_, name):
+        self.table.remove_service(name)
+
+
+def browse_peers(timeout=2.0, service_type=DEFAULT_SERVICE_TYPE, probe=True) -> List[Peer]:
+    """One-shot LAN browse (no Django needed); peers sorted by latency"""
+    from zeroconf import ServiceBrowser, Zeroconf
+
+    table = PeerTable()
+    zc = Zeroconf()
+    try:
+        ServiceBrowser(zc, service_type, _Listener(table))
+        time.sleep(timeout)
+    finally:
+        zc.close()
+    if probe:
+        probe_table(table)
+    return table.peers()
+
+
+class PeerDiscoveryService:
+    """
+    Advertise + browse + probe loop (singleton per process)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        from django.conf import settings
+
+        self.service_type = getattr(settings, 'UNIBOS_MDNS_SERVICE_TYPE', DEFAULT_SERVICE_TYPE)
+        self.port = getattr(settings, 'UNIBOS_MDNS_SERVICE_PORT', 8000)
+        self.peer_timeout = getattr(settings, 'UNIBOS_P2P_PEER_TIMEOUT', 180)
+        self.probe_interval = getattr(settings, 'UNIBOS_P2P_PROBE_INTERVAL', 15)
+        self.table = PeerTable()
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._zeroconf = None
+        self._service_info = None
+        self._token = f'{os.getpid()}:{id(self)}'
+        self._unavailable = False
+        self._is_leader = False
+        self._table_read_at = 0.0
+
+    @classmethod
+    def get_instance(cls) -> 'PeerDiscoveryService':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def is_enabled() -> bool:
+        from django.conf import settings
+        return bool(
+            getattr(settings, 'UNIBOS_MDNS_ENABLED', False)
+            or getattr(settings, 'UNIBOS_P2P_DISCOVERY_ENABLED', False)
+        )
+
+    @staticmethod
+    def _cache_key(suffix=''):
+        return f'p2p:peers:{socket.gethostname()}{suffix}'
+
+    def start(self):
+        """Start the discovery thread (idempotent)"""
+        with self._lock:
+            if self._unavailable or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='p2p-discovery', daemon=True)
+            self._thread.start()
+            logger.info("peer discovery started")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._stop_zeroconf()
+
+    def get_peers(self, capability=None, module=None) -> List[Peer]:
+        """Live peers, lowest latency first"""
+        self.start()
+        if not self._is_leader:
+            self._read_shared_table()
+        return self.table.peers(capability, module)
+
+    def best_peer(self, capability=None, module=None) -> Optional[Peer]:
+        """Lowest-latency reachable peer offering a capability/module, or None"""
+        for peer in self.get_peers(capability, module):
+            if peer.latency_ms is not None:
+                return peer
+        return None
+
+    def _run(self):
+        from django.core.cache import cache
+
+        while not self._stop_event.is_set():
+            try:
+                if self._hold_leader_lock(cache):
+                    if self._zeroconf is None:
+                        self._start_zeroconf()
+                    self.table.expire(self.peer_timeout)
+                    probe_table(self.table)
+                    cache.set(
+                        self._cache_key(),
+                        [peer.to_dict() for peer in self.table.peers()],
+                        self.probe_interval * 4,
+                    )
+                elif self._zeroconf is not None:
+                    self._stop_zeroconf()  # Lost the lock; another process advertises now
+            except Exception as e:
+                logger.warning(f"peer discovery cycle failed: {e}")
+            self._stop_event.wait(self.probe_interval)
+
+    def _hold_leader_lock(self, cache) -> bool:
+        ttl = self.probe_interval * 3
+        if cache.add(self._cache_key(':leader'), self._token, ttl):
+            self._is_leader = True
+        elif cache.get(self._cache_key(':leader')) == self._token:
+            cache.touch(self._cache_key(':leader'), ttl)
+            self._is_leader = True
+        else:
+            self._is_leader = False
+        return self._is_leader
+
+    def _read_shared_table(self):
+        now = time.monotonic()
+        if now - self._table_read_at < LOCAL_TABLE_TTL:
+            return
+        from django.core.cache import cache
+
+        try:
+            rows = cache.get(self._cache_key()) or []
+        except Exception:
+            rows = []
+        fields = Peer.__dataclass_fields__
+        self.table.replace([Peer(**{key: value for key, value in row.items() if key in fields}) for row in rows])
+        self._table_read_at = now
+
+    def _start_zeroconf(self):
+        try:
+            from zeroconf import ServiceBrowser, ServiceInfo, Zeroconf
+        except ImportError:
+            logger.warning("zeroconf not installed, mDNS peer discovery disabled")
+            self._unavailable = True
+            self._stop_event.set()
+            return
+
+        from django.conf import settings
+
+        from core.base.identity import get_instance_identity
+
+        identity = get_instance_identity()
+        extra = ['sync'] if getattr(settings, 'UNIBOS_SYNC_TOKEN', '') else []
+        properties = build_properties(identity, extra)
+        hostname = identity.identity.hostname.split('.')[0]
+
+        self._service_info = ServiceInfo(
+            self.service_type,
+            f"{hostname}-{identity.get_uuid()[:8]}.{self.service_type}",
+            port=self.port,
+            properties=properties,
+            server=f"{hostname}.local.",
+            parsed_addresses=[local_ip()],
+        )
+        self._zeroconf = Zeroconf()
+        self._zeroconf.register_service(self._service_info, allow_name_change=True)
+        ServiceBrowser(self._zeroconf, self.service_type, _Listener(self.table, own_uuid=identity.get_uuid()))
+        logger.info(f"📡 mDNS: advertising {self._service_info.name} on port {self.port}")
+
+    def _stop_zeroconf(self):
+        if self._zeroconf is None:
+            return
+        try:
+            if self._service_info is not None:
+                self._zeroconf.unregister_service(self._service_info)
+            self._zeroconf.close()
+        except Exception as e:
+            logger.debug(f"zeroconf shutdown failed: {e}")
+        self._zeroconf = None
+        self._service_info = None
+
+
+def get_discovery_service() -> PeerDiscoveryService:
+    return PeerDiscoveryService.get_instance()
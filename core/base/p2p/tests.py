@@ -0,0 +1,175 @@
+"""
+Tests for the mDNS peer table and discovery service
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from . import discovery
+from .discovery import MAX_PROBE_FAILURES, Peer, PeerDiscoveryService, PeerTable, _Listener, build_properties
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def service_info(uuid='node-a', name='a._unibos._tcp.local.', caps=b'gpu,django', modules=b'cctv'):
+    return SimpleNamespace(
+        name=name,
+        port=8000,
+        properties={b'uuid': uuid.encode(), b'host': b'edge-a', b'type': b'edge', b'caps': caps, b'modules': modules},
+        parsed_addresses=lambda: ['10.0.0.5'],
+    )
+
+
+def make_peer(uuid, latency_ms=None, capabilities=(), last_seen=1000.0):
+    return Peer(
+        uuid=uuid, name=f'{uuid}._unibos._tcp.local.', addresses=['10.0.0.1'], port=8000,
+        capabilities=list(capabilities), latency_ms=latency_ms, last_seen=last_seen,
+    )
+
+
+class PeerTests(SimpleTestCase):
+
+    def test_from_service_info_decodes_txt_record(self):
+        peer = Peer.from_service_info(service_info())
+        self.assertEqual(peer.uuid, 'node-a')
+        self.assertEqual(peer.hostname, 'edge-a')
+        self.assertEqual(peer.capabilities, ['gpu', 'django'])
+        self.assertEqual(peer.modules, ['cctv'])
+        self.assertEqual(peer.base_url, 'http://10.0.0.5:8000')
+
+    def test_announcement_without_uuid_is_ignored(self):
+        info = service_info()
+        del info.properties[b'uuid']
+        self.assertIsNone(Peer.from_service_info(info))
+
+    def test_ipv6_base_url_is_bracketed(self):
+        peer = make_peer('a')
+        peer.addresses = ['fe80::1']
+        self.assertEqual(peer.base_url, 'http://[fe80::1]:8000')
+
+    def test_build_properties_caps_long_module_lists(self):
+        capabilities = SimpleNamespace(has_gpu=True, can_run_django=True, available_modules=[f'module_{i}' for i in range(100)])
+        identity = SimpleNamespace(
+            get_uuid=lambda: 'node-a',
+            get_node_type=lambda: SimpleNamespace(value='edge'),
+            get_capabilities=lambda: capabilities,
+            identity=SimpleNamespace(hostname='edge-a'),
+        )
+        properties = build_properties(identity, extra_capabilities=['sync'])
+        self.assertEqual(properties['caps'], 'gpu,django,sync')
+        self.assertLessEqual(len(properties['modules'].encode('utf-8')), discovery.TXT_VALUE_LIMIT)
+        self.assertTrue(properties['modules'].startswith('module_0,module_1'))
+
+
+class PeerTableTests(SimpleTestCase):
+
+    def setUp(self):
+        self.table = PeerTable()
+
+    def test_latency_is_a_moving_average(self):
+        self.table.upsert(make_peer('a'))
+        self.table.record_probe('a', 10.0)
+        self.table.record_probe('a', 20.0)
+        expected = 10.0 + discovery.LATENCY_SMOOTHING * 10.0
+        self.assertAlmostEqual(self.table.peers()[0].latency_ms, expected)
+
+    def test_reannouncement_keeps_measured_latency(self):
+        self.table.upsert(make_peer('a'))
+        self.table.record_probe('a', 12.0)
+        self.table.upsert(make_peer('a'))
+        self.assertEqual(self.table.peers()[0].latency_ms, 12.0)
+
+    def test_peer_dropped_after_repeated_probe_failures(self):
+        self.table.upsert(make_peer('a'))
+        for _ in range(MAX_PROBE_FAILURES - 1):
+            self.table.record_probe('a', None)
+        self.assertEqual(len(self.table.peers()), 1)
+        self.table.record_probe('a', None)
+        self.assertEqual(self.table.peers(), [])
+
+    def test_successful_probe_resets_failures(self):
+        self.table.upsert(make_peer('a'))
+        for _ in range(MAX_PROBE_FAILURES - 1):
+            self.table.record_probe('a', None)
+        self.table.record_probe('a', 5.0)
+        self.table.record_probe('a', None)
+        self.assertEqual(len(self.table.peers()), 1)
+
+    def test_silent_peers_expire(self):
+        self.table.upsert(make_peer('old', last_seen=1000.0))
+        self.table.upsert(make_peer('new', last_seen=1170.0))
+        self.assertEqual(self.table.expire(ttl=60, now=1200.0), 1)
+        self.assertEqual([peer.uuid for peer in self.table.peers()], ['new'])
+
+    def test_goodbye_removes_peer_by_service_name(self):
+        self.table.upsert(make_peer('a'))
+        self.table.remove_service('a._unibos._tcp.local.')
+        self.assertEqual(self.table.peers(), [])
+
+    def test_peers_sorted_by_latency_and_filtered(self):
+        self.table.upsert(make_peer('slow', latency_ms=50.0, capabilities=['gpu']))
+        self.table.upsert(make_peer('unmeasured', capabilities=['gpu']))
+        self.table.upsert(make_peer('fast', latency_ms=5.0))
+        self.assertEqual([peer.uuid for peer in self.table.peers()], ['fast', 'slow', 'unmeasured'])
+        self.assertEqual([peer.uuid for peer in self.table.peers(capability='gpu')], ['slow', 'unmeasured'])
+
+
+class ListenerTests(SimpleTestCase):
+
+    def test_own_announcement_is_skipped(self):
+        table = PeerTable()
+        listener = _Listener(table, own_uuid='node-a')
+        zc = SimpleNamespace(get_service_info=lambda type_, name, timeout: service_info(uuid='node-a'))
+        listener.add_service(zc, '_unibos._tcp.local.', 'a._unibos._tcp.local.')
+        self.assertEqual(table.peers(), [])
+
+    def test_new_peer_is_probed_immediately(self):
+        table = PeerTable()
+        listener = _Listener(table)
+        zc = SimpleNamespace(get_service_info=lambda type_, name, timeout: service_info(uuid='node-b'))
+        with patch.object(discovery, 'measure_latency', return_value=3.0) as probe:
+            listener.add_service(zc, '_unibos._tcp.local.', 'b._unibos._tcp.local.')
+        probe.assert_called_once_with('10.0.0.5', 8000)
+        self.assertEqual(table.peers()[0].latency_ms, 3.0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, UNIBOS_P2P_PROBE_INTERVAL=15)
+class PeerDiscoveryServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(PeerDiscoveryService, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_process_holds_the_leader_lock(self):
+        leader, follower = PeerDiscoveryService(), PeerDiscoveryService()
+        self.assertTrue(leader._hold_leader_lock(cache))
+        self.assertFalse(follower._hold_leader_lock(cache))
+        # The leader keeps renewing its own lock
+        self.assertTrue(leader._hold_leader_lock(cache))
+
+    def test_follower_reads_table_published_by_leader(self):
+        leader, follower = PeerDiscoveryService(), PeerDiscoveryService()
+        leader._stop_event.wait = lambda timeout, event=leader._stop_event: event.set()
+        leader._zeroconf = object()  # Already advertising; skip the real zeroconf start
+        leader.table.upsert(make_peer('a', capabilities=['gpu'], last_seen=time.time()))
+
+        with patch.object(discovery, 'measure_latency', return_value=4.0):
+            leader._run()
+
+        peers = follower.get_peers(capability='gpu')
+        self.assertEqual([peer.uuid for peer in peers], ['a'])
+        self.assertEqual(peers[0].latency_ms, 4.0)
+
+    def test_best_peer_skips_unmeasured_peers(self):
+        service = PeerDiscoveryService()
+        service._is_leader = True
+        service.table.upsert(make_peer('unmeasured'))
+        self.assertIsNone(service.best_peer())
+        service.table.upsert(make_peer('measured', latency_ms=8.0))
+        self.assertEqual(service.best_peer().uuid, 'measured')
@@ -7,13 +7,23 @@ Scans modules/ directory for module.json files and provides:
 - Dependency resolution
 - Platform compatibility checking
 - Dynamic INSTALLED_APPS generation
+
+Scan results are persisted in a manifest (~/.cache/unibos/module_manifest.json)
+keyed by the mtimes of the modules directory, each module directory and its
+module.json. When none of them changed, the registry is built from the
+manifest without reading any module.json; enabling/disabling a module
+creates/removes its .enabled marker, which changes the directory mtime.
 """
 import json
+import os
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
+MANIFEST_PATH = Path.home() / '.cache' / 'unibos' / 'module_manifest.json'
+MANIFEST_VERSION = 1
+
 
 class ModuleStatus(Enum):
     """Module status"""
@@ -87,64 +97,121 @@ class ModuleRegistry:
     Discovers and manages modules in the modules/ directory.
     """
 
-    def __init__(self, modules_dir: Optional[Path] = None):
+    def __init__(self, modules_dir: Optional[Path] = None, manifest_path: Optional[Path] = MANIFEST_PATH):
         """
         Initialize module registry
 
         Args:
             modules_dir: Path to modules directory (default: GIT_ROOT/modules/)
+            manifest_path: Scan cache file (None: always scan)
         """
-        # Set modules directory
         if modules_dir is None:
-            # Try to find git root (for pipx installed packages)
-            import subprocess
-            import os
-
-            # First check UNIBOS_ROOT environment variable
-            unibos_root = os.environ.get('UNIBOS_ROOT')
-            if unibos_root:
-                modules_dir = Path(unibos_root) / 'modules'
-            else:
-                # Try git root
-                try:
-                    result = subprocess.run(
-                        ['git', 'rev-parse', '--show-toplevel'],
-                        cwd=Path.cwd(),
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        timeout=2
-                    )
-                    if result.returncode == 0:
-                        git_root = Path(result.stdout.strip())
-                        modules_dir = git_root / 'modules'
-                    else:
-                        # Fallback to relative path from __file__
-                        project_root = Path(__file__).parent.parent.parent
-                        modules_dir = project_root / 'modules'
-                except (FileNotFoundError, subprocess.TimeoutExpired):
-                    # Git not available, use relative path
-                    project_root = Path(__file__).parent.parent.parent
-                    modules_dir = project_root / 'modules'
+            modules_dir = self._default_modules_dir()
 
         self.modules_dir = Path(modules_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
         self.modules: Dict[str, ModuleInfo] = {}
 
-        # Discover modules
-        self._discover_modules()
+        # Discover modules (from the manifest when nothing changed)
+        if not self._load_manifest():
+            self._discover_modules()
+            self._save_manifest()
+
+    @staticmethod
+    def _default_modules_dir() -> Path:
+        """UNIBOS_ROOT/modules, else GIT_ROOT/modules (for pipx installed packages), else relative to this file"""
+        unibos_root = os.environ.get('UNIBOS_ROOT')
+        if unibos_root:
+            return Path(unibos_root) / 'modules'
+
+        # Same answer as `git rev-parse --show-toplevel`, without a subprocess
+        cwd = Path.cwd()
+        for directory in (cwd, *cwd.parents):
+            if (directory / '.git').exists():
+                return directory / 'modules'
+
+        project_root = Path(__file__).parent.parent.parent
+        return project_root / 'modules'
+
+    def _module_dirs(self) -> List[Path]:
+        return sorted(
+            module_dir for module_dir in self.modules_dir.iterdir()
+            if module_dir.is_dir() and not module_dir.name.startswith(('.', '_'))
+        )
+
+    def _signature(self) -> List:
+        """mtimes the scan result depends on (stat calls only, no file reads)"""
+        signature = [self.modules_dir.stat().st_mtime_ns]
+        for module_dir in self._module_dirs():
+            json_file = module_dir / 'module.json'
+            signature.append([
+                module_dir.name,
+                module_dir.stat().st_mtime_ns,
+                json_file.stat().st_mtime_ns if json_file.exists() else None,
+            ])
+        return signature
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+            return {}
+        return manifest
+
+    def _load_manifest(self) -> bool:
+        """Fill self.modules from the manifest; False if missing or stale"""
+        if self.manifest_path is None or not self.modules_dir.exists():
+            return False
+
+        entry = self._read_manifest().get('registries', {}).get(str(self.modules_dir.resolve()))
+        if not entry:
+            return False
+        try:
+            if entry.get('signature') != self._signature():
+                return False
+        except OSError:
+            return False
+
+        for cached in entry.get('modules', []):
+            module_dir = self.modules_dir / cached['dir']
+            module_info = self._build_module_info(
+                cached['data'], module_dir / 'module.json', module_dir, cached['enabled']
+            )
+            self.modules[module_info.id] = module_info
+        return True
+
+    def _save_manifest(self):
+        """Persist the current scan (best effort: the cache is optional)"""
+        if self.manifest_path is None or not self.modules_dir.exists():
+            return
+
+        try:
+            manifest = self._read_manifest()
+            registries = manifest.get('registries', {})
+            registries[str(self.modules_dir.resolve())] = {
+                'signature': self._signature(),
+                'modules': [
+                    {'dir': module.module_path.name, 'data': module.metadata, 'enabled': module.enabled}
+                    for module in self.modules.values()
+                ],
+            }
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'registries': registries}, f)
+            os.replace(temp_path, self.manifest_path)
+        except OSError:
+            pass
 
     def _discover_modules(self):
         """Discover all modules by scanning module.json files"""
         if not self.modules_dir.exists():
             return
 
-        for module_dir in self.modules_dir.iterdir():
-            if not module_dir.is_dir():
-                continue
-
-            if module_dir.name.startswith('.') or module_dir.name.startswith('_'):
-                continue
-
+        for module_dir in self._module_dirs():
             json_file = module_dir / 'module.json'
             if not json_file.exists():
                 continue
@@ -161,6 +228,13 @@ class ModuleRegistry:
         with open(json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
+        # Check if enabled (check for marker file)
+        enabled = (module_dir / '.enabled').exists()
+
+        return self._build_module_info(data, json_file, module_dir, enabled)
+
+    def _build_module_info(self, data: Dict, json_file: Path, module_dir: Path, enabled: bool) -> ModuleInfo:
+        """ModuleInfo from module.json content"""
         # Extract basic info
         module_id = data.get('id', module_dir.name)
         name = data.get('name', module_id)
@@ -178,10 +252,6 @@ class ModuleRegistry:
         # Platform requirements
         platforms = data.get('platforms', ['linux', 'macos', 'windows'])
 
-        # Check if enabled (check for marker file)
-        enabled_file = module_dir / '.enabled'
-        enabled = enabled_file.exists()
-
         # Determine status
         status = ModuleStatus.ENABLED if enabled else ModuleStatus.AVAILABLE
 
@@ -239,6 +309,7 @@ class ModuleRegistry:
         # Update status
         module.enabled = True
         module.status = ModuleStatus.ENABLED
+        self._save_manifest()
 
         return True
 
@@ -264,6 +335,7 @@ class ModuleRegistry:
         # Update status
         module.enabled = False
         module.status = ModuleStatus.AVAILABLE
+        self._save_manifest()
 
         return True
 
@@ -0,0 +1,8 @@
+"""
+UNIBOS Node Sync
+
+Change log based replication between nodes (central, server, edge):
+hybrid logical clocks order changes, peers exchange compressed delta batches
+from per-peer cursors, and apps declare which models sync and how conflicts
+resolve in their `sync.py` (see registry).
+"""
@@ -0,0 +1,22 @@
+"""
+Django Admin Configuration for Node Sync
+"""
+
+from django.contrib import admin
+
+from .models import ChangeLogEntry, SyncPeer
+
+
+@admin.register(SyncPeer)
+class SyncPeerAdmin(admin.ModelAdmin):
+    list_display = ['base_url', 'name', 'node_id', 'last_pulled_seq', 'last_pushed_seq', 'last_sync_at', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['base_url', 'name', 'node_id']
+    readonly_fields = ['node_id', 'last_sync_at', 'last_error', 'created_at', 'updated_at']
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'model_label', 'object_key', 'operation', 'origin', 'hlc', 'created_at']
+    list_filter = ['model_label', 'operation']
+    search_fields = ['object_key', 'origin']
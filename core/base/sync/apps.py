@@ -0,0 +1,18 @@
+"""
+Django App Configuration for Node Sync
+"""
+
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core.base.sync'
+    label = 'sync'
+    verbose_name = 'Node Sync'
+
+    def ready(self):
+        from . import capture, registry
+
+        registry.autodiscover()
+        capture.connect_signals()
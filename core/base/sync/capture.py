@@ -0,0 +1,128 @@
+"""
+Change Capture
+
+Writes ChangeLogEntry rows for local changes to registered models:
+
+- post_save/post_delete signals cover ordinary saves and deletes
+- record_changes() covers bulk_create/bulk_update/queryset.update paths,
+  which don't send signals
+
+Capture is muted while remote changes are applied (see applying_remote),
+because the apply step logs those itself with the origin's clock.
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save
+
+from .hlc import HybridLogicalClock
+from .models import ChangeLogEntry, ChangeOperation
+from .registry import get_spec_for_model, get_synced_specs
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+_clock = None
+_clock_lock = threading.Lock()
+
+
+def get_local_node_id() -> str:
+    """This node's sync id (UNIBOS_SYNC_NODE_ID, else the instance identity UUID)"""
+    node_id = getattr(settings, 'UNIBOS_SYNC_NODE_ID', None)
+    if node_id:
+        return str(node_id)
+    from core.base.identity import get_instance_identity
+    return str(get_instance_identity().get_uuid())
+
+
+def get_clock() -> HybridLogicalClock:
+    """Process-wide HLC, seeded from the newest logged timestamp so it never runs backwards"""
+    global _clock
+    with _clock_lock:
+        if _clock is None:
+            clock = HybridLogicalClock(
+                get_local_node_id(),
+                max_drift_ms=getattr(settings, 'UNIBOS_SYNC_MAX_DRIFT_SECONDS', 60) * 1000,
+            )
+            latest = ChangeLogEntry.objects.order_by('-hlc').values_list('hlc', flat=True).first()
+            clock.update(latest)
+            _clock = clock
+        return _clock
+
+
+def is_muted() -> bool:
+    return getattr(_state, 'muted', 0) > 0
+
+
+@contextmanager
+def applying_remote():
+    """Suppress capture while applying changes received from a peer"""
+    _state.muted = getattr(_state, 'muted', 0) + 1
+    try:
+        yield
+    finally:
+        _state.muted -= 1
+
+
+def object_key(spec, instance) -> str:
+    return str(getattr(instance, spec.key.attname))
+
+
+def serialize(spec, instance) -> dict:
+    """JSON-safe field values (foreign keys by raw id)"""
+    data = {field.attname: field.value_from_object(instance) for field in spec.sync_fields()}
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def build_entry(spec, instance, operation=ChangeOperation.UPSERT) -> ChangeLogEntry:
+    clock = get_clock()
+    return ChangeLogEntry(
+        hlc=clock.now(),
+        origin=clock.node_id,
+        model_label=spec.label,
+        object_key=object_key(spec, instance),
+        operation=operation,
+        data=serialize(spec, instance) if operation == ChangeOperation.UPSERT else None,
+    )
+
+
+def record_changes(model, instances, operation=ChangeOperation.UPSERT) -> int:
+    """
+    Log changes made without signals (bulk_create, bulk_update, queryset.update)
+
+    Returns:
+        Number of entries written (0 if the model doesn't sync on this node)
+    """
+    spec = get_spec_for_model(model)
+    if spec is None or is_muted():
+        return 0
+    entries = [build_entry(spec, instance, operation) for instance in instances]
+    ChangeLogEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw or is_muted():
+        return  # Fixture loading / remote apply
+    spec = get_spec_for_model(sender)
+    if spec is not None:
+        build_entry(spec, instance).save()
+
+
+def _on_delete(sender, instance, **kwargs):
+    if is_muted():
+        return
+    spec = get_spec_for_model(sender)
+    if spec is not None:
+        build_entry(spec, instance, ChangeOperation.DELETE).save()
+
+
+def connect_signals():
+    for spec in get_synced_specs():
+        post_save.connect(_on_save, sender=spec.model, dispatch_uid=f'sync-save-{spec.label}')
+        post_delete.connect(_on_delete, sender=spec.model, dispatch_uid=f'sync-delete-{spec.label}')
@@ -0,0 +1,356 @@
+"""
+Sync Engine
+
+Exchanges change log deltas with peers over HTTP:
+
+- Pull: GET {peer}/api/v1/sync/changes/?since=<cursor>; apply; store the
+  peer's next sequence number as the cursor
+- Push: POST our entries after the peer's cursor; advance it once accepted
+
+Cursors are saved after every batch, so an edge node that drops offline
+resumes from the last accepted batch instead of re-pulling everything.
+Batches are gzip-compressed JSON, exclude changes that originated on the
+receiving peer, and carry only the newest change per row; superseded
+entries are also removed from the log by compact_change_log(), so a node
+catching up after a long time offline receives each row once.
+"""
+
+import gzip
+import json
+import logging
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .capture import applying_remote, get_clock, get_local_node_id
+from .models import ChangeLogEntry, ChangeOperation, SyncPeer
+from .registry import get_spec
+
+logger = logging.getLogger(__name__)
+
+API_PATH = '/api/v1/sync/changes/'
+TOKEN_HEADER = 'X-Sync-Token'
+
+
+def get_batch_size():
+    return getattr(settings, 'UNIBOS_SYNC_BATCH_SIZE', 500)
+
+
+def encode_batch(payload) -> bytes:
+    return gzip.compress(json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8'))
+
+
+def get_max_batch_bytes():
+    return getattr(settings, 'UNIBOS_SYNC_MAX_BATCH_BYTES', 32 * 1024 * 1024)
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def decode_batch(body, encoding=None, max_bytes=None):
+    """Decode a (possibly gzip-compressed) batch, refusing to inflate it past max_bytes"""
+    max_bytes = max_bytes or get_max_batch_bytes()
+    if encoding == 'gzip' or body[:2] == b'\x1f\x8b':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        inflated = decompressor.decompress(body, max_bytes)
+        if not decompressor.eof:
+            if decompressor.unconsumed_tail or len(inflated) >= max_bytes:
+                raise BatchTooLarge(f'Decompressed batch exceeds {max_bytes} bytes')
+            raise ValueError('Truncated gzip body')
+        body = inflated
+    elif len(body) > max_bytes:
+        raise BatchTooLarge(f'Batch exceeds {max_bytes} bytes')
+    return json.loads(body.decode('utf-8'))
+
+
+def latest_per_row(changes):
+    """Keep only the newest change (by hlc) for each (model, key), in hlc order"""
+    latest = {}
+    for change in changes:
+        row = (change['model'], change['key'])
+        if row not in latest or change['hlc'] > latest[row]['hlc']:
+            latest[row] = change
+    return sorted(latest.values(), key=lambda change: change['hlc'])
+
+
+def changes_since(since=0, limit=None, exclude_origin=None):
+    """
+    One outgoing batch from the local change log
+
+    Returns:
+        dict with changes (wire format), next_seq (cursor to send next time)
+        and has_more. next_seq advances past skipped entries too.
+    """
+    limit = limit or get_batch_size()
+    entries = list(ChangeLogEntry.objects.filter(id__gt=since).order_by('id')[:limit])
+    changes = [
+        entry.to_wire() for entry in entries
+        if not (exclude_origin and entry.origin == exclude_origin) and get_spec(entry.model_label)
+    ]
+    return {
+        'changes': latest_per_row(changes),
+        'next_seq': entries[-1].id if entries else since,
+        'has_more': len(entries) == limit,
+    }
+
+
+def _local_versions(label, keys):
+    """{object_key: newest logged hlc} for rows of one model"""
+    return dict(
+        ChangeLogEntry.objects.filter(model_label=label, object_key__in=keys)
+        .values('object_key').annotate(latest=Max('hlc')).values_list('object_key', 'latest')
+    )
+
+
+def _should_apply(policy, change, local_hlc, local_obj):
+    if change['hlc'] == local_hlc:
+        return False  # Already have exactly this change
+    if callable(policy):
+        return bool(policy(local_obj, change))
+    if policy == 'remote_wins':
+        return True
+    if policy == 'local_wins':
+        return local_obj is None and change['op'] == ChangeOperation.UPSERT
+    return local_hlc is None or change['hlc'] > local_hlc
+
+
+def _build_instance(spec, obj, data):
+    for field in spec.sync_fields():
+        if field.attname in data:
+            setattr(obj, field.attname, field.to_python(data[field.attname]))
+    return obj
+
+
+def apply_changes(changes):
+    """
+    Apply a batch of remote changes under each model's conflict policy
+
+    Accepted changes are logged with their original hlc/origin (for relaying);
+    rejected ones are dropped.
+
+    Returns:
+        dict with applied and skipped counts
+    """
+    clock = get_clock()
+    for change in changes:
+        if not clock.update(change['hlc']):
+            logger.warning(f"⚠️ Remote clock from {change['origin']} is too far ahead; not merged")
+
+    by_model = defaultdict(list)
+    skipped = 0
+    for change in latest_per_row(changes):
+        if get_spec(change['model']) is None:
+            skipped += 1  # Not synced on this node
+        else:
+            by_model[change['model']].append(change)
+
+    applied = 0
+    with transaction.atomic(), applying_remote():
+        for label, model_changes in by_model.items():
+            spec = get_spec(label)
+            policy = spec.get_policy()
+            manager = spec.model._default_manager
+            key_name = spec.key.name
+            keys = [change['key'] for change in model_changes]
+            versions = _local_versions(label, keys)
+            existing = {str(key): obj for key, obj in manager.in_bulk(keys, field_name=key_name).items()}
+
+            to_create, to_update, to_delete, accepted = [], [], [], []
+            for change in model_changes:
+                local_obj = existing.get(change['key'])
+                if not _should_apply(policy, change, versions.get(change['key']), local_obj):
+                    skipped += 1
+                    continue
+                accepted.append(change)
+                if change['op'] == ChangeOperation.DELETE:
+                    if local_obj is not None:
+                        to_delete.append(change['key'])
+                elif local_obj is None:
+                    obj = _build_instance(spec, spec.model(), change['data'] or {})
+                    setattr(obj, spec.key.attname, spec.key.to_python(change['key']))
+                    to_create.append(obj)
+                else:
+                    to_update.append(_build_instance(spec, local_obj, change['data'] or {}))
+
+            batch_size = get_batch_size()
+            if to_delete:
+                manager.filter(**{f'{key_name}__in': to_delete}).delete()
+            if to_create:
+                manager.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+            if to_update:
+                update_fields = [field.name for field in spec.sync_fields() if not field.primary_key]
+                manager.bulk_update(to_update, update_fields, batch_size=batch_size)
+
+            ChangeLogEntry.objects.bulk_create([
+                ChangeLogEntry(
+                    hlc=change['hlc'],
+                    origin=change['origin'],
+                    model_label=label,
+                    object_key=change['key'],
+                    operation=change['op'],
+                    data=change['data'],
+                ) for change in accepted
+            ], batch_size=batch_size)
+            applied += len(accepted)
+
+    return {'applied': applied, 'skipped': skipped}
+
+
+class SyncEngine:
+    """
+    Pull/push loop against SyncPeer rows
+
+    Args:
+        session: requests.Session (keep-alive); created on first use
+    """
+
+    def __init__(self, session=None):
+        self.node_id = get_local_node_id()
+        self.token = getattr(settings, 'UNIBOS_SYNC_TOKEN', '')
+        self.timeout = getattr(settings, 'UNIBOS_SYNC_TIMEOUT_SECONDS', 30)
+        self.max_batches = getattr(settings, 'UNIBOS_SYNC_MAX_BATCHES_PER_RUN', 100)
+        self._session = session
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def _headers(self):
+        return {
+            TOKEN_HEADER: self.token,
+            'X-Sync-Node': self.node_id,
+            'Accept-Encoding': 'gzip',
+        }
+
+    def _url(self, peer):
+        return f"{peer.base_url.rstrip('/')}{API_PATH}"
+
+    def _learn_node_id(self, peer, node_id):
+        if node_id and peer.node_id != node_id:
+            peer.node_id = node_id
+            SyncPeer.objects.filter(pk=peer.pk).update(node_id=node_id)
+
+    def pull(self, peer) -> dict:
+        """Apply the peer's changes after our cursor, batch by batch"""
+        stats = {'batches': 0, 'applied': 0, 'skipped': 0}
+        for _ in range(self.max_batches):
+            response = self.session.get(
+                self._url(peer),
+                params={'since': peer.last_pulled_seq, 'limit': get_batch_size()},
+                headers=self._headers(),
+                timeout=self.timeout,
+                stream=True,
+            )
+            with response:
+                response.raise_for_status()
+                # Read the raw body so decode_batch applies the decompression cap
+                body = response.raw.read(get_max_batch_bytes() + 1, decode_content=False)
+            batch = decode_batch(body, response.headers.get('Content-Encoding'))
+            self._learn_node_id(peer, batch.get('node_id'))
+
+            result = apply_changes(batch['changes'])
+            peer.last_pulled_seq = batch['next_seq']
+            SyncPeer.objects.filter(pk=peer.pk).update(last_pulled_seq=peer.last_pulled_seq)
+
+            stats['batches'] += 1
+            stats['applied'] += result['applied']
+            stats['skipped'] += result['skipped']
+            if not batch.get('has_more'):
+                break
+        return stats
+
+    def push(self, peer) -> dict:
+        """Send our changes after the peer's cursor, batch by batch"""
+        stats = {'batches': 0, 'applied': 0, 'skipped': 0}
+        for _ in range(self.max_batches):
+            batch = changes_since(peer.last_pushed_seq, exclude_origin=peer.node_id or None)
+            if batch['next_seq'] == peer.last_pushed_seq:
+                break  # Nothing new
+
+            if batch['changes']:
+                response = self.session.post(
+                    self._url(peer),
+                    data=encode_batch({'node_id': self.node_id, 'changes': batch['changes']}),
+                    headers={**self._headers(), 'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                result = response.json()
+                self._learn_node_id(peer, result.get('node_id'))
+                stats['applied'] += result.get('applied', 0)
+                stats['skipped'] += result.get('skipped', 0)
+
+            peer.last_pushed_seq = batch['next_seq']
+            SyncPeer.objects.filter(pk=peer.pk).update(last_pushed_seq=peer.last_pushed_seq)
+            stats['batches'] += 1
+            if not batch['has_more']:
+                break
+        return stats
+
+    def sync_peer(self, peer, pull=True, push=True) -> dict:
+        """Pull then push; records last_sync_at/last_error on the peer"""
+        import requests
+
+        result = {'peer': str(peer)}
+        try:
+            if pull:
+                result['pull'] = self.pull(peer)
+            if push:
+                result['push'] = self.push(peer)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            # Offline or bad response: cursors already hold the last good batch
+            logger.warning(f"⚠️ Sync with {peer} stopped: {e}")
+            SyncPeer.objects.filter(pk=peer.pk).update(last_error=str(e)[:1000])
+            result['error'] = str(e)
+            return result
+
+        SyncPeer.objects.filter(pk=peer.pk).update(last_sync_at=timezone.now(), last_error='')
+        return result
+
+    def sync_all(self, due_only=False) -> list:
+        """Sync every active peer (only those past UNIBOS_SYNC_INTERVAL if due_only)"""
+        peers = SyncPeer.objects.filter(is_active=True)
+        if due_only:
+            interval = getattr(settings, 'UNIBOS_SYNC_INTERVAL', 300)
+            cutoff = timezone.now() - timedelta(seconds=interval)
+            peers = [peer for peer in peers if peer.last_sync_at is None or peer.last_sync_at <= cutoff]
+        return [self.sync_peer(peer) for peer in peers]
+
+
+def ensure_configured_peers():
+    """Create SyncPeer rows for URLs listed in UNIBOS_SYNC_PEERS"""
+    for url in getattr(settings, 'UNIBOS_SYNC_PEERS', []):
+        SyncPeer.objects.get_or_create(base_url=url.rstrip('/'))
+
+
+def compact_change_log(now=None):
+    """
+    Drop superseded entries and expired tombstones
+
+    Safe for every cursor: a peer behind a dropped entry still receives the
+    newer entry for the same row, which has a higher sequence number.
+
+    Returns:
+        dict with superseded and tombstones deleted
+    """
+    now = now or timezone.now()
+    newer = ChangeLogEntry.objects.filter(
+        model_label=OuterRef('model_label'), object_key=OuterRef('object_key'), id__gt=OuterRef('id')
+    )
+    superseded = ChangeLogEntry.objects.filter(Exists(newer)).delete()[0]
+
+    retention = getattr(settings, 'UNIBOS_SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+    tombstones = ChangeLogEntry.objects.filter(
+        operation=ChangeOperation.DELETE, created_at__lt=now - timedelta(days=retention)
+    ).delete()[0]
+    return {'superseded': superseded, 'tombstones': tombstones}
@@ -0,0 +1,84 @@
+"""
+Hybrid Logical Clock
+
+Timestamps are strings that sort in causal order:
+
+    <wall clock ms, 13 digits>.<logical counter, 5 digits>.<node id>
+
+The wall part follows physical time, the counter orders events within one
+millisecond (or while another node's clock is ahead), and the node id breaks
+ties, so two nodes never produce the same timestamp. Comparing two HLC
+strings with < is enough for last-writer-wins.
+"""
+
+import threading
+import time
+from typing import NamedTuple, Optional
+
+
+class Timestamp(NamedTuple):
+    wall_ms: int
+    counter: int
+    node: str
+
+    def __str__(self):
+        return f"{self.wall_ms:013d}.{self.counter:05d}.{self.node}"
+
+
+def parse(value: str) -> Timestamp:
+    """Timestamp from its string form"""
+    wall, counter, node = value.split('.', 2)
+    return Timestamp(int(wall), int(counter), node)
+
+
+def _physical_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class HybridLogicalClock:
+    """
+    Thread-safe HLC for one node
+
+    Args:
+        node_id: Identifier appended to every timestamp (tie-breaker)
+        max_drift_ms: Remote clocks further ahead than this are not merged
+        physical_ms: Wall clock source (injectable for tests)
+    """
+
+    def __init__(self, node_id: str, max_drift_ms: int = 60_000, physical_ms=_physical_ms):
+        self.node_id = node_id
+        self.max_drift_ms = max_drift_ms
+        self._physical_ms = physical_ms
+        self._wall_ms = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def now(self) -> str:
+        """Timestamp for a local event"""
+        with self._lock:
+            physical = self._physical_ms()
+            if physical > self._wall_ms:
+                self._wall_ms, self._counter = physical, 0
+            else:
+                self._counter += 1
+            return str(Timestamp(self._wall_ms, self._counter, self.node_id))
+
+    def update(self, remote: Optional[str]) -> bool:
+        """
+        Merge a timestamp seen from another node (or read back from storage)
+
+        Returns:
+            False if the remote clock is too far ahead and was ignored
+        """
+        if not remote:
+            return True
+        remote_ts = parse(remote)
+        with self._lock:
+            physical = self._physical_ms()
+            if remote_ts.wall_ms - physical > self.max_drift_ms:
+                return False
+            if remote_ts.wall_ms > self._wall_ms:
+                self._wall_ms, self._counter = remote_ts.wall_ms, remote_ts.counter
+            elif remote_ts.wall_ms == self._wall_ms:
+                self._counter = max(self._counter, remote_ts.counter)
+            return True
@@ -0,0 +1,63 @@
+"""
+Management command to sync with peers immediately
+Also the easiest way to try sync between two local instances:
+
+    UNIBOS_SYNC_TOKEN=dev ./manage.py runserver 8001   # instance B
+    UNIBOS_SYNC_TOKEN=dev ./manage.py sync_now --peer http://127.0.0.1:8001
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.base.sync.engine import SyncEngine, ensure_configured_peers
+from core.base.sync.models import SyncPeer
+
+
+class Command(BaseCommand):
+    help = 'Pull and push change log deltas with sync peers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--peer',
+            type=str,
+            help='Peer base URL (added as a peer if unknown; default: all active peers)'
+        )
+        parser.add_argument('--pull-only', action='store_true', help='Only pull changes')
+        parser.add_argument('--push-only', action='store_true', help='Only push changes')
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the peer cursors first (full re-sync)'
+        )
+
+    def handle(self, *args, **options):
+        if options['pull_only'] and options['push_only']:
+            raise CommandError('--pull-only and --push-only are mutually exclusive')
+
+        ensure_configured_peers()
+        if options['peer']:
+            peer, _ = SyncPeer.objects.get_or_create(base_url=options['peer'].rstrip('/'))
+            peers = [peer]
+        else:
+            peers = list(SyncPeer.objects.filter(is_active=True))
+        if not peers:
+            raise CommandError('No sync peers configured (use --peer or UNIBOS_SYNC_PEERS)')
+
+        engine = SyncEngine()
+        for peer in peers:
+            if options['reset']:
+                peer.last_pulled_seq = peer.last_pushed_seq = 0
+                peer.save(update_fields=['last_pulled_seq', 'last_pushed_seq'])
+
+            self.stdout.write(f'🔄 Syncing with {peer}...')
+            result = engine.sync_peer(peer, pull=not options['push_only'], push=not options['pull_only'])
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f"❌ {result['error']}"))
+                continue
+            for direction in ('pull', 'push'):
+                if direction in result:
+                    stats = result[direction]
+                    self.stdout.write(
+                        f"   {direction}: {stats['batches']} batches, "
+                        f"{stats['applied']} applied, {stats['skipped']} skipped"
+                    )
+            self.stdout.write(self.style.SUCCESS(f'✅ {peer} in sync'))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncPeer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('base_url', models.URLField(unique=True)),
+                ('node_id', models.CharField(blank=True, db_index=True, help_text='Learned on first exchange', max_length=64)),
+                ('last_pulled_seq', models.BigIntegerField(default=0)),
+                ('last_pushed_seq', models.BigIntegerField(default=0)),
+                ('last_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sync_peers',
+                'ordering': ['name', 'base_url'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hlc', models.CharField(db_index=True, max_length=100)),
+                ('origin', models.CharField(help_text='Node id where the change was made', max_length=64)),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_key', models.CharField(max_length=255)),
+                ('operation', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], default='upsert', max_length=10)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'sync_change_log',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['model_label', 'object_key'], name='sync_change_model_l_ba125d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+"""
+Sync Models
+
+ChangeLogEntry is the per-node change log: one row per accepted change to a
+synced model, ordered by a local sequence number (the id) that peers use as
+their cursor, and stamped with the hybrid logical clock of the node where the
+change originated. SyncPeer stores the cursors for each peer in both
+directions, so an interrupted sync resumes where it stopped.
+"""
+
+from django.db import models
+
+
+class ChangeOperation(models.TextChoices):
+    UPSERT = 'upsert', 'Upsert'
+    DELETE = 'delete', 'Delete'
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One change to a synced row
+
+    The id is the local sequence number; hlc orders changes across nodes.
+    Remote changes applied here are logged with their original hlc/origin so
+    they can be relayed to further peers.
+    """
+    id = models.BigAutoField(primary_key=True)
+    hlc = models.CharField(max_length=100, db_index=True)
+    origin = models.CharField(max_length=64, help_text="Node id where the change was made")
+    model_label = models.CharField(max_length=100)
+    object_key = models.CharField(max_length=255)
+    operation = models.CharField(max_length=10, choices=ChangeOperation.choices, default=ChangeOperation.UPSERT)
+    data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sync_change_log'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['model_label', 'object_key']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.operation} {self.model_label}:{self.object_key} @ {self.hlc}"
+
+    def to_wire(self):
+        return {
+            'seq': self.id,
+            'hlc': self.hlc,
+            'origin': self.origin,
+            'model': self.model_label,
+            'key': self.object_key,
+            'op': self.operation,
+            'data': self.data,
+        }
+
+
+class SyncPeer(models.Model):
+    """
+    A node this node exchanges changes with
+
+    last_pulled_seq is the peer's sequence number we have applied up to;
+    last_pushed_seq is our own sequence number the peer has accepted up to.
+    """
+    name = models.CharField(max_length=255, blank=True)
+    base_url = models.URLField(unique=True)
+    node_id = models.CharField(max_length=64, blank=True, db_index=True, help_text="Learned on first exchange")
+
+    last_pulled_seq = models.BigIntegerField(default=0)
+    last_pushed_seq = models.BigIntegerField(default=0)
+    last_sync_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sync_peers'
+        ordering = ['name', 'base_url']
+
+    def __str__(self):
+        return self.name or self.base_url
@@ -0,0 +1,148 @@
+"""
+Sync Model Registry
+
+Apps opt models into node-to-node sync from a `sync.py` module next to their
+models, discovered when the sync app loads:
+
+    # modules/currencies/backend/sync.py
+    from core.base.sync.registry import register
+    from .models import BankExchangeRate
+
+    CONFLICT_POLICY = 'lww'  # Default for every model registered here
+
+    register(BankExchangeRate, key_field='entry_id')
+
+Conflict policies:
+    'lww'          Last writer wins by hybrid logical clock (default)
+    'remote_wins'  Incoming changes always overwrite local rows
+    'local_wins'   Incoming changes only create rows that don't exist locally
+    callable       resolver(local_obj_or_None, change) -> True to apply
+
+Apps listed in UNIBOS_LOCAL_ONLY_MODULES never sync; if
+UNIBOS_SYNC_ALLOWED_MODULES is set, only those apps do.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Callable, Dict, List, Optional, Union
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('lww', 'remote_wins', 'local_wins')
+DEFAULT_POLICY = 'lww'
+
+Policy = Union[str, Callable]
+
+
+@dataclass
+class SyncSpec:
+    """How one model is synced"""
+    model: type
+    key_field: str = 'pk'
+    fields: Optional[List[str]] = None
+    exclude: List[str] = field(default_factory=list)
+    policy: Optional[Policy] = None
+
+    @property
+    def label(self) -> str:
+        return self.model._meta.label
+
+    @property
+    def app_label(self) -> str:
+        return self.model._meta.app_label
+
+    @property
+    def key(self):
+        """Model field holding the natural key"""
+        if self.key_field == 'pk':
+            return self.model._meta.pk
+        return self.model._meta.get_field(self.key_field)
+
+    def sync_fields(self):
+        """Concrete fields carried in change payloads (the pk only when it is the key)"""
+        key = self.key
+        pk = self.model._meta.pk
+        result = []
+        for model_field in self.model._meta.concrete_fields:
+            if model_field.name in self.exclude:
+                continue
+            if self.fields is not None and model_field.name not in self.fields and model_field is not key:
+                continue
+            if model_field is pk and key is not pk:
+                continue  # Surrogate ids differ between nodes
+            result.append(model_field)
+        return result
+
+    def get_policy(self) -> Policy:
+        return self.policy or _app_policies.get(self.app_label) or DEFAULT_POLICY
+
+
+_registry: Dict[str, SyncSpec] = {}
+_app_policies: Dict[str, Policy] = {}
+
+
+def register(model, key_field='pk', fields=None, exclude=None, policy=None) -> SyncSpec:
+    """
+    Register a model for sync
+
+    Args:
+        key_field: Unique field identifying a row on every node (default: pk)
+        fields: Field names to sync (default: all concrete fields)
+        exclude: Field names never synced
+        policy: Conflict policy; defaults to the app's CONFLICT_POLICY, then 'lww'
+    """
+    if isinstance(policy, str) and policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy '{policy}' for {model._meta.label}")
+
+    spec = SyncSpec(model=model, key_field=key_field, fields=fields, exclude=list(exclude or []), policy=policy)
+    key = spec.key
+    if not (key.primary_key or key.unique):
+        raise ValueError(f"{model._meta.label}.{key.name} must be unique to be used as a sync key")
+
+    _registry[spec.label] = spec
+    return spec
+
+
+def is_app_synced(app_label) -> bool:
+    if app_label in getattr(settings, 'UNIBOS_LOCAL_ONLY_MODULES', []):
+        return False
+    allowed = getattr(settings, 'UNIBOS_SYNC_ALLOWED_MODULES', None)
+    return allowed is None or app_label in allowed
+
+
+def get_spec(label) -> Optional[SyncSpec]:
+    """Spec for a model label ('app_label.ModelName') if it syncs on this node"""
+    spec = _registry.get(label)
+    if spec is None or not is_app_synced(spec.app_label):
+        return None
+    return spec
+
+
+def get_spec_for_model(model) -> Optional[SyncSpec]:
+    return get_spec(model._meta.label)
+
+
+def get_synced_specs() -> List[SyncSpec]:
+    return [spec for spec in _registry.values() if is_app_synced(spec.app_label)]
+
+
+def autodiscover():
+    """Import `sync` from every installed app and record its CONFLICT_POLICY"""
+    for app_config in apps.get_app_configs():
+        module_name = f'{app_config.name}.sync'
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError as e:
+            if e.name != module_name:
+                raise
+            continue
+        policy = getattr(module, 'CONFLICT_POLICY', None)
+        if policy is not None:
+            if isinstance(policy, str) and policy not in POLICIES:
+                raise ValueError(f"Unknown conflict policy '{policy}' in {module_name}")
+            _app_policies[app_config.label] = policy
+        logger.debug(f"sync models registered from {module_name}")
@@ -0,0 +1,60 @@
+"""
+Celery Tasks for Node Sync
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SYNC_LOCK_KEY = 'sync:peers:lock'
+
+
+@shared_task(bind=True, max_retries=0)
+def sync_with_peers(self):
+    """
+    Exchange change log deltas with every peer that is due.
+
+    Runs every minute via Celery Beat; each peer is synced at most once per
+    UNIBOS_SYNC_INTERVAL. Does nothing unless UNIBOS_SYNC_ENABLED.
+    """
+    if not getattr(settings, 'UNIBOS_SYNC_ENABLED', False):
+        return {'status': 'disabled'}
+
+    from .engine import SyncEngine, ensure_configured_peers
+
+    # A slow peer must not lead to overlapping runs
+    if not cache.add(SYNC_LOCK_KEY, True, getattr(settings, 'UNIBOS_SYNC_INTERVAL', 300)):
+        return {'status': 'already_running'}
+    try:
+        ensure_configured_peers()
+        results = SyncEngine().sync_all(due_only=True)
+    finally:
+        cache.delete(SYNC_LOCK_KEY)
+
+    failed = [result for result in results if 'error' in result]
+    if results:
+        logger.info(f"🔄 Synced with {len(results) - len(failed)}/{len(results)} peers")
+    return {'status': 'success', 'peers': len(results), 'failed': len(failed)}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def compact_change_log(self):
+    """
+    Remove superseded change log entries and expired tombstones.
+
+    Runs daily via Celery Beat.
+    """
+    from .engine import compact_change_log as compact
+
+    try:
+        deleted = compact()
+        logger.info(f"Change log compacted: {deleted}")
+        return {'status': 'success', **deleted}
+
+    except Exception as e:
+        logger.error(f"Error compacting change log: {e}")
+        raise self.retry(exc=e)
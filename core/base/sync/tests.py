@@ -0,0 +1,132 @@
+"""
+Tests for node sync: clock ordering, change capture and conflict policies
+"""
+
+import gzip
+
+from django.test import SimpleTestCase, TestCase
+
+from core.base.modules_core.models import ItemCategory
+
+from . import capture, registry
+from .engine import BatchTooLarge, apply_changes, changes_since, compact_change_log, decode_batch, encode_batch, latest_per_row
+from .hlc import HybridLogicalClock, parse
+from .models import ChangeLogEntry
+
+
+class HybridLogicalClockTests(SimpleTestCase):
+
+    def test_timestamps_increase_within_one_millisecond(self):
+        clock = HybridLogicalClock('a', physical_ms=lambda: 1000)
+        first, second = clock.now(), clock.now()
+        self.assertLess(first, second)
+        self.assertEqual(parse(second).counter, 1)
+
+    def test_update_moves_past_a_remote_clock_that_is_ahead(self):
+        clock = HybridLogicalClock('a', physical_ms=lambda: 1000)
+        remote = HybridLogicalClock('b', physical_ms=lambda: 5000).now()
+        clock.update(remote)
+        self.assertGreater(clock.now(), remote)
+
+    def test_update_ignores_clocks_beyond_max_drift(self):
+        clock = HybridLogicalClock('a', max_drift_ms=100, physical_ms=lambda: 1000)
+        remote = HybridLogicalClock('b', physical_ms=lambda: 5000).now()
+        self.assertFalse(clock.update(remote))
+        self.assertLess(clock.now(), remote)
+
+    def test_latest_per_row_keeps_newest_change(self):
+        changes = [
+            {'model': 'm', 'key': '1', 'hlc': '0000000001000.00000.a'},
+            {'model': 'm', 'key': '1', 'hlc': '0000000002000.00000.b'},
+            {'model': 'm', 'key': '2', 'hlc': '0000000001500.00000.a'},
+        ]
+        self.assertEqual(
+            [change['hlc'] for change in latest_per_row(changes)],
+            ['0000000001500.00000.a', '0000000002000.00000.b'],
+        )
+
+
+class SyncApplyTests(TestCase):
+
+    def setUp(self):
+        self.spec = registry.register(ItemCategory, key_field='slug', fields=['name', 'slug', 'description'])
+        capture.connect_signals()
+        self.addCleanup(registry._registry.pop, self.spec.label)
+
+    def remote_change(self, slug, name, hlc, op='upsert'):
+        return {
+            'seq': 1, 'hlc': hlc, 'origin': 'remote-node', 'model': self.spec.label, 'key': slug, 'op': op,
+            'data': {'name': name, 'slug': slug, 'description': ''} if op == 'upsert' else None,
+        }
+
+    def test_local_save_is_captured(self):
+        ItemCategory.objects.create(name='Fruit', slug='fruit')
+        batch = changes_since(0)
+        self.assertEqual(len(batch['changes']), 1)
+        self.assertEqual(batch['changes'][0]['key'], 'fruit')
+        self.assertEqual(batch['changes'][0]['data']['name'], 'Fruit')
+        self.assertNotIn('id', batch['changes'][0]['data'])
+
+    def test_changes_from_the_requesting_peer_are_not_sent_back(self):
+        apply_changes([self.remote_change('veg', 'Vegetables', capture.get_clock().now())])
+        batch = changes_since(0, exclude_origin='remote-node')
+        self.assertEqual(batch['changes'], [])
+        self.assertEqual(batch['next_seq'], ChangeLogEntry.objects.latest('id').id)
+
+    def test_last_writer_wins(self):
+        ItemCategory.objects.create(name='Local', slug='fruit')
+        older = '0000000000001.00000.remote-node'
+        result = apply_changes([self.remote_change('fruit', 'Stale', older)])
+        self.assertEqual(result, {'applied': 0, 'skipped': 1})
+        self.assertEqual(ItemCategory.objects.get(slug='fruit').name, 'Local')
+
+        newer = capture.get_clock().now()
+        apply_changes([self.remote_change('fruit', 'Remote', newer)])
+        self.assertEqual(ItemCategory.objects.get(slug='fruit').name, 'Remote')
+
+    def test_apply_is_idempotent_and_not_recaptured(self):
+        change = self.remote_change('veg', 'Vegetables', capture.get_clock().now())
+        apply_changes([change])
+        self.assertEqual(apply_changes([change]), {'applied': 0, 'skipped': 1})
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
+        self.assertEqual(ChangeLogEntry.objects.get().origin, 'remote-node')
+
+    def test_local_wins_only_creates_missing_rows(self):
+        self.spec.policy = 'local_wins'
+        ItemCategory.objects.create(name='Local', slug='fruit')
+        newer = capture.get_clock().now()
+        apply_changes([self.remote_change('fruit', 'Remote', newer), self.remote_change('veg', 'Veg', newer)])
+        self.assertEqual(ItemCategory.objects.get(slug='fruit').name, 'Local')
+        self.assertTrue(ItemCategory.objects.filter(slug='veg').exists())
+
+    def test_remote_delete(self):
+        ItemCategory.objects.create(name='Fruit', slug='fruit')
+        apply_changes([self.remote_change('fruit', None, capture.get_clock().now(), op='delete')])
+        self.assertFalse(ItemCategory.objects.filter(slug='fruit').exists())
+
+    def test_compaction_keeps_latest_entry_per_row(self):
+        category = ItemCategory.objects.create(name='Fruit', slug='fruit')
+        category.name = 'Fruits'
+        category.save()
+        self.assertEqual(compact_change_log()['superseded'], 1)
+        self.assertEqual(ChangeLogEntry.objects.get().data['name'], 'Fruits')
+
+
+class DecodeBatchTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        payload = {'node_id': 'n1', 'changes': [{'model': 'x', 'key': '1'}]}
+        self.assertEqual(decode_batch(encode_batch(payload), 'gzip'), payload)
+
+    def test_plain_json_is_accepted(self):
+        self.assertEqual(decode_batch(b'{"changes": []}'), {'changes': []})
+
+    def test_gzip_bomb_is_refused(self):
+        bomb = gzip.compress(b' ' * (8 * 1024 * 1024))
+        with self.assertRaises(BatchTooLarge):
+            decode_batch(bomb, 'gzip', max_bytes=64 * 1024)
+
+    def test_oversized_plain_body_is_refused(self):
+        with self.assertRaises(BatchTooLarge):
+            decode_batch(b' ' * 2048, max_bytes=1024)
+
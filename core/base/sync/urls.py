@@ -0,0 +1,14 @@
+"""
+URL Configuration for Node Sync API
+"""
+
+from django.urls import path
+
+from .views import ChangesView, StatusView
+
+app_name = 'sync'
+
+urlpatterns = [
+    path('changes/', ChangesView.as_view(), name='changes'),
+    path('status/', StatusView.as_view(), name='status'),
+]
@@ -0,0 +1,91 @@
+"""
+Sync API
+
+GET  /api/v1/sync/changes/?since=<seq>&limit=<n>   outgoing delta batch (gzip)
+POST /api/v1/sync/changes/                         apply an incoming batch (gzip body)
+GET  /api/v1/sync/status/                          node id, latest sequence, clock
+
+Peers authenticate with a shared UNIBOS_SYNC_TOKEN in the X-Sync-Token header
+and identify themselves with X-Sync-Node, so their own changes are not sent
+back to them.
+"""
+
+import hmac
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .capture import get_clock, get_local_node_id
+from .engine import BatchTooLarge, apply_changes, changes_since, decode_batch, encode_batch, get_batch_size
+from .models import ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+
+class HasSyncToken(BasePermission):
+    """Shared-secret check; sync is closed while UNIBOS_SYNC_TOKEN is empty"""
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, 'UNIBOS_SYNC_TOKEN', '')
+        provided = request.META.get('HTTP_X_SYNC_TOKEN', '')
+        return bool(expected) and hmac.compare_digest(provided.encode(), expected.encode())
+
+
+class SyncAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [HasSyncToken]
+
+
+class ChangesView(SyncAPIView):
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', get_batch_size())), get_batch_size())
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = changes_since(since, limit=max(limit, 1), exclude_origin=request.META.get('HTTP_X_SYNC_NODE'))
+        payload = {'node_id': get_local_node_id(), 'hlc': get_clock().now(), **batch}
+
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(encode_batch(payload), content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+            return response
+        return Response(payload)
+
+    def post(self, request):
+        try:
+            payload = decode_batch(request.body, request.META.get('HTTP_CONTENT_ENCODING'))
+            changes = payload['changes']
+        except BatchTooLarge:
+            return Response({'error': 'Change batch too large'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except (zlib.error, ValueError, KeyError, TypeError):
+            return Response({'error': 'Invalid change batch'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = apply_changes(changes)
+        except (KeyError, TypeError, ValueError, ValidationError) as e:
+            logger.warning(f"⚠️ Rejected sync batch from {payload.get('node_id')}: {e}")
+            return Response({'error': f'Invalid change: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"🔄 Sync batch from {payload.get('node_id')}: {result['applied']} applied, {result['skipped']} skipped")
+        return Response({'node_id': get_local_node_id(), **result})
+
+
+class StatusView(SyncAPIView):
+
+    def get(self, request):
+        return Response({
+            'node_id': get_local_node_id(),
+            'latest_seq': ChangeLogEntry.objects.aggregate(latest=Max('id'))['latest'] or 0,
+            'hlc': get_clock().now(),
+        })
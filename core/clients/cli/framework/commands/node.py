@@ -128,15 +128,44 @@ def node_register(central_url, token):
 
 
 @node_group.command(name='peers')
-def node_peers():
+@click.option('--timeout', default=2.0, show_default=True, help='Seconds to listen for announcements')
+@click.option('--capability', help='Only peers with this capability (gpu, camera, celery, ...)')
+@click.option('--json', 'output_json', is_flag=True, help='Output as JSON')
+def node_peers(timeout, capability, output_json):
     """List known peer nodes
 
-    Shows other UNIBOS nodes on the local network (via mDNS discovery).
+    Shows other UNIBOS nodes on the local network (via mDNS discovery),
+    fastest first.
 
     Examples:
         unibos node peers
+        unibos node peers --capability gpu
     """
-    # TODO: Implement mDNS discovery with zeroconf
-    click.echo("🔍 Discovering peer nodes on local network...")
-    click.echo("\n⚠️  Peer discovery not yet implemented")
-    click.echo("   Coming in Phase 3: P2P Network Foundation\n")
+    from core.base.p2p.discovery import browse_peers
+
+    if not output_json:
+        click.echo("🔍 Discovering peer nodes on local network...")
+    try:
+        peers = browse_peers(timeout=timeout)
+    except ImportError:
+        click.echo("❌ zeroconf is not installed (pip install zeroconf)", err=True)
+        raise click.Abort()
+
+    own_uuid = get_instance_identity().get_uuid()
+    peers = [peer for peer in peers if peer.uuid != own_uuid and peer.matches(capability)]
+
+    if output_json:
+        click.echo(json.dumps([peer.to_dict() for peer in peers], indent=2))
+        return
+
+    if not peers:
+        click.echo("\n   No peers found\n")
+        return
+
+    click.echo()
+    for peer in peers:
+        latency = f"{peer.latency_ms:.1f} ms" if peer.latency_ms is not None else "unreachable"
+        click.echo(f"   {peer.hostname or peer.name:<24} {peer.node_type:<8} {peer.base_url or '-':<28} {latency}")
+        if peer.capabilities:
+            click.echo(f"      capabilities: {', '.join(peer.capabilities)}")
+    click.echo()
@@ -16,12 +16,10 @@ from dataclasses import dataclass, field
 # Import existing UI components
 from core.clients.cli.framework.ui import (
     Colors,
-    clear_screen,
     get_terminal_size,
     move_cursor,
     hide_cursor,
     show_cursor,
-    flush_input_buffer,
     wrap_text,
     print_centered,
     show_splash_screen,
@@ -40,6 +38,8 @@ from .components import (
     MenuSection,
 )
 
+from .framework.screen import ScreenRenderer
+from .framework.status import SystemStatusMonitor
 from .i18n import get_translation_manager, t
 
 
@@ -127,6 +127,12 @@ class BaseTUI(ABC):
         # V527: Render completion flag (Protection 8)
         self._last_render_complete = False
 
+        # Double-buffered output: frames write only changed cells
+        self.screen = ScreenRenderer()
+
+        # Footer status probes run in the background
+        self.status_monitor = SystemStatusMonitor()
+
     @abstractmethod
     def get_menu_sections(self) -> List[MenuSection]:
         """
@@ -185,6 +191,9 @@ class BaseTUI(ABC):
             except Exception as e:
                 self.show_error(f"Action failed: {e}")
                 return True
+            finally:
+                # Handlers may have written to the terminal directly; repaint in full next frame
+                self.screen.invalidate()
 
         # Default: show not implemented
         self.show_message(
@@ -214,97 +223,64 @@ class BaseTUI(ABC):
         return True
 
     def render(self):
-        """Render complete UI with v527 hide-cursor pattern and ALL 8 protections"""
-        # V527: Hide cursor at start of draw sequence
-        sys.stdout.write('\033[?25l')
-        sys.stdout.flush()
+        """
+        Render complete UI as one frame
 
+        All components draw into the back buffer; only the cells that differ
+        from what the terminal shows are written, in a single write. No
+        clearing and no per-component delays, so there is nothing to flicker.
+        """
         try:
-            # V527 Protection 4: Enhanced clear with triple clear
-            sys.stdout.write('\033[2J')  # Clear screen
-            sys.stdout.write('\033[H')   # Move to home
-            sys.stdout.write('\033[3J')  # Clear scrollback
-            sys.stdout.flush()
-
-            # V527 Protection 4: Increase delay to 30ms (from 20ms)
-            time.sleep(0.03)
-
-            # Double clear for safety
-            clear_screen()
-            sys.stdout.flush()
-
-            # V527 Protection 7: Clear stale input (5 flushes)
-            flush_input_buffer(times=5)
-
-            # Get terminal size for responsive layout
-            cols, lines = get_terminal_size()
+            with self.screen.frame():
+                # Update components with current state
+                sections = self.get_menu_sections()
+                current_section = sections[self.state.current_section] if sections else None
+                selected_item = self.state.get_selected_item() if current_section else None
 
-            # Update components with current state
-            sections = self.get_menu_sections()
-            current_section = sections[self.state.current_section] if sections else None
-            selected_item = self.state.get_selected_item() if current_section else None
+                # Header
+                self.header.draw(
+                    breadcrumb=self.get_breadcrumb(),
+                    username=self.get_username(),
+                    language=self.get_language_display()  # V527 spec: language in header
+                )
 
-            # V527 Protection 5: Draw components in STRICT ORDER with Protection 6 (flush + delay)
-            # Get current language display
-            lang_code = self.i18n.get_language()
-            lang_flag = self.i18n.get_language_flag(lang_code)
-            lang_name = self.i18n.get_language_display_name(lang_code)
-            language_display = f"{lang_flag} {lang_name}"
+                # Sidebar
+                self.sidebar.draw(
+                    sections=sections,
+                    current_section=self.state.current_section,
+                    selected_index=self.state.selected_index
+                )
 
-            # PROTECTION 5 & 6: Header FIRST with flush and delay
-            self.header.draw(
-                breadcrumb=self.get_breadcrumb(),
-                username=self.get_username(),
-                language=language_display  # V527 spec: language in header
-            )
-            sys.stdout.flush()
-            time.sleep(0.01)  # Protection 6: Small delay after component
+                # Content: persistent buffer or selected item description
+                if self.content_buffer['lines']:
+                    # Show buffered content from last command
+                    # Handle both list and string types defensively
+                    lines = self.content_buffer['lines']
+                    if isinstance(lines, str):
+                        content = lines
+                    elif isinstance(lines, list):
+                        content = '\n'.join(lines)
+                    else:
+                        content = str(lines)
 
-            # PROTECTION 5 & 6: Sidebar SECOND with flush and delay
-            self.sidebar.draw(
-                sections=sections,
-                current_section=self.state.current_section,
-                selected_index=self.state.selected_index
-            )
-            sys.stdout.flush()
-            time.sleep(0.01)  # Protection 6: Small delay after component
-
-            # PROTECTION 5 & 6: Content THIRD with flush and delay
-            # Render content area with persistent buffer or selected item description
-            if self.content_buffer['lines']:
-                # Show buffered content from last command
-                # Handle both list and string types defensively
-                lines = self.content_buffer['lines']
-                if isinstance(lines, str):
-                    content = lines
-                elif isinstance(lines, list):
-                    content = '\n'.join(lines)
-                else:
-                    content = str(lines)
+                    self.content_area.draw(
+                        title=self.content_buffer['title'],
+                        content=content,
+                        item=None
+                    )
+                elif selected_item:
+                    # Show selected item description
+                    self.content_area.draw(
+                        title=selected_item.label,
+                        content=selected_item.description,
+                        item=selected_item
+                    )
 
-                self.content_area.draw(
-                    title=self.content_buffer['title'],
-                    content=content,
-                    item=None
-                )
-            elif selected_item:
-                # Show selected item description
-                self.content_area.draw(
-                    title=selected_item.label,
-                    content=selected_item.description,
-                    item=selected_item
+                # Footer
+                self.footer.draw(
+                    hints=self.get_navigation_hints(),
+                    status=self.get_system_status()
                 )
-            sys.stdout.flush()
-            time.sleep(0.01)  # Protection 6: Small delay after component
-
-            # PROTECTION 5 & 6: Footer LAST with flush and delay
-            self.footer.draw(
-                hints=self.get_navigation_hints(),
-                status=self.get_system_status()
-            )
-            sys.stdout.flush()
-            time.sleep(0.01)  # Protection 6: Small delay after component
-
         finally:
             # V527: Always show cursor after draw (even on error)
             sys.stdout.write('\033[?25h')
@@ -313,6 +289,21 @@ class BaseTUI(ABC):
             # V527 Protection 8: Mark render as complete
             self._last_render_complete = True
 
+    def get_language_display(self) -> str:
+        """Language shown in the header, e.g. '🇹🇷 Türkçe'"""
+        lang_code = self.i18n.get_language()
+        lang_flag = self.i18n.get_language_flag(lang_code)
+        lang_name = self.i18n.get_language_display_name(lang_code)
+        return f"{lang_flag} {lang_name}"
+
+    def draw_footer(self):
+        """Redraw only the footer (clock tick); writes just the changed cells"""
+        with self.screen.frame():
+            self.footer.draw(
+                hints=self.get_navigation_hints(),
+                status=self.get_system_status()
+            )
+
     def _navigation_redraw(self, sections):
         """Atomic redraw for navigation - prevents flicker and escape sequence leaks"""
         # Prevent concurrent rendering
@@ -332,44 +323,27 @@ class BaseTUI(ABC):
             old_settings = None
 
         try:
-            cols, lines = get_terminal_size()
-
-            # Hide cursor
-            sys.stdout.write('\033[?25l')
-            sys.stdout.flush()
-
-            # Draw sidebar (no separate flush inside)
-            self.sidebar.draw(
-                sections, self.state.current_section,
-                self.state.selected_index, bool(self.state.in_submenu)
-            )
-
-            # Update content
-            self.update_content_for_selection()
-
-            # Get language display
-            lang_code = self.i18n.get_language()
-            lang_flag = self.i18n.get_language_flag(lang_code)
-            lang_name = self.i18n.get_language_display_name(lang_code)
-            language_display = f"{lang_flag} {lang_name}"
-
-            # Redraw header
-            self.header.draw(
-                breadcrumb=self.get_breadcrumb(),
-                username=self.get_username(),
-                language=language_display
-            )
-
-            # Redraw footer
-            self.footer.draw(
-                hints=self.get_navigation_hints(),
-                status=self.get_system_status()
-            )
+            # One frame: only the cells that changed (old and new selection,
+            # content, breadcrumb) reach the terminal
+            with self.screen.frame():
+                self.sidebar.draw(
+                    sections, self.state.current_section,
+                    self.state.selected_index, bool(self.state.in_submenu)
+                )
+                self.update_content_for_selection()
+                self.header.draw(
+                    breadcrumb=self.get_breadcrumb(),
+                    username=self.get_username(),
+                    language=self.get_language_display()
+                )
+                self.footer.draw(
+                    hints=self.get_navigation_hints(),
+                    status=self.get_system_status()
+                )
 
             # Position cursor safely off-screen (bottom-left, invisible area)
+            cols, lines = get_terminal_size()
             sys.stdout.write(f'\033[{lines};1H')
-
-            # Single final flush
             sys.stdout.flush()
         finally:
             # Restore terminal settings
@@ -408,26 +382,20 @@ class BaseTUI(ABC):
         return self.i18n.translate('navigate_hint_main')
 
     def get_system_status(self) -> Dict[str, Any]:
-        """Get system status for footer"""
-        import socket
+        """Get system status for footer (no I/O: probes run in status_monitor)"""
         from datetime import datetime
 
+        now = datetime.now()
         return {
-            'hostname': socket.gethostname().lower(),
-            'time': datetime.now().strftime('%H:%M:%S'),
-            'date': datetime.now().strftime('%Y-%m-%d'),
+            'hostname': self.status_monitor.hostname,
+            'time': now.strftime('%H:%M:%S'),
+            'date': now.strftime('%Y-%m-%d'),
             'online': self.check_online_status()
         }
 
     def check_online_status(self) -> bool:
-        """Check if system is online"""
-        try:
-            # Quick DNS check
-            import socket
-            socket.create_connection(("1.1.1.1", 53), timeout=1).close()
-            return True
-        except:
-            return False
+        """Check if system is online (last background probe result)"""
+        return self.status_monitor.online
 
     def handle_key(self, key: str) -> bool:
         """
@@ -541,6 +509,10 @@ class BaseTUI(ABC):
             # Switch to alternate screen buffer to prevent scroll pollution
             sys.stdout.write('\033[?1049h')
             sys.stdout.flush()
+            self.screen.invalidate()
+
+            # Connectivity probe for the footer LED
+            self.status_monitor.start()
 
             # Initialize menu structure
             sections = self.get_menu_sections()
@@ -574,26 +546,22 @@ class BaseTUI(ABC):
                 if cols != self.state.last_cols or lines != self.state.last_lines:
                     self.state.last_cols = cols
                     self.state.last_lines = lines
-                    # Full redraw on resize
+                    # Full redraw on resize (the screen buffer is rebuilt for the new size)
                     self.render()
 
                 # V527: Update footer time every second (polling, not threading)
                 current_time = time.time()
                 if current_time - last_footer_update >= 1.0 and not self.state.in_submenu:
-                    # Update only footer (not entire screen)
-                    self.footer.draw(
-                        hints=self.get_navigation_hints(),
-                        status=self.get_system_status()
-                    )
+                    # Only the changed clock digits are written
+                    self.draw_footer()
                     last_footer_update = current_time
                     hide_cursor()
 
-                time.sleep(0.01)
-
         except KeyboardInterrupt:
             pass
         finally:
             # Cleanup
+            self.status_monitor.stop()
             show_cursor()
             # Switch back from alternate screen buffer
             sys.stdout.write('\033[?1049l')
@@ -632,7 +600,6 @@ class BaseTUI(ABC):
                     return 'TAB'
                 else:
                     return key
-            time.sleep(0.01)
 
     def update_content(self, title: str, lines: List[str], color: str = Colors.RESET):
         """Update the content buffer with new information"""
@@ -644,18 +611,20 @@ class BaseTUI(ABC):
     def set_sidebar_inactive(self):
         """Mark sidebar selection as inactive (gray) when content area has focus"""
         sections = self.get_menu_sections()
-        self.sidebar.draw(
-            sections, self.state.current_section,
-            self.state.selected_index, True  # in_submenu=True
-        )
+        with self.screen.frame():
+            self.sidebar.draw(
+                sections, self.state.current_section,
+                self.state.selected_index, True  # in_submenu=True
+            )
 
     def set_sidebar_active(self):
         """Mark sidebar selection as active (orange) when sidebar has focus"""
         sections = self.get_menu_sections()
-        self.sidebar.draw(
-            sections, self.state.current_section,
-            self.state.selected_index, False  # in_submenu=False
-        )
+        with self.screen.frame():
+            self.sidebar.draw(
+                sections, self.state.current_section,
+                self.state.selected_index, False  # in_submenu=False
+            )
 
     def show_message(self, message: str, color: str = Colors.GREEN):
         """Show a message in content area"""
@@ -720,12 +689,12 @@ class BaseTUI(ABC):
         if current_section and 0 <= self.state.selected_index < len(current_section.items):
             selected_item = current_section.items[self.state.selected_index]
             # Draw content for selected item
-            self.content_area.draw(
-                title=selected_item.label,
-                content=selected_item.description,
-                item=selected_item
-            )
-            sys.stdout.flush()
+            with self.screen.frame():
+                self.content_area.draw(
+                    title=selected_item.label,
+                    content=selected_item.description,
+                    item=selected_item
+                )
 
     def show_info_panel(self, title: str, lines: List[str], color: str = Colors.CYAN) -> None:
         """
@@ -788,25 +757,25 @@ class BaseTUI(ABC):
                 break
 
         while True:
-            # Draw popup box
-            draw_box(lang_x, lang_y, lang_width, lang_height,
-                    self.i18n.translate('select_language'),
-                    Colors.YELLOW)
-
-            # Display languages with selection highlight
-            for i, (code, name, flag) in enumerate(languages[:10]):  # Max 10
-                y_pos = lang_y + 2 + i
-
-                if i == selected:
-                    # Selected item with orange background
-                    move_cursor(lang_x + 3, y_pos)
-                    sys.stdout.write(f"{Colors.BG_ORANGE}{Colors.WHITE} ➤ {flag} {name} {' ' * (lang_width - len(name) - 10)}{Colors.RESET}")
-                else:
-                    # Normal item
-                    move_cursor(lang_x + 3, y_pos)
-                    sys.stdout.write(f"   {flag} {name}")
+            with self.screen.frame():
+                # Draw popup box
+                draw_box(lang_x, lang_y, lang_width, lang_height,
+                        self.i18n.translate('select_language'),
+                        Colors.YELLOW)
+
+                # Display languages with selection highlight
+                for i, (code, name, flag) in enumerate(languages[:10]):  # Max 10
+                    y_pos = lang_y + 2 + i
+
+                    if i == selected:
+                        # Selected item with orange background
+                        move_cursor(lang_x + 3, y_pos)
+                        sys.stdout.write(f"{Colors.BG_ORANGE}{Colors.WHITE} ➤ {flag} {name} {' ' * (lang_width - len(name) - 10)}{Colors.RESET}")
+                    else:
+                        # Normal item
+                        move_cursor(lang_x + 3, y_pos)
+                        sys.stdout.write(f"   {flag} {name}")
 
-            sys.stdout.flush()
             hide_cursor()
 
             # Handle input
@@ -830,8 +799,6 @@ class BaseTUI(ABC):
                 # Cancel
                 break
 
-            time.sleep(0.01)
-
     def clear_cache(self):
         """Clear all cached data"""
         self.cache = {
@@ -885,11 +852,11 @@ class BaseTUI(ABC):
 
         # Show initial message
         self.update_content(title, ["starting..."])
-        self.content_area.draw(
-            self.content_buffer['title'],
-            self.content_buffer['lines']
-        )
-        sys.stdout.flush()
+        with self.screen.frame():
+            self.content_area.draw(
+                self.content_buffer['title'],
+                self.content_buffer['lines']
+            )
 
         # Start process with pipes
         process = subprocess.Popen(
@@ -931,57 +898,48 @@ class BaseTUI(ABC):
                 if cols != last_cols or term_lines != last_lines:
                     last_cols, last_lines = cols, term_lines
                     # Full redraw on resize - header, sidebar, content, footer
-                    # Clear screen first
-                    sys.stdout.write('\033[2J')
-                    sys.stdout.flush()
-
-                    # Redraw header
-                    lang_code = self.i18n.get_language()
-                    lang_flag = self.i18n.get_language_flag(lang_code)
-                    lang_name = self.i18n.get_language_display_name(lang_code)
-                    language_display = f"{lang_flag} {lang_name}"
-                    self.header.draw(
-                        breadcrumb=self.get_breadcrumb(),
-                        username=self.get_username(),
-                        language=language_display
-                    )
-
-                    # Redraw sidebar with inactive state
-                    self.set_sidebar_inactive()
-
-                    # Redraw content
-                    max_visible = term_lines - 8
-                    if len(output_lines) > max_visible:
-                        visible_lines = output_lines[-max_visible:]
-                    else:
-                        visible_lines = output_lines
-                    self.update_content(title, visible_lines)
-                    self.content_area.draw(
-                        self.content_buffer['title'],
-                        self.content_buffer['lines']
-                    )
-
-                    # Redraw footer
-                    self.footer.draw(
-                        hints=self.get_navigation_hints(),
-                        status=self.get_system_status()
-                    )
+                    # (the screen buffer is rebuilt for the new size)
+                    with self.screen.frame():
+                        # Redraw header
+                        self.header.draw(
+                            breadcrumb=self.get_breadcrumb(),
+                            username=self.get_username(),
+                            language=self.get_language_display()
+                        )
+                    
+                        # Redraw sidebar with inactive state
+                        self.set_sidebar_inactive()
+                    
+                        # Redraw content
+                        max_visible = term_lines - 8
+                        if len(output_lines) > max_visible:
+                            visible_lines = output_lines[-max_visible:]
+                        else:
+                            visible_lines = output_lines
+                        self.update_content(title, visible_lines)
+                        self.content_area.draw(
+                            self.content_buffer['title'],
+                            self.content_buffer['lines']
+                        )
+                    
+                        # Redraw footer
+                        self.footer.draw(
+                            hints=self.get_navigation_hints(),
+                            status=self.get_system_status()
+                        )
                     # Reset footer update timer to prevent immediate redraw
                     last_footer_update = time.time()
 
                 # Update spinner every 100ms
                 current_time = time.time()
                 if current_time - last_spinner_update >= 0.1:
-                    draw_spinner()
-                    sys.stdout.flush()
+                    with self.screen.frame():
+                        draw_spinner()
                     last_spinner_update = current_time
 
                 # Update footer time every second
                 if current_time - last_footer_update >= 1.0:
-                    self.footer.draw(
-                        hints=self.get_navigation_hints(),
-                        status=self.get_system_status()
-                    )
+                    self.draw_footer()
                     last_footer_update = current_time
 
                 # Try to read a line (non-blocking)
@@ -1000,11 +958,11 @@ class BaseTUI(ABC):
 
                         self.content_area.scroll_position = 0
                         self.update_content(title, visible_lines)
-                        self.content_area.draw(
-                            self.content_buffer['title'],
-                            self.content_buffer['lines']
-                        )
-                        sys.stdout.flush()
+                        with self.screen.frame():
+                            self.content_area.draw(
+                                self.content_buffer['title'],
+                                self.content_buffer['lines']
+                            )
 
                     elif process.poll() is not None:
                         break
@@ -1112,46 +1070,37 @@ class BaseTUI(ABC):
             cols, term_lines = get_terminal_size()
             if cols != last_cols or term_lines != last_lines:
                 last_cols, last_lines = cols, term_lines
-                # Full redraw on resize - clear and redraw all components
-                sys.stdout.write('\033[2J')
-                sys.stdout.flush()
-
-                # Redraw header
-                lang_code = self.i18n.get_language()
-                lang_flag = self.i18n.get_language_flag(lang_code)
-                lang_name = self.i18n.get_language_display_name(lang_code)
-                language_display = f"{lang_flag} {lang_name}"
-                self.header.draw(
-                    breadcrumb=self.get_breadcrumb(),
-                    username=self.get_username(),
-                    language=language_display
-                )
+                # Full redraw on resize (the screen buffer is rebuilt for the new size)
+                with self.screen.frame():
+                    self.header.draw(
+                        breadcrumb=self.get_breadcrumb(),
+                        username=self.get_username(),
+                        language=self.get_language_display()
+                    )
 
-                # Redraw sidebar with inactive state
-                self.set_sidebar_inactive()
+                    # Redraw sidebar with inactive state
+                    self.set_sidebar_inactive()
 
-                # Redraw footer
-                self.footer.draw(
-                    hints=self.get_navigation_hints(),
-                    status=self.get_system_status()
-                )
+                    # Redraw footer
+                    self.footer.draw(
+                        hints=self.get_navigation_hints(),
+                        status=self.get_system_status()
+                    )
                 # Reset footer update timer to prevent immediate redraw
                 last_footer_update = time.time()
 
             self.update_content(self.i18n.translate('command_output'), lines)
-            # Only redraw content area, not sidebar
-            self.content_area.draw(
-                self.content_buffer['title'],
-                self.content_buffer['lines']
-            )
+            # Only redraw content area, not sidebar (unchanged cells are not rewritten)
+            with self.screen.frame():
+                self.content_area.draw(
+                    self.content_buffer['title'],
+                    self.content_buffer['lines']
+                )
 
             # Update footer time every second
             current_time = time.time()
             if current_time - last_footer_update >= 1.0:
-                self.footer.draw(
-                    hints=self.get_navigation_hints(),
-                    status=self.get_system_status()
-                )
+                self.draw_footer()
                 last_footer_update = current_time
 
             # Use timeout-based key reading
@@ -1254,10 +1203,7 @@ class BaseTUI(ABC):
             # Update footer time every second
             current_time = time.time()
             if current_time - last_footer_update >= 1.0:
-                self.footer.draw(
-                    hints=self.get_navigation_hints(),
-                    status=self.get_system_status()
-                )
+                self.draw_footer()
                 last_footer_update = current_time
 
             # Get input
@@ -1302,10 +1248,6 @@ class BaseTUI(ABC):
         back_label: str
     ):
         """Draw submenu content - clean and minimal style with scroll protection"""
-        # V527 CRITICAL: Hide cursor during entire draw to prevent artifacts
-        sys.stdout.write('\033[?25l')
-        sys.stdout.flush()
-
         content_lines = []
 
         # Subtitle at top
@@ -1331,43 +1273,36 @@ class BaseTUI(ABC):
             color=Colors.CYAN
         )
 
-        # V527 CRITICAL: Redraw header FIRST to ensure it persists
-        # Get language display for header
-        lang_code = self.i18n.get_language()
-        lang_flag = self.i18n.get_language_flag(lang_code)
-        lang_name = self.i18n.get_language_display_name(lang_code)
-        language_display = f"{lang_flag} {lang_name}"
-
-        self.header.draw(
-            breadcrumb=self.get_breadcrumb(),
-            username=self.get_username(),
-            language=language_display
-        )
-
-        # Get terminal size for layout calculations
-        cols, lines = get_terminal_size()
+        # One frame: only cells that differ from the previous submenu draw are written
+        with self.screen.frame():
+            # V527 CRITICAL: Redraw header FIRST to ensure it persists
+            self.header.draw(
+                breadcrumb=self.get_breadcrumb(),
+                username=self.get_username(),
+                language=self.get_language_display()
+            )
 
-        # V527: Redraw sidebar with inactive state (submenu has focus)
-        sections = self.get_menu_sections()
-        self.sidebar.draw(
-            sections=sections,
-            current_section=self.state.current_section,
-            selected_index=self.state.selected_index,
-            in_submenu=True  # Sidebar is inactive when submenu is open
-        )
+            # V527: Redraw sidebar with inactive state (submenu has focus)
+            sections = self.get_menu_sections()
+            self.sidebar.draw(
+                sections=sections,
+                current_section=self.state.current_section,
+                selected_index=self.state.selected_index,
+                in_submenu=True  # Sidebar is inactive when submenu is open
+            )
 
-        # Draw content area
-        self.content_area.draw(
-            title=title,
-            content='\n'.join(content_lines),
-            item=None
-        )
+            # Draw content area
+            self.content_area.draw(
+                title=title,
+                content='\n'.join(content_lines),
+                item=None
+            )
 
-        # V527 CRITICAL: Redraw footer at exact bottom line
-        self.footer.draw(
-            hints=self.get_navigation_hints(),
-            status=self.get_system_status()
-        )
+            # V527 CRITICAL: Redraw footer at exact bottom line
+            self.footer.draw(
+                hints=self.get_navigation_hints(),
+                status=self.get_system_status()
+            )
 
         # Keep cursor hidden during submenu navigation (no blink)
         sys.stdout.write('\033[?25l')
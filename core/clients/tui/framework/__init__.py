@@ -6,6 +6,8 @@ Modern terminal UI with colors, layouts, and splash screen
 from .colors import Colors
 from .splash import show_splash_screen
 from .layout import get_terminal_size, clear_screen, move_cursor
+from .screen import ScreenRenderer
+from .status import SystemStatusMonitor
 
 __all__ = [
     'Colors',
@@ -13,4 +15,6 @@ __all__ = [
     'get_terminal_size',
     'clear_screen',
     'move_cursor',
+    'ScreenRenderer',
+    'SystemStatusMonitor',
 ]
@@ -0,0 +1,260 @@
+"""
+UNIBOS TUI Screen Buffer
+Double-buffered, diff-based terminal output
+
+Components keep drawing with absolute cursor moves and colors on
+sys.stdout. Inside a frame that output is captured and replayed onto a
+back buffer of cells (character + SGR style); the back buffer is compared
+with the front buffer (what the terminal shows) and only the changed cells
+are written, as one coalesced write.
+
+- No clear-screen between frames, so nothing flickers
+- A frame that changes nothing writes nothing
+- Resize is detected per frame: buffers are rebuilt and fully repainted
+- invalidate() forces a full repaint after output that bypassed the buffer
+  (subprocesses, splash screen, raw prints)
+"""
+
+import re
+import sys
+import unicodedata
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from core.clients.cli.framework.ui import get_terminal_size
+
+# CSI sequences (cursor moves, SGR, clears, modes) and other two-byte escapes
+ESCAPE = re.compile(r'\x1b\[([?0-9;]*)([@-~])|\x1b[^\[]')
+
+BLANK = (' ', '')
+CONTINUATION = ('', None)  # Right half of a wide character
+
+
+def char_width(char: str, next_char: str = '') -> int:
+    """Display columns of one character (same rules as emoji_safe_slice.get_display_width)"""
+    if next_char == '\uFE0F':
+        return 2
+    if unicodedata.combining(char) or char in ('\u200D', '\uFE0F'):
+        return 0
+    if unicodedata.east_asian_width(char) in ('F', 'W') or ord(char) >= 0x1F300:
+        return 2
+    return 1
+
+
+class _Capture:
+    """File-like sink that collects everything written during a frame"""
+
+    def __init__(self, target):
+        self.target = target
+        self.parts: List[str] = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.target.isatty()
+
+    def fileno(self):
+        return self.target.fileno()
+
+    @property
+    def encoding(self):
+        return self.target.encoding
+
+
+class ScreenRenderer:
+    """
+    Front/back cell buffers for the whole terminal
+
+    Usage:
+        with screen.frame():
+            header.draw(...)
+            footer.draw(...)
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.cols = 0
+        self.lines = 0
+        self.front: List[List[Tuple[str, Optional[str]]]] = []
+        self.back: List[List[Tuple[str, Optional[str]]]] = []
+        self._depth = 0
+        self._capture: Optional[_Capture] = None
+        self._full_repaint = True
+        self._clear_pending = False
+
+    def invalidate(self):
+        """Clear and repaint on the next frame (terminal content is unknown)"""
+        self._full_repaint = True
+
+    @property
+    def needs_repaint(self) -> bool:
+        """True if the next frame should draw the whole UI (after invalidate or resize)"""
+        return self._full_repaint or get_terminal_size() != (self.cols, self.lines)
+
+    @contextmanager
+    def frame(self):
+        """Capture component output and write only the changed cells on exit (re-entrant)"""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+
+        previous = sys.stdout
+        stream = self.stream or previous
+        self._resize_if_needed()
+        self.back = [row[:] for row in self.front]
+        self._capture = _Capture(stream)
+        self._depth = 1
+        sys.stdout = self._capture
+        try:
+            yield self
+        finally:
+            sys.stdout = previous
+            self._depth = 0
+            captured = ''.join(self._capture.parts)
+            self._capture = None
+            self._apply(captured)
+            output = self._diff()
+            if output:
+                stream.write(output)
+                stream.flush()
+
+    def _blank_grid(self, cell):
+        return [[cell] * self.cols for _ in range(self.lines)]
+
+    def _resize_if_needed(self):
+        cols, lines = get_terminal_size()
+        if (cols, lines) != (self.cols, self.lines):
+            self.cols, self.lines = cols, lines
+            self._full_repaint = True
+        if self._full_repaint:
+            # Unknown terminal content: clear once, then diff against a blank screen
+            self.front = self._blank_grid(BLANK)
+            self._clear_pending = True
+
+    # ----- Replaying captured output onto the back buffer -----
+
+    def _apply(self, text: str):
+        row = col = 0
+        style = ''
+        position = 0
+        for match in ESCAPE.finditer(text):
+            row, col = self._put_text(text[position:match.start()], row, col, style)
+            position = match.end()
+            final = match.group(2)
+            params = match.group(1) or ''
+            if final is None or params.startswith('?'):
+                continue  # Cursor visibility, alternate screen, charset: not cell content
+            numbers = [int(p) if p else 0 for p in params.split(';')] if params else []
+            if final in 'Hf':
+                row = (numbers[0] if numbers and numbers[0] else 1) - 1
+                col = (numbers[1] if len(numbers) > 1 and numbers[1] else 1) - 1
+            elif final == 'm':
+                style = '' if not numbers or numbers == [0] else style + match.group(0)
+            elif final == 'K':
+                self._erase_line(row, col, numbers[0] if numbers else 0, style)
+            elif final == 'J':
+                if numbers and numbers[0] in (2, 3):
+                    self.back = self._blank_grid(BLANK)
+            elif final in 'ABCD':
+                count = numbers[0] if numbers and numbers[0] else 1
+                if final == 'A':
+                    row = max(0, row - count)
+                elif final == 'B':
+                    row += count
+                elif final == 'C':
+                    col += count
+                else:
+                    col = max(0, col - count)
+            elif final == 'G':
+                col = (numbers[0] if numbers and numbers[0] else 1) - 1
+            # Scroll regions (r) and anything else don't change cells
+        self._put_text(text[position:], row, col, style)
+
+    def _erase_line(self, row, col, mode, style):
+        if not 0 <= row < self.lines:
+            return
+        start, end = {0: (col, self.cols), 1: (0, col + 1)}.get(mode, (0, self.cols))
+        cell = (' ', style)
+        for x in range(max(0, start), min(end, self.cols)):
+            self.back[row][x] = cell
+
+    def _put_text(self, text, row, col, style):
+        length = len(text)
+        for index, char in enumerate(text):
+            if char == '\n':
+                row, col = row + 1, 0
+                continue
+            if char == '\r':
+                col = 0
+                continue
+            width = char_width(char, text[index + 1] if index + 1 < length else '')
+            if not 0 <= row < self.lines:
+                col += width
+                continue
+            cells = self.back[row]
+            if width == 0:
+                # Combining mark / variation selector: belongs to the previous cell
+                target = col - 1
+                if 0 <= target < self.cols and cells[target] is CONTINUATION:
+                    target -= 1
+                if 0 <= target < self.cols:
+                    cells[target] = (cells[target][0] + char, cells[target][1])
+                continue
+            if col + width > self.cols:
+                col += width  # Clipped: terminal would wrap, components never rely on it
+                continue
+            if cells[col] is CONTINUATION and col > 0:
+                cells[col - 1] = (' ', cells[col - 1][1])  # Overwrote half of a wide char
+            cells[col] = (char, style)
+            if width == 2:
+                cells[col + 1] = CONTINUATION
+            end = col + width
+            if end < self.cols and cells[end] is CONTINUATION:
+                cells[end] = (' ', style)  # Overwrote the left half of a wide char
+            col += width
+        return row, col
+
+    # ----- Diff -----
+
+    def _diff(self) -> str:
+        out = ['\033[0m\033[2J'] if self._clear_pending else []
+        current_style = None
+        for y in range(self.lines):
+            front, back = self.front[y], self.back[y]
+            x = 0
+            while x < self.cols:
+                if front[x] == back[x]:
+                    x += 1
+                    continue
+                # Start of a changed run; a run never starts on the right half of a wide char
+                start = x - 1 if back[x] is CONTINUATION and x > 0 else x
+                end = x
+                unchanged = 0
+                while end < self.cols and unchanged < 4:
+                    unchanged = unchanged + 1 if front[end] == back[end] else 0
+                    end += 1
+                end -= unchanged
+                out.append(f'\033[{y + 1};{start + 1}H')
+                for char, style in back[start:end]:
+                    if style is None:
+                        continue  # Covered by the wide char before it
+                    if style != current_style:
+                        out.append('\033[0m' + style)
+                        current_style = style
+                    out.append(char)
+                x = end
+        self.front = self.back
+        self._full_repaint = self._clear_pending = False
+        if out:
+            out.insert(0, '\033[?25l')  # Cursor stays hidden while cells change
+            out.append('\033[0m')
+        return ''.join(out)
@@ -0,0 +1,54 @@
+"""
+UNIBOS TUI Status Monitor
+Background refresher for footer status probes
+
+The footer is redrawn every second and on every navigation; probing
+connectivity there (a TCP connect to 1.1.1.1:53 with a 1s timeout) blocked
+each redraw, badly so over SSH on an edge node without internet. The probe
+runs on a daemon thread instead and draws only read the last result.
+"""
+
+import socket
+import threading
+from typing import Optional
+
+
+class SystemStatusMonitor:
+    """
+    Periodically probes connectivity; hostname is resolved once
+
+    Args:
+        interval: Seconds between probes
+        probe_host: (host, port) reached with a TCP connect
+    """
+
+    def __init__(self, interval: float = 15.0, probe_host=("1.1.1.1", 53), timeout: float = 1.0):
+        self.interval = interval
+        self.probe_host = probe_host
+        self.timeout = timeout
+        self.hostname = socket.gethostname().lower()
+        self.online = True  # Optimistic until the first probe finishes
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tui-status', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self):
+        """Probe now (blocking)"""
+        try:
+            socket.create_connection(self.probe_host, timeout=self.timeout).close()
+            self.online = True
+        except OSError:
+            self.online = False
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
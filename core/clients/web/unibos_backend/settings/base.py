@@ -74,6 +74,7 @@ THIRD_PARTY_APPS = [
 
 CORE_APPS = [
     'core.base.modules_core',  # Core shared models (Item, Account, UserProfile, etc.) - must be loaded before modules
+    'core.base.sync',  # Node-to-node change log sync (apps declare models in sync.py)
     # Note: modules.core.backend removed during v533 migration
     # Core functionality now distributed across individual modules
 ]
@@ -186,6 +187,7 @@ MIDDLEWARE = [
     'core.system.common.backend.middleware.RateLimitMiddleware',
     'core.system.common.backend.middleware.HealthCheckMiddleware',  # Quick health check bypass
     'core.system.common.backend.middleware.NodeIdentityMiddleware',  # Multi-node identity
+    'core.system.nodes.backend.middleware.NodeRequestMetricsMiddleware',  # Request counters for the node agent
     'core.system.common.backend.middleware.P2PDiscoveryMiddleware',  # Peer discovery
     'core.system.common.backend.middleware.MaintenanceModeMiddleware',  # Graceful maintenance
     'core.system.web_ui.backend.middleware.SolitaireSecurityMiddleware',  # Solitaire screen lock security
@@ -504,6 +506,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'core.system.nodes.backend.tasks.check_node_heartbeats',
         'schedule': timedelta(minutes=1),  # Check every minute for stale nodes
     },
+    'rollup-node-metrics': {
+        'task': 'core.system.nodes.backend.tasks.rollup_node_metrics',
+        'schedule': timedelta(minutes=1),  # Downsample metrics into 1m/1h/1d tiers
+    },
     'cleanup-stale-node-metrics': {
         'task': 'core.system.nodes.backend.tasks.cleanup_stale_metrics',
         'schedule': timedelta(days=1),  # Daily cleanup of old metrics
@@ -512,6 +518,15 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'core.system.nodes.backend.tasks.cleanup_old_events',
         'schedule': timedelta(days=1),  # Daily cleanup of old events
     },
+    # Node Sync Tasks
+    'sync-with-peers': {
+        'task': 'core.base.sync.tasks.sync_with_peers',
+        'schedule': timedelta(minutes=1),  # Each peer synced once per UNIBOS_SYNC_INTERVAL
+    },
+    'compact-sync-change-log': {
+        'task': 'core.base.sync.tasks.compact_change_log',
+        'schedule': timedelta(days=1),  # Drop superseded change log entries
+    },
 }
 
 # Email Configuration
@@ -529,9 +544,119 @@ SERVER_EMAIL = 'berk@recaria.org'
 NODE_HEARTBEAT_TIMEOUT_MINUTES = 5  # Mark offline after no heartbeat
 NODE_STALE_THRESHOLD_MINUTES = 15  # Consider stale after this time
 NODE_METRICS_RETENTION_DAYS = 7  # Keep metrics for 7 days
+NODE_METRIC_ROLLUP_RETENTION_DAYS = {'1m': 7, '1h': 90, '1d': 730}  # Retention per downsampled tier
+NODE_HEARTBEAT_FLUSH_SECONDS = 5  # Buffered heartbeats are bulk-written this often
+NODE_HEARTBEAT_BATCH_SIZE = 500  # ...or as soon as this many are queued
+NODE_AGENT_ENABLED = False  # In-process metrics agent (needs CENTRAL_REGISTRY_URL); replaces the heartbeat task
+NODE_AGENT_SAMPLE_SECONDS = 10  # Non-blocking CPU/mem/disk/net/request sample interval
+NODE_AGENT_PUSH_SECONDS = 60  # Compressed batch push interval (doubles while central is slow, up to the max)
+NODE_AGENT_MAX_BACKOFF_SECONDS = 900
 NODE_EVENTS_RETENTION_DAYS = 30  # Keep events for 30 days
 CENTRAL_REGISTRY_URL = None  # Set in server/prod settings if not central
 
+# Documents OCR Worker Pool Settings
+OCR_WORKER_POOL_ENABLED = True  # Run OCR engines in long-lived worker processes
+OCR_WORKER_POOL_SIZE = 2  # Number of OCR worker processes
+OCR_WORKER_MEMORY_BUDGET_MB = 4096  # Engine memory budget per worker (LRU eviction)
+OCR_POOL_MEMORY_BUDGET_MB = 6144  # Engine memory budget shared by every pool on the host (admission control)
+OCR_WORKER_PRELOAD = ['paddleocr']  # Engines warmed when a worker starts
+
+# Documents OCR Job Queue Settings
+OCR_JOB_RUNNER_EMBEDDED = True  # Run queued OCR jobs inside web processes (False: use `manage.py run_ocr_jobs`)
+OCR_JOB_RUNNER_CONCURRENCY = 2  # Documents analyzed concurrently per runner
+OCR_JOB_LEASE_SECONDS = 300  # Requeue running jobs without a heartbeat for this long
+OCR_JOB_MAX_ATTEMPTS = 3  # Attempts before a job is marked failed
+OCR_BULK_BATCH_SIZE = 8  # Bulk reprocess documents run through each OCR engine together
+
+# Documents OCR Result Cache Settings
+# Content-addressed by image hash + stage parameters + engine/model version
+OCR_RESULT_CACHE_ENABLED = os.environ.get('OCR_RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+OCR_RESULT_CACHE_DIR = CACHE_DIR / 'ocr'
+OCR_RESULT_CACHE_MAX_MB = int(os.environ.get('OCR_RESULT_CACHE_MAX_MB', 2048))
+
+# Documents Search Settings
+DOCUMENT_SEARCH_CONFIG = 'simple'  # Applied to Turkish-normalized text (tsvector + tsquery)
+DOCUMENT_SEARCH_HEADLINE_CONFIG = 'turkish'  # Highlight snippets over the original OCR text
+
+# Currencies Candle Settings
+CURRENCY_MINUTE_CANDLE_RETENTION_DAYS = 7  # 1m candles pruned weekly; 1h/4h/1d/1w kept
+
+# Currencies Rate Broadcast Settings
+CURRENCY_RATE_HUB_INTERVAL = 10  # Seconds between shared latest-rate ticks (one query per tick for all clients)
+CURRENCY_RATE_HUB_WINDOW_HOURS = 24  # Pairs updated within this window are tracked by the hub
+CURRENCY_WS_MAX_SUBSCRIPTIONS = 50  # Pairs one rates WebSocket may subscribe to
+
+# Currencies Crypto Aggregator Settings
+CRYPTO_API_SOURCE_TIMEOUT = 5  # Seconds per exchange (sources are fetched concurrently)
+CRYPTO_API_BREAKER_THRESHOLD = 3  # Consecutive failures before a source is skipped
+CRYPTO_API_BREAKER_COOLDOWN = 300  # Seconds a tripped source stays skipped
+CRYPTO_API_ENDPOINTS = {}  # Base URL overrides by source (binance, binance_us, coingecko, btcturk), e.g. a stub server
+
+# Currencies Portfolio Snapshot Settings
+PORTFOLIO_SNAPSHOT_BATCH_SIZE = 500  # Portfolios per holdings/history query and bulk write
+
+# Currencies Firebase Import Settings
+FIREBASE_IMPORT_PAGE_SIZE = 500  # Entries per orderBy/startAt page
+FIREBASE_IMPORT_BATCH_SIZE = 500  # Rows per bulk_create
+
+# Web UI Status Settings
+WEB_UI_STATUS_INTERVAL = 30  # Seconds between connectivity/version probes for template context
+
+# Version Manager Settings
+VERSION_MANAGER_SCAN_WORKERS = 8  # Parallel os.scandir workers for archive catalog scans
+
+# Node Sync Settings
+UNIBOS_SYNC_ENABLED = False  # Exchange change log deltas with UNIBOS_SYNC_PEERS / SyncPeer rows
+UNIBOS_SYNC_INTERVAL = 300  # Seconds between syncs with one peer
+UNIBOS_SYNC_PEERS = []  # Peer base URLs, e.g. ['https://recaria.org']
+UNIBOS_SYNC_TOKEN = os.environ.get('UNIBOS_SYNC_TOKEN', '')  # Shared secret; sync API is closed while empty
+UNIBOS_SYNC_NODE_ID = os.environ.get('UNIBOS_SYNC_NODE_ID') or None  # Override identity UUID (two instances on one host)
+UNIBOS_SYNC_BATCH_SIZE = 500  # Change log entries per delta batch
+UNIBOS_SYNC_TOMBSTONE_RETENTION_DAYS = 30  # Peers offline longer than this may miss deletes
+
+# P2P Discovery Settings
+UNIBOS_MDNS_ENABLED = False  # Advertise/browse _unibos._tcp on the LAN (zeroconf)
+UNIBOS_MDNS_SERVICE_TYPE = '_unibos._tcp.local.'
+UNIBOS_MDNS_SERVICE_PORT = 8000  # Advertised API port, also probed for peer latency
+UNIBOS_P2P_PROBE_INTERVAL = 15  # Seconds between latency probes of known peers
+UNIBOS_P2P_PEER_TIMEOUT = 180  # Drop peers not seen/reachable for this long
+
+# CCTV Capture Hub Settings
+CCTV_CAPTURE_IDLE_GRACE = 30  # Seconds without viewers before a camera's decoder is stopped
+CCTV_CAPTURE_STALL_TIMEOUT = 15  # Seconds without decoder heartbeat before it is restarted/taken over
+CCTV_CAPTURE_RING_SLOTS = 4  # Raw frames kept per camera in shared memory
+CCTV_STREAM_TIERS = {  # MJPEG quality tiers (?quality=...), each encoded once per frame
+    'high': {'quality': 85, 'width': None},
+    'medium': {'quality': 70, 'width': 1280},
+    'low': {'quality': 50, 'width': 640},
+}
+CCTV_CAPTURE_TEST_SOURCE = os.environ.get('CCTV_CAPTURE_TEST_SOURCE') or None  # Looping video file instead of camera streams
+
+# CCTV Motion Detection Settings (python manage.py cctv_motion)
+CCTV_MOTION_WIDTH = 320  # Analysis width in pixels (frames are downscaled before differencing)
+CCTV_MOTION_FPS = 5  # Frames analyzed per second per camera
+CCTV_MOTION_ALPHA = 0.05  # Background learning rate per analyzed frame
+CCTV_MOTION_TRIGGER_FRAMES = 2  # Consecutive motion frames needed to start an event
+CCTV_MOTION_PRE_ROLL = 5  # Seconds recorded before an event starts
+CCTV_MOTION_POST_ROLL = 10  # Seconds without motion before an event ends
+CCTV_MOTION_RECORD_FPS = 10  # Frame rate of motion clips
+CCTV_MOTION_REFRESH_INTERVAL = 60  # Seconds between camera list refreshes
+
+# Birlikteyiz Earthquake Ingestion Settings
+EARTHQUAKE_SOURCE_TIMEOUTS = {  # Seconds per agency (agencies are fetched concurrently)
+    'KANDILLI': 10,
+    'AFAD': 15,
+    'IRIS': 15,
+    'USGS': 10,
+    'GFZ': 15,
+}
+EARTHQUAKE_SOURCE_URLS = {}  # URL overrides by source (KANDILLI, AFAD, IRIS, USGS, GFZ), e.g. local fixture servers
+EARTHQUAKE_SOURCE_PRIORITY = ['AFAD', 'KANDILLI', 'EMSC', 'USGS', 'GFZ', 'IRIS']  # Merged quakes show the first listed source's report
+EARTHQUAKE_MERGE_WINDOW = 60  # Max origin time difference (seconds) between reports of one quake
+EARTHQUAKE_MERGE_DISTANCE_KM = 100  # Max epicenter distance between reports of one quake
+EARTHQUAKE_MERGE_MAGNITUDE_DELTA = 1.0  # Max magnitude difference between reports of one quake
+EARTHQUAKE_UPSERT_BATCH_SIZE = 500  # Rows per upsert / merge update statement
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
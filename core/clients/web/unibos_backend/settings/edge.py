@@ -266,9 +266,13 @@ UNIBOS_PLATFORM_DETAIL = os.environ.get('NODE_PLATFORM_DETAIL', 'unknown')
 # Central registry for node discovery
 CENTRAL_REGISTRY_URL = os.environ.get('CENTRAL_REGISTRY_URL', 'https://unibos.recaria.org')
 
+# Node agent - in-process metrics sampler pushing compressed batches to the central registry
+NODE_AGENT_ENABLED = os.environ.get('NODE_AGENT_ENABLED', 'true').lower() == 'true'
+
 # Sync settings
 UNIBOS_SYNC_ENABLED = os.environ.get('SYNC_ENABLED', 'false').lower() == 'true'
 UNIBOS_SYNC_INTERVAL = int(os.environ.get('SYNC_INTERVAL', '300'))  # 5 minutes
+UNIBOS_SYNC_PEERS = [url for url in os.environ.get('SYNC_PEERS', CENTRAL_REGISTRY_URL or '').split(',') if url]
 
 # Privacy settings - Edge nodes keep data local by default
 UNIBOS_LOCAL_ONLY_MODULES = ['wimm', 'documents', 'cctv', 'personal_inflation']
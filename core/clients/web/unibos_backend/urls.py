@@ -61,6 +61,9 @@ urlpatterns = [
     # Node Registry API
     path(f'{API_V1_PREFIX}nodes/', include('core.system.nodes.backend.urls', namespace='nodes')),
 
+    # Node Sync API - change log deltas between nodes
+    path(f'{API_V1_PREFIX}sync/', include('core.base.sync.urls', namespace='sync')),
+
     # Movies Module - Movie/Series Collection Management
     path('movies/', include('modules.movies.backend.urls', namespace='movies')),
 
@@ -1,18 +1,25 @@
 """
 UNIBOS CLI Commands
 All available CLI commands for UNIBOS management
+
+Submodules are imported on attribute access, so loading one command
+(e.g. commands.db) does not import all of them.
 """
 
-from .deploy import deploy_group
-from .dev import dev_group
-from .db import db_group
-from .status import status_command
-from .release import release_group
+import importlib
+
+_EXPORTS = {
+    'deploy_group': '.deploy',
+    'dev_group': '.dev',
+    'db_group': '.db',
+    'status_command': '.status',
+    'release_group': '.release',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'deploy_group',
-    'dev_group',
-    'db_group',
-    'status_command',
-    'release_group',
-]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
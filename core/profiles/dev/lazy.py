@@ -0,0 +1,74 @@
+"""
+UNIBOS Lazy Click Group
+
+Subcommands are listed in a precomputed table of
+    name -> ('module.path:attribute', short help)
+and imported on first use. `--help` and tab completion are answered from
+the table, so they never import the command modules (deploy, db, release,
+platform detection, the manager CLI, ...); running a command imports only
+that command's module.
+"""
+
+import importlib
+from typing import Dict, Tuple
+
+import click
+from click.shell_completion import CompletionItem
+
+
+class LazyGroup(click.Group):
+    """
+    click.Group resolving subcommands from an entry-point table
+
+    Args:
+        lazy_commands: {name: ('package.module:attribute', short help)}
+    """
+
+    def __init__(self, *args, lazy_commands: Dict[str, Tuple[str, str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return self.commands.get(cmd_name)
+
+    def _load(self, cmd_name) -> click.Command:
+        target, _ = self.lazy_commands[cmd_name]
+        module_name, attribute = target.split(':')
+        command = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise click.ClickException(f"{target} is not a click command")
+        return command
+
+    def _short_help(self, cmd_name, limit: int = 45) -> str:
+        command = self.commands.get(cmd_name)
+        if command is not None:
+            return command.get_short_help_str(limit)
+        return self.lazy_commands[cmd_name][1]
+
+    def format_commands(self, ctx, formatter):
+        """Command list for --help, without importing unloaded commands"""
+        names = [
+            name for name in self.list_commands(ctx)
+            if name in self.lazy_commands or not self.commands[name].hidden
+        ]
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        with formatter.section("Commands"):
+            formatter.write_dl([(name, self._short_help(name, limit)) for name in names])
+
+    def shell_complete(self, ctx, incomplete):
+        """Subcommand completion from the table (the chosen command is loaded when completing its args)"""
+        results = [
+            CompletionItem(name, help=self._short_help(name))
+            for name in self.list_commands(ctx)
+            if name.startswith(incomplete)
+            and (name in self.lazy_commands or not self.commands[name].hidden)
+        ]
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
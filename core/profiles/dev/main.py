@@ -12,28 +12,38 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from core.profiles.dev.ui.splash import show_splash_screen, show_compact_header
-from core.profiles.dev.commands.deploy import deploy_group
-from core.profiles.dev.commands.dev import dev_group
-from core.profiles.dev.commands.db import db_group
-from core.profiles.dev.commands.status import status_command
-from core.profiles.dev.commands.git import git_group
-from core.profiles.dev.commands.platform import platform_command
-from core.profiles.dev.commands.release import release_group
-from core.profiles.dev.commands.help import help_command
+from core.profiles.dev.lazy import LazyGroup
 from core.version import __version__
 
-# Import manager profile CLI
-from core.profiles.manager.main import cli as manager_cli
-
-# Import individual dev commands for top-level access
-from core.profiles.dev.commands.dev import (
-    dev_run, dev_stop, dev_shell, dev_test,
-    dev_migrate, dev_makemigrations, dev_logs
-)
-
-
-@click.group()
+# Subcommands are imported on first use; --help and tab completion read
+# this table only. Keep the short help in sync with the command docstrings.
+LAZY_COMMANDS = {
+    # Command groups (full paths - backwards compatibility)
+    'deploy': ('core.profiles.dev.commands.deploy:deploy_group', 'deployment commands for UNIBOS servers'),
+    'dev': ('core.profiles.dev.commands.dev:dev_group', '💻 Development commands'),
+    'db': ('core.profiles.dev.commands.db:db_group', '🗄️ Database commands'),
+    'status': ('core.profiles.dev.commands.status:status_command', '📊 Show system status and health'),
+    'git': ('core.profiles.dev.commands.git:git_group', '🔀 Git repository management (dev/prod)'),
+    'platform': ('core.profiles.dev.commands.platform:platform_command', '🖥️ Show platform and hardware information'),
+    'release': ('core.profiles.dev.commands.release:release_group', '📦 Release and version management'),
+    'help': ('core.profiles.dev.commands.help:help_command', 'show comprehensive cli help and documentation'),
+
+    # Manager profile as a command group
+    'manager': ('core.profiles.manager.main:cli', '🎯 UNIBOS Manager CLI - Remote Management Tools'),
+
+    # Top-level shortcuts for common dev commands
+    # These allow: unibos-dev run instead of unibos-dev dev run
+    'run': ('core.profiles.dev.commands.dev:dev_run', 'Run ASGI development server (uvicorn)'),
+    'stop': ('core.profiles.dev.commands.dev:dev_stop', 'Stop development server'),
+    'shell': ('core.profiles.dev.commands.dev:dev_shell', 'Open Django shell'),
+    'test': ('core.profiles.dev.commands.dev:dev_test', 'Run tests'),
+    'migrate': ('core.profiles.dev.commands.dev:dev_migrate', 'Run database migrations'),
+    'makemigrations': ('core.profiles.dev.commands.dev:dev_makemigrations', 'Create new migrations'),
+    'logs': ('core.profiles.dev.commands.dev:dev_logs', 'View development logs'),
+}
+
+
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
 @click.version_option(version=__version__, prog_name='unibos-dev')
 @click.option('--no-splash', is_flag=True, help='Skip splash screen')
 @click.pass_context
@@ -57,40 +67,21 @@ def cli(ctx, no_splash):
     ctx.ensure_object(dict)
     ctx.obj['no_splash'] = no_splash
 
+    if no_splash:
+        return
+
+    from core.profiles.dev.ui.splash import show_splash_screen, show_compact_header
+
     # Show splash only for main command (no subcommand)
-    if ctx.invoked_subcommand is None and not no_splash:
+    if ctx.invoked_subcommand is None:
         show_splash_screen(quick=False)
         click.echo()
         click.echo("💡 Run 'unibos-dev --help' to see available commands")
-    elif ctx.invoked_subcommand and not no_splash:
+    else:
         # Show compact header for subcommands
         show_compact_header()
 
 
-# Register command groups (full paths - backwards compatibility)
-cli.add_command(deploy_group)
-cli.add_command(dev_group)
-cli.add_command(db_group)
-cli.add_command(status_command)
-cli.add_command(git_group)
-cli.add_command(platform_command)
-cli.add_command(release_group)
-cli.add_command(help_command)
-
-# Register manager profile as a command group
-cli.add_command(manager_cli, name='manager')
-
-# Register top-level shortcuts for common dev commands
-# These allow: unibos-dev run instead of unibos-dev dev run
-cli.add_command(dev_run, name='run')
-cli.add_command(dev_stop, name='stop')
-cli.add_command(dev_shell, name='shell')
-cli.add_command(dev_test, name='test')
-cli.add_command(dev_migrate, name='migrate')
-cli.add_command(dev_makemigrations, name='makemigrations')
-cli.add_command(dev_logs, name='logs')
-
-
 def main():
     """
     Main entry point for the CLI
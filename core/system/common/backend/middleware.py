@@ -274,8 +274,16 @@ class P2PDiscoveryMiddleware(MiddlewareMixin):
     """
     Handle P2P node discovery headers.
     Allows nodes to advertise themselves and discover peers.
+
+    Also starts mDNS LAN discovery (core.base.p2p) when UNIBOS_MDNS_ENABLED.
     """
 
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        from core.base.p2p.discovery import PeerDiscoveryService
+        if PeerDiscoveryService.is_enabled():
+            PeerDiscoveryService.get_instance().start()
+
     def process_request(self, request):
         """Check for peer discovery requests"""
         # Check if this is a peer discovery request
@@ -0,0 +1,239 @@
+"""
+Node Agent for UNIBOS
+
+In-process metrics agent for nodes reporting to a central registry
+(NODE_AGENT_ENABLED + CENTRAL_REGISTRY_URL):
+
+- A sampler thread takes a CPU/memory/disk/network sample every
+  NODE_AGENT_SAMPLE_SECONDS. psutil.cpu_percent(interval=None) measures
+  since the previous sample, so nothing blocks.
+- NodeRequestMetricsMiddleware counts requests and response times; worker
+  processes publish their counts to the cache and the sampling process
+  folds them into requests_per_minute/avg_response_time_ms
+- Samples are pushed as one gzip-compressed batch per NODE_AGENT_PUSH_SECONDS
+  over a keep-alive requests.Session. Slow or failed pushes back off
+  exponentially (samples are kept, bounded) up to NODE_AGENT_MAX_BACKOFF_SECONDS.
+
+Only one process per host samples and pushes (cache.add lock); the others
+only publish their request counters.
+"""
+
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REQUEST_COUNT_KEY = 'nodes:agent:requests'
+REQUEST_TIME_KEY = 'nodes:agent:response_ms'
+LEADER_KEY = 'nodes:agent:leader'
+
+
+def get_node_id():
+    """This node's UUID from the instance identity"""
+    from core.base.identity import get_instance_identity
+    return str(get_instance_identity().get_uuid())
+
+
+def collect_system_metrics(disk_path='/'):
+    """Non-blocking system snapshot (CPU is measured since the previous call)"""
+    import psutil
+
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage(disk_path)
+    network = psutil.net_io_counters()
+    return {
+        'cpu_percent': psutil.cpu_percent(interval=None),
+        'memory_percent': memory.percent,
+        'memory_used_mb': memory.used // (1024 * 1024),
+        'disk_percent': disk.percent,
+        'disk_used_gb': disk.used / (1024 ** 3),
+        'network_bytes_sent': network.bytes_sent,
+        'network_bytes_recv': network.bytes_recv,
+    }
+
+
+def _cache_incr(key, amount):
+    """Increment a shared counter, creating it on first use"""
+    if amount <= 0:
+        return
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.set(key, amount, None)
+
+
+class NodeAgent:
+    """
+    Rolling metrics sampler and batch pusher (singleton per process)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.central_url = getattr(settings, 'CENTRAL_REGISTRY_URL', None)
+        self.sample_seconds = getattr(settings, 'NODE_AGENT_SAMPLE_SECONDS', 10)
+        self.push_seconds = getattr(settings, 'NODE_AGENT_PUSH_SECONDS', 60)
+        self.max_backoff = getattr(settings, 'NODE_AGENT_MAX_BACKOFF_SECONDS', 900)
+        self.slow_push_seconds = getattr(settings, 'NODE_AGENT_SLOW_PUSH_SECONDS', 5)
+        self.samples = deque(maxlen=getattr(settings, 'NODE_AGENT_MAX_BUFFERED_SAMPLES', 1000))
+
+        self._token = f'{os.getpid()}:{id(self)}'
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._session = None
+        self._node_id = None
+
+        # Local request counters, published to the cache every sample
+        self._request_count = 0
+        self._request_time_ms = 0.0
+
+        self._push_interval = self.push_seconds
+        self._next_push_at = 0.0
+        self._last_sample_at = None
+
+    @classmethod
+    def get_instance(cls) -> 'NodeAgent':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def is_enabled():
+        return bool(getattr(settings, 'NODE_AGENT_ENABLED', False) and getattr(settings, 'CENTRAL_REGISTRY_URL', None))
+
+    def start(self):
+        """Start the sampler thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='node-agent', daemon=True)
+            self._thread.start()
+            logger.info("node agent started")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def record_request(self, duration_ms):
+        """Count one handled request (called from middleware, no I/O)"""
+        with self._lock:
+            self._request_count += 1
+            self._request_time_ms += duration_ms
+
+    def _run(self):
+        import psutil
+        psutil.cpu_percent(interval=None)  # Prime the CPU counter; the first reading is meaningless
+        self._next_push_at = time.monotonic() + self.push_seconds
+        while not self._stop_event.wait(self.sample_seconds):
+            try:
+                self._publish_requests()
+                if self._is_leader():
+                    self._sample()
+                    if time.monotonic() >= self._next_push_at:
+                        self._push()
+            except Exception as e:
+                logger.warning(f"node agent cycle failed: {e}")
+
+    def _publish_requests(self):
+        with self._lock:
+            count, total_ms = self._request_count, self._request_time_ms
+            self._request_count, self._request_time_ms = 0, 0.0
+        _cache_incr(REQUEST_COUNT_KEY, count)
+        _cache_incr(REQUEST_TIME_KEY, int(total_ms))
+
+    def _is_leader(self):
+        """Hold the per-host sampling lock (renewed every cycle)"""
+        ttl = self.sample_seconds * 3
+        if cache.add(LEADER_KEY, self._token, ttl):
+            return True
+        if cache.get(LEADER_KEY) == self._token:
+            cache.touch(LEADER_KEY, ttl)
+            return True
+        return False
+
+    def _take_request_counters(self):
+        """Read and subtract the shared counters (increments made meanwhile are kept)"""
+        values = cache.get_many([REQUEST_COUNT_KEY, REQUEST_TIME_KEY])
+        count = values.get(REQUEST_COUNT_KEY) or 0
+        total_ms = values.get(REQUEST_TIME_KEY) or 0
+        if count:
+            cache.decr(REQUEST_COUNT_KEY, count)
+        if total_ms:
+            cache.decr(REQUEST_TIME_KEY, total_ms)
+        return count, total_ms
+
+    def _sample(self):
+        now = time.monotonic()
+        elapsed = now - self._last_sample_at if self._last_sample_at else self.sample_seconds
+        self._last_sample_at = now
+
+        sample = collect_system_metrics()
+        count, total_ms = self._take_request_counters()
+        sample.update({
+            'recorded_at': timezone.now().isoformat(),
+            'requests_per_minute': int(round(count * 60 / elapsed)) if elapsed > 0 else 0,
+            'avg_response_time_ms': total_ms / count if count else 0,
+        })
+        self.samples.append(sample)
+
+    def _push(self):
+        if not self.samples:
+            self._next_push_at = time.monotonic() + self.push_seconds
+            return
+
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()  # Keep-alive connection to the central registry
+        if self._node_id is None:
+            self._node_id = get_node_id()
+
+        batch = list(self.samples)
+        body = gzip.compress(json.dumps({'samples': batch}).encode('utf-8'))
+        started = time.monotonic()
+        try:
+            response = self._session.post(
+                f"{self.central_url}/api/v1/nodes/{self._node_id}/heartbeat-batch/",
+                data=body,
+                headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+                timeout=max(self.slow_push_seconds * 2, 10),
+            )
+            ok = response.status_code == 200
+            if not ok:
+                logger.warning(f"Heartbeat batch failed: {response.status_code} - {response.text[:200]}")
+        except requests.RequestException as e:
+            ok = False
+            logger.warning(f"Could not push heartbeat batch to central registry: {e}")
+        duration = time.monotonic() - started
+
+        if ok:
+            for _ in range(len(batch)):
+                self.samples.popleft()
+
+        if ok and duration < self.slow_push_seconds:
+            self._push_interval = self.push_seconds
+        else:
+            # Central registry is slow or unreachable: push less often, keep buffered samples
+            self._push_interval = min(self._push_interval * 2, self.max_backoff)
+            logger.info(f"node agent backing off, next push in ~{self._push_interval}s")
+        jitter = random.uniform(0, self.sample_seconds)
+        self._next_push_at = time.monotonic() + self._push_interval + jitter
+
+
+def get_node_agent() -> NodeAgent:
+    return NodeAgent.get_instance()
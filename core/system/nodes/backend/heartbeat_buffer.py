@@ -0,0 +1,178 @@
+"""
+Heartbeat Ingestion Buffer for Node Registry
+
+Heartbeats are queued in-process and flushed by a background thread every
+NODE_HEARTBEAT_FLUSH_SECONDS (or NODE_HEARTBEAT_BATCH_SIZE heartbeats):
+
+- NodeMetric rows for the whole batch are written with one bulk_create
+- last_seen/last_heartbeat/status are set with one UPDATE per flush (per-node
+  timestamps via CASE)
+- 'online' events for nodes that were offline are bulk-created
+
+Known node ids are cached per process, so accepting a heartbeat needs no
+query in the common case.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from queue import Empty, Full, Queue
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import Node, NodeEvent, NodeMetric, NodeStatus
+
+logger = logging.getLogger(__name__)
+
+KNOWN_NODES_TTL = 60  # Seconds before the known node id set is reloaded
+
+
+class HeartbeatBuffer:
+    """
+    Buffered heartbeat writer (singleton per process)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.flush_seconds = getattr(settings, 'NODE_HEARTBEAT_FLUSH_SECONDS', 5)
+        self.batch_size = getattr(settings, 'NODE_HEARTBEAT_BATCH_SIZE', 500)
+        self.queue = Queue(maxsize=getattr(settings, 'NODE_HEARTBEAT_QUEUE_SIZE', 10000))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._known_nodes = set()
+        self._known_loaded_at = 0.0
+
+    @classmethod
+    def get_instance(cls) -> 'HeartbeatBuffer':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.flush)
+            return cls._instance
+
+    def start(self):
+        """Start the flush thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='node-heartbeat-flush', daemon=True)
+            self._thread.start()
+            logger.info("heartbeat buffer started")
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def is_known_node(self, node_id) -> bool:
+        """True if node_id is a registered node (cached set, single lookup on miss)"""
+        now = time.monotonic()
+        if now - self._known_loaded_at > KNOWN_NODES_TTL:
+            self._known_nodes = {str(pk) for pk in Node.objects.values_list('id', flat=True)}
+            self._known_loaded_at = now
+        try:
+            node_id = str(uuid.UUID(str(node_id)))
+        except ValueError:
+            return False
+        if node_id in self._known_nodes:
+            return True
+        if Node.objects.filter(id=node_id).exists():
+            self._known_nodes.add(node_id)
+            return True
+        return False
+
+    def add(self, node_id, metrics=None, received_at=None) -> bool:
+        """Queue a heartbeat (non-blocking); returns False if the buffer is full"""
+        self.start()
+        try:
+            self.queue.put_nowait((str(node_id), metrics, received_at or timezone.now()))
+        except Full:
+            logger.warning("heartbeat buffer full, dropping heartbeat")
+            return False
+        if self.queue.qsize() >= self.batch_size:
+            self._wake_event.set()  # Flush early
+        return True
+
+    def flush(self) -> int:
+        """Write all queued heartbeats; returns the number flushed"""
+        with self._flush_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            return len(batch)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_seconds)
+            self._wake_event.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"heartbeat flush failed: {e}")
+
+    def _write_batch(self, batch):
+        latest = {}
+        metrics = []
+        for node_id, data, received_at in batch:
+            latest[node_id] = max(latest.get(node_id, received_at), received_at)
+            if data is not None:
+                metrics.append(NodeMetric(node_id=node_id, recorded_at=received_at, **data))
+
+        # Nodes deleted since their heartbeat was queued are dropped
+        nodes = {
+            str(node_id): (hostname, node_status)
+            for node_id, hostname, node_status in Node.objects.filter(
+                id__in=list(latest)
+            ).values_list('id', 'hostname', 'status')
+        }
+        node_ids = list(nodes)
+        if not node_ids:
+            return
+        metrics = [metric for metric in metrics if str(metric.node_id) in nodes]
+        latest = {node_id: latest[node_id] for node_id in node_ids}
+
+        if metrics:
+            NodeMetric.objects.bulk_create(metrics, batch_size=self.batch_size)
+
+        # One statement for the whole batch; each node gets its own newest heartbeat time
+        seen_at = Case(
+            *[When(id=node_id, then=Value(received_at)) for node_id, received_at in latest.items()],
+            output_field=DateTimeField(),
+        )
+        Node.objects.filter(id__in=node_ids).update(
+            last_seen=seen_at,
+            last_heartbeat=seen_at,
+            status=NodeStatus.ONLINE,
+        )
+
+        came_online = [
+            NodeEvent(node_id=node_id, event_type='online', message=f'Node {hostname} came online')
+            for node_id, (hostname, node_status) in nodes.items()
+            if node_status != NodeStatus.ONLINE
+        ]
+        if came_online:
+            NodeEvent.objects.bulk_create(came_online)
+
+        logger.debug(f"flushed {len(batch)} heartbeats from {len(node_ids)} nodes")
+
+
+def get_heartbeat_buffer() -> HeartbeatBuffer:
+    return HeartbeatBuffer.get_instance()
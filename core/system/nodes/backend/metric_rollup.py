@@ -0,0 +1,198 @@
+"""
+Node Metric Rollups
+
+Downsamples raw NodeMetric rows into NodeMetricRollup tiers:
+
+    raw NodeMetric -> 1m -> 1h -> 1d
+
+Each tier keeps a write-time cursor (NodeMetricRollupCursor). A run finds
+the (node, bucket) pairs with source rows written since the cursor and
+rebuilds just those buckets with one GROUP BY query, so backdated samples
+from a batching agent are rolled up like any other, and the task is
+idempotent and cheap to run every minute. Averages are weighted by
+sample_count when rolling up from a lower tier.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import MetricResolution, NodeMetric, NodeMetricRollup, NodeMetricRollupCursor
+
+logger = logging.getLogger(__name__)
+
+# Rollup field -> (raw NodeMetric field, aggregate kind)
+ROLLUP_FIELDS = {
+    'cpu_avg': ('cpu_percent', 'avg'),
+    'cpu_max': ('cpu_percent', 'max'),
+    'memory_avg': ('memory_percent', 'avg'),
+    'memory_max': ('memory_percent', 'max'),
+    'memory_used_mb': ('memory_used_mb', 'avg'),
+    'disk_avg': ('disk_percent', 'avg'),
+    'disk_used_gb': ('disk_used_gb', 'avg'),
+    'network_bytes_sent': ('network_bytes_sent', 'max'),
+    'network_bytes_recv': ('network_bytes_recv', 'max'),
+    'requests_per_minute': ('requests_per_minute', 'avg'),
+    'avg_response_time_ms': ('avg_response_time_ms', 'avg'),
+}
+
+# Tier -> (source tier or None for raw, truncation function)
+TIERS = {
+    MetricResolution.MINUTE: (None, TruncMinute),
+    MetricResolution.HOUR: (MetricResolution.MINUTE, TruncHour),
+    MetricResolution.DAY: (MetricResolution.HOUR, TruncDay),
+}
+
+# Upper bound of a bucket's length (a day bucket can be 25h across a DST change)
+BUCKET_SPANS = {
+    MetricResolution.MINUTE: timedelta(minutes=1),
+    MetricResolution.HOUR: timedelta(hours=1),
+    MetricResolution.DAY: timedelta(hours=25),
+}
+
+# Seconds re-read behind each cursor on every run
+WATERMARK_OVERLAP_SECONDS = 120
+
+DEFAULT_RETENTION_DAYS = {
+    MetricResolution.MINUTE: 7,
+    MetricResolution.HOUR: 90,
+    MetricResolution.DAY: 730,
+}
+
+
+def get_retention_days(resolution):
+    retention = getattr(settings, 'NODE_METRIC_ROLLUP_RETENTION_DAYS', {})
+    return retention.get(resolution, DEFAULT_RETENTION_DAYS[resolution])
+
+
+def _aggregates(from_raw):
+    """
+    Aggregate expressions for one tier's GROUP BY
+
+    Keys are prefixed so they do not shadow the source fields they aggregate.
+    """
+    if from_raw:
+        aggregates = {'agg_sample_count': Count('id')}
+        for field, (raw_field, kind) in ROLLUP_FIELDS.items():
+            aggregates[f'agg_{field}'] = Avg(raw_field) if kind == 'avg' else Max(raw_field)
+        return aggregates
+
+    aggregates = {'agg_sample_count': Sum('sample_count')}
+    for field, (_, kind) in ROLLUP_FIELDS.items():
+        if kind == 'avg':
+            # Weighted sum; divided by sample_count after the query
+            aggregates[f'agg_{field}'] = Sum(F(field) * F('sample_count'), output_field=FloatField())
+        else:
+            aggregates[f'agg_{field}'] = Max(field)
+    return aggregates
+
+
+def _touched_buckets(source, time_field, changed_field, trunc, since):
+    """
+    (node_id, bucket) pairs with source rows written after `since`, and the
+    newest write time among them
+    """
+    changed = source
+    if since is not None:
+        changed = changed.filter(**{f'{changed_field}__gt': since})
+
+    newest = changed.aggregate(newest=Max(changed_field))['newest']
+    if newest is None:
+        return set(), None
+    pairs = changed.annotate(bucket=trunc(time_field)).values_list('node_id', 'bucket').distinct().order_by()
+    return set(pairs), newest
+
+
+def rollup_tier(resolution):
+    """
+    Rebuild the buckets of one tier that have new source rows
+
+    Source rows are picked up by write time (NodeMetric.inserted_at or the
+    lower tier's updated_at) past this tier's cursor, not by their bucket
+    time, so late and backdated samples still land in their buckets. Each
+    touched bucket is re-aggregated in full from its source rows.
+
+    Returns:
+        Number of rollup rows written
+    """
+    source_tier, trunc = TIERS[resolution]
+
+    if source_tier is None:
+        source = NodeMetric.objects.all()
+        time_field, changed_field = 'recorded_at', 'inserted_at'
+    else:
+        source = NodeMetricRollup.objects.filter(resolution=source_tier)
+        time_field, changed_field = 'bucket_start', 'updated_at'
+
+    cursor = NodeMetricRollupCursor.objects.filter(resolution=resolution).first()
+    # Re-read a short overlap so rows from transactions that committed late are not skipped
+    since = cursor.watermark - timedelta(seconds=WATERMARK_OVERLAP_SECONDS) if cursor else None
+
+    touched, newest = _touched_buckets(source, time_field, changed_field, trunc, since)
+    if not touched:
+        return 0
+
+    # One range per node covering its touched buckets; untouched buckets in range are discarded below
+    ranges = {}
+    for node_id, bucket in touched:
+        low, high = ranges.get(node_id, (bucket, bucket))
+        ranges[node_id] = (min(low, bucket), max(high, bucket))
+    span = BUCKET_SPANS[resolution]
+    in_range = Q()
+    for node_id, (low, high) in ranges.items():
+        in_range |= Q(node_id=node_id, **{f'{time_field}__gte': low, f'{time_field}__lt': high + span})
+
+    rows = source.filter(in_range).annotate(
+        bucket=trunc(time_field)
+    ).values('node_id', 'bucket').annotate(**_aggregates(source_tier is None)).order_by()
+
+    rollups = []
+    for row in rows:
+        if (row['node_id'], row['bucket']) not in touched:
+            continue
+        count = row['agg_sample_count'] or 0
+        values = {}
+        for field, (_, kind) in ROLLUP_FIELDS.items():
+            value = row[f'agg_{field}'] or 0
+            if kind == 'avg' and source_tier is not None:
+                value = value / count if count else 0
+            values[field] = value
+        rollups.append(NodeMetricRollup(
+            node_id=row['node_id'],
+            resolution=resolution,
+            bucket_start=row['bucket'],
+            sample_count=count,
+            **values,
+        ))
+
+    replaced = Q()
+    for node_id in ranges:
+        replaced |= Q(node_id=node_id, bucket_start__in=[bucket for node, bucket in touched if node == node_id])
+
+    with transaction.atomic():
+        NodeMetricRollup.objects.filter(replaced, resolution=resolution).delete()
+        NodeMetricRollup.objects.bulk_create(rollups, batch_size=500)
+        NodeMetricRollupCursor.objects.update_or_create(resolution=resolution, defaults={'watermark': newest})
+    return len(rollups)
+
+
+def rollup_metrics():
+    """Rebuild changed buckets of all tiers in order (1m, 1h, 1d); returns {resolution: rows written}"""
+    return {resolution: rollup_tier(resolution) for resolution in TIERS}
+
+
+def prune_rollups(now=None):
+    """Drop rollups past their tier's retention; returns {resolution: rows deleted}"""
+    now = now or timezone.now()
+    deleted = {}
+    for resolution in TIERS:
+        cutoff = now - timedelta(days=get_retention_days(resolution))
+        deleted[resolution] = NodeMetricRollup.objects.filter(
+            resolution=resolution, bucket_start__lt=cutoff
+        ).delete()[0]
+    return deleted
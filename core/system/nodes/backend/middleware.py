@@ -0,0 +1,28 @@
+"""
+Middleware for Node Registry
+
+Feeds request counts and response times into the node agent.
+"""
+
+import time
+
+from .agent import NodeAgent
+
+
+class NodeRequestMetricsMiddleware:
+    """Count requests for the node agent's requests_per_minute/avg_response_time_ms"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.agent = NodeAgent.get_instance() if NodeAgent.is_enabled() else None
+        if self.agent:
+            self.agent.start()
+
+    def __call__(self, request):
+        if self.agent is None:
+            return self.get_response(request)
+
+        started = time.monotonic()
+        response = self.get_response(request)
+        self.agent.record_request((time.monotonic() - started) * 1000)
+        return response
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-16 14:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nodes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='nodemetric',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='NodeMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 Minute'), ('1h', '1 Hour'), ('1d', '1 Day')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('cpu_avg', models.FloatField(default=0)),
+                ('cpu_max', models.FloatField(default=0)),
+                ('memory_avg', models.FloatField(default=0)),
+                ('memory_max', models.FloatField(default=0)),
+                ('memory_used_mb', models.FloatField(default=0)),
+                ('disk_avg', models.FloatField(default=0)),
+                ('disk_used_gb', models.FloatField(default=0)),
+                ('network_bytes_sent', models.BigIntegerField(default=0)),
+                ('network_bytes_recv', models.BigIntegerField(default=0)),
+                ('requests_per_minute', models.FloatField(default=0)),
+                ('avg_response_time_ms', models.FloatField(default=0)),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to='nodes.node')),
+            ],
+            options={
+                'verbose_name': 'Node Metric Rollup',
+                'verbose_name_plural': 'Node Metric Rollups',
+                'db_table': 'node_metric_rollups',
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['resolution', 'bucket_start'], name='node_metric_resolut_83a112_idx')],
+                'unique_together': {('node', 'resolution', 'bucket_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nodes', '0002_nodemetricrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nodemetric',
+            name='inserted_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='nodemetricrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='NodeMetricRollupCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 Minute'), ('1h', '1 Hour'), ('1d', '1 Day')], max_length=2, unique=True)),
+                ('watermark', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Node Metric Rollup Cursor',
+                'verbose_name_plural': 'Node Metric Rollup Cursors',
+                'db_table': 'node_metric_rollup_cursors',
+            },
+        ),
+    ]
@@ -173,8 +173,10 @@ class NodeMetric(models.Model):
         related_name='metrics'
     )
 
-    # Timestamp
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # Timestamp (set by the heartbeat buffer to the time the heartbeat arrived)
+    recorded_at = models.DateTimeField(default=timezone.now)
+    # Write time; rollups pick up new rows by this, so backdated samples are not missed
+    inserted_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     # CPU metrics
     cpu_percent = models.FloatField(default=0)
@@ -208,6 +210,85 @@ class NodeMetric(models.Model):
         return f"{self.node.hostname} @ {self.recorded_at}"
 
 
+class MetricResolution(models.TextChoices):
+    """Downsampled metric tiers"""
+    MINUTE = '1m', '1 Minute'
+    HOUR = '1h', '1 Hour'
+    DAY = '1d', '1 Day'
+
+
+class NodeMetricRollup(models.Model):
+    """
+    Downsampled node metrics
+
+    One row per node, resolution and bucket. 1m rollups are built from raw
+    NodeMetric rows, 1h from 1m and 1d from 1h (see metric_rollup.py); each
+    tier has its own retention.
+    """
+    node = models.ForeignKey(
+        Node,
+        on_delete=models.CASCADE,
+        related_name='metric_rollups'
+    )
+    resolution = models.CharField(max_length=2, choices=MetricResolution.choices)
+    bucket_start = models.DateTimeField()
+    sample_count = models.PositiveIntegerField(default=0)
+
+    # CPU / memory (average and peak)
+    cpu_avg = models.FloatField(default=0)
+    cpu_max = models.FloatField(default=0)
+    memory_avg = models.FloatField(default=0)
+    memory_max = models.FloatField(default=0)
+    memory_used_mb = models.FloatField(default=0)
+
+    # Disk (average)
+    disk_avg = models.FloatField(default=0)
+    disk_used_gb = models.FloatField(default=0)
+
+    # Network counters (highest value seen in the bucket)
+    network_bytes_sent = models.BigIntegerField(default=0)
+    network_bytes_recv = models.BigIntegerField(default=0)
+
+    # Request metrics (average)
+    requests_per_minute = models.FloatField(default=0)
+    avg_response_time_ms = models.FloatField(default=0)
+
+    # Write time; the next tier picks up rebuilt buckets by this
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        db_table = 'node_metric_rollups'
+        verbose_name = 'Node Metric Rollup'
+        verbose_name_plural = 'Node Metric Rollups'
+        ordering = ['-bucket_start']
+        unique_together = [['node', 'resolution', 'bucket_start']]
+        indexes = [
+            models.Index(fields=['resolution', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.node.hostname} {self.resolution} @ {self.bucket_start}"
+
+
+class NodeMetricRollupCursor(models.Model):
+    """
+    Per-tier rollup watermark
+
+    Write time of the newest source row (raw metric or lower tier rollup)
+    already folded into this tier.
+    """
+    resolution = models.CharField(max_length=2, choices=MetricResolution.choices, unique=True)
+    watermark = models.DateTimeField()
+
+    class Meta:
+        db_table = 'node_metric_rollup_cursors'
+        verbose_name = 'Node Metric Rollup Cursor'
+        verbose_name_plural = 'Node Metric Rollup Cursors'
+
+    def __str__(self):
+        return f"{self.resolution} @ {self.watermark}"
+
+
 class NodeEvent(models.Model):
     """
     Node events for audit logging
@@ -3,7 +3,7 @@ Serializers for Node Registry API
 """
 
 from rest_framework import serializers
-from .models import Node, NodeCapability, NodeMetric, NodeEvent
+from .models import Node, NodeCapability, NodeMetric, NodeMetricRollup, NodeEvent
 
 
 class NodeCapabilitySerializer(serializers.ModelSerializer):
@@ -34,6 +34,21 @@ class NodeMetricSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'recorded_at']
 
 
+class NodeMetricRollupSerializer(serializers.ModelSerializer):
+    """Serializer for downsampled node metrics"""
+
+    class Meta:
+        model = NodeMetricRollup
+        fields = [
+            'resolution', 'bucket_start', 'sample_count',
+            'cpu_avg', 'cpu_max', 'memory_avg', 'memory_max', 'memory_used_mb',
+            'disk_avg', 'disk_used_gb',
+            'network_bytes_sent', 'network_bytes_recv',
+            'requests_per_minute', 'avg_response_time_ms',
+        ]
+        read_only_fields = fields
+
+
 class NodeEventSerializer(serializers.ModelSerializer):
     """Serializer for node events"""
     event_type_display = serializers.CharField(
@@ -142,6 +157,8 @@ class NodeHeartbeatSerializer(serializers.Serializer):
     memory_used_mb = serializers.IntegerField(required=False, default=0)
     disk_percent = serializers.FloatField(required=False, default=0)
     disk_used_gb = serializers.FloatField(required=False, default=0)
+    network_bytes_sent = serializers.IntegerField(required=False, default=0, min_value=0)
+    network_bytes_recv = serializers.IntegerField(required=False, default=0, min_value=0)
     requests_per_minute = serializers.IntegerField(required=False, default=0)
     avg_response_time_ms = serializers.FloatField(required=False, default=0)
 
@@ -92,7 +92,8 @@ def cleanup_stale_metrics(self):
     Clean up old node metrics to prevent database bloat.
 
     Runs daily via Celery Beat.
-    Removes metrics older than 7 days by default.
+    Removes raw metrics older than 7 days by default, and rollups past
+    NODE_METRIC_ROLLUP_RETENTION_DAYS per tier.
     """
     from .models import NodeMetric
 
@@ -104,11 +105,19 @@ def cleanup_stale_metrics(self):
             recorded_at__lt=cutoff_date
         ).delete()
 
-        logger.info(f"Cleaned up {deleted_count} old node metrics (older than {retention_days} days)")
+        # Downsampled tiers have their own retention
+        from .metric_rollup import prune_rollups
+        deleted_rollups = prune_rollups()
+
+        logger.info(
+            f"Cleaned up {deleted_count} old node metrics (older than {retention_days} days) "
+            f"and {sum(deleted_rollups.values())} rollups"
+        )
 
         return {
             'status': 'success',
             'deleted_metrics': deleted_count,
+            'deleted_rollups': deleted_rollups,
             'retention_days': retention_days
         }
 
@@ -117,6 +126,25 @@ def cleanup_stale_metrics(self):
         raise self.retry(exc=e)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def rollup_node_metrics(self):
+    """
+    Downsample raw node metrics into 1m/1h/1d rollups.
+
+    Runs every minute via Celery Beat.
+    """
+    from .metric_rollup import rollup_metrics
+
+    try:
+        written = rollup_metrics()
+        logger.debug(f"Node metric rollups written: {written}")
+        return {'status': 'success', 'rollups': written}
+
+    except Exception as e:
+        logger.error(f"Error rolling up node metrics: {e}")
+        raise self.retry(exc=e)
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def cleanup_old_events(self):
     """
@@ -146,16 +174,30 @@ def cleanup_old_events(self):
         raise self.retry(exc=e)
 
 
+_central_session = None
+
+
+def _get_central_session():
+    """Keep-alive session to the central registry, reused across heartbeats"""
+    global _central_session
+    if _central_session is None:
+        import requests
+        _central_session = requests.Session()
+    return _central_session
+
+
 @shared_task
 def send_heartbeat_to_central():
     """
     Send heartbeat from this node to the central registry.
 
     Runs every minute via Celery Beat.
-    Used when this node is not the central server.
+    Used when this node is not the central server. When the node agent is
+    enabled (NODE_AGENT_ENABLED) it pushes metric batches itself and this
+    task does nothing.
     """
     import requests
-    import psutil
+    from .agent import NodeAgent, collect_system_metrics, get_node_id
 
     try:
         # Get central server URL from settings
@@ -164,26 +206,21 @@ def send_heartbeat_to_central():
             logger.debug("No central registry configured, skipping heartbeat")
             return {'status': 'skipped', 'reason': 'no_central_registry'}
 
+        if NodeAgent.is_enabled():
+            return {'status': 'skipped', 'reason': 'node_agent'}
+
         # Get this node's identity
         try:
-            from core.base.identity import get_node_identity
-            identity = get_node_identity()
-            node_id = str(identity.node_id)
+            node_id = get_node_id()
         except Exception as e:
             logger.warning(f"Could not get node identity: {e}")
             return {'status': 'error', 'reason': 'no_identity'}
 
-        # Collect metrics
-        metrics = {
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'memory_percent': psutil.virtual_memory().percent,
-            'memory_used_mb': psutil.virtual_memory().used // (1024 * 1024),
-            'disk_percent': psutil.disk_usage('/').percent,
-            'disk_used_gb': psutil.disk_usage('/').used / (1024 ** 3),
-        }
+        # Collect metrics (CPU is measured since the previous heartbeat in this worker; never blocks)
+        metrics = collect_system_metrics()
 
         # Send heartbeat
-        response = requests.post(
+        response = _get_central_session().post(
             f"{central_url}/api/v1/nodes/{node_id}/heartbeat/",
             json=metrics,
             timeout=10
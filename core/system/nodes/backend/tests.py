@@ -0,0 +1,103 @@
+"""
+Tests for node metric ingestion and rollups
+"""
+
+import gzip
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .heartbeat_buffer import HeartbeatBuffer
+from .metric_rollup import rollup_metrics
+from .models import MetricResolution, Node, NodeMetricRollup
+from .views import BatchTooLarge, gunzip_limited
+
+
+class MetricRollupTests(TestCase):
+
+    def setUp(self):
+        self.buffer = HeartbeatBuffer()
+        self.node = Node.objects.create(hostname='edge-1', platform='linux')
+        self.other = Node.objects.create(hostname='edge-2', platform='linux')
+        self.now = timezone.now().replace(second=30, microsecond=0)
+
+    def ingest(self, node, recorded_at, cpu):
+        self.buffer._write_batch([(str(node.id), {'cpu_percent': cpu}, recorded_at)])
+
+    def rollup(self, node, resolution):
+        return NodeMetricRollup.objects.filter(node=node, resolution=resolution)
+
+    def test_backdated_batch_after_rollup_reaches_every_tier(self):
+        self.ingest(self.other, self.now, 10)
+        rollup_metrics()
+
+        # Agent flushes samples it held back under backoff, older than edge-2's newest bucket
+        backdated = self.now - timedelta(minutes=10)
+        self.ingest(self.node, backdated, 40)
+        self.ingest(self.node, backdated + timedelta(seconds=5), 60)
+        rollup_metrics()
+
+        minute = self.rollup(self.node, MetricResolution.MINUTE).get()
+        self.assertEqual(minute.sample_count, 2)
+        self.assertEqual(minute.cpu_avg, 50)
+        self.assertEqual(minute.cpu_max, 60)
+        for resolution in (MetricResolution.HOUR, MetricResolution.DAY):
+            self.assertEqual(self.rollup(self.node, resolution).get().sample_count, 2)
+
+    def test_late_sample_rebuilds_an_existing_bucket(self):
+        self.ingest(self.node, self.now, 20)
+        rollup_metrics()
+
+        self.ingest(self.node, self.now + timedelta(seconds=1), 80)
+        rollup_metrics()
+
+        minute = self.rollup(self.node, MetricResolution.MINUTE).get()
+        self.assertEqual(minute.sample_count, 2)
+        self.assertEqual(minute.cpu_avg, 50)
+        self.assertEqual(self.rollup(self.node, MetricResolution.DAY).get().cpu_max, 80)
+
+    def test_rerun_without_new_rows_keeps_rollups(self):
+        self.ingest(self.node, self.now, 30)
+        rollup_metrics()
+        rollup_metrics()
+
+        self.assertEqual(self.rollup(self.node, MetricResolution.MINUTE).count(), 1)
+        self.assertEqual(self.rollup(self.node, MetricResolution.HOUR).get().sample_count, 1)
+
+
+class HeartbeatBufferTests(TestCase):
+
+    def test_each_node_keeps_its_own_last_seen(self):
+        silent = Node.objects.create(hostname='silent', platform='linux')
+        busy = Node.objects.create(hostname='busy', platform='linux')
+        now = timezone.now()
+        earlier = now - timedelta(minutes=5)
+
+        HeartbeatBuffer()._write_batch([
+            (str(silent.id), None, earlier),
+            (str(busy.id), None, now),
+        ])
+
+        silent.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual(silent.last_seen, earlier)
+        self.assertEqual(busy.last_heartbeat, now)
+
+
+class GzipBatchLimitTests(SimpleTestCase):
+
+    def test_round_trip_within_limit(self):
+        body = b'{"samples": []}' * 10
+        self.assertEqual(gunzip_limited(gzip.compress(body), max_bytes=1024), body)
+
+    def test_bomb_is_refused_without_inflating(self):
+        bomb = gzip.compress(b'\0' * (8 * 1024 * 1024))
+        with self.assertRaises(BatchTooLarge):
+            gunzip_limited(bomb, max_bytes=64 * 1024)
+
+    def test_truncated_body_is_invalid(self):
+        body = gzip.compress(b'x' * 1000)
+        with self.assertRaises(ValueError) as ctx:
+            gunzip_limited(body[:-12], max_bytes=64 * 1024)
+        self.assertNotIsInstance(ctx.exception, BatchTooLarge)
@@ -4,24 +4,48 @@ API Views for Node Registry
 Provides endpoints for node registration, discovery, and management.
 """
 
+import json
+import zlib
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Count
 
-from .models import Node, NodeCapability, NodeMetric, NodeEvent, NodeStatus, NodeType
+from .models import Node, NodeCapability, NodeMetric, NodeEvent, NodeStatus, NodeType, MetricResolution
+from .heartbeat_buffer import get_heartbeat_buffer
 from .serializers import (
     NodeSerializer,
     NodeDetailSerializer,
     NodeRegistrationSerializer,
     NodeHeartbeatSerializer,
     NodeMetricSerializer,
+    NodeMetricRollupSerializer,
     NodeEventSerializer,
     NodeSummarySerializer,
 )
 
+MAX_BATCH_SAMPLES = 1000  # Samples accepted per heartbeat batch
+MAX_BATCH_BYTES = 4 * 1024 * 1024  # Decompressed heartbeat batch size limit
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def gunzip_limited(body: bytes, max_bytes: int = MAX_BATCH_BYTES) -> bytes:
+    """Decompress a gzip body, refusing to inflate it past max_bytes"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = decompressor.decompress(body, max_bytes)
+    if not decompressor.eof:
+        if decompressor.unconsumed_tail or len(data) >= max_bytes:
+            raise BatchTooLarge(f'Decompressed batch exceeds {max_bytes} bytes')
+        raise ValueError('Truncated gzip body')
+    return data
+
 
 class NodeViewSet(viewsets.ModelViewSet):
     """
@@ -43,7 +67,7 @@ class NodeViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         # Allow unauthenticated registration and heartbeat for nodes
-        if self.action in ['register', 'heartbeat', 'discover']:
+        if self.action in ['register', 'heartbeat', 'heartbeat_batch', 'discover']:
             return [AllowAny()]
         return super().get_permissions()
 
@@ -123,32 +147,72 @@ class NodeViewSet(viewsets.ModelViewSet):
 
         POST /api/v1/nodes/{id}/heartbeat/
         """
-        try:
-            node = Node.objects.get(id=id)
-        except Node.DoesNotExist:
+        buffer = get_heartbeat_buffer()
+        if not buffer.is_known_node(id):
             return Response(
                 {'error': 'Node not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Update heartbeat
-        was_offline = node.status != NodeStatus.ONLINE
-        node.update_heartbeat()
-
-        # Store metrics if provided
+        # Queue heartbeat + metrics; the buffer bulk-writes them every few seconds
         serializer = NodeHeartbeatSerializer(data=request.data)
-        if serializer.is_valid():
-            NodeMetric.objects.create(node=node, **serializer.validated_data)
+        metrics = serializer.validated_data if serializer.is_valid() else None
+        received_at = timezone.now()
+        buffer.add(id, metrics, received_at)
 
-        # Log if node came back online
-        if was_offline:
-            NodeEvent.objects.create(
-                node=node,
-                event_type='online',
-                message=f'Node {node.hostname} came online',
+        return Response({'status': 'ok', 'last_seen': received_at})
+
+    @action(detail=True, methods=['post'], url_path='heartbeat-batch')
+    def heartbeat_batch(self, request, id=None):
+        """
+        Receive a batch of metric samples from a node agent
+
+        POST /api/v1/nodes/{id}/heartbeat-batch/
+        Body: {"samples": [{"recorded_at": ..., "cpu_percent": ...}, ...]}
+        (optionally gzip-compressed with Content-Encoding: gzip)
+        """
+        buffer = get_heartbeat_buffer()
+        if not buffer.is_known_node(id):
+            return Response(
+                {'error': 'Node not found'},
+                status=status.HTTP_404_NOT_FOUND
             )
 
-        return Response({'status': 'ok', 'last_seen': node.last_seen})
+        try:
+            if request.META.get('HTTP_CONTENT_ENCODING') == 'gzip':
+                payload = json.loads(gunzip_limited(request.body))
+            else:
+                payload = request.data
+            samples = payload.get('samples', [])
+        except BatchTooLarge:
+            return Response(
+                {'error': 'Heartbeat batch too large'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        except (zlib.error, ValueError, AttributeError):
+            return Response(
+                {'error': 'Invalid heartbeat batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        accepted = 0
+        for sample in samples[:MAX_BATCH_SAMPLES]:
+            if not isinstance(sample, dict):
+                continue
+            serializer = NodeHeartbeatSerializer(data=sample)
+            if not serializer.is_valid():
+                continue
+            try:
+                recorded_at = parse_datetime(str(sample.get('recorded_at', ''))) or now
+            except ValueError:
+                recorded_at = now
+            if timezone.is_naive(recorded_at):
+                recorded_at = timezone.make_aware(recorded_at)
+            buffer.add(id, serializer.validated_data, min(recorded_at, now))
+            accepted += 1
+
+        return Response({'status': 'ok', 'accepted': accepted, 'last_seen': now})
 
     @action(detail=False, methods=['get'])
     def discover(self, request):
@@ -175,6 +239,37 @@ class NodeViewSet(viewsets.ModelViewSet):
         serializer = NodeSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='local-peers')
+    def local_peers(self, request):
+        """
+        Peers found on the LAN via mDNS (no central registry involved)
+
+        GET /api/v1/nodes/local-peers/?capability=gpu&module=cctv&best=true
+        Peers are ordered by measured latency; best=true returns only the fastest.
+        """
+        from core.base.p2p.discovery import PeerDiscoveryService
+
+        if not PeerDiscoveryService.is_enabled():
+            return Response(
+                {'error': 'mDNS discovery is disabled on this node'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        service = PeerDiscoveryService.get_instance()
+        capability = request.query_params.get('capability')
+        module = request.query_params.get('module')
+
+        if request.query_params.get('best') in ('1', 'true'):
+            peer = service.best_peer(capability=capability, module=module)
+            if peer is None:
+                return Response(
+                    {'error': 'No reachable peer matches'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(peer.to_dict())
+
+        return Response([peer.to_dict() for peer in service.get_peers(capability=capability, module=module)])
+
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
@@ -205,7 +300,7 @@ class NodeViewSet(viewsets.ModelViewSet):
         """
         Get node metrics history
 
-        GET /api/v1/nodes/{id}/metrics/?limit=24
+        GET /api/v1/nodes/{id}/metrics/?limit=24&resolution=1h
         """
         try:
             node = Node.objects.get(id=id)
@@ -216,6 +311,18 @@ class NodeViewSet(viewsets.ModelViewSet):
             )
 
         limit = int(request.query_params.get('limit', 24))
+
+        # Downsampled tiers: ?resolution=1m|1h|1d (default: raw heartbeats)
+        resolution = request.query_params.get('resolution')
+        if resolution:
+            if resolution not in MetricResolution.values:
+                return Response(
+                    {'error': f'Invalid resolution (choose from {", ".join(MetricResolution.values)})'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rollups = node.metric_rollups.filter(resolution=resolution)[:limit]
+            return Response(NodeMetricRollupSerializer(rollups, many=True).data)
+
         metrics = node.metrics.all()[:limit]
         serializer = NodeMetricSerializer(metrics, many=True)
         return Response(serializer.data)
@@ -0,0 +1,271 @@
+"""
+Version Archive Catalog
+Keeps VersionArchive rows in step with archive/versions/unibos_v* on disk.
+
+Each archive row stores the directory mtime it was scanned at plus a content
+fingerprint (sha1 over relative path + size of every file). A sync only stats
+the top-level archive directories; archives whose mtime is unchanged reuse
+their catalogued size/file counts, and new or modified ones are walked in
+parallel with os.scandir workers. Rows of archives that are no longer on
+disk are deleted.
+
+Only the top-level directory mtime is compared: adding, removing or renaming
+an entry directly inside an archive changes it, but edits in nested
+directories (or rewriting a file in place) do not. Archives are write-once
+snapshots, so `force=True` (full walk) is only needed after such edits.
+
+Pages read the stored catalog with load_catalog(); syncing is left to the
+scan view.
+"""
+
+import hashlib
+import logging
+import os
+import statistics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import VersionArchive
+
+logger = logging.getLogger(__name__)
+
+# Path from: core/system/version_manager/backend/archive_catalog.py -> unibos root
+ARCHIVE_PATH = Path(__file__).parent.parent.parent.parent.parent / "archive" / "versions"
+
+ANOMALY_Z_SCORE = 2.5  # Threshold reduces false positives (99% confidence)
+
+
+def parse_version(dirname):
+    """Version number from an archive dirname (unibos_vXXX_YYYYMMDD_HHMM), or None"""
+    parts = dirname.split('_')
+    if len(parts) < 2:
+        return None
+    return parts[1][1:] if parts[1].startswith('v') else parts[1]
+
+
+def parse_build(dirname):
+    """Build stamp (YYYYMMDD_HHMM) from an archive dirname, or None"""
+    parts = dirname.split('_')
+    if len(parts) < 3:
+        return None
+    return f"{parts[-2]}_{parts[-1]}" if len(parts) >= 4 else parts[-1]
+
+
+def size_status(size_mb):
+    """Status bucket for an archive size (same thresholds as VersionArchive.update_status)"""
+    if size_mb >= 500:
+        return 'huge'
+    if size_mb >= 200:
+        return 'very_large'
+    if size_mb >= 50:
+        return 'large'
+    return 'normal'
+
+
+def list_archive_dirs(archive_path=ARCHIVE_PATH):
+    """[(dirname, path, mtime_ns)] of archive directories, sorted by name"""
+    try:
+        with os.scandir(archive_path) as entries:
+            dirs = [
+                (entry.name, entry.path, entry.stat().st_mtime_ns)
+                for entry in entries
+                if entry.name.startswith('unibos_v') and entry.is_dir()
+            ]
+    except FileNotFoundError:
+        return []
+    return sorted(dirs)
+
+
+def scan_archive(path):
+    """
+    Walk one archive with os.scandir
+
+    Returns:
+        dict with size_bytes, file_count, directory_count and fingerprint
+    """
+    size = file_count = dir_count = 0
+    digest = hashlib.sha1()
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as iterator:
+                entries = sorted(iterator, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    dir_count += 1
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                    continue
+                file_count += 1
+                file_size = entry.stat().st_size
+            except OSError:
+                continue
+            size += file_size
+            digest.update(f"{os.path.relpath(entry.path, path)}\0{file_size}\n".encode('utf-8', 'surrogateescape'))
+
+    return {
+        'size_bytes': size,
+        'file_count': file_count,
+        'directory_count': dir_count,
+        'fingerprint': digest.hexdigest(),
+    }
+
+
+def _apply_statistics(archives):
+    """Set z_score/is_anomaly/status on archive rows; returns anomaly count"""
+    sizes = [archive.size_bytes for archive in archives]
+    mean_size = statistics.mean(sizes) if len(sizes) > 2 else 0
+    stdev_size = statistics.stdev(sizes) if len(sizes) > 2 else 0
+
+    anomaly_count = 0
+    for archive in archives:
+        if stdev_size > 0:
+            archive.z_score = abs((archive.size_bytes - mean_size) / stdev_size)
+            archive.is_anomaly = archive.z_score > ANOMALY_Z_SCORE
+        else:
+            archive.z_score = 0
+            archive.is_anomaly = False
+        archive.status = size_status(archive.size_mb)
+        anomaly_count += archive.is_anomaly
+    return anomaly_count
+
+
+def _version_sort_key(archive):
+    return int(archive.version) if archive.version.isdigit() else 0
+
+
+def load_catalog():
+    """
+    Stored catalog without touching the disk or writing
+
+    Returns:
+        dict with archives (newest version first), anomaly_count and total_size_bytes
+    """
+    archives = sorted(VersionArchive.objects.all(), key=_version_sort_key, reverse=True)
+    return {
+        'archives': archives,
+        'anomaly_count': sum(1 for archive in archives if archive.is_anomaly),
+        'total_size_bytes': sum(archive.size_bytes for archive in archives),
+    }
+
+
+def sync_catalog(archive_path=ARCHIVE_PATH, force=False, on_progress=None, should_stop=None):
+    """
+    Bring the archive catalog up to date
+
+    Archives whose top-level directory mtime is unchanged are not walked (see
+    the module docstring); pass force=True after edits in nested directories.
+
+    Args:
+        force: Re-walk every archive, not only new/modified ones
+        on_progress: callable(done, total, dirname, result, rescanned) after each archive
+        should_stop: callable returning True to abandon remaining scans
+
+    Returns:
+        dict with archives (VersionArchive list, newest version first), scanned,
+        unchanged, removed (rows of archives no longer on disk), anomaly_count,
+        total_size_bytes and stopped
+    """
+    # One catalog row per version; a later directory for the same version wins
+    by_version = {}
+    for dirname, path, mtime_ns in list_archive_dirs(archive_path):
+        version = parse_version(dirname)
+        if version is not None:
+            by_version[version] = (dirname, path, mtime_ns, version)
+    archive_dirs = sorted(by_version.values())
+    total = len(archive_dirs)
+
+    existing = VersionArchive.objects.in_bulk(list(by_version), field_name='version')
+    results = {}
+    to_scan = []
+    done = 0
+    for dirname, path, mtime_ns, version in archive_dirs:
+        archive = existing.get(version)
+        if not force and archive and archive.path == path and archive.dir_mtime_ns == mtime_ns:
+            results[version] = None  # Catalogued values still valid
+            done += 1
+            if on_progress:
+                on_progress(done, total, dirname, None, False)
+        else:
+            to_scan.append((dirname, path, mtime_ns, version))
+
+    stopped = False
+    if to_scan:
+        workers = getattr(settings, 'VERSION_MANAGER_SCAN_WORKERS', min(8, (os.cpu_count() or 1) * 2))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='archive-scan') as pool:
+            futures = {pool.submit(scan_archive, entry[1]): entry for entry in to_scan}
+            for future in as_completed(futures):
+                dirname, path, mtime_ns, version = futures[future]
+                result = future.result()
+                results[version] = {**result, 'path': path, 'dir_mtime_ns': mtime_ns}
+                done += 1
+                if on_progress:
+                    on_progress(done, total, dirname, result, True)
+                if should_stop and should_stop():
+                    stopped = True
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+    now = timezone.now()
+    archives = []
+    to_create = []
+    for dirname, path, mtime_ns, version in archive_dirs:
+        if version not in results:
+            continue  # Scan abandoned before this archive
+        archive = existing.get(version)
+        scanned = results[version]
+        if archive is None:
+            archive = VersionArchive(version=version)
+            to_create.append(archive)
+        if scanned is not None:
+            archive.path = scanned['path']
+            archive.size_bytes = scanned['size_bytes']
+            archive.size_mb = scanned['size_bytes'] / (1024 * 1024)
+            archive.file_count = scanned['file_count']
+            archive.directory_count = scanned['directory_count']
+            archive.fingerprint = scanned['fingerprint']
+            archive.dir_mtime_ns = scanned['dir_mtime_ns']
+        archive.last_scanned = now
+        archive.build = parse_build(dirname) or ''
+        archives.append(archive)
+
+    anomaly_count = _apply_statistics(archives) if archives else 0
+
+    with transaction.atomic():
+        # Archives deleted from disk (skipped if the archive root itself is missing, e.g. unmounted)
+        removed = 0
+        if os.path.isdir(archive_path):
+            removed = VersionArchive.objects.exclude(version__in=list(by_version)).delete()[0]
+        VersionArchive.objects.bulk_create(to_create, batch_size=200)
+        created = {id(archive) for archive in to_create}
+        VersionArchive.objects.bulk_update(
+            [archive for archive in archives if id(archive) not in created],
+            ['path', 'build', 'size_bytes', 'size_mb', 'file_count', 'directory_count', 'fingerprint',
+             'dir_mtime_ns', 'z_score', 'is_anomaly', 'status', 'last_scanned'],
+            batch_size=200,
+        )
+
+    archives.sort(key=_version_sort_key, reverse=True)
+    scanned_count = sum(1 for value in results.values() if value is not None)
+    logger.info(
+        f"archive catalog synced: {scanned_count} scanned, {len(results) - scanned_count} unchanged, {removed} removed"
+    )
+    return {
+        'archives': archives,
+        'scanned': scanned_count,
+        'unchanged': len(results) - scanned_count,
+        'removed': removed,
+        'anomaly_count': anomaly_count,
+        'total_size_bytes': sum(archive.size_bytes for archive in archives),
+        'stopped': stopped,
+    }
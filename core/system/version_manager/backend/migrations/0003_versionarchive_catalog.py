@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-16 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('version_manager', '0002_alter_versionarchive_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionarchive',
+            name='dir_mtime_ns',
+            field=models.BigIntegerField(blank=True, help_text='Archive directory mtime at last walk', null=True),
+        ),
+        migrations.AddField(
+            model_name='versionarchive',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='sha1 of relative file paths and sizes', max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('version_manager', '0003_versionarchive_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionarchive',
+            name='build',
+            field=models.CharField(blank=True, default='', help_text='Build stamp from the directory name (YYYYMMDD_HHMM)', max_length=20),
+        ),
+    ]
@@ -15,12 +15,17 @@ class VersionArchive(models.Model):
     """Model to store version archive information"""
     
     version = models.CharField(max_length=20, unique=True, db_index=True)
+    build = models.CharField(max_length=20, blank=True, default='', help_text="Build stamp from the directory name (YYYYMMDD_HHMM)")
     path = models.CharField(max_length=500)
     size_bytes = models.BigIntegerField(default=0)
     size_mb = models.FloatField(default=0.0)
     file_count = models.IntegerField(default=0)
     directory_count = models.IntegerField(default=0)
     
+    # Catalog change detection (archive_catalog.sync_catalog)
+    dir_mtime_ns = models.BigIntegerField(null=True, blank=True, help_text="Archive directory mtime at last walk")
+    fingerprint = models.CharField(max_length=40, blank=True, help_text="sha1 of relative file paths and sizes")
+    
     # Statistical analysis fields
     z_score = models.FloatField(default=0.0, null=True, blank=True)
     is_anomaly = models.BooleanField(default=False)
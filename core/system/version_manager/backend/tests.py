@@ -1,3 +1,85 @@
+"""
+Tests for the version archive catalog
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
 from django.test import TestCase
 
-# Create your tests here.
+from .archive_catalog import load_catalog, sync_catalog
+from .models import VersionArchive
+
+
+class ArchiveCatalogTests(TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def make_archive(self, dirname, files):
+        path = self.root / dirname
+        for name, size in files.items():
+            file_path = path / name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(b'x' * size)
+        return path
+
+    def test_initial_sync_catalogues_every_archive(self):
+        self.make_archive('unibos_v100_20250101_1200', {'a.py': 10, 'pkg/b.py': 20})
+        self.make_archive('unibos_v101_20250102_1300', {'a.py': 30})
+
+        catalog = sync_catalog(self.root)
+
+        self.assertEqual(catalog['scanned'], 2)
+        self.assertEqual([archive.version for archive in catalog['archives']], ['101', '100'])
+        first = VersionArchive.objects.get(version='100')
+        self.assertEqual(first.build, '20250101_1200')
+        self.assertEqual(first.size_bytes, 30)
+        self.assertEqual(first.file_count, 2)
+        self.assertEqual(first.directory_count, 1)
+
+    def test_resync_walks_only_modified_archives(self):
+        self.make_archive('unibos_v100_20250101_1200', {'a.py': 10})
+        edited = self.make_archive('unibos_v101_20250102_1300', {'a.py': 30})
+        sync_catalog(self.root)
+
+        (edited / 'new.py').write_bytes(b'x' * 5)
+        stat = edited.stat()
+        os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        catalog = sync_catalog(self.root)
+
+        self.assertEqual((catalog['scanned'], catalog['unchanged']), (1, 1))
+        self.assertEqual(VersionArchive.objects.get(version='101').size_bytes, 35)
+
+    def test_resync_removes_deleted_archives(self):
+        self.make_archive('unibos_v100_20250101_1200', {'a.py': 10})
+        removed = self.make_archive('unibos_v101_20250102_1300', {'a.py': 30})
+        sync_catalog(self.root)
+
+        shutil.rmtree(removed)
+        catalog = sync_catalog(self.root)
+
+        self.assertEqual(catalog['removed'], 1)
+        self.assertEqual(list(VersionArchive.objects.values_list('version', flat=True)), ['100'])
+
+    def test_missing_archive_root_keeps_catalog(self):
+        self.make_archive('unibos_v100_20250101_1200', {'a.py': 10})
+        sync_catalog(self.root)
+
+        catalog = sync_catalog(self.root / 'unmounted')
+
+        self.assertEqual(catalog['removed'], 0)
+        self.assertEqual(VersionArchive.objects.count(), 1)
+
+    def test_load_catalog_reads_without_writing(self):
+        self.make_archive('unibos_v100_20250101_1200', {'a.py': 10})
+        sync_catalog(self.root)
+        scanned_at = VersionArchive.objects.get().last_scanned
+
+        catalog = load_catalog()
+
+        self.assertEqual(catalog['total_size_bytes'], 10)
+        self.assertEqual(VersionArchive.objects.get().last_scanned, scanned_at)
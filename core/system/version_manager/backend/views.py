@@ -4,7 +4,6 @@ Handles version archive analysis and git operations with real-time updates
 """
 
 import os
-import glob
 import statistics
 import subprocess
 import json
@@ -23,6 +22,7 @@ from django.db import transaction
 from django.core.cache import cache
 
 from .models import VersionArchive, ScanSession, GitStatus
+from .archive_catalog import ARCHIVE_PATH, load_catalog, sync_catalog
 from core.system.web_ui.backend.views import BaseUIView
 from django.core.paginator import Paginator
 from django.db.models import Q, Avg, Count
@@ -36,118 +36,19 @@ class VersionManagerView(LoginRequiredMixin, BaseUIView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Perform real-time scan of archive directory
-        import os
-        import glob
-        # Path from: apps/web/backend/apps/version_manager/views.py
-        # Need to go up 6 levels to reach unibos root
-        base_dir = Path(__file__).parent.parent.parent.parent.parent.parent
-        archive_path = base_dir / "archive" / "versions"
-        
-        # Get all version directories and calculate real-time stats
-        version_dirs = sorted(glob.glob(f"{archive_path}/unibos_v*"))
-        total_archives = len(version_dirs)
-        total_size_bytes = 0
-        archives_data = []
-        
-        for version_dir in version_dirs:
-            if os.path.isdir(version_dir):
-                dirname = os.path.basename(version_dir)
-                # Calculate directory size
-                dir_size = 0
-                file_count = 0
-                for dirpath, dirnames, filenames in os.walk(version_dir):
-                    file_count += len(filenames)
-                    for filename in filenames:
-                        filepath = os.path.join(dirpath, filename)
-                        try:
-                            dir_size += os.path.getsize(filepath)
-                        except:
-                            pass
-                
-                total_size_bytes += dir_size
-                
-                # Extract version number
-                parts = dirname.split('_')
-                if len(parts) >= 2:
-                    version_num = parts[1][1:] if parts[1].startswith('v') else parts[1]
-                    archives_data.append({
-                        'version': version_num,
-                        'size_mb': dir_size / (1024 * 1024),
-                        'file_count': file_count,
-                        'dirname': dirname
-                    })
-        
-        # Sort by version number (descending)
-        archives_data.sort(key=lambda x: int(x['version']) if x['version'].isdigit() else 0, reverse=True)
+        # Stored catalog only; the scan view keeps it in step with the disk
+        catalog = load_catalog()
+        archives_data = catalog['archives']
+        total_archives = len(archives_data)
+        total_size_bytes = catalog['total_size_bytes']
         
         # Calculate statistics
         if total_archives > 0:
             total_size_gb = total_size_bytes / (1024**3)
             avg_size_mb = (total_size_bytes / (1024**2)) / total_archives
-            
-            # Calculate anomalies based on Z-score
-            import statistics
-            if len(archives_data) > 2:
-                # Work directly with MB values for consistency
-                sizes_mb = [a['size_mb'] for a in archives_data]
-                mean_size_mb = statistics.mean(sizes_mb)
-                stdev_size_mb = statistics.stdev(sizes_mb) if len(sizes_mb) > 1 else 0
-
-                anomaly_count = 0
-                for archive in archives_data:
-                    if stdev_size_mb > 0:
-                        # Z-score: how many standard deviations away from mean
-                        z_score = abs((archive['size_mb'] - mean_size_mb) / stdev_size_mb)
-                        archive['z_score'] = z_score
-                        # Use threshold of 2.5 to reduce false positives (99% confidence)
-                        archive['is_anomaly'] = z_score > 2.5
-                        if archive['is_anomaly']:
-                            anomaly_count += 1
-                    else:
-                        archive['z_score'] = 0
-                        archive['is_anomaly'] = False
-            else:
-                anomaly_count = 0
         else:
             total_size_gb = 0
             avg_size_mb = 0
-            anomaly_count = 0
-        
-        # Get or update database records for display
-        archives = []
-        for data in archives_data[:20]:  # Show top 20
-            # Extract build info from dirname (format: unibos_vXXX_YYYYMMDD_HHMM)
-            build = None
-            if '_' in data['dirname']:
-                parts = data['dirname'].split('_')
-                if len(parts) >= 3:
-                    # Get the date and time parts
-                    build = f"{parts[-2]}_{parts[-1]}" if len(parts) >= 4 else parts[-1]
-            
-            archive, created = VersionArchive.objects.get_or_create(
-                version=data['version'],
-                defaults={
-                    'path': f"{archive_path}/{data['dirname']}",
-                    'size_bytes': int(data['size_mb'] * 1024 * 1024),
-                    'size_mb': data['size_mb'],
-                    'file_count': data['file_count'],
-                    'z_score': data.get('z_score', 0),
-                    'is_anomaly': data.get('is_anomaly', False),
-                }
-            )
-            # Update if exists
-            if not created:
-                archive.size_bytes = int(data['size_mb'] * 1024 * 1024)
-                archive.size_mb = data['size_mb']
-                archive.file_count = data['file_count']
-                archive.z_score = data.get('z_score', 0)
-                archive.is_anomaly = data.get('is_anomaly', False)
-                archive.save()
-            
-            # Add build info to archive object
-            archive.build = build
-            archives.append(archive)
         
         # Get latest scan session
         latest_scan = ScanSession.objects.first()
@@ -156,14 +57,14 @@ class VersionManagerView(LoginRequiredMixin, BaseUIView):
         latest_git = GitStatus.objects.first()
         
         context.update({
-            'archives': archives,
+            'archives': archives_data[:20],  # Show top 20
             'total_archives': total_archives,
             'total_size_gb': total_size_gb,
             'average_size_mb': avg_size_mb,
-            'anomaly_count': anomaly_count,
+            'anomaly_count': catalog['anomaly_count'],
             'latest_scan': latest_scan,
             'latest_git': latest_git,
-            'archive_path': str(archive_path),
+            'archive_path': str(ARCHIVE_PATH),
         })
         
         return context
@@ -177,11 +78,7 @@ class ArchiveAnalyzerView(LoginRequiredMixin, BaseUIView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Calculate dynamic archive path
-        # Path from: apps/web/backend/apps/version_manager/views.py
-        # Need to go up 6 levels to reach unibos root
-        base_dir = Path(__file__).parent.parent.parent.parent.parent.parent
-        archive_path = base_dir / "archive" / "versions"
+        archive_path = ARCHIVE_PATH
 
         # Get all archives ordered by version
         archives = VersionArchive.objects.all()
@@ -226,9 +123,12 @@ class StartScanView(LoginRequiredMixin, View):
         # Store session ID in cache for progress tracking
         cache.set(f'scan_session_{scan_session.id}', scan_session.id, 3600)
         
+        # Full scan re-walks every archive; default only walks new/modified ones
+        force = request.POST.get('full') in ('1', 'true', 'on')
+        
         # Start scanning in background thread
         import threading
-        scan_thread = threading.Thread(target=self._perform_scan, args=(scan_session,))
+        scan_thread = threading.Thread(target=self._perform_scan, args=(scan_session, force))
         scan_thread.daemon = True
         scan_thread.start()
         
@@ -258,14 +158,9 @@ class StartScanView(LoginRequiredMixin, View):
         cache.set(logs_key, logs, 3600)
         return log_entry
     
-    def _perform_scan(self, scan_session):
-        """Perform the actual scanning with detailed logging"""
-        # Use correct path to unibos project root
-        import os
-        # Path from: apps/web/backend/apps/version_manager/views.py
-        # Need to go up 6 levels to reach unibos root
-        base_dir = Path(__file__).parent.parent.parent.parent.parent.parent
-        archive_path = base_dir / "archive" / "versions"
+    def _perform_scan(self, scan_session, force=False):
+        """Sync the archive catalog, streaming per-archive progress into the session"""
+        archive_path = ARCHIVE_PATH
         session_id = scan_session.id
         
         try:
@@ -275,15 +170,45 @@ class StartScanView(LoginRequiredMixin, View):
             cache.delete(f'scan_anomaly_{session_id}')
             
             self._add_log(session_id, 'info', f'Starting scan of archive directory: {archive_path}')
+            if force:
+                self._add_log(session_id, 'info', 'Full scan: every archive will be re-walked')
             
-            # Get all version directories
-            self._add_log(session_id, 'info', 'Searching for version directories...')
-            version_dirs = sorted(glob.glob(f"{archive_path}/unibos_v*"))
-            total_dirs = len(version_dirs)
-            
-            self._add_log(session_id, 'success', f'Found {total_dirs} version directories')
+            def on_progress(done, total, dirname, result, rescanned):
+                if done == 1:
+                    ScanSession.objects.filter(pk=session_id).update(total_archives=total)
+                    self._add_log(session_id, 'success', f'Found {total} version directories')
+                
+                ScanSession.objects.filter(pk=session_id).update(
+                    progress_percent=int(done / total * 100),
+                    current_archive=dirname,
+                    status_message=f"Scanning {dirname}..." if rescanned else f"Checked {dirname}",
+                )
+                if not rescanned:
+                    self._add_log(session_id, 'debug', f'[{done}/{total}] {dirname}: unchanged')
+                    return
+                
+                # Store current archive details in cache
+                cache.set(f'scan_current_{session_id}', {
+                    'size': result['size_bytes'],
+                    'files': result['file_count'],
+                    'dirs': result['directory_count']
+                }, 60)
+                self._add_log(session_id, 'success',
+                    f'[{done}/{total}] {dirname} → Size: {result["size_bytes"] / (1024*1024):.2f} MB | '
+                    f'Files: {result["file_count"]} | Dirs: {result["directory_count"]}')
+            
+            def should_stop():
+                # StopScanView marks the session complete
+                return ScanSession.objects.filter(pk=session_id, is_complete=True).exists()
+            
+            catalog = sync_catalog(archive_path, force=force, on_progress=on_progress, should_stop=should_stop)
+            archives_data = catalog['archives']
+            
+            if catalog['stopped']:
+                self._add_log(session_id, 'warning', f'Scan stopped: {len(archives_data)} archives catalogued')
+                return
             
-            if total_dirs == 0:
+            if not archives_data:
                 self._add_log(session_id, 'warning', 'No version archives found in the specified path')
                 scan_session.status_message = "No version archives found"
                 scan_session.is_complete = True
@@ -291,152 +216,31 @@ class StartScanView(LoginRequiredMixin, View):
                 scan_session.save()
                 return
             
-            scan_session.total_archives = total_dirs
-            scan_session.save()
-            
-            archives_data = []
-            total_size = 0
-            
-            for idx, version_dir in enumerate(version_dirs):
-                if os.path.isdir(version_dir):
-                    # Update progress
-                    progress = int((idx + 1) / total_dirs * 100)
-                    dirname = os.path.basename(version_dir)
-                    
-                    scan_session.progress_percent = progress
-                    scan_session.current_archive = dirname
-                    scan_session.status_message = f"Scanning {dirname}..."
-                    scan_session.save()
-                    
-                    self._add_log(session_id, 'info', f'[{idx+1}/{total_dirs}] Scanning: {dirname}')
-                    
-                    # Extract version info
-                    parts = dirname.split('_')
-                    if len(parts) >= 2:
-                        version_num = parts[1][1:] if parts[1].startswith('v') else parts[1]
-                        
-                        # Calculate directory size and file count
-                        dir_size = 0
-                        file_count = 0
-                        dir_count = 0
-                        
-                        self._add_log(session_id, 'debug', f'  analyzing directory structure...')
-                        
-                        for dirpath, dirnames, filenames in os.walk(version_dir):
-                            file_count += len(filenames)
-                            dir_count += len(dirnames)
-                            for filename in filenames:
-                                filepath = os.path.join(dirpath, filename)
-                                try:
-                                    dir_size += os.path.getsize(filepath)
-                                except:
-                                    pass
-                        
-                        # Store current archive details in cache
-                        cache.set(f'scan_current_{session_id}', {
-                            'size': dir_size,
-                            'files': file_count,
-                            'dirs': dir_count
-                        }, 60)
-                        
-                        self._add_log(session_id, 'success', 
-                            f'  → Size: {dir_size / (1024*1024):.2f} MB | Files: {file_count} | Dirs: {dir_count}')
-                        
-                        # Store archive data
-                        archive_data = {
-                            'version': version_num,
-                            'path': version_dir,
-                            'size_bytes': dir_size,
-                            'size_mb': dir_size / (1024 * 1024),
-                            'file_count': file_count,
-                            'directory_count': dir_count,
-                        }
-                        archives_data.append(archive_data)
-                        total_size += dir_size
-            
-            # Calculate statistics for anomaly detection
-            self._add_log(session_id, 'info', 'analyzing archive sizes for anomalies...')
-            
-            if len(archives_data) > 2:
-                sizes = [a['size_bytes'] for a in archives_data]
-                mean_size = statistics.mean(sizes)
-                stdev_size = statistics.stdev(sizes) if len(sizes) > 1 else 0
-                
-                self._add_log(session_id, 'debug', 
-                    f'Statistics: Mean={mean_size/(1024*1024):.2f}MB, StdDev={stdev_size/(1024*1024):.2f}MB')
-                
-                for archive in archives_data:
-                    if stdev_size > 0:
-                        z_score = abs((archive['size_bytes'] - mean_size) / stdev_size)
-                        archive['z_score'] = z_score
-                        # Use threshold of 2.5 to reduce false positives (99% confidence)
-                        archive['is_anomaly'] = z_score > 2.5
-                        
-                        # Determine status based on size (like terminal version)
-                        size_mb = archive['size_mb']
-                        if size_mb < 50:
-                            archive['status'] = 'normal'
-                        elif size_mb < 200:
-                            archive['status'] = 'large'
-                        elif size_mb < 500:
-                            archive['status'] = 'very_large'
-                        else:
-                            archive['status'] = 'huge'
-                        
-                        if archive['is_anomaly']:
-                            self._add_log(session_id, 'warning', 
-                                f'⚠️ Anomaly detected: v{archive["version"]} (Z-score: {z_score:.2f}, Size: {size_mb:.2f}MB)')
-                            
-                            # Store anomaly info in cache
-                            cache.set(f'scan_anomaly_{session_id}', {
-                                'archive': f'v{archive["version"]}',
-                                'zscore': z_score,
-                                'size_mb': size_mb
-                            }, 60)
-                    else:
-                        archive['z_score'] = 0
-                        archive['is_anomaly'] = False
-                        archive['status'] = 'normal'
-            
-            # Save archives to database
-            self._add_log(session_id, 'info', 'Saving archive data to database...')
-            anomaly_count = 0
+            self._add_log(session_id, 'info',
+                f"Walked {catalog['scanned']} archives, {catalog['unchanged']} unchanged since last scan")
             
-            with transaction.atomic():
-                for archive_data in archives_data:
-                    archive, created = VersionArchive.objects.update_or_create(
-                        version=archive_data['version'],
-                        defaults={
-                            'path': archive_data['path'],
-                            'size_bytes': archive_data['size_bytes'],
-                            'size_mb': archive_data['size_mb'],
-                            'file_count': archive_data['file_count'],
-                            'directory_count': archive_data['directory_count'],
-                            'z_score': archive_data.get('z_score', 0),
-                            'is_anomaly': archive_data.get('is_anomaly', False),
-                            'status': archive_data.get('status', 'normal'),
-                        }
-                    )
-                    # Don't call update_status() since we're setting it directly
-                    archive.save()
+            for archive in archives_data:
+                if archive.is_anomaly:
+                    self._add_log(session_id, 'warning',
+                        f'⚠️ Anomaly detected: v{archive.version} (Z-score: {archive.z_score:.2f}, Size: {archive.size_mb:.2f}MB)')
                     
-                    if archive.is_anomaly:
-                        anomaly_count += 1
-                        self._add_log(session_id, 'info', 
-                            f'  ✓ v{archive.version}: {archive.size_mb:.2f}MB - anomaly detected')
-                    else:
-                        # Log with color coding based on status
-                        status_icon = '🟢' if archive.status == 'normal' else '🟡' if archive.status == 'large' else '🟠' if archive.status == 'very_large' else '🔴'
-                        self._add_log(session_id, 'success', 
-                            f'  {status_icon} v{archive.version}: {archive.size_mb:.2f}MB - {archive.status}')
+                    # Store anomaly info in cache
+                    cache.set(f'scan_anomaly_{session_id}', {
+                        'archive': f'v{archive.version}',
+                        'zscore': archive.z_score,
+                        'size_mb': archive.size_mb
+                    }, 60)
             
             self._add_log(session_id, 'success', f'Database updated: {len(archives_data)} archives saved')
             
             # Update scan session
+            total_size = catalog['total_size_bytes']
+            scan_session.refresh_from_db(fields=['total_archives'])
+            scan_session.progress_percent = 100
             scan_session.total_size_bytes = total_size
             scan_session.total_size_gb = total_size / (1024**3)
-            scan_session.average_size_mb = (total_size / (1024**2)) / len(archives_data) if archives_data else 0
-            scan_session.anomaly_count = anomaly_count
+            scan_session.average_size_mb = (total_size / (1024**2)) / len(archives_data)
+            scan_session.anomaly_count = catalog['anomaly_count']
             scan_session.is_complete = True
             scan_session.completed_at = timezone.now()
             scan_session.status_message = f"Scan complete: {len(archives_data)} archives processed"
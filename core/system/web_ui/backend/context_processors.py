@@ -59,117 +59,37 @@ def sidebar_context(request):
 def version_context(request):
     """
     Provides version information for all templates
-    Supports both old and new VERSION.json formats
+    Supports both old and new VERSION.json formats (parsed by the status service)
     """
-    import json
-    from pathlib import Path
-
-    version_data = None
-
-    try:
-        # Path resolution: core/system/web_ui/backend -> project root (4 levels up)
-        project_root = Path(__file__).parent.parent.parent.parent.parent
-
-        # Try paths in priority order:
-        version_paths = [
-            project_root / 'VERSION.json',  # Project root
-            project_root / 'core' / 'clients' / 'web' / 'VERSION.json',  # Web client specific
-        ]
-
-        for version_file in version_paths:
-            if version_file.exists():
-                with open(version_file, 'r', encoding='utf-8') as f:
-                    version_data = json.load(f)
-                break
-
-    except Exception:
-        pass
-
-    # Parse version data - support both old and new formats
-    if version_data:
-        version_field = version_data.get('version')
-
-        # New format: version is a dict with major/minor/patch/build
-        if isinstance(version_field, dict):
-            major = version_field.get('major', 0)
-            minor = version_field.get('minor', 0)
-            patch = version_field.get('patch', 0)
-            version = f"v{major}.{minor}.{patch}"
-
-            # Get build from version dict or build_info
-            build = version_field.get('build', '')
-            if not build and 'build_info' in version_data:
-                build = version_data['build_info'].get('timestamp', '')
-
-            # Format build as YYYYMMDD_HHMM for display
-            if build and len(build) == 14:
-                build = f"{build[:8]}_{build[8:12]}"
-
-            # Get release date
-            release_date = version_data.get('build_info', {}).get('date', '')
-            if not release_date:
-                release_date = version_data.get('release_info', {}).get('release_date', '2025-12-01')
-
-        # Old format: version is a string
-        else:
-            version = version_field if version_field else 'v0.534.0'
-            build = version_data.get('build') or version_data.get('build_number', '20251116_0550')
-            release_date = version_data.get('release_date', '2025-11-16')
-    else:
-        # Fallback
-        version = 'v1.0.0'
-        build = '20251201_2225'
-        release_date = '2025-12-01'
+    from .status_service import get_status_snapshot
 
+    snapshot = get_status_snapshot()
     return {
-        'version': version,
-        'build_number': build,
-        'release_date': release_date,
+        'version': snapshot['version'],
+        'build_number': snapshot['build_number'],
+        'release_date': snapshot['release_date'],
     }
 
 
 def unibos_context(request):
     """
     General UNIBOS context data
+    Host and connectivity info come from the background status snapshot
     """
     from datetime import datetime
-    import sys
-    from pathlib import Path
-    
-    # Add src directory to path to import system_info
-    src_path = Path(__file__).parent.parent.parent.parent / 'src'
-    if str(src_path) not in sys.path:
-        sys.path.insert(0, str(src_path))
-    
-    # Import system info
-    try:
-        from system_info import system_info
-        hostname = system_info.hostname
-        environment = system_info.environment
-        display_name = system_info.display_name
-    except ImportError:
-        import socket
-        hostname = socket.gethostname()
-        environment = 'unknown'
-        display_name = hostname
-    
-    # Check online status
-    def check_online_status():
-        try:
-            import socket
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
-        except:
-            return False
-    
+    from .status_service import get_status_snapshot
+
+    snapshot = get_status_snapshot()
+    now = datetime.now()
+
     return {
-        'current_time': datetime.now().strftime('%H:%M:%S'),
-        'current_date': datetime.now().strftime('%Y-%m-%d'),
+        'current_time': now.strftime('%H:%M:%S'),
+        'current_date': now.strftime('%Y-%m-%d'),
         'location': 'bitez, bodrum',
-        'online_status': check_online_status(),
+        'online_status': snapshot['online_status'],
         'user': request.user if request.user.is_authenticated else None,
-        'hostname': hostname,
-        'environment': environment,
-        'display_name': display_name,
+        'hostname': snapshot['hostname'],
+        'environment': snapshot['environment'],
+        'display_name': snapshot['display_name'],
         'footer_nav': '↑↓ navigate | enter/→ select | esc/← back | tab switch | L language | M minimize | q quit',
-    }
\ No newline at end of file
+    }
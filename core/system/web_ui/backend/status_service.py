@@ -0,0 +1,215 @@
+"""
+System Status Service
+Background snapshot of the values every template shows in its header/footer:
+online status, hostname/environment and VERSION.json info.
+
+A daemon thread refreshes the snapshot every WEB_UI_STATUS_INTERVAL seconds
+and publishes it to the cache, so all workers on a host share one probe
+(a cache.add lock elects the worker that refreshes). Context processors only
+read the snapshot and never touch the network or the filesystem.
+"""
+
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Path resolution: core/system/web_ui/backend -> project root (4 levels up)
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent.parent
+
+VERSION_PATHS = [
+    PROJECT_ROOT / 'VERSION.json',  # Project root
+    PROJECT_ROOT / 'core' / 'clients' / 'web' / 'VERSION.json',  # Web client specific
+]
+
+LOCAL_SNAPSHOT_TTL = 5  # Seconds a worker reuses its copy before re-reading the cache
+
+
+def _cache_key(suffix=''):
+    return f'web_ui:system_status:{socket.gethostname()}{suffix}'
+
+
+def parse_version_data(version_data):
+    """version/build_number/release_date from VERSION.json contents (old and new formats)"""
+    if not version_data:
+        return {'version': 'v1.0.0', 'build_number': '20251201_2225', 'release_date': '2025-12-01'}
+
+    version_field = version_data.get('version')
+
+    # New format: version is a dict with major/minor/patch/build
+    if isinstance(version_field, dict):
+        major = version_field.get('major', 0)
+        minor = version_field.get('minor', 0)
+        patch = version_field.get('patch', 0)
+        version = f"v{major}.{minor}.{patch}"
+
+        # Get build from version dict or build_info
+        build = version_field.get('build', '')
+        if not build and 'build_info' in version_data:
+            build = version_data['build_info'].get('timestamp', '')
+
+        # Format build as YYYYMMDD_HHMM for display
+        if build and len(build) == 14:
+            build = f"{build[:8]}_{build[8:12]}"
+
+        # Get release date
+        release_date = version_data.get('build_info', {}).get('date', '')
+        if not release_date:
+            release_date = version_data.get('release_info', {}).get('release_date', '2025-12-01')
+
+    # Old format: version is a string
+    else:
+        version = version_field if version_field else 'v0.534.0'
+        build = version_data.get('build') or version_data.get('build_number', '20251116_0550')
+        release_date = version_data.get('release_date', '2025-11-16')
+
+    return {'version': version, 'build_number': build, 'release_date': release_date}
+
+
+def read_host_info():
+    """hostname/environment/display_name from system_info, falling back to the socket hostname"""
+    # Add src directory to path to import system_info
+    src_path = Path(__file__).parent.parent.parent.parent / 'src'
+    if str(src_path) not in sys.path:
+        sys.path.insert(0, str(src_path))
+
+    try:
+        from system_info import system_info
+        return {
+            'hostname': system_info.hostname,
+            'environment': system_info.environment,
+            'display_name': system_info.display_name,
+        }
+    except ImportError:
+        hostname = socket.gethostname()
+        return {'hostname': hostname, 'environment': 'unknown', 'display_name': hostname}
+
+
+def check_online_status(timeout=3):
+    """True if a TCP connection to a public DNS server succeeds"""
+    try:
+        socket.create_connection(("8.8.8.8", 53), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+class SystemStatusService:
+    """
+    Periodically refreshed status snapshot (singleton per process)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.interval = getattr(settings, 'WEB_UI_STATUS_INTERVAL', 30)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._snapshot = None
+        self._snapshot_read_at = 0.0
+        self._host_info = None
+        self._version_info = None
+        self._version_mtime = None
+
+    @classmethod
+    def get_instance(cls) -> 'SystemStatusService':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def start(self):
+        """Start the refresh thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='web-ui-status', daemon=True)
+            self._thread.start()
+            logger.info("system status service started")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def get_snapshot(self) -> dict:
+        """Latest snapshot; never blocks on the network"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._snapshot_read_at < LOCAL_SNAPSHOT_TTL:
+            return self._snapshot
+
+        self.start()
+        try:
+            snapshot = cache.get(_cache_key())
+        except Exception:
+            snapshot = None
+        if snapshot is None:
+            # Nothing published yet: local info only, connectivity unknown until the first probe
+            snapshot = self._snapshot or {**self._read_host_info(), **self._read_version_info(), 'online_status': None}
+        self._snapshot = snapshot
+        self._snapshot_read_at = now
+        return snapshot
+
+    def refresh(self) -> dict:
+        """Probe everything and publish a new snapshot"""
+        snapshot = {
+            **self._read_host_info(),
+            **self._read_version_info(),
+            'online_status': check_online_status(),
+            'checked_at': time.time(),
+        }
+        # Stale after a few missed intervals so readers fall back if every worker dies
+        cache.set(_cache_key(), snapshot, self.interval * 4)
+        self._snapshot = snapshot
+        self._snapshot_read_at = time.monotonic()
+        return snapshot
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                # One worker per host probes each interval; the others just read the cache
+                if cache.add(_cache_key(':lock'), True, max(1, self.interval - 1)):
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"system status refresh failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def _read_host_info(self):
+        # Host identity doesn't change while the process runs
+        if self._host_info is None:
+            self._host_info = read_host_info()
+        return self._host_info
+
+    def _read_version_info(self):
+        """Parsed VERSION.json, re-read only when the file's mtime changes"""
+        version_file = next((path for path in VERSION_PATHS if path.exists()), None)
+        try:
+            mtime = version_file.stat().st_mtime if version_file else None
+        except OSError:
+            mtime = None
+
+        if self._version_info is None or mtime != self._version_mtime:
+            version_data = None
+            if version_file:
+                try:
+                    with open(version_file, 'r', encoding='utf-8') as f:
+                        version_data = json.load(f)
+                except Exception:
+                    pass
+            self._version_info = parse_version_data(version_data)
+            self._version_mtime = mtime
+        return self._version_info
+
+
+def get_status_snapshot() -> dict:
+    return SystemStatusService.get_instance().get_snapshot()
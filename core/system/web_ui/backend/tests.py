@@ -0,0 +1,128 @@
+"""
+Tests for the background system status snapshot
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from . import status_service
+from .context_processors import unibos_context, version_context
+from .status_service import SystemStatusService, _cache_key, parse_version_data
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+HOST_INFO = {'hostname': 'edge-1', 'environment': 'test', 'display_name': 'edge-1'}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, WEB_UI_STATUS_INTERVAL=30)
+class SystemStatusServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.version_file = Path(self.tmpdir.name) / 'VERSION.json'
+        self.write_version('v1.2.3')
+
+        patches = [
+            patch.object(status_service, 'VERSION_PATHS', [self.version_file]),
+            patch.object(status_service, 'read_host_info', return_value=HOST_INFO),
+            # Snapshot reads must never spawn the refresh thread in tests
+            patch.object(SystemStatusService, 'start'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.service = SystemStatusService()
+
+    def write_version(self, version, mtime=None):
+        self.version_file.write_text(json.dumps({'version': version, 'build': '20260101_0000'}))
+        if mtime is not None:
+            os.utime(self.version_file, (mtime, mtime))
+
+    def test_refresh_publishes_snapshot_to_cache(self):
+        with patch.object(status_service, 'check_online_status', return_value=True):
+            self.service.refresh()
+
+        published = cache.get(_cache_key())
+        self.assertTrue(published['online_status'])
+        self.assertEqual(published['version'], 'v1.2.3')
+        self.assertEqual(published['hostname'], 'edge-1')
+
+    def test_snapshot_is_read_from_cache_without_probing(self):
+        cache.set(_cache_key(), {**HOST_INFO, 'version': 'v9.9.9', 'online_status': False})
+
+        with patch.object(status_service, 'check_online_status') as probe:
+            snapshot = self.service.get_snapshot()
+
+        probe.assert_not_called()
+        self.assertEqual(snapshot['version'], 'v9.9.9')
+        self.assertIs(snapshot['online_status'], False)
+
+    def test_snapshot_before_first_probe_has_unknown_connectivity(self):
+        with patch.object(status_service, 'check_online_status') as probe:
+            snapshot = self.service.get_snapshot()
+
+        probe.assert_not_called()
+        self.assertIsNone(snapshot['online_status'])
+        self.assertEqual(snapshot['version'], 'v1.2.3')
+
+    def test_one_worker_wins_the_refresh_lock(self):
+        other = SystemStatusService()
+        for service in (self.service, other):
+            # One loop iteration: stop instead of sleeping for the interval
+            service._stop_event.wait = lambda timeout, event=service._stop_event: event.set()
+
+        with patch.object(status_service, 'check_online_status', return_value=True) as probe:
+            self.service._run()
+            other._run()
+
+        self.assertEqual(probe.call_count, 1)
+
+    def test_version_file_reparsed_only_when_mtime_changes(self):
+        with patch.object(status_service, 'parse_version_data', wraps=parse_version_data) as parse:
+            self.assertEqual(self.service._read_version_info()['version'], 'v1.2.3')
+            self.assertEqual(self.service._read_version_info()['version'], 'v1.2.3')
+            self.assertEqual(parse.call_count, 1)
+
+            self.write_version('v1.2.4', mtime=self.version_file.stat().st_mtime + 10)
+            self.assertEqual(self.service._read_version_info()['version'], 'v1.2.4')
+            self.assertEqual(parse.call_count, 2)
+
+
+class ParseVersionDataTests(SimpleTestCase):
+
+    def test_new_format(self):
+        info = parse_version_data({
+            'version': {'major': 2, 'minor': 1, 'patch': 0, 'build': '20260102030405'},
+            'build_info': {'date': '2026-01-02'},
+        })
+        self.assertEqual(info, {'version': 'v2.1.0', 'build_number': '20260102_0304', 'release_date': '2026-01-02'})
+
+    def test_old_format(self):
+        info = parse_version_data({'version': 'v0.9.0', 'build_number': '20251116_0550', 'release_date': '2025-11-16'})
+        self.assertEqual(info['version'], 'v0.9.0')
+        self.assertEqual(info['build_number'], '20251116_0550')
+
+
+class ContextProcessorTests(SimpleTestCase):
+
+    def test_context_processors_use_snapshot(self):
+        snapshot = {**HOST_INFO, 'version': 'v1.0.0', 'build_number': 'b', 'release_date': 'd', 'online_status': True}
+        request = SimpleNamespace(user=SimpleNamespace(is_authenticated=False))
+
+        with patch.object(status_service, 'get_status_snapshot', return_value=snapshot), \
+                patch.object(status_service, 'check_online_status') as probe:
+            context = unibos_context(request)
+            versions = version_context(request)
+
+        probe.assert_not_called()
+        self.assertIs(context['online_status'], True)
+        self.assertEqual(context['hostname'], 'edge-1')
+        self.assertEqual(versions['version'], 'v1.0.0')
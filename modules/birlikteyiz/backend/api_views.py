@@ -57,10 +57,12 @@ class EarthquakeViewSet(viewsets.ReadOnlyModelViewSet):
             except ValueError:
                 pass
 
-        # Filter by source
+        # Filter by source; without it, reports merged into another source's row are left out
         source = self.request.query_params.get('source', None)
         if source:
             queryset = queryset.filter(source=source.upper())
+        elif self.action != 'retrieve':
+            queryset = queryset.filter(duplicate_of__isnull=True)
 
         # Filter by city
         city = self.request.query_params.get('city', None)
@@ -84,6 +86,7 @@ class EarthquakeViewSet(viewsets.ReadOnlyModelViewSet):
 
         # Base queryset for last 7 days
         last_7d = Earthquake.objects.filter(
+            duplicate_of__isnull=True,
             occurred_at__gte=timezone.now() - timedelta(days=7)
         )
 
@@ -95,6 +98,7 @@ class EarthquakeViewSet(viewsets.ReadOnlyModelViewSet):
 
         # Last 24h
         last_24h = Earthquake.objects.filter(
+            duplicate_of__isnull=True,
             occurred_at__gte=timezone.now() - timedelta(hours=24)
         ).count()
 
@@ -151,6 +155,7 @@ class EarthquakeViewSet(viewsets.ReadOnlyModelViewSet):
 
         # Query earthquakes
         earthquakes = Earthquake.objects.filter(
+            duplicate_of__isnull=True,
             occurred_at__gte=timezone.now() - timedelta(days=days),
             magnitude__gte=min_magnitude
         ).order_by('-occurred_at')[:500]
@@ -167,6 +172,7 @@ class EarthquakeViewSet(viewsets.ReadOnlyModelViewSet):
                 'loc': eq.location,
                 'city': eq.city or '',
                 'src': eq.source,
+                'reports': eq.report_count,
                 'time': eq.occurred_at.isoformat(),
             })
 
@@ -0,0 +1,704 @@
+"""
+Earthquake Ingestion Engine
+Fetches every agency concurrently, normalizes their reports into one schema
+and merges reports of the same earthquake.
+
+- All sources run at once on one aiohttp session, each under its own timeout
+  (EARTHQUAKE_SOURCE_TIMEOUTS); a slow or failing agency doesn't hold up the
+  others
+- Conditional requests: the ETag / Last-Modified of the last stored response
+  is sent back (If-None-Match / If-Modified-Since); a 304 skips parsing and
+  writing for that source
+- Parsers turn each agency's format into QuakeReport: UTC times, Decimal
+  values and the unique_id scheme existing rows already use
+- Reports are written with batched upserting bulk_create on unique_id
+- Reports of one quake by different agencies (close in origin time, epicenter
+  and magnitude) are clustered: the report of the first source in
+  EARTHQUAKE_SOURCE_PRIORITY is the canonical row, the others point to it
+  through duplicate_of, and lists and maps show canonical rows only
+
+A refresh costs the slowest agency's round trip instead of the sum of all of
+them, and one quake is one marker. Source URLs can be overridden
+(EARTHQUAKE_SOURCE_URLS or the urls argument), so tests can run against
+local fixture servers.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+import aiohttp
+import pytz
+from bs4 import BeautifulSoup
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Earthquake, EarthquakeDataSource
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+VALIDATORS_PREFIX = 'birlikteyiz:ingest:validators'
+VALIDATORS_TTL = 7 * 24 * 3600
+
+TURKEY_SOURCES = ('KANDILLI', 'AFAD')
+TURKEY_BOUNDS = {
+    'filter_min_lat': Decimal('35.0'),
+    'filter_max_lat': Decimal('43.0'),
+    'filter_min_lon': Decimal('25.0'),
+    'filter_max_lon': Decimal('45.0'),
+}
+
+# Written on every upsert; sources add the extra fields they provide
+UPSERT_FIELDS = [
+    'source', 'source_id', 'magnitude', 'depth', 'latitude', 'longitude',
+    'location', 'occurred_at', 'raw_data',
+]
+
+SOURCE_DESCRIPTIONS = {
+    'KANDILLI': 'Boğaziçi Üniversitesi Kandilli Rasathanesi ve Deprem Araştırma Enstitüsü - Türkiye deprem verileri',
+    'AFAD': 'Afet ve Acil Durum Yönetimi Başkanlığı - Türkiye resmi deprem verileri',
+    'IRIS': 'Incorporated Research Institutions for Seismology - Küresel deprem verileri',
+    'USGS': 'United States Geological Survey - Küresel deprem verileri',
+    'GFZ': 'German Research Centre for Geosciences - Avrupa deprem verileri',
+    'EMSC': 'European-Mediterranean Seismological Centre - Gerçek zamanlı küresel deprem verileri (WebSocket)',
+}
+
+
+@dataclass
+class QuakeReport:
+    """One agency's report of an earthquake, normalized"""
+    unique_id: str
+    source: str
+    source_id: Optional[str]
+    magnitude: Decimal
+    depth: Decimal
+    latitude: Decimal
+    longitude: Decimal
+    location: str
+    occurred_at: datetime
+    city: Optional[str] = None
+    district: Optional[str] = None
+    intensity: Optional[str] = None
+    felt_reports: int = 0
+    raw_data: Optional[dict] = None
+
+    def to_model(self) -> Earthquake:
+        return Earthquake(
+            unique_id=self.unique_id,
+            source=self.source,
+            source_id=self.source_id,
+            magnitude=self.magnitude,
+            depth=self.depth,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            location=self.location,
+            city=self.city,
+            district=self.district,
+            occurred_at=self.occurred_at,
+            intensity=self.intensity,
+            felt_reports=self.felt_reports,
+            raw_data=self.raw_data,
+        )
+
+
+@dataclass
+class SourceResult:
+    """Outcome of one source in a run"""
+    new: int = 0
+    updated: int = 0
+    elapsed: float = 0.0
+    not_modified: bool = False
+    error: Optional[str] = None
+    reports: List[QuakeReport] = field(default_factory=list, repr=False)
+    validators: Dict[str, str] = field(default_factory=dict, repr=False)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Naive agency timestamps are UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def _date_range(data_source) -> Dict[str, str]:
+    # Whole days so the query (and its ETag) stays the same for a day; the end is exclusive
+    today = datetime.now(dt_timezone.utc).date()
+    return {
+        'start': (today - timedelta(days=7)).strftime('%Y-%m-%d'),
+        'end': (today + timedelta(days=1)).strftime('%Y-%m-%d'),
+    }
+
+
+def _bounds_params(data_source) -> Dict[str, float]:
+    bounds = data_source.get_geographic_bounds() if data_source.use_geographic_filter else None
+    if not bounds or not all(value is not None for value in bounds.values()):
+        return {}
+    return {
+        'minlat': bounds['min_lat'],
+        'maxlat': bounds['max_lat'],
+        'minlon': bounds['min_lon'],
+        'maxlon': bounds['max_lon'],
+    }
+
+
+def afad_params(data_source) -> Dict:
+    dates = _date_range(data_source)
+    return {
+        'start': dates['start'],
+        'end': dates['end'],
+        'minmag': float(data_source.min_magnitude) if data_source.min_magnitude else 2.0,
+        'limit': data_source.max_results or 100,
+    }
+
+
+def fdsn_params(data_source, orderby: str) -> Dict:
+    """FDSN event web service query (IRIS, GFZ)"""
+    dates = _date_range(data_source)
+    params = {
+        'format': 'text',
+        'minmag': float(data_source.min_magnitude) if data_source.min_magnitude else 3.0,
+        'starttime': dates['start'],
+        'endtime': dates['end'],
+        'orderby': orderby,
+        'limit': data_source.max_results or 100,
+    }
+    params.update(_bounds_params(data_source))
+    return params
+
+
+def parse_kandilli(text: str, data_source=None) -> List[QuakeReport]:
+    """Kandilli lst5.asp: fixed-width lines inside <pre>, Turkey local time"""
+    pre_element = BeautifulSoup(text, 'html.parser').find('pre')
+    if not pre_element:
+        logger.warning('Kandilli: could not find PRE element in HTML')
+        return []
+
+    turkey_tz = pytz.timezone('Europe/Istanbul')
+    reports = []
+    data_started = False
+    for line in pre_element.text.split('\n'):
+        # Data starts after the separator line
+        if '------' in line and not data_started:
+            data_started = True
+            continue
+        if not data_started or not line.strip():
+            continue
+
+        try:
+            # Date Time Lat Lon Depth MD ML MW Location...
+            parts = line.split()
+            if len(parts) < 7:
+                continue
+            date_str, time_str, lat, lon, depth = parts[:5]
+
+            # First available of MD, ML, MW
+            magnitude = None
+            for column in parts[5:8]:
+                if column == '-.-':
+                    continue
+                try:
+                    magnitude = float(column)
+                except ValueError:
+                    continue
+                if magnitude:
+                    break
+            if not magnitude:
+                continue
+
+            location = ' '.join(parts[8:]) if len(parts) > 8 else 'Unknown'
+            occurred_at = turkey_tz.localize(datetime.strptime(f"{date_str} {time_str}", "%Y.%m.%d %H:%M:%S"))
+
+            reports.append(QuakeReport(
+                unique_id=f"KANDILLI_{date_str}_{time_str}_{lat}_{lon}",
+                source='KANDILLI',
+                source_id=None,
+                magnitude=Decimal(str(magnitude)),
+                depth=Decimal(depth),
+                latitude=Decimal(lat),
+                longitude=Decimal(lon),
+                location=location.replace('�lk sel', 'İlksel'),  # Fix encoding
+                occurred_at=_as_utc(occurred_at),
+                raw_data={'original_line': line},
+            ))
+        except Exception:
+            continue  # Skip line if parsing fails
+    return reports
+
+
+def parse_afad(data, data_source=None) -> List[QuakeReport]:
+    """AFAD event filter API (JSON, UTC times)"""
+    events = data if isinstance(data, list) else data.get('data', [])
+    reports = []
+    for event in events:
+        try:
+            event_id = event.get('eventID') or event.get('id')
+            if not event_id:
+                continue
+
+            date_str = event.get('date') or event.get('eventDate') or event.get('time')
+            if not date_str:
+                continue
+            occurred_at = _as_utc(datetime.fromisoformat(date_str.replace('Z', '+00:00')))
+
+            reports.append(QuakeReport(
+                unique_id=f"AFAD_{event_id}",
+                source='AFAD',
+                source_id=str(event_id),
+                magnitude=Decimal(str(event.get('magnitude', event.get('mag', 0)))),
+                depth=Decimal(str(event.get('depth', 0))),
+                latitude=Decimal(str(event.get('latitude', event.get('lat', 0)))),
+                longitude=Decimal(str(event.get('longitude', event.get('lon', 0)))),
+                location=event.get('location', event.get('place', 'Unknown')),
+                city=event.get('province', event.get('city')),
+                district=event.get('district'),
+                occurred_at=occurred_at,
+                raw_data=event,
+            ))
+        except Exception as e:
+            logger.warning(f'Error parsing AFAD event: {e}')
+    return reports
+
+
+def parse_fdsn_text(text: str, source: str) -> List[QuakeReport]:
+    """FDSN text format (IRIS, GFZ): pipe-separated, '#' header, UTC times"""
+    reports = []
+    for line in text.strip().split('\n'):
+        if not line.strip() or line.startswith('#'):
+            continue
+        try:
+            parts = line.split('|')
+            if len(parts) < 13:
+                continue
+            event_id = parts[0].strip()
+            reports.append(QuakeReport(
+                unique_id=f"{source}_{event_id}",
+                source=source,
+                source_id=event_id,
+                magnitude=Decimal(parts[10]),
+                depth=Decimal(parts[4]),
+                latitude=Decimal(parts[2]),
+                longitude=Decimal(parts[3]),
+                location=parts[12].strip() or 'Unknown',
+                occurred_at=_as_utc(datetime.fromisoformat(parts[1].strip().replace('Z', '+00:00'))),
+                raw_data={'original_line': line},
+            ))
+        except Exception:
+            continue  # Header line or malformed row
+    return reports
+
+
+def parse_usgs(data, data_source=None) -> List[QuakeReport]:
+    """USGS GeoJSON summary feed"""
+    bounds = None
+    if data_source is not None and data_source.use_geographic_filter:
+        bounds = data_source.get_geographic_bounds()
+
+    reports = []
+    for feature in data.get('features', []):
+        try:
+            props = feature['properties']
+            lon, lat, depth = feature['geometry']['coordinates'][:3]
+            if bounds and all(value is not None for value in bounds.values()):
+                if not (bounds['min_lat'] <= lat <= bounds['max_lat'] and
+                        bounds['min_lon'] <= lon <= bounds['max_lon']):
+                    continue
+
+            reports.append(QuakeReport(
+                unique_id=f"USGS_{feature['id']}",
+                source='USGS',
+                source_id=feature['id'],
+                magnitude=Decimal(str(props['mag'])),
+                depth=Decimal(str(depth)),
+                latitude=Decimal(str(lat)),
+                longitude=Decimal(str(lon)),
+                location=props['place'],
+                occurred_at=datetime.fromtimestamp(props['time'] / 1000, tz=dt_timezone.utc),
+                intensity=str(props['mmi']) if props.get('mmi') is not None else None,
+                felt_reports=props.get('felt') or 0,
+                raw_data=feature,
+            ))
+        except Exception as e:
+            logger.warning(f'Error parsing USGS event: {e}')
+    return reports
+
+
+SOURCES = {
+    'KANDILLI': {
+        'url': 'http://www.koeri.boun.edu.tr/scripts/lst5.asp',
+        'format': 'text',
+        'encoding': 'windows-1254',  # Turkish encoding
+        'parser': parse_kandilli,
+    },
+    'AFAD': {
+        'url': 'https://servisnet.afad.gov.tr/apigateway/deprem/apiv2/event/filter',
+        'format': 'json',
+        'params': afad_params,
+        'parser': parse_afad,
+        'fields': ('city', 'district'),
+    },
+    'IRIS': {  # Incorporated Research Institutions for Seismology - Global data
+        'url': 'http://service.iris.edu/fdsnws/event/1/query',
+        'format': 'text',
+        'params': lambda data_source: fdsn_params(data_source, 'time-desc'),
+        'parser': lambda text, data_source: parse_fdsn_text(text, 'IRIS'),
+    },
+    'USGS': {
+        'url': 'https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson',
+        'format': 'json',
+        'parser': parse_usgs,
+        'fields': ('intensity', 'felt_reports'),
+    },
+    'GFZ': {  # German Research Centre for Geosciences - European data
+        'url': 'https://geofon.gfz-potsdam.de/fdsnws/event/1/query',
+        'format': 'text',
+        'params': lambda data_source: fdsn_params(data_source, 'time'),
+        'parser': lambda text, data_source: parse_fdsn_text(text, 'GFZ'),
+    },
+}
+
+
+def ensure_data_source(name: str, url: str) -> EarthquakeDataSource:
+    """EarthquakeDataSource row of a source, created with its defaults on first use"""
+    turkey_only = name in TURKEY_SOURCES
+    defaults = {
+        'url': url,
+        'is_active': True,
+        'fetch_interval_minutes': 5,
+        'min_magnitude': Decimal('2.5'),
+        'max_results': 100,
+        'use_geographic_filter': turkey_only,
+        'filter_region_name': 'Türkiye' if turkey_only else 'Küresel',
+        'description': SOURCE_DESCRIPTIONS.get(name, ''),
+    }
+    if turkey_only:
+        defaults.update(TURKEY_BOUNDS)
+    data_source, created = EarthquakeDataSource.objects.get_or_create(name=name, defaults=defaults)
+    if created:
+        logger.info(f'Created data source: {name}')
+    return data_source
+
+
+def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance (haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 6371.0 * 2 * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cluster_reports(rows: Iterable[Dict], window: float, distance_km: float,
+                    magnitude_delta: float, priority: List[str]) -> List[List[Dict]]:
+    """
+    Group reports of the same earthquake
+
+    Reports are taken in source priority order; each joins the closest
+    cluster whose canonical (first) report is within window seconds,
+    distance_km and magnitude_delta and which has no report from the same
+    source yet, or starts a new cluster. An agency never reports one quake
+    twice, so its own nearby events (e.g. aftershocks) stay separate.
+
+    Args:
+        rows: dicts with unique_id, source, magnitude, latitude, longitude, occurred_at
+
+    Returns:
+        Clusters, each a list of rows starting with the canonical one
+    """
+    rank = {source: index for index, source in enumerate(priority)}
+    ordered = sorted(rows, key=lambda row: (
+        rank.get(row['source'], len(rank)), row['occurred_at'], row['unique_id']
+    ))
+
+    buckets = defaultdict(list)  # origin time // window -> clusters
+    clusters = []
+    for row in ordered:
+        timestamp = row['occurred_at'].timestamp()
+        bucket = int(timestamp // window)
+        best, best_score = None, None
+        for key in (bucket - 1, bucket, bucket + 1):
+            for cluster in buckets[key]:
+                if row['source'] in cluster['sources']:
+                    continue
+                anchor = cluster['rows'][0]
+                dt = abs(timestamp - anchor['occurred_at'].timestamp())
+                dm = abs(float(row['magnitude']) - float(anchor['magnitude']))
+                if dt > window or dm > magnitude_delta:
+                    continue
+                distance = _distance_km(
+                    float(row['latitude']), float(row['longitude']),
+                    float(anchor['latitude']), float(anchor['longitude']),
+                )
+                if distance > distance_km:
+                    continue
+                score = dt / window + distance / distance_km + (dm / magnitude_delta if magnitude_delta else 0)
+                if best_score is None or score < best_score:
+                    best, best_score = cluster, score
+
+        if best is None:
+            best = {'rows': [], 'sources': set()}
+            buckets[bucket].append(best)
+            clusters.append(best)
+        best['rows'].append(row)
+        best['sources'].add(row['source'])
+
+    return [cluster['rows'] for cluster in clusters]
+
+
+def merge_duplicates(start: datetime, end: datetime, new_ids: Optional[Set[str]] = None) -> List[str]:
+    """
+    Re-cluster reports with origin times between start and end
+
+    Rows within twice the merge window around the range are taken into
+    account; only rows within one window are rewritten, so clusters cut by
+    the range edge are left as they were.
+
+    Returns:
+        unique_ids of canonical rows whose whole cluster is in new_ids
+        (quakes no source had reported before)
+    """
+    window = getattr(settings, 'EARTHQUAKE_MERGE_WINDOW', 60)
+    batch_size = getattr(settings, 'EARTHQUAKE_UPSERT_BATCH_SIZE', 500)
+    margin = timedelta(seconds=window)
+    new_ids = new_ids or set()
+
+    rows = list(Earthquake.objects.filter(
+        occurred_at__gte=start - 2 * margin,
+        occurred_at__lte=end + 2 * margin,
+    ).values('id', 'unique_id', 'source', 'magnitude', 'latitude', 'longitude',
+             'occurred_at', 'duplicate_of', 'report_count'))
+
+    clusters = cluster_reports(
+        rows,
+        window=window,
+        distance_km=getattr(settings, 'EARTHQUAKE_MERGE_DISTANCE_KM', 100),
+        magnitude_delta=getattr(settings, 'EARTHQUAKE_MERGE_MAGNITUDE_DELTA', 1.0),
+        priority=getattr(settings, 'EARTHQUAKE_SOURCE_PRIORITY', ['AFAD', 'KANDILLI', 'EMSC', 'USGS', 'GFZ', 'IRIS']),
+    )
+
+    changed = []
+    first_reports = []
+    for members in clusters:
+        canonical = members[0]
+        for row in members:
+            if not (start - margin <= row['occurred_at'] <= end + margin):
+                continue
+            duplicate_of = None if row is canonical else canonical['unique_id']
+            report_count = len(members) if row is canonical else 1
+            if (row['duplicate_of'], row['report_count']) != (duplicate_of, report_count):
+                changed.append(Earthquake(id=row['id'], duplicate_of=duplicate_of, report_count=report_count))
+        if all(row['unique_id'] in new_ids for row in members):
+            first_reports.append(canonical['unique_id'])
+
+    if changed:
+        Earthquake.objects.bulk_update(changed, ['duplicate_of', 'report_count'], batch_size=batch_size)
+        logger.info(f'Merged reports: {len(changed)} rows relinked in {len(clusters)} quakes')
+    return first_reports
+
+
+def _run_async(coro):
+    """Run a coroutine from sync code, also when the caller already has a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class EarthquakeIngestor:
+    """
+    Concurrent fetch, batched upsert and cross-source merge of all agencies
+
+    Args:
+        urls: URL overrides by source name (see SOURCES)
+        timeouts: per-source timeout overrides in seconds
+    """
+
+    DEFAULT_TIMEOUT = 15
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None, timeouts: Optional[Dict[str, float]] = None):
+        self.urls = {
+            **{name: spec['url'] for name, spec in SOURCES.items()},
+            **getattr(settings, 'EARTHQUAKE_SOURCE_URLS', {}),
+            **(urls or {}),
+        }
+        self.timeouts = {
+            **getattr(settings, 'EARTHQUAKE_SOURCE_TIMEOUTS', {}),
+            **(timeouts or {}),
+        }
+        self.batch_size = getattr(settings, 'EARTHQUAKE_UPSERT_BATCH_SIZE', 500)
+
+    def run(self, sources: Optional[List[str]] = None) -> Dict[str, SourceResult]:
+        """
+        Fetch, store and merge the given sources (default: all)
+
+        Inactive sources are left out of the result. Source failures are
+        recorded on their result and data source row; database errors raise.
+        """
+        data_sources = {name: ensure_data_source(name, self.urls[name]) for name in sources or SOURCES}
+        active = {name: data_source for name, data_source in data_sources.items() if data_source.is_active}
+        for name in set(data_sources) - set(active):
+            logger.info(f'Skipping inactive source: {name}')
+
+        results = _run_async(self._fetch_all(active)) if active else {}
+
+        fetched = [report for result in results.values() if result.error is None for report in result.reports]
+        counts = self.store(fetched)
+        for name, result in results.items():
+            result.new, result.updated = counts.get(name, (0, 0))
+            self._record(active[name], result)
+        return results
+
+    async def _fetch_all(self, data_sources: Dict[str, EarthquakeDataSource]) -> Dict[str, SourceResult]:
+        names = list(data_sources)
+        async with aiohttp.ClientSession(headers={'User-Agent': USER_AGENT}) as session:
+            outcomes = await asyncio.gather(
+                *(self._fetch_source(session, name, data_sources[name]) for name in names),
+                return_exceptions=True,
+            )
+
+        results = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, BaseException):
+                message = str(outcome) or type(outcome).__name__
+                if isinstance(outcome, asyncio.TimeoutError):
+                    message = f'timed out after {self.timeouts.get(name, self.DEFAULT_TIMEOUT)}s'
+                logger.error(f'{name} fetch failed: {message}')
+                outcome = SourceResult(error=message)
+            results[name] = outcome
+        return results
+
+    async def _fetch_source(self, session, name: str, data_source) -> SourceResult:
+        started = time.monotonic()
+        result = await asyncio.wait_for(
+            self._request(session, name, data_source),
+            self.timeouts.get(name, self.DEFAULT_TIMEOUT),
+        )
+        result.elapsed = time.monotonic() - started
+        return result
+
+    async def _request(self, session, name: str, data_source) -> SourceResult:
+        spec = SOURCES[name]
+        params = spec['params'](data_source) if 'params' in spec else None
+        headers = {'Accept': 'application/json'} if spec['format'] == 'json' else {}
+        validators = cache.get(f'{VALIDATORS_PREFIX}:{name}') or {}
+        if validators.get('url') == self.urls[name] and validators.get('params') == params:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        async with session.get(self.urls[name], params=params, headers=headers) as response:
+            if response.status == 304:
+                return SourceResult(not_modified=True)
+            response.raise_for_status()
+            if spec['format'] == 'json':
+                payload = await response.json(content_type=None)
+            else:
+                payload = await response.text(encoding=spec.get('encoding'), errors='replace')
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        result = SourceResult(reports=spec['parser'](payload, data_source))
+        if etag or last_modified:
+            result.validators = {
+                'url': self.urls[name],
+                'params': params,
+                'etag': etag,
+                'last_modified': last_modified,
+            }
+        return result
+
+    def store(self, reports: List[QuakeReport]) -> Dict[str, tuple]:
+        """
+        Upsert reports in batches and merge them with other sources' reports
+
+        Returns:
+            {source: (new, updated)}
+        """
+        if not reports:
+            return {}
+        reports = list({report.unique_id: report for report in reports}.values())
+        unique_ids = [report.unique_id for report in reports]
+
+        existing = set()
+        for offset in range(0, len(unique_ids), self.batch_size):
+            existing.update(Earthquake.objects.filter(
+                unique_id__in=unique_ids[offset:offset + self.batch_size]
+            ).values_list('unique_id', flat=True))
+
+        by_source = defaultdict(list)
+        for report in reports:
+            by_source[report.source].append(report)
+
+        counts = {}
+        written = []
+        with transaction.atomic():
+            for source, source_reports in by_source.items():
+                instances = [report.to_model() for report in source_reports]
+                Earthquake.objects.bulk_create(
+                    instances,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=['unique_id'],
+                    update_fields=UPSERT_FIELDS + list(SOURCES.get(source, {}).get('fields', ())),
+                )
+                written.extend(instances)
+                new = sum(1 for report in source_reports if report.unique_id not in existing)
+                counts[source] = (new, len(source_reports) - new)
+
+            new_ids = set(unique_ids) - existing
+            first_reports = merge_duplicates(
+                min(report.occurred_at for report in reports),
+                max(report.occurred_at for report in reports),
+                new_ids,
+            )
+
+        if apps.is_installed('core.base.sync'):
+            from core.base.sync.capture import record_changes
+            record_changes(Earthquake, written)  # bulk_create sends no signals
+
+        if first_reports:
+            from .signals import notify_earthquake
+            for earthquake in Earthquake.objects.filter(unique_id__in=first_reports):
+                notify_earthquake(earthquake)
+        return counts
+
+    def _record(self, data_source: EarthquakeDataSource, result: SourceResult):
+        """Update the data source's fetch statistics"""
+        now = timezone.now()
+        data_source.last_fetch = now
+        data_source.fetch_count += 1
+
+        if result.error is not None:
+            data_source.last_error = result.error
+            data_source.last_error_time = now
+            data_source.error_count += 1
+            data_source.save()
+            return
+
+        data_source.last_success = now
+        data_source.success_count += 1
+        data_source.total_earthquakes_fetched += result.new
+        data_source.last_response_time = result.elapsed
+        if data_source.avg_response_time:
+            data_source.avg_response_time = (data_source.avg_response_time + result.elapsed) / 2
+        else:
+            data_source.avg_response_time = result.elapsed
+        data_source.last_error = None  # Clear error on success
+        data_source.save()
+
+        # Only after the reports are stored, so a 304 never hides unsaved data
+        if result.validators:
+            cache.set(f'{VALIDATORS_PREFIX}:{data_source.name}', result.validators, VALIDATORS_TTL)
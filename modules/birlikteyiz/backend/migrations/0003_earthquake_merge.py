@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-16 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birlikteyiz', '0002_alter_earthquakedatasource_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='earthquake',
+            name='duplicate_of',
+            field=models.CharField(blank=True, db_index=True, help_text="Aynı depremin kanonik kaydının unique_id'si (boşsa bu kayıt kanoniktir)", max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='earthquake',
+            name='report_count',
+            field=models.IntegerField(default=1, help_text='Bu depremi bildiren kaynak sayısı'),
+        ),
+        migrations.AlterField(
+            model_name='earthquake',
+            name='source',
+            field=models.CharField(choices=[('KANDILLI', 'Kandilli Rasathanesi'), ('AFAD', 'AFAD'), ('TDBS', 'TDBS'), ('USGS', 'USGS'), ('EMSC', 'EMSC'), ('IRIS', 'IRIS'), ('GFZ', 'GFZ')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='earthquake',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', True)), fields=['-occurred_at'], name='birlikteyiz_eq_canonical_idx'),
+        ),
+    ]
@@ -435,6 +435,8 @@ class Earthquake(models.Model):
         ('TDBS', 'TDBS'),
         ('USGS', 'USGS'),
         ('EMSC', 'EMSC'),
+        ('IRIS', 'IRIS'),
+        ('GFZ', 'GFZ'),
     ]
     
     # Benzersiz tanımlayıcı (kaynak + olay ID)
@@ -470,6 +472,13 @@ class Earthquake(models.Model):
     # Meta veri
     raw_data = models.JSONField(null=True, blank=True)
     
+    # Kaynaklar arası birleştirme (aynı depremi bildiren farklı kurumlar)
+    duplicate_of = models.CharField(
+        max_length=100, null=True, blank=True, db_index=True,
+        help_text="Aynı depremin kanonik kaydının unique_id'si (boşsa bu kayıt kanoniktir)"
+    )
+    report_count = models.IntegerField(default=1, help_text="Bu depremi bildiren kaynak sayısı")
+    
     class Meta:
         db_table = 'birlikteyiz_earthquakes'
         ordering = ['-occurred_at']
@@ -478,10 +487,19 @@ class Earthquake(models.Model):
             models.Index(fields=['magnitude']),
             models.Index(fields=['source']),
             models.Index(fields=['city']),
+            models.Index(
+                fields=['-occurred_at'],
+                name='birlikteyiz_eq_canonical_idx',
+                condition=models.Q(duplicate_of__isnull=True),
+            ),
         ]
         
     def __str__(self):
         return f"{self.magnitude} - {self.location} ({self.occurred_at})"
+    
+    def get_source_reports(self):
+        """Diğer kaynakların aynı depreme ait kayıtları"""
+        return Earthquake.objects.filter(duplicate_of=self.unique_id).order_by('source')
 
 
 class EarthquakeComment(models.Model):
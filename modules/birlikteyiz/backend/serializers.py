@@ -5,6 +5,8 @@ from .models import Earthquake, EarthquakeDataSource, DisasterZone, MeshNode
 class EarthquakeSerializer(serializers.ModelSerializer):
     """Serializer for Earthquake model"""
 
+    source_reports = serializers.SerializerMethodField()
+
     class Meta:
         model = Earthquake
         fields = [
@@ -25,9 +27,28 @@ class EarthquakeSerializer(serializers.ModelSerializer):
             'solution_type',
             'is_felt',
             'felt_reports',
+            'duplicate_of',
+            'report_count',
+            'source_reports',
         ]
         read_only_fields = ['id', 'unique_id', 'fetched_at']
 
+    def get_source_reports(self, obj):
+        """Other agencies' reports merged into this quake"""
+        if obj.duplicate_of:
+            return []
+        return [
+            {
+                'source': report.source,
+                'unique_id': report.unique_id,
+                'magnitude': str(report.magnitude),
+                'latitude': str(report.latitude),
+                'longitude': str(report.longitude),
+                'occurred_at': report.occurred_at.isoformat(),
+            }
+            for report in obj.get_source_reports()
+        ]
+
 
 class EarthquakeListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for list view"""
@@ -45,6 +66,7 @@ class EarthquakeListSerializer(serializers.ModelSerializer):
             'location',
             'city',
             'source',
+            'report_count',
             'occurred_at',
             'time_ago',
         ]
@@ -82,6 +82,7 @@ class EMSCWebSocketClient:
             }
         }
         """
+        from modules.birlikteyiz.backend.ingestion import merge_duplicates
         from modules.birlikteyiz.backend.models import Earthquake
 
         try:
@@ -141,6 +142,9 @@ class EMSCWebSocketClient:
                     }
                 )
 
+                # Link to (or take over) reports of the same quake by other agencies
+                merge_duplicates(occurred_at, occurred_at)
+
                 # Update data source statistics
                 if created:
                     self.data_source.success_count += 1
@@ -32,6 +32,17 @@ def earthquake_created(sender, instance, created, **kwargs):
     if not created:
         return
 
+    notify_earthquake(instance)
+
+
+def notify_earthquake(instance):
+    """
+    Send a notification for a new earthquake if it is recent and significant
+
+    Called by the post_save handler, and by the ingestion engine for quakes
+    it stores with bulk_create (which sends no signals).
+    """
+
     # Only notify for recent earthquakes (within last hour)
     one_hour_ago = timezone.now() - timedelta(hours=1)
     if instance.occurred_at < one_hour_ago:
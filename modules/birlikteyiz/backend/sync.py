@@ -0,0 +1,16 @@
+"""
+Node sync declarations for birlikteyiz
+
+Earthquakes are keyed by their source event id; nodes fetch them
+independently, so sync only fills in events a node has missed. The
+cross-source merge (duplicate_of, report_count) is computed by each node
+from its own rows and is not synced.
+"""
+
+from core.base.sync.registry import register
+
+from .models import Earthquake
+
+CONFLICT_POLICY = 'local_wins'
+
+register(Earthquake, key_field='unique_id', exclude=['duplicate_of', 'report_count'])
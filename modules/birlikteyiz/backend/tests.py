@@ -0,0 +1,188 @@
+"""
+Tests for Birlikteyiz earthquake ingestion
+Agencies are replaced by a local fixture server
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from .ingestion import EarthquakeIngestor, cluster_reports
+from .models import Earthquake
+
+
+def _millis(value):
+    return int(datetime.fromisoformat(value).replace(tzinfo=dt_timezone.utc).timestamp() * 1000)
+
+
+KANDILLI_PAGE = """<html><body><pre>
+Tarih      Saat      Enlem(N)  Boylam(E) Derinlik(km)  MD   ML   Mw    Yer                                             Çözüm Niteliği
+---------- --------  --------  -------  ----------    ------------    --------------                                  --------------
+2025.03.01 15:00:04  38.1200   27.1300        6.5      -.-  4.0  -.-   SEFERIHISAR (IZMIR)                               İlksel
+2025.03.01 15:00:30  38.1210   27.1310        7.0      -.-  3.1  -.-   SEFERIHISAR (IZMIR)                               İlksel
+</pre></body></html>"""
+
+FDSN_HEADER = '#EventID|Time|Latitude|Longitude|Depth/km|Author|Catalog|Contributor|ContributorID|MagType|Magnitude|MagAuthor|EventLocationName'
+
+# One quake near Seferihisar reported by all five agencies (Kandilli also saw an
+# aftershock 26 seconds later) and one USGS-only quake off Japan
+FIXTURES = {
+    '/kandilli': ('text/html; charset=windows-1254', KANDILLI_PAGE.encode('windows-1254')),
+    '/afad': ('application/json', json.dumps([{
+        'eventID': '650123', 'date': '2025-03-01T12:00:03', 'latitude': '38.12', 'longitude': '27.13',
+        'depth': '7.1', 'magnitude': '4.3', 'location': 'Seferihisar (İzmir)',
+        'province': 'İzmir', 'district': 'Seferihisar',
+    }]).encode()),
+    '/usgs': ('application/json', json.dumps({'features': [
+        {'id': 'us7000abcd', 'properties': {'mag': 4.4, 'place': 'western Turkey', 'time': _millis('2025-03-01T12:00:04'), 'mmi': None, 'felt': 3},
+         'geometry': {'coordinates': [27.14, 38.10, 10.0]}},
+        {'id': 'us7000wxyz', 'properties': {'mag': 5.1, 'place': 'off the east coast of Honshu, Japan', 'time': _millis('2025-03-01T12:00:05'), 'mmi': 3.4, 'felt': None},
+         'geometry': {'coordinates': [142.3, 38.3, 35.0]}},
+    ]}).encode()),
+    '/iris': ('text/plain', '\n'.join([
+        FDSN_HEADER, '11111|2025-03-01T12:00:04.5|38.11|27.12|9.0|ISC|ISC|ISC|1|mb|4.1|ISC|TURKEY',
+    ]).encode()),
+    '/gfz': ('text/plain', '\n'.join([
+        FDSN_HEADER, 'gfz2025ehqb|2025-03-01T12:00:03|38.13|27.11|10|GFZ|GFZ|GFZ|gfz2025ehqb|M|4.2|GFZ|Western Turkey',
+    ]).encode()),
+}
+USGS_ETAG = '"usgs-v1"'
+
+
+class EarthquakeClusteringTests(SimpleTestCase):
+    """Test cross-source clustering"""
+
+    def row(self, unique_id, source, at, lat, lon, magnitude):
+        return {
+            'unique_id': unique_id, 'source': source, 'magnitude': magnitude, 'latitude': lat, 'longitude': lon,
+            'occurred_at': datetime.fromisoformat(at).replace(tzinfo=dt_timezone.utc),
+        }
+
+    def test_reports_of_one_quake_merge_under_the_preferred_source(self):
+        """Test the canonical report is the highest priority source and far/same-source events stay apart"""
+        clusters = cluster_reports([
+            self.row('USGS_a', 'USGS', '2025-03-01T12:00:04', 38.10, 27.14, 4.4),
+            self.row('AFAD_a', 'AFAD', '2025-03-01T12:00:03', 38.12, 27.13, 4.3),
+            self.row('KANDILLI_a', 'KANDILLI', '2025-03-01T12:00:04', 38.12, 27.13, 4.0),
+            self.row('KANDILLI_b', 'KANDILLI', '2025-03-01T12:00:30', 38.12, 27.13, 3.9),
+            self.row('USGS_far', 'USGS', '2025-03-01T12:00:05', 38.30, 142.30, 5.1),
+            self.row('IRIS_late', 'IRIS', '2025-03-01T12:05:00', 38.11, 27.12, 4.1),
+        ], window=60, distance_km=100, magnitude_delta=1.0, priority=['AFAD', 'KANDILLI', 'USGS', 'IRIS'])
+
+        merged = {tuple(row['unique_id'] for row in cluster) for cluster in clusters}
+        self.assertIn(('AFAD_a', 'KANDILLI_a', 'USGS_a'), merged)
+        self.assertIn(('KANDILLI_b',), merged)
+        self.assertIn(('USGS_far',), merged)
+        self.assertIn(('IRIS_late',), merged)
+
+
+class EarthquakeIngestionTests(TestCase):
+    """Test concurrent ingestion against local agency fixtures"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import urlparse
+
+        requests_seen = cls.requests_seen = []
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                requests_seen.append((path, dict(self.headers)))
+                if path == '/slow':
+                    time.sleep(2)
+                    path = '/iris'
+                if path not in FIXTURES:
+                    self.send_error(503)
+                    return
+                if path == '/usgs' and self.headers.get('If-None-Match') == USGS_ETAG:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                content_type, body = FIXTURES[path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if path == '/usgs':
+                    self.send_header('ETag', USGS_ETAG)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.requests_seen.clear()
+
+    def make_ingestor(self, **overrides):
+        urls = {name: f"{self.base_url}/{name.lower()}" for name in ('KANDILLI', 'AFAD', 'IRIS', 'USGS', 'GFZ')}
+        urls.update(overrides)
+        return EarthquakeIngestor(urls=urls, timeouts={name: 1 for name in urls})
+
+    def test_all_sources_are_stored_and_merged(self):
+        """Test every agency is normalized, stored and merged into one canonical quake"""
+        results = self.make_ingestor().run()
+
+        self.assertEqual({name: result.new for name, result in results.items()},
+                         {'KANDILLI': 2, 'AFAD': 1, 'IRIS': 1, 'USGS': 2, 'GFZ': 1})
+        self.assertEqual(Earthquake.objects.count(), 7)
+
+        canonical = Earthquake.objects.filter(duplicate_of__isnull=True)
+        self.assertEqual(canonical.count(), 3)
+        main = Earthquake.objects.get(unique_id='AFAD_650123')
+        self.assertIsNone(main.duplicate_of)
+        self.assertEqual(main.report_count, 5)
+        self.assertEqual(main.city, 'İzmir')
+        self.assertEqual(sorted(main.get_source_reports().values_list('source', flat=True)),
+                         ['GFZ', 'IRIS', 'KANDILLI', 'USGS'])
+
+        # Kandilli's local time and the agencies' UTC times are the same instant
+        kandilli = Earthquake.objects.get(unique_id='KANDILLI_2025.03.01_15:00:04_38.1200_27.1300')
+        self.assertEqual(kandilli.occurred_at, datetime(2025, 3, 1, 12, 0, 4, tzinfo=dt_timezone.utc))
+        self.assertEqual(kandilli.duplicate_of, 'AFAD_650123')
+
+    def test_rerun_updates_in_place(self):
+        """Test a second run upserts the same rows and keeps the merge"""
+        self.make_ingestor().run()
+        results = self.make_ingestor().run(['AFAD', 'IRIS'])
+
+        self.assertEqual((results['AFAD'].new, results['AFAD'].updated), (0, 1))
+        self.assertEqual(Earthquake.objects.count(), 7)
+        self.assertEqual(Earthquake.objects.get(unique_id='AFAD_650123').report_count, 5)
+
+    def test_slow_source_times_out_without_blocking_the_others(self):
+        """Test a source over its timeout fails alone and doesn't delay the run"""
+        started = time.monotonic()
+        results = self.make_ingestor(IRIS=f"{self.base_url}/slow").run()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIn('timed out', results['IRIS'].error)
+        self.assertEqual(results['USGS'].new, 2)
+        self.assertFalse(Earthquake.objects.filter(source='IRIS').exists())
+        self.assertEqual(Earthquake.objects.get(unique_id='AFAD_650123').report_count, 4)
+
+    def test_unchanged_source_is_not_refetched(self):
+        """Test the stored ETag is sent back and a 304 skips the source"""
+        self.make_ingestor().run(['USGS'])
+        results = self.make_ingestor().run(['USGS'])
+
+        self.assertTrue(results['USGS'].not_modified)
+        self.assertEqual(self.requests_seen[-1][1].get('If-None-Match'), USGS_ETAG)
+        self.assertEqual(Earthquake.objects.filter(source='USGS').count(), 2)
@@ -22,8 +22,9 @@ from .models import (
 def birlikteyiz_dashboard(request):
     """Main dashboard for Birlikteyiz module"""
 
-    # Get recent earthquakes (base queryset - NO slice yet)
+    # Get recent earthquakes (base queryset - NO slice yet), one row per quake
     recent_earthquakes_qs = Earthquake.objects.filter(
+        duplicate_of__isnull=True,
         occurred_at__gte=timezone.now() - timedelta(days=7)
     ).order_by('-occurred_at')
 
@@ -49,6 +50,7 @@ def birlikteyiz_dashboard(request):
 
     # Enhanced earthquake statistics
     earthquake_count = Earthquake.objects.filter(
+        duplicate_of__isnull=True,
         occurred_at__gte=timezone.now() - timedelta(days=1),
         magnitude__gte=3.0
     ).count()
@@ -100,6 +102,8 @@ def earthquake_list(request):
     source = request.GET.get('source')
     if source:
         earthquakes = earthquakes.filter(source=source)
+    else:
+        earthquakes = earthquakes.filter(duplicate_of__isnull=True)  # One row per quake
     
     city = request.GET.get('city')
     if city:
@@ -226,9 +230,11 @@ def earthquake_map(request):
         magnitude__gte=magnitude_min
     )
 
-    # Apply source filter if provided
+    # Apply source filter if provided; otherwise one marker per quake
     if source_filter:
         earthquakes_qs = earthquakes_qs.filter(source=source_filter)
+    else:
+        earthquakes_qs = earthquakes_qs.filter(duplicate_of__isnull=True)
 
     earthquakes_qs = earthquakes_qs.order_by('-occurred_at')
 
@@ -247,6 +253,7 @@ def earthquake_map(request):
             'location': eq.location,
             'city': eq.city or '',
             'source': eq.source,
+            'report_count': eq.report_count,
             'occurred_at': eq.occurred_at.strftime('%Y-%m-%d %H:%M:%S'),
             'time_ago': f'{(timezone.now() - eq.occurred_at).days} gün önce' if (timezone.now() - eq.occurred_at).days > 0 else f'{(timezone.now() - eq.occurred_at).seconds // 3600} saat önce'
         })
@@ -6,7 +6,7 @@ Django admin interface for camera management
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
-    Camera, CameraStream, RecordingSession, 
+    Camera, CameraStream, RecordingSession, MotionEvent,
     RecordingSchedule, Alert, CameraGroup, StorageConfiguration
 )
 
@@ -39,6 +39,10 @@ class CameraAdmin(admin.ModelAdmin):
                 'audio_enabled', 'status'
             )
         }),
+        ('motion detection', {
+            'fields': ('motion_sensitivity', 'motion_zones'),
+            'classes': ('collapse',)
+        }),
         ('video settings', {
             'fields': ('resolution', 'fps', 'bitrate')
         }),
@@ -101,6 +105,22 @@ class RecordingSessionAdmin(admin.ModelAdmin):
     file_size_mb.short_description = 'file size'
 
 
+@admin.register(MotionEvent)
+class MotionEventAdmin(admin.ModelAdmin):
+    """Motion event administration"""
+    list_display = ['camera', 'started_at', 'duration', 'peak_score_percent', 'frame_count', 'recording']
+    list_filter = ['camera', 'started_at']
+    search_fields = ['camera__name']
+    date_hierarchy = 'started_at'
+    raw_id_fields = ['recording']
+    readonly_fields = ['id', 'created_at']
+    
+    def peak_score_percent(self, obj):
+        """Display peak score as percentage of the watched area"""
+        return f"{obj.peak_score:.1%}"
+    peak_score_percent.short_description = 'peak motion'
+
+
 @admin.register(RecordingSchedule)
 class RecordingScheduleAdmin(admin.ModelAdmin):
     """Recording schedule administration"""
@@ -0,0 +1,690 @@
+"""
+CCTV Capture Hub
+One decoder per camera, shared by every viewer.
+
+- A decoder process per camera reads the stream (cv2.VideoCapture) and
+  writes raw frames into a shared-memory ring buffer (FrameRing). The ring is
+  named after the camera, so every web worker attaches to the same ring; the
+  worker that created it owns the decoder process
+- In each web worker a CameraFeed polls the ring, JPEG-encodes every new
+  frame once per quality tier that has viewers and fans the bytes out to all
+  MJPEG subscribers of that tier
+- Snapshots are encoded from the latest buffered frame
+- Readers stamp a heartbeat into the ring; when nobody has read for
+  CCTV_CAPTURE_IDLE_GRACE seconds the decoder exits and the ring is removed
+- A stalled decoder (no heartbeat for CCTV_CAPTURE_STALL_TIMEOUT) is
+  restarted by its owner, or taken over by another worker if the owner is gone
+- Local video files are looped at their own frame rate, so everything can be
+  exercised without a camera (CCTV_CAPTURE_TEST_SOURCE)
+
+Five viewers of one camera cost one RTSP session, one decode and one encode
+per tier, instead of five of each.
+
+Settings (all optional):
+    CCTV_CAPTURE_IDLE_GRACE     - seconds without viewers before a camera is closed (default: 30)
+    CCTV_CAPTURE_STALL_TIMEOUT  - seconds without decoder heartbeat before a restart (default: 15)
+    CCTV_CAPTURE_RING_SLOTS     - frames kept in each ring buffer (default: 4)
+    CCTV_STREAM_TIERS           - {tier: {'quality': JPEG quality, 'width': max width or None}}
+    CCTV_CAPTURE_TEST_SOURCE    - video file streamed instead of every camera (default: None)
+"""
+
+import asyncio
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import secrets
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+# Optional imports for video processing
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+    cv2 = None
+    np = None
+
+logger = logging.getLogger('cctv.capture')
+
+DEFAULT_TIERS = {
+    'high': {'quality': 85, 'width': None},
+    'medium': {'quality': 70, 'width': 1280},
+    'low': {'quality': 50, 'width': 640},
+}
+DEFAULT_FRAME_SIZE = (1920, 1080)
+
+POLL_INTERVAL = 0.01  # Seconds between ring polls when no new frame is there
+OPEN_TIMEOUT_MS = 5000  # Stream open/read timeout; must stay below the stall timeout
+
+# Ring layout: header, then `slots` x (slot header + frame capacity)
+# Header: magic, slots, capacity, latest seq, owner token, writer heartbeat, reader heartbeat
+HEADER = struct.Struct('<IIQQQdd')
+# Slot header: seq (0 while being written), height, width, channels, capture time
+SLOT_HEADER = struct.Struct('<QIIId')
+MAGIC = 0x56544355  # 'UCTV'
+LATEST_OFFSET = 16
+WRITER_HEARTBEAT_OFFSET = 32
+READER_HEARTBEAT_OFFSET = 40
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_F64 = struct.Struct('<d')
+
+
+def _setting(name: str, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def _untrack(shm):
+    """Keep multiprocessing's resource tracker from unlinking a ring when this process exits (rings are ours to clean up)"""
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def _unlink(shm):
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, 'shared_memory')  # unlink() unregisters it again
+    shm.unlink()
+
+
+class FrameRing:
+    """
+    Shared-memory ring of raw frames (one writer, any number of readers)
+
+    A slot's seq is zeroed while it is written; readers compare it before and
+    after copying, so a frame overwritten during the copy is dropped.
+    """
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf
+
+    @staticmethod
+    def name_for(camera_key) -> str:
+        # Short: macOS limits shared memory names to 31 characters
+        return 'ucctv_' + hashlib.sha1(str(camera_key).encode()).hexdigest()[:20]
+
+    @classmethod
+    def create(cls, name: str, slots: int, capacity: int) -> 'FrameRing':
+        """Raises FileExistsError if another process created it first"""
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=HEADER.size + slots * (SLOT_HEADER.size + capacity)
+        )
+        _untrack(shm)
+        ring = cls(shm)
+        now = time.time()
+        HEADER.pack_into(ring.buf, 0, 0, slots, capacity, 0, secrets.randbits(63) + 1, now, now)
+        _U32.pack_into(ring.buf, 0, MAGIC)  # Last: attached readers treat the ring as ready from here on
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> 'FrameRing':
+        """Raises FileNotFoundError if there is no such ring"""
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return cls(shm)
+
+    @property
+    def ready(self) -> bool:
+        return _U32.unpack_from(self.buf, 0)[0] == MAGIC
+
+    @property
+    def slots(self) -> int:
+        return HEADER.unpack_from(self.buf, 0)[1]
+
+    @property
+    def capacity(self) -> int:
+        return HEADER.unpack_from(self.buf, 0)[2]
+
+    @property
+    def token(self) -> int:
+        return HEADER.unpack_from(self.buf, 0)[4]
+
+    @property
+    def latest_seq(self) -> int:
+        return _U64.unpack_from(self.buf, LATEST_OFFSET)[0]
+
+    @property
+    def writer_heartbeat(self) -> float:
+        return _F64.unpack_from(self.buf, WRITER_HEARTBEAT_OFFSET)[0]
+
+    @property
+    def reader_heartbeat(self) -> float:
+        return _F64.unpack_from(self.buf, READER_HEARTBEAT_OFFSET)[0]
+
+    def touch_writer(self):
+        _F64.pack_into(self.buf, WRITER_HEARTBEAT_OFFSET, time.time())
+
+    def touch_reader(self):
+        _F64.pack_into(self.buf, READER_HEARTBEAT_OFFSET, time.time())
+
+    def _slot_offset(self, seq: int) -> int:
+        return HEADER.size + (seq % self.slots) * (SLOT_HEADER.size + self.capacity)
+
+    def write(self, frame, seq: int):
+        offset = self._slot_offset(seq)
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        _U64.pack_into(self.buf, offset, 0)
+        np.ndarray(frame.shape, np.uint8, buffer=self.buf, offset=offset + SLOT_HEADER.size)[...] = frame
+        SLOT_HEADER.pack_into(self.buf, offset, seq, height, width, channels, time.time())
+        _U64.pack_into(self.buf, LATEST_OFFSET, seq)
+
+    def read_latest(self, after: int = 0) -> Optional[Tuple[int, object, float]]:
+        """(seq, frame copy, capture time) of the newest frame, if newer than `after`"""
+        if not self.ready:
+            return None
+        seq = self.latest_seq
+        if seq <= after:
+            return None
+        offset = self._slot_offset(seq)
+        slot_seq, height, width, channels, timestamp = SLOT_HEADER.unpack_from(self.buf, offset)
+        if slot_seq != seq:
+            return None
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        frame = np.ndarray(shape, np.uint8, buffer=self.buf, offset=offset + SLOT_HEADER.size).copy()
+        if _U64.unpack_from(self.buf, offset)[0] != seq:
+            return None  # Overwritten while copying
+        return seq, frame, timestamp
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def _unlink_if(name: str, predicate) -> bool:
+    """Remove the ring currently under `name` if predicate(ring) holds"""
+    try:
+        ring = FrameRing.attach(name)
+    except FileNotFoundError:
+        return False
+    try:
+        if predicate(ring):
+            _unlink(ring.shm)
+            return True
+        return False
+    finally:
+        ring.close()
+
+
+def _fit(frame, capacity: int):
+    """Downscale frames larger than a ring slot"""
+    if frame.nbytes <= capacity:
+        return frame
+    scale = (capacity / frame.nbytes) ** 0.5
+    size = (max(1, int(frame.shape[1] * scale)), max(1, int(frame.shape[0] * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def _open_capture(source: str, is_file: bool):
+    if is_file:
+        return cv2.VideoCapture(source)
+    capture = cv2.VideoCapture(source, cv2.CAP_ANY, [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, OPEN_TIMEOUT_MS,
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, OPEN_TIMEOUT_MS,
+    ])
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
+
+
+def _decoder_main(ring_name: str, source: str, idle_grace: float):
+    """Decoder process entry point - one capture, every frame into the ring"""
+    ring = FrameRing.attach(ring_name)
+    is_file = os.path.isfile(source)
+    capture = None
+    frame_interval = 0.0
+    next_frame_at = 0.0
+    backoff = 0.5
+    seq = ring.latest_seq  # Continue after a restart, readers only look forward
+
+    try:
+        while time.time() - ring.reader_heartbeat < idle_grace:
+            ring.touch_writer()
+
+            if capture is None:
+                capture = _open_capture(source, is_file)
+                if not capture.isOpened():
+                    capture.release()
+                    capture = None
+                    logger.warning(f"⚠️ {ring_name}: could not open stream, retrying in {backoff:.1f}s")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 5.0)
+                    continue
+                # Files play at their own rate; live streams are paced by the camera
+                frame_interval = 1.0 / (capture.get(cv2.CAP_PROP_FPS) or 25) if is_file else 0.0
+                next_frame_at = time.monotonic()
+
+            ok, frame = capture.read()
+            if not ok and is_file:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop
+                ok, frame = capture.read()
+            if not ok:
+                capture.release()
+                capture = None
+                continue
+
+            backoff = 0.5
+            seq += 1
+            ring.write(_fit(frame, ring.capacity), seq)
+
+            if frame_interval:
+                next_frame_at += frame_interval
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_at = time.monotonic()
+    finally:
+        if capture is not None:
+            capture.release()
+        ring.close()
+
+
+class _Subscriber:
+    """One MJPEG viewer waiting on its event loop"""
+
+    def __init__(self, tier: str):
+        self.tier = tier
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # Loop already closed
+
+
+class CameraFeed:
+    """
+    One camera in this process: ring reader, per-tier encoder, subscribers
+    """
+
+    def __init__(self, hub: 'CaptureHub', key: str, source: str, frame_size: Tuple[int, int]):
+        self.hub = hub
+        self.key = key
+        self.source = source
+        self.name = FrameRing.name_for(key)
+        self.capacity = frame_size[0] * frame_size[1] * 3
+        self.ring: Optional[FrameRing] = None
+        self.process = None  # Decoder, if this process owns the ring
+        self.closed = False
+        self.last_used = time.monotonic()
+        self.opened_at = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._raw_readers = 0
+        self._encoded: Dict[str, Tuple[int, bytes]] = {}  # tier -> (seq, jpeg)
+        self._frame = None  # Latest (seq, frame, timestamp)
+
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f'cctv-feed-{self.name}', daemon=True)
+        self._thread.start()
+
+    @property
+    def owner(self) -> bool:
+        return self.process is not None
+
+    def _open(self):
+        try:
+            self.ring = FrameRing.create(self.name, self.hub.ring_slots, self.capacity)
+        except FileExistsError:
+            self.ring = FrameRing.attach(self.name)
+            logger.info(f"📷 {self.key}: attached to running capture")
+            return
+        self._start_decoder()
+        logger.info(f"📷 {self.key}: capture started")
+
+    def _start_decoder(self):
+        self.process = self.hub._ctx.Process(
+            target=_decoder_main,
+            args=(self.name, self.source, self.hub.idle_grace),
+            name=f'cctv-decoder-{self.name}',
+            daemon=True
+        )
+        self.process.start()
+        self.opened_at = time.monotonic()
+
+    def _stop_decoder(self):
+        self.process.terminate()
+        self.process.join(timeout=2)
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def active(self) -> bool:
+        """Used in this process, or (owner) decoder still running for other workers' readers"""
+        return self._locally_active() or (self.owner and self.process.is_alive())
+
+    def _locally_active(self) -> bool:
+        with self._cond:
+            if self._subscribers or self._raw_readers:
+                return True
+        return time.monotonic() - self.last_used < self.hub.idle_grace
+
+    async def frames(self, tier: str) -> AsyncIterator[bytes]:
+        """JPEG frames of one tier; a slow viewer skips to the newest frame"""
+        subscriber = _Subscriber(tier)
+        with self._cond:
+            self._subscribers.add(subscriber)
+        try:
+            seq = 0
+            while not self.closed:
+                await subscriber.event.wait()
+                subscriber.event.clear()
+                with self._cond:
+                    encoded = self._encoded.get(tier)
+                if encoded and encoded[0] > seq:
+                    seq, jpeg = encoded
+                    yield jpeg
+        finally:
+            with self._cond:
+                self._subscribers.discard(subscriber)
+            self.touch()
+
+    def raw_frames(self, timeout: float = 1.0) -> Iterator[Optional[Tuple[int, object, float]]]:
+        """
+        (seq, frame, capture time) of every new frame for in-process consumers
+        (motion detection); None when nothing arrived within timeout
+        """
+        with self._cond:
+            self._raw_readers += 1
+        try:
+            seq = 0
+            while not self.closed:
+                with self._cond:
+                    if self._frame is None or self._frame[0] <= seq:
+                        self._cond.wait(timeout)
+                    latest = self._frame
+                if latest is None or latest[0] <= seq:
+                    yield None
+                    continue
+                seq = latest[0]
+                yield latest
+        finally:
+            with self._cond:
+                self._raw_readers -= 1
+            self.touch()
+
+    def snapshot(self, timeout: float) -> Optional[bytes]:
+        """JPEG of the latest buffered frame (waits for the first one)"""
+        self.touch()
+        tier = self.hub.snapshot_tier
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._frame is None and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self._frame is None:
+                return None
+            seq, frame, _ = self._frame
+            cached = self._encoded.get(tier)
+            if cached and cached[0] >= seq:
+                return cached[1]
+
+        jpeg = self.hub.encode(frame, tier)
+        if jpeg is not None:
+            with self._cond:
+                if self._encoded.get(tier, (0,))[0] < seq:
+                    self._encoded[tier] = (seq, jpeg)
+        return jpeg
+
+    def _publish(self, latest):
+        seq, frame, _ = latest
+        with self._cond:
+            subscribers = list(self._subscribers)
+        # Each tier with viewers is encoded once, outside the lock
+        encoded = {}
+        for tier in {subscriber.tier for subscriber in subscribers}:
+            jpeg = self.hub.encode(frame, tier)
+            if jpeg is not None:
+                encoded[tier] = (seq, jpeg)
+        with self._cond:
+            self._frame = latest
+            self._encoded.update(encoded)
+            self._cond.notify_all()
+        for subscriber in subscribers:
+            subscriber.notify()
+
+    def _run(self):
+        # The ring and the decoder are only touched from this thread
+        seq = 0
+        try:
+            while not self.closed:
+                local = self._locally_active()
+                if local:
+                    self.ring.touch_reader()
+                elif self.hub._release(self):
+                    break
+
+                latest = self.ring.read_latest(after=seq) if local else None
+                if latest is not None:
+                    seq = latest[0]
+                    self._publish(latest)
+                    continue
+
+                if not self._check_decoder():
+                    break
+                time.sleep(POLL_INTERVAL)
+        finally:
+            self._cleanup()
+
+    def _stalled(self) -> bool:
+        if time.monotonic() - self.opened_at < self.hub.stall_timeout:
+            return False  # Still connecting
+        if not self.ring.ready:
+            return True  # Creator died before initialising the ring
+        return time.time() - self.ring.writer_heartbeat > self.hub.stall_timeout
+
+    def _check_decoder(self) -> bool:
+        """Restart or take over a dead decoder; False if this feed was closed"""
+        if self.owner:
+            # A decoder that exited on its own was idle everywhere; restart it only if needed here
+            alive = self.process.is_alive()
+            if (not alive and self._locally_active()) or (alive and self._stalled()):
+                logger.warning(f"⚠️ {self.key}: decoder stopped (exit code {self.process.exitcode}), restarting")
+                if alive:
+                    self._stop_decoder()
+                self._start_decoder()
+            return True
+
+        if not self._stalled():
+            return True
+        # Owner is gone: remove its ring; viewers reconnect to a fresh feed (which becomes the owner)
+        token = self.ring.token
+        logger.warning(f"⚠️ {self.key}: capture owner stopped responding, taking over")
+        _unlink_if(self.name, lambda ring: not ring.ready or ring.token == token)
+        self.hub._discard(self)
+        self.close()
+        return False
+
+    def close(self):
+        """Stop the feed; the feed thread stops the decoder and releases the ring"""
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            subscribers = list(self._subscribers)
+            self._cond.notify_all()
+        for subscriber in subscribers:
+            subscriber.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout=5)
+
+    def _cleanup(self):
+        self.closed = True
+        if self.owner:
+            self._stop_decoder()
+            token = self.ring.token
+            _unlink_if(self.name, lambda ring: ring.token == token)
+            logger.info(f"📷 {self.key}: capture stopped")
+        self.ring.close()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            tiers = {}
+            for subscriber in self._subscribers:
+                tiers[subscriber.tier] = tiers.get(subscriber.tier, 0) + 1
+            latest = self._frame[0] if self._frame else None
+            raw_readers = self._raw_readers
+        return {'owner': self.owner, 'viewers': tiers, 'raw_readers': raw_readers, 'latest_seq': latest}
+
+
+class CaptureHub:
+    """
+    Process-wide registry of CameraFeeds
+
+    Usage:
+        hub = get_capture_hub()
+        async for jpeg in hub.frames(camera, 'medium'): ...
+        jpeg = hub.snapshot(camera)
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.idle_grace = _setting('CCTV_CAPTURE_IDLE_GRACE', 30)
+        self.stall_timeout = _setting('CCTV_CAPTURE_STALL_TIMEOUT', 15)
+        self.ring_slots = _setting('CCTV_CAPTURE_RING_SLOTS', 4)
+        self.tiers = _setting('CCTV_STREAM_TIERS', DEFAULT_TIERS)
+        self.snapshot_tier = max(self.tiers, key=lambda tier: self.tiers[tier].get('quality', 0))
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._feeds: Dict[str, CameraFeed] = {}
+        self._lock = threading.Lock()
+        self._running = True
+
+    @classmethod
+    def get_instance(cls) -> 'CaptureHub':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.shutdown)
+            return cls._instance
+
+    # ----- Cameras -----
+
+    @staticmethod
+    def camera_source(camera) -> Optional[str]:
+        """Capture source (CCTV_CAPTURE_TEST_SOURCE replaces every camera's stream when set)"""
+        return _setting('CCTV_CAPTURE_TEST_SOURCE', None) or camera.get_rtsp_url()
+
+    @staticmethod
+    def camera_frame_size(camera) -> Tuple[int, int]:
+        try:
+            width, height = (int(part) for part in camera.resolution.lower().split('x'))
+            return width, height
+        except (AttributeError, ValueError):
+            return DEFAULT_FRAME_SIZE
+
+    def tier_for(self, name: Optional[str]) -> str:
+        return name if name in self.tiers else self.snapshot_tier
+
+    def is_live(self, camera) -> bool:
+        """True if this process is already receiving frames of the camera"""
+        with self._lock:
+            feed = self._feeds.get(str(camera.id))
+        return feed is not None and not feed.closed
+
+    async def frames(self, camera, tier: str) -> AsyncIterator[bytes]:
+        """JPEG frames for one MJPEG viewer; survives decoder restarts and takeovers"""
+        key, source, frame_size = str(camera.id), self.camera_source(camera), self.camera_frame_size(camera)
+        while self._running:
+            feed = await asyncio.to_thread(self.acquire, key, source, frame_size)
+            stream = feed.frames(tier)
+            try:
+                async for jpeg in stream:
+                    yield jpeg
+            finally:
+                await stream.aclose()  # Unsubscribe now, not when the generator is collected
+            await asyncio.sleep(0.1)  # Feed was replaced: reconnect
+
+    def raw_frames(self, camera, timeout: float = 1.0) -> Iterator[Optional[Tuple[int, object, float]]]:
+        """Raw frames of a camera for in-process analysis; None on timeouts so callers can stop"""
+        key, source, frame_size = str(camera.id), self.camera_source(camera), self.camera_frame_size(camera)
+        while self._running:
+            feed = self.acquire(key, source, frame_size)
+            stream = feed.raw_frames(timeout)
+            try:
+                yield from stream
+            finally:
+                stream.close()
+            time.sleep(0.1)  # Feed was replaced: reconnect
+
+    def snapshot(self, camera, timeout: float = 5.0) -> Optional[bytes]:
+        """JPEG of the camera's latest frame (starts the capture if needed; it idles out later)"""
+        feed = self.acquire(str(camera.id), self.camera_source(camera), self.camera_frame_size(camera))
+        return feed.snapshot(timeout)
+
+    # ----- Feeds -----
+
+    def acquire(self, key: str, source: str, frame_size: Tuple[int, int] = DEFAULT_FRAME_SIZE) -> CameraFeed:
+        with self._lock:
+            if not self._running:
+                raise RuntimeError('capture hub is shut down')
+            feed = self._feeds.get(key)
+            if feed is None or feed.closed:
+                feed = CameraFeed(self, key, source, frame_size)
+                self._feeds[key] = feed
+            feed.touch()
+            return feed
+
+    def _release(self, feed: CameraFeed) -> bool:
+        """Close an idle feed (re-checked under the lock, acquire() may have just touched it)"""
+        with self._lock:
+            if feed.active():
+                return False
+            if self._feeds.get(feed.key) is feed:
+                del self._feeds[feed.key]
+        feed.close()
+        return True
+
+    def _discard(self, feed: CameraFeed):
+        with self._lock:
+            if self._feeds.get(feed.key) is feed:
+                del self._feeds[feed.key]
+
+    def encode(self, frame, tier: str) -> Optional[bytes]:
+        options = self.tiers[tier]
+        width = options.get('width')
+        if width and frame.shape[1] > width:
+            height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(options.get('quality', 80))])
+        return buffer.tobytes() if ok else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            feeds = dict(self._feeds)
+        return {key: feed.stats() for key, feed in feeds.items()}
+
+    def shutdown(self):
+        with self._lock:
+            self._running = False
+            feeds = list(self._feeds.values())
+            self._feeds.clear()
+        for feed in feeds:
+            feed.close()
+
+
+def get_capture_hub() -> Optional[CaptureHub]:
+    """Process-wide hub, or None without OpenCV"""
+    if not CV2_AVAILABLE:
+        return None
+    return CaptureHub.get_instance()
@@ -0,0 +1 @@
+# Management module for cctv app
@@ -0,0 +1,44 @@
+"""
+CCTV motion detection management command
+Runs motion detection and motion-gated recording in a dedicated process
+"""
+
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from modules.cctv.backend.motion import MotionService
+
+logger = logging.getLogger('cctv.motion')
+
+
+class Command(BaseCommand):
+    help = 'Detect motion on active cameras and record motion events (cameras using Kerberos.io are skipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh',
+            type=float,
+            default=None,
+            help='Seconds between camera list refreshes (default: CCTV_MOTION_REFRESH_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        service = MotionService(refresh_interval=options['refresh'])
+        if service.hub is None:
+            raise CommandError('opencv is not installed (pip install opencv-python-headless)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 starting cctv motion detection (refresh: {service.refresh_interval}s)'
+        ))
+
+        try:
+            service.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                '\n⚠️  stopping cctv motion detection...'
+            ))
+        finally:
+            service.stop()
+
+        self.stdout.write(self.style.SUCCESS(
+            '👋 cctv motion detection stopped'
+        ))
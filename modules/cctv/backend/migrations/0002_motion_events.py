@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-16 14:20
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='motion_sensitivity',
+            field=models.IntegerField(default=50, help_text='motion detection sensitivity (1-100)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='motion_zones',
+            field=models.JSONField(blank=True, default=list, help_text='detection zones: polygons of [x, y] points in 0-1 frame coordinates (empty: whole frame)'),
+        ),
+        migrations.AlterField(
+            model_name='camera',
+            name='recording_enabled',
+            field=models.BooleanField(default=False, help_text='record video (only around motion events when motion detection is enabled)'),
+        ),
+        migrations.CreateModel(
+            name='MotionEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, help_text='duration in seconds', null=True)),
+                ('peak_score', models.FloatField(default=0.0, help_text='largest changed fraction of the watched area')),
+                ('zones', models.JSONField(blank=True, default=list, help_text='indexes of the zones that saw motion')),
+                ('frame_count', models.IntegerField(default=0, help_text='analyzed frames with motion')),
+                ('thumbnail_path', models.CharField(blank=True, help_text='keyframe at peak motion', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='motion_events', to='cctv.camera')),
+                ('recording', models.ForeignKey(blank=True, help_text='clip recorded for this event (pre/post-roll included)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='cctv.recordingsession')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['camera', 'started_at'], name='cctv_motion_camera__c49d02_idx'), models.Index(fields=['started_at'], name='cctv_motion_started_96eaf7_idx')],
+            },
+        ),
+    ]
@@ -69,8 +69,21 @@ class Camera(models.Model):
     # Status and Settings
     status = models.CharField(max_length=20, choices=CAMERA_STATUS, default='offline')
     is_active = models.BooleanField(default=True, help_text="camera enabled/disabled")
-    recording_enabled = models.BooleanField(default=False, help_text="continuous recording")
+    recording_enabled = models.BooleanField(
+        default=False,
+        help_text="record video (only around motion events when motion detection is enabled)"
+    )
     motion_detection = models.BooleanField(default=True, help_text="motion detection enabled")
+    motion_sensitivity = models.IntegerField(
+        default=50,
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        help_text="motion detection sensitivity (1-100)"
+    )
+    motion_zones = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="detection zones: polygons of [x, y] points in 0-1 frame coordinates (empty: whole frame)"
+    )
     audio_enabled = models.BooleanField(default=False, help_text="audio recording enabled")
     
     # Video Settings
@@ -251,6 +264,44 @@ class RecordingSession(models.Model):
         return None
 
 
+class MotionEvent(models.Model):
+    """Motion detected on a camera, with keyframe thumbnail and recorded clip"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='motion_events')
+    recording = models.ForeignKey(
+        RecordingSession,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='events',
+        help_text="clip recorded for this event (pre/post-roll included)"
+    )
+    
+    # Time information
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="duration in seconds")
+    
+    # Detection data
+    peak_score = models.FloatField(default=0.0, help_text="largest changed fraction of the watched area")
+    zones = models.JSONField(default=list, blank=True, help_text="indexes of the zones that saw motion")
+    frame_count = models.IntegerField(default=0, help_text="analyzed frames with motion")
+    thumbnail_path = models.CharField(max_length=500, blank=True, help_text="keyframe at peak motion")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['camera', 'started_at']),
+            models.Index(fields=['started_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.camera.name} - motion - {self.started_at}"
+
+
 class RecordingSchedule(models.Model):
     """Schedule for automatic recordings"""
     
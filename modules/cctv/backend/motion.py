@@ -0,0 +1,466 @@
+"""
+CCTV Motion Detection
+CPU-only frame differencing on the shared capture pipeline, with motion-gated,
+event-indexed recording.
+
+- MotionDetector: frames are downscaled to CCTV_MOTION_WIDTH, converted to
+  blurred grayscale and compared with a running-average background
+  (cv2.accumulateWeighted). Changed pixels inside the camera's zones, as a
+  fraction of the watched area, are the motion score. Sensitivity (1-100)
+  sets both the pixel threshold and the minimum changed area
+- Frames come from the capture hub (the same decoder viewers use) and are
+  analyzed at CCTV_MOTION_FPS, not at the camera frame rate
+- MotionEventTracker: an event starts after CCTV_MOTION_TRIGGER_FRAMES
+  consecutive motion frames and ends CCTV_MOTION_POST_ROLL seconds after
+  the last one
+- MotionRecorder: keeps CCTV_MOTION_PRE_ROLL seconds of JPEG frames; when an
+  event starts they are written, followed by live frames until the event
+  ends, into one clip (RecordingSession with recording_type='motion')
+- Every event is a MotionEvent row (indexed on camera + start time) with a
+  keyframe thumbnail taken at peak motion
+
+A quiet camera costs one small grayscale diff per analyzed frame instead of
+continuous encoding and writing, and incidents are found with an indexed
+query instead of scrubbing footage. Runs in its own process:
+`python manage.py cctv_motion`.
+"""
+
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .capture_hub import cv2, get_capture_hub, np
+from .models import Camera, MotionEvent, RecordingSession, StorageConfiguration
+
+logger = logging.getLogger('cctv.motion')
+
+THUMBNAIL_WIDTH = 320
+LIGHTING_CHANGE_SCORE = 0.8  # Most of the frame changed at once: lights or IR mode switched, not motion
+
+MotionResult = namedtuple('MotionResult', ['score', 'motion', 'zones'])
+
+
+def _aware(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def _resize_to_width(frame, width: int):
+    height, current = frame.shape[:2]
+    if current <= width:
+        return frame
+    return cv2.resize(frame, (width, max(1, round(height * width / current))), interpolation=cv2.INTER_AREA)
+
+
+def storage_paths() -> Dict[str, Path]:
+    """Recording and thumbnail roots (active StorageConfiguration, else MEDIA_ROOT/cctv)"""
+    storage = StorageConfiguration.objects.filter(is_active=True).first()
+    if storage is not None:
+        return {
+            'recordings': Path(storage.recording_path),
+            'thumbnails': Path(storage.snapshot_path) / 'motion',
+        }
+    media_root = Path(settings.MEDIA_ROOT) / 'cctv'
+    return {'recordings': media_root / 'recordings', 'thumbnails': media_root / 'snapshots' / 'motion'}
+
+
+class MotionDetector:
+    """
+    Running-average background subtraction on downscaled grayscale frames
+
+    Args:
+        sensitivity: 1-100; higher reacts to smaller and fainter changes
+        zones: polygons of [x, y] points in 0-1 frame coordinates (empty: whole frame)
+        width: analysis width in pixels
+        alpha: background learning rate per analyzed frame
+    """
+
+    def __init__(self, sensitivity: int = 50, zones: Optional[List] = None, width: int = 320, alpha: float = 0.05):
+        sensitivity = min(100, max(1, int(sensitivity)))
+        self.threshold = round(45 - sensitivity * 0.35)  # Pixel delta: 45 (least) .. 10 (most sensitive)
+        self.min_area = 0.001 + 0.01 * (100 - sensitivity) / 99  # Changed fraction: 1.1% .. 0.1%
+        self.zones = zones or []
+        self.width = width
+        self.alpha = alpha
+        self.background = None
+        self.mask = None
+        self.zone_masks = []
+        self.watched = 0
+
+    def _prepare(self, frame):
+        small = _resize_to_width(frame, self.width)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _build_masks(self, shape):
+        height, width = shape
+        self.zone_masks = []
+        for zone in self.zones:
+            points = np.array([[x * (width - 1), y * (height - 1)] for x, y in zone], dtype=np.int32)
+            if len(points) < 3:
+                continue
+            mask = np.zeros(shape, dtype=np.uint8)
+            cv2.fillPoly(mask, [points], 255)
+            self.zone_masks.append(mask)
+
+        if self.zone_masks:
+            self.mask = self.zone_masks[0].copy()
+            for mask in self.zone_masks[1:]:
+                cv2.bitwise_or(self.mask, mask, self.mask)
+            self.watched = max(1, cv2.countNonZero(self.mask))
+        else:
+            self.mask = None
+            self.watched = height * width
+
+    def process(self, frame) -> MotionResult:
+        gray = self._prepare(frame)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self._build_masks(gray.shape)
+            return MotionResult(0.0, False, [])
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+        _, changed = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        if self.mask is not None:
+            changed = cv2.bitwise_and(changed, self.mask)
+
+        score = cv2.countNonZero(changed) / self.watched
+        if score >= LIGHTING_CHANGE_SCORE:
+            self.background = gray.astype(np.float32)  # Relearn instead of reporting a whole-frame event
+            return MotionResult(score, False, [])
+
+        motion = score >= self.min_area
+        zones = []
+        if motion and len(self.zone_masks) > 1:
+            zones = [
+                index for index, mask in enumerate(self.zone_masks)
+                if cv2.countNonZero(cv2.bitwise_and(changed, mask))
+            ]
+        return MotionResult(score, motion, zones)
+
+
+class MotionEventTracker:
+    """
+    Per-frame motion -> events
+
+    update() returns 'start' when trigger_frames consecutive motion frames were
+    seen, 'end' when post_roll seconds passed without motion, else None.
+    """
+
+    def __init__(self, trigger_frames: int = 2, post_roll: float = 10.0):
+        self.trigger_frames = trigger_frames
+        self.post_roll = post_roll
+        self.active = False
+        self.streak = 0
+        self.last_motion_at = 0.0
+
+    def update(self, motion: bool, now: float) -> Optional[str]:
+        if motion:
+            self.streak += 1
+            self.last_motion_at = now
+            if not self.active and self.streak >= self.trigger_frames:
+                self.active = True
+                return 'start'
+            return None
+
+        self.streak = 0
+        if self.active and now - self.last_motion_at >= self.post_roll:
+            self.active = False
+            return 'end'
+        return None
+
+
+class MotionRecorder:
+    """
+    Pre-roll buffer + clip writer for one camera
+
+    Outside events only the last pre_roll seconds are kept, JPEG-encoded;
+    during an event frames go straight to the open clip.
+    """
+
+    def __init__(self, pre_roll: float, fps: float):
+        self.pre_roll = pre_roll
+        self.fps = fps
+        self.buffer = deque()  # (timestamp, jpeg)
+        self.writer = None
+        self.path: Optional[Path] = None
+        self.size = None
+        self.started_at = None
+
+    @property
+    def recording(self) -> bool:
+        return self.writer is not None
+
+    def add(self, timestamp: float, frame):
+        if self.writer is not None:
+            self._write(frame)
+            return
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if ok:
+            self.buffer.append((timestamp, jpeg))
+        while self.buffer and timestamp - self.buffer[0][0] > self.pre_roll:
+            self.buffer.popleft()
+
+    def start(self, path: Path, frame, now: float) -> float:
+        """Open the clip and write the pre-roll; returns the clip's start time"""
+        if self.writer is not None:
+            self.stop()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        height, width = frame.shape[:2]
+        self.size = (width, height)
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), self.fps, self.size)
+        if not writer.isOpened():
+            writer.release()
+            raise OSError(f'could not open video writer for {path}')
+        self.writer = writer
+        self.path = path
+        self.started_at = self.buffer[0][0] if self.buffer else now
+        for _, jpeg in self.buffer:
+            self._write(cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+        self.buffer.clear()
+        return self.started_at
+
+    def _write(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.writer.write(frame)
+
+    def stop(self) -> Optional[int]:
+        """Close the clip; returns its size in bytes"""
+        if self.writer is None:
+            return None
+        self.writer.release()
+        self.writer = None
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return None
+
+
+class CameraMotionMonitor:
+    """
+    Motion detection (and motion-gated recording) for one camera, on its own thread
+
+    Camera settings are read once; MotionService restarts the monitor when
+    they change.
+    """
+
+    def __init__(self, camera: Camera, hub=None):
+        self.camera = camera
+        self.hub = hub or get_capture_hub()
+        self.config = self.config_of(camera)
+        self.analysis_interval = 1.0 / getattr(settings, 'CCTV_MOTION_FPS', 5)
+        self.record_fps = getattr(settings, 'CCTV_MOTION_RECORD_FPS', 10)
+        self.detector = MotionDetector(
+            sensitivity=camera.motion_sensitivity,
+            zones=camera.motion_zones,
+            width=getattr(settings, 'CCTV_MOTION_WIDTH', 320),
+            alpha=getattr(settings, 'CCTV_MOTION_ALPHA', 0.05),
+        )
+        self.tracker = MotionEventTracker(
+            trigger_frames=getattr(settings, 'CCTV_MOTION_TRIGGER_FRAMES', 2),
+            post_roll=getattr(settings, 'CCTV_MOTION_POST_ROLL', 10),
+        )
+        self.recorder = MotionRecorder(
+            pre_roll=getattr(settings, 'CCTV_MOTION_PRE_ROLL', 5), fps=self.record_fps
+        ) if camera.recording_enabled else None
+
+        self.event: Optional[MotionEvent] = None
+        self.session: Optional[RecordingSession] = None
+        self.keyframe = None
+        self.zones_seen = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'cctv-motion-{camera.id}', daemon=True)
+
+    @staticmethod
+    def config_of(camera: Camera):
+        """Settings the monitor depends on; a change means a restart"""
+        return (
+            camera.motion_sensitivity, repr(camera.motion_zones), camera.recording_enabled,
+            camera.get_rtsp_url(), camera.resolution,
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        last_analyzed = last_recorded = 0.0
+        frames = self.hub.raw_frames(self.camera)
+        try:
+            for latest in frames:
+                if self._stop.is_set():
+                    break
+                if latest is None:
+                    continue
+                _, frame, captured_at = latest
+
+                if self.recorder is not None and captured_at - last_recorded >= 1.0 / self.record_fps:
+                    last_recorded = captured_at
+                    self.recorder.add(captured_at, frame)
+
+                if captured_at - last_analyzed >= self.analysis_interval:
+                    last_analyzed = captured_at
+                    self._analyze(frame, captured_at)
+        except Exception as e:
+            logger.error(f"❌ motion monitor for {self.camera.name} failed: {e}", exc_info=True)
+        finally:
+            frames.close()
+            if self.event is not None:
+                self._end_event(time.time())
+            close_old_connections()
+
+    def _analyze(self, frame, now: float):
+        result = self.detector.process(frame)
+        transition = self.tracker.update(result.motion, now)
+
+        if result.motion and self.event is not None:
+            self._note(result, frame)
+        if transition == 'start':
+            self._start_event(now, frame)
+            self._note(result, frame)
+        elif transition == 'end':
+            self._end_event(now)
+
+    def _note(self, result: MotionResult, frame):
+        self.event.frame_count += 1
+        self.zones_seen.update(result.zones)
+        if result.score > self.event.peak_score:
+            self.event.peak_score = result.score
+            self.keyframe = frame
+
+    def _start_event(self, now: float, frame):
+        close_old_connections()
+        self.event = MotionEvent(camera=self.camera, started_at=_aware(now))
+        self.zones_seen = set()
+        self.keyframe = frame
+
+        if self.recorder is not None:
+            path = storage_paths()['recordings'] / str(self.camera.id) / _aware(now).strftime('%Y-%m-%d') / f'{self.event.id}.mp4'
+            try:
+                clip_start = self.recorder.start(path, frame, now)
+                self.session = RecordingSession.objects.create(
+                    camera=self.camera,
+                    user=self.camera.user,
+                    recording_type='motion',
+                    status='recording',
+                    start_time=_aware(clip_start),
+                    file_path=str(path),
+                    resolution=f'{frame.shape[1]}x{frame.shape[0]}',
+                    fps=self.record_fps,
+                    motion_events=1,
+                )
+                self.event.recording = self.session
+            except Exception as e:
+                # Without a session _end_event never closes the clip; don't leave it collecting frames
+                self.recorder.stop()
+                self.session = None
+                logger.error(f"❌ could not start motion clip for {self.camera.name}: {e}")
+
+        self.event.save()
+        logger.info(f"🏃 motion started on {self.camera.name}")
+
+    def _end_event(self, now: float):
+        close_old_connections()
+        event, self.event = self.event, None
+        event.ended_at = _aware(now)
+        event.duration = (event.ended_at - event.started_at).total_seconds()
+        event.zones = sorted(self.zones_seen)
+        event.thumbnail_path = self._save_thumbnail(event)
+        try:
+            event.save()
+        except Exception as e:
+            logger.error(f"❌ could not save motion event for {self.camera.name}: {e}")
+
+        if self.session is not None:
+            session, self.session = self.session, None
+            session.file_size = self.recorder.stop()
+            session.end_time = event.ended_at
+            session.status = 'completed'
+            session.calculate_duration()
+            try:
+                session.save()
+            except Exception as e:
+                logger.error(f"❌ could not save motion clip for {self.camera.name}: {e}")
+        self.keyframe = None
+        logger.info(f"✓ motion ended on {self.camera.name} ({event.duration:.0f}s, peak {event.peak_score:.1%})")
+
+    def _save_thumbnail(self, event: MotionEvent) -> str:
+        if self.keyframe is None:
+            return ''
+        path = storage_paths()['thumbnails'] / str(self.camera.id) / event.started_at.strftime('%Y-%m-%d') / f'{event.id}.jpg'
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if cv2.imwrite(str(path), _resize_to_width(self.keyframe, THUMBNAIL_WIDTH)):
+                return str(path)
+        except Exception as e:
+            logger.warning(f"⚠️ could not write motion thumbnail for {self.camera.name}: {e}")
+        return ''
+
+
+class MotionService:
+    """
+    Runs a CameraMotionMonitor for every active camera with motion detection
+
+    Cameras processed by Kerberos.io are skipped. The camera list is re-read
+    every CCTV_MOTION_REFRESH_INTERVAL seconds; monitors of changed cameras
+    are restarted.
+    """
+
+    def __init__(self, refresh_interval: Optional[float] = None):
+        self.refresh_interval = refresh_interval or getattr(settings, 'CCTV_MOTION_REFRESH_INTERVAL', 60)
+        self.hub = get_capture_hub()
+        self.monitors: Dict[str, CameraMotionMonitor] = {}
+        self._stop = threading.Event()
+
+    def cameras(self):
+        return Camera.objects.filter(
+            is_active=True, motion_detection=True, kerberos_enabled=False
+        ).select_related('user')
+
+    def sync(self):
+        close_old_connections()
+        wanted = {str(camera.id): camera for camera in self.cameras() if self.hub.camera_source(camera)}
+
+        for key in list(self.monitors):
+            monitor = self.monitors[key]
+            camera = wanted.get(key)
+            if camera is None or not monitor.alive or CameraMotionMonitor.config_of(camera) != monitor.config:
+                monitor.stop()
+                del self.monitors[key]
+
+        for key, camera in wanted.items():
+            if key not in self.monitors:
+                monitor = CameraMotionMonitor(camera, self.hub)
+                monitor.start()
+                self.monitors[key] = monitor
+                logger.info(f"👁️ watching {camera.name} (sensitivity {camera.motion_sensitivity})")
+
+    def run_forever(self):
+        if self.hub is None:
+            raise RuntimeError('opencv is not installed (opencv-python-headless)')
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.refresh_interval)
+
+    def stop(self):
+        self._stop.set()
+        for monitor in self.monitors.values():
+            monitor.stop()
+        self.monitors.clear()
+        if self.hub is not None:
+            self.hub.shutdown()
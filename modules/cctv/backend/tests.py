@@ -0,0 +1,402 @@
+"""
+Tests for the shared capture hub and motion detection
+"""
+
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import capture_hub
+from .capture_hub import CV2_AVAILABLE, CameraFeed, CaptureHub, FrameRing, _U64, _unlink_if, cv2, get_capture_hub, np
+from .models import Camera, MotionEvent, RecordingSession
+from .motion import CameraMotionMonitor, MotionDetector, MotionEventTracker, MotionRecorder
+
+LEFT_HALF = [[0, 0], [0.5, 0], [0.5, 1], [0, 1]]
+RIGHT_HALF = [[0.5, 0], [1, 0], [1, 1], [0.5, 1]]
+
+
+def make_frame(value=0, width=64, height=48):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class FakeDecoder:
+    """Stands in for the decoder process; tests write frames into the ring themselves"""
+
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeViewer:
+    def __init__(self, tier):
+        self.tier = tier
+        self.notified = 0
+
+    def notify(self):
+        self.notified += 1
+
+
+@skipUnless(CV2_AVAILABLE, 'opencv is not installed')
+class FrameRingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.name = FrameRing.name_for(uuid.uuid4())
+        self.ring = FrameRing.create(self.name, slots=2, capacity=64 * 48 * 3)
+        self.addCleanup(self.cleanup)
+
+    def cleanup(self):
+        self.ring.close()
+        _unlink_if(self.name, lambda ring: True)
+
+    def test_name_fits_shared_memory_limit(self):
+        self.assertLessEqual(len(self.name), 31)
+
+    def test_latest_frame_round_trip(self):
+        self.assertIsNone(self.ring.read_latest())
+        self.ring.write(make_frame(7), 1)
+        self.ring.write(make_frame(9), 2)
+
+        seq, frame, _ = self.ring.read_latest()
+        self.assertEqual(seq, 2)
+        self.assertTrue((frame == 9).all())
+        self.assertIsNone(self.ring.read_latest(after=2))
+
+    def test_frame_being_written_is_skipped(self):
+        self.ring.write(make_frame(7), 1)
+        _U64.pack_into(self.ring.buf, self.ring._slot_offset(1), 0)  # Writer mid-copy
+        self.assertIsNone(self.ring.read_latest())
+
+    def test_second_worker_attaches_to_the_same_ring(self):
+        with self.assertRaises(FileExistsError):
+            FrameRing.create(self.name, slots=2, capacity=16)
+
+        other = FrameRing.attach(self.name)
+        try:
+            self.ring.write(make_frame(3), 1)
+            seq, frame, _ = other.read_latest()
+            self.assertEqual(seq, 1)
+            self.assertTrue((frame == 3).all())
+            self.assertEqual(other.token, self.ring.token)
+        finally:
+            other.close()
+
+    def test_unlink_only_removes_the_expected_ring(self):
+        self.assertFalse(_unlink_if(self.name, lambda ring: ring.token == self.ring.token + 1))
+        self.assertTrue(_unlink_if(self.name, lambda ring: ring.token == self.ring.token))
+        with self.assertRaises(FileNotFoundError):
+            FrameRing.attach(self.name)
+
+
+@skipUnless(CV2_AVAILABLE, 'opencv is not installed')
+@override_settings(CCTV_CAPTURE_IDLE_GRACE=30, CCTV_CAPTURE_RING_SLOTS=2)
+class CaptureHubTests(SimpleTestCase):
+
+    def setUp(self):
+        self.decoders = []
+        patcher = patch.object(CameraFeed, '_start_decoder', autospec=True, side_effect=self.start_decoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hub = CaptureHub()
+        self.addCleanup(self.hub.shutdown)
+        self.key = str(uuid.uuid4())
+
+    def start_decoder(self, feed):
+        feed.process = FakeDecoder()
+        feed.opened_at = time.monotonic()
+        self.decoders.append(feed.process)
+
+    def acquire(self, hub=None):
+        return (hub or self.hub).acquire(self.key, 'rtsp://camera/stream', frame_size=(64, 48))
+
+    def test_viewers_of_one_camera_share_one_decoder(self):
+        first, second = self.acquire(), self.acquire()
+        self.assertIs(first, second)
+        self.assertTrue(first.owner)
+        self.assertEqual(len(self.decoders), 1)
+
+    def test_other_worker_attaches_without_a_decoder(self):
+        feed = self.acquire()
+        other_hub = CaptureHub()
+        self.addCleanup(other_hub.shutdown)
+
+        other = self.acquire(other_hub)
+
+        self.assertFalse(other.owner)
+        self.assertEqual(len(self.decoders), 1)
+        self.assertEqual(other.ring.token, feed.ring.token)
+
+    def test_snapshot_encodes_the_latest_frame_once(self):
+        feed = self.acquire()
+        feed.ring.write(make_frame(120), 1)
+
+        with patch.object(self.hub, 'encode', wraps=self.hub.encode) as encode:
+            first = feed.snapshot(timeout=3)
+            second = feed.snapshot(timeout=3)
+
+        self.assertTrue(first.startswith(b'\xff\xd8'))
+        self.assertEqual(first, second)
+        self.assertEqual(encode.call_count, 1)
+
+    def test_raw_frames_yield_new_frames_in_order(self):
+        feed = self.acquire()
+        stream = feed.raw_frames(timeout=0.05)
+        try:
+            self.assertIsNone(next(stream))  # Nothing decoded yet
+            feed.ring.write(make_frame(1), 1)
+            self.assertEqual(next(item for item in stream if item is not None)[0], 1)
+            feed.ring.write(make_frame(2), 2)
+            seq, frame, _ = next(item for item in stream if item is not None)
+            self.assertEqual(seq, 2)
+            self.assertTrue((frame == 2).all())
+        finally:
+            stream.close()
+
+    def test_published_frame_is_encoded_once_per_viewed_tier(self):
+        feed = self.acquire()
+        viewers = [FakeViewer('low'), FakeViewer('low'), FakeViewer('low'), FakeViewer('high')]
+        with feed._cond:
+            feed._subscribers.update(viewers)
+
+        with patch.object(self.hub, 'encode', return_value=b'jpeg') as encode:
+            feed._publish((5, make_frame(), time.time()))
+
+        self.assertEqual(sorted(call.args[1] for call in encode.call_args_list), ['high', 'low'])
+        self.assertEqual(feed.stats()['viewers'], {'low': 3, 'high': 1})
+        self.assertEqual([viewer.notified for viewer in viewers], [1, 1, 1, 1])
+        with feed._cond:
+            feed._subscribers.clear()
+
+    @override_settings(CCTV_CAPTURE_IDLE_GRACE=0.1)
+    def test_idle_feed_stops_its_decoder_and_removes_the_ring(self):
+        hub = CaptureHub()
+        self.addCleanup(hub.shutdown)
+        feed = self.acquire(hub)
+        time.sleep(0.2)
+        feed.process.alive = False  # Decoder exits on its own once nobody read for the idle grace
+
+        self.assertTrue(wait_for(lambda: feed.closed))
+        self.assertNotIn(self.key, hub.stats())
+        with self.assertRaises(FileNotFoundError):
+            FrameRing.attach(feed.name)
+
+    def test_encode_scales_down_to_the_tier_width(self):
+        jpeg = self.hub.encode(make_frame(width=1920, height=1080), 'low')
+        decoded = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (360, 640))
+
+    def test_camera_settings(self):
+        self.assertEqual(CaptureHub.camera_frame_size(SimpleNamespace(resolution='1280x720')), (1280, 720))
+        self.assertEqual(CaptureHub.camera_frame_size(SimpleNamespace(resolution='hd')), capture_hub.DEFAULT_FRAME_SIZE)
+        self.assertEqual(self.hub.tier_for('low'), 'low')
+        self.assertEqual(self.hub.tier_for('bogus'), 'high')
+
+    def test_test_source_replaces_camera_stream(self):
+        camera = SimpleNamespace(get_rtsp_url=lambda: 'rtsp://camera/stream')
+        self.assertEqual(CaptureHub.camera_source(camera), 'rtsp://camera/stream')
+        with override_settings(CCTV_CAPTURE_TEST_SOURCE='/tmp/loop.mp4'):
+            self.assertEqual(CaptureHub.camera_source(camera), '/tmp/loop.mp4')
+
+
+class CaptureHubAvailabilityTests(SimpleTestCase):
+
+    def test_no_hub_without_opencv(self):
+        with patch.object(capture_hub, 'CV2_AVAILABLE', False):
+            self.assertIsNone(get_capture_hub())
+
+
+def with_block(x, y, size=40, width=160, height=120, background=30):
+    """Frame with a bright square at (x, y)"""
+    frame = make_frame(background, width, height)
+    frame[y:y + size, x:x + size] = 230
+    return frame
+
+
+class MotionEventTrackerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tracker = MotionEventTracker(trigger_frames=2, post_roll=5)
+
+    def test_event_starts_after_consecutive_motion_frames(self):
+        self.assertIsNone(self.tracker.update(True, 0.0))
+        self.assertIsNone(self.tracker.update(False, 0.2))
+        self.assertIsNone(self.tracker.update(True, 0.4))
+        self.assertEqual(self.tracker.update(True, 0.6), 'start')
+        self.assertIsNone(self.tracker.update(True, 0.8))
+
+    def test_event_ends_after_post_roll_without_motion(self):
+        self.tracker.update(True, 0.0)
+        self.tracker.update(True, 1.0)
+        self.assertIsNone(self.tracker.update(False, 5.0))
+        self.assertIsNone(self.tracker.update(True, 5.5))  # Motion again: post-roll restarts
+        self.assertIsNone(self.tracker.update(False, 10.0))
+        self.assertEqual(self.tracker.update(False, 10.5), 'end')
+        self.assertFalse(self.tracker.active)
+
+
+@skipUnless(CV2_AVAILABLE, 'opencv is not installed')
+class MotionDetectorTests(SimpleTestCase):
+
+    def test_static_scene_has_no_motion(self):
+        detector = MotionDetector()
+        self.assertFalse(detector.process(make_frame(30, 160, 120)).motion)  # First frame: background
+        result = detector.process(make_frame(30, 160, 120))
+        self.assertFalse(result.motion)
+        self.assertEqual(result.score, 0)
+
+    def test_moving_object_is_motion(self):
+        detector = MotionDetector()
+        detector.process(make_frame(30, 160, 120))
+        result = detector.process(with_block(10, 10))
+        self.assertTrue(result.motion)
+        self.assertAlmostEqual(result.score, 40 * 40 / (160 * 120), delta=0.02)
+
+    def test_lighting_change_relearns_background(self):
+        detector = MotionDetector()
+        detector.process(make_frame(30, 160, 120))
+        self.assertFalse(detector.process(make_frame(220, 160, 120)).motion)
+        self.assertFalse(detector.process(make_frame(220, 160, 120)).motion)
+
+    def test_motion_is_reported_per_zone(self):
+        detector = MotionDetector(zones=[LEFT_HALF, RIGHT_HALF])
+        detector.process(make_frame(30, 160, 120))
+        result = detector.process(with_block(110, 40))
+        self.assertTrue(result.motion)
+        self.assertEqual(result.zones, [1])
+
+    def test_motion_outside_zones_is_ignored(self):
+        detector = MotionDetector(zones=[LEFT_HALF])
+        detector.process(make_frame(30, 160, 120))
+        self.assertFalse(detector.process(with_block(110, 40)).motion)
+
+    def test_sensitivity_is_clamped(self):
+        self.assertEqual(MotionDetector(sensitivity=500).threshold, MotionDetector(sensitivity=100).threshold)
+        self.assertEqual(MotionDetector(sensitivity=-5).threshold, MotionDetector(sensitivity=1).threshold)
+
+
+@skipUnless(CV2_AVAILABLE, 'opencv is not installed')
+class MotionRecorderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.recorder = MotionRecorder(pre_roll=1.0, fps=10)
+
+    def test_pre_roll_keeps_only_recent_frames(self):
+        for index in range(10):
+            self.recorder.add(index * 0.5, make_frame(index, 160, 120))
+        self.assertEqual([timestamp for timestamp, _ in self.recorder.buffer], [3.5, 4.0, 4.5])
+
+    def test_clip_starts_with_the_pre_roll(self):
+        for index in range(5):
+            self.recorder.add(10 + index * 0.1, make_frame(index, 160, 120))
+        path = Path(self.tmpdir.name) / 'clips' / 'event.mp4'
+
+        started_at = self.recorder.start(path, make_frame(0, 160, 120), now=11.0)
+        self.assertEqual(started_at, 10)
+        self.assertTrue(self.recorder.recording)
+        self.assertEqual(len(self.recorder.buffer), 0)
+
+        self.recorder.add(11.1, make_frame(0, 320, 240))  # Resized to the clip size
+        self.assertGreater(self.recorder.stop(), 0)
+        self.assertFalse(self.recorder.recording)
+
+
+class FakeHub:
+    """raw_frames() source for a monitor (what the capture hub would decode)"""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def raw_frames(self, camera, timeout=1.0):
+        for seq, (timestamp, frame) in enumerate(self.frames, start=1):
+            yield seq, frame, timestamp
+
+
+@skipUnless(CV2_AVAILABLE, 'opencv is not installed')
+@override_settings(
+    CCTV_MOTION_FPS=20, CCTV_MOTION_RECORD_FPS=20, CCTV_MOTION_ALPHA=0.5,
+    CCTV_MOTION_TRIGGER_FRAMES=2, CCTV_MOTION_POST_ROLL=1, CCTV_MOTION_PRE_ROLL=0.5,
+)
+class CameraMotionMonitorTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmpdir.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        user = get_user_model().objects.create_user('viewer', password='x')
+        self.camera = Camera.objects.create(
+            name='gate', location='garden', ip_address='10.0.0.20',
+            username='admin', password='secret', user=user,
+            recording_enabled=True, resolution='160x120',
+        )
+
+    def scene(self):
+        """Quiet, then a square moving across the frame for 1s, then quiet again"""
+        frames = [make_frame(30, 160, 120) for _ in range(10)]
+        frames += [with_block(10 + step * 10, 40) for step in range(10)]
+        frames += [make_frame(30, 160, 120) for _ in range(30)]
+        return [(1000 + index * 0.1, frame) for index, frame in enumerate(frames)]
+
+    def run_monitor(self):
+        monitor = CameraMotionMonitor(self.camera, hub=FakeHub(self.scene()))
+        monitor._run()
+        return monitor
+
+    def test_motion_creates_an_event_with_clip_and_thumbnail(self):
+        self.run_monitor()
+
+        event = MotionEvent.objects.get(camera=self.camera)
+        self.assertIsNotNone(event.ended_at)
+        self.assertGreater(event.frame_count, 0)
+        self.assertGreater(event.peak_score, 0)
+        self.assertTrue(Path(event.thumbnail_path).exists())
+
+        session = event.recording
+        self.assertEqual(session.recording_type, 'motion')
+        self.assertEqual(session.status, 'completed')
+        self.assertGreater(session.file_size, 0)
+        self.assertLess(session.start_time, event.started_at)  # Pre-roll included
+
+    def test_quiet_camera_records_nothing(self):
+        frames = [(1000 + index * 0.1, make_frame(30, 160, 120)) for index in range(30)]
+        CameraMotionMonitor(self.camera, hub=FakeHub(frames))._run()
+
+        self.assertFalse(MotionEvent.objects.exists())
+        self.assertFalse(RecordingSession.objects.exists())
+
+    def test_failed_session_does_not_leave_the_clip_open(self):
+        with patch.object(RecordingSession.objects, 'create', side_effect=RuntimeError('db down')):
+            monitor = self.run_monitor()
+
+        self.assertFalse(monitor.recorder.recording)
+        event = MotionEvent.objects.get(camera=self.camera)
+        self.assertIsNone(event.recording)
+        self.assertIsNotNone(event.ended_at)
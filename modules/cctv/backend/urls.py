@@ -21,6 +21,7 @@ urlpatterns = [
     # Recording management
     path('recordings/', views.RecordingListView.as_view(), name='recordings'),
     path('playback/<uuid:pk>/', views.RecordingPlaybackView.as_view(), name='playback'),
+    path('recording/<uuid:pk>/file/', views.recording_file, name='recording_file'),
     path('record/start/<uuid:camera_id>/', views.start_recording, name='start_recording'),
     path('record/stop/<uuid:camera_id>/', views.stop_recording, name='stop_recording'),
     
@@ -34,4 +35,6 @@ urlpatterns = [
     # API endpoints
     path('api/ptz/<uuid:camera_id>/', views.camera_ptz_control, name='ptz_control'),
     path('api/status/', views.camera_status, name='camera_status'),
+    path('api/events/', views.motion_events, name='motion_events'),
+    path('api/events/<uuid:event_id>/thumbnail/', views.motion_event_thumbnail, name='motion_event_thumbnail'),
 ]
\ No newline at end of file
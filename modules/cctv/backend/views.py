@@ -8,7 +8,8 @@ from django.views.generic import TemplateView, ListView, DetailView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from core.system.web_ui.backend.views import BaseUIView
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, StreamingHttpResponse, HttpResponse
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponse, FileResponse, Http404
+from django.urls import reverse
 from django.utils import timezone
 from django.db.models import Count, Q, Sum
 from django.core.paginator import Paginator
@@ -21,18 +22,9 @@ from datetime import datetime, timedelta
 import subprocess
 from pathlib import Path
 
-# Optional imports for video processing
-try:
-    import cv2
-    import numpy as np
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
-    cv2 = None
-    np = None
-
+from .capture_hub import get_capture_hub
 from .models import (
-    Camera, CameraStream, RecordingSession, 
+    Camera, CameraStream, RecordingSession, MotionEvent,
     RecordingSchedule, Alert, CameraGroup, StorageConfiguration
 )
 
@@ -227,37 +219,28 @@ class StreamProxyView(LoginRequiredMixin, View):
     """Proxy RTSP stream to browser-compatible format"""
     
     def get(self, request, camera_id):
-        """Stream video to browser using MJPEG"""
+        """
+        Stream video to browser using MJPEG
+
+        Frames come from the shared capture hub: one camera connection and one
+        JPEG encode per quality tier (?quality=high|medium|low), whatever the
+        number of viewers.
+        """
         camera = get_object_or_404(Camera, id=camera_id, user=request.user)
         
-        def generate():
+        hub = get_capture_hub()
+        if hub is None:
+            return JsonResponse({'error': 'video processing not available'}, status=503)
+        if not hub.camera_source(camera):
+            return JsonResponse({'error': 'stream url not available'}, status=404)
+        tier = hub.tier_for(request.GET.get('quality'))
+        
+        async def generate():
             """Generate MJPEG stream"""
-            rtsp_url = camera.get_rtsp_url()
-            if not rtsp_url:
-                return
-            
-            # Open video capture if cv2 available
-            if not CV2_AVAILABLE:
-                return
-            
-            cap = cv2.VideoCapture(rtsp_url)
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            
-            try:
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    # Encode frame as JPEG
-                    _, buffer = cv2.imencode('.jpg', frame)
-                    frame_bytes = buffer.tobytes()
-                    
-                    # Yield frame in MJPEG format
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            finally:
-                cap.release()
+            async for frame_bytes in hub.frames(camera, tier):
+                # Yield frame in MJPEG format
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
         
         return StreamingHttpResponse(
             generate(),
@@ -271,6 +254,13 @@ class SnapshotView(LoginRequiredMixin, View):
     def get(self, request, camera_id):
         """Get current snapshot from camera"""
         camera = get_object_or_404(Camera, id=camera_id, user=request.user)
+        hub = get_capture_hub()
+        
+        # Camera already streaming: latest buffered frame, no request to the camera
+        if hub is not None and hub.is_live(camera):
+            snapshot = hub.snapshot(camera)
+            if snapshot:
+                return HttpResponse(snapshot, content_type='image/jpeg')
         
         # Get snapshot URL
         snapshot_url = camera.get_snapshot_url()
@@ -284,16 +274,11 @@ class SnapshotView(LoginRequiredMixin, View):
             except:
                 pass
         
-        # Fallback: capture frame from stream
-        rtsp_url = camera.get_rtsp_url()
-        if rtsp_url and CV2_AVAILABLE:
-            cap = cv2.VideoCapture(rtsp_url)
-            ret, frame = cap.read()
-            cap.release()
-            
-            if ret:
-                _, buffer = cv2.imencode('.jpg', frame)
-                return HttpResponse(buffer.tobytes(), content_type='image/jpeg')
+        # Fallback: capture frame from stream (kept open for the idle grace period)
+        if hub is not None and hub.camera_source(camera):
+            snapshot = hub.snapshot(camera)
+            if snapshot:
+                return HttpResponse(snapshot, content_type='image/jpeg')
         
         return HttpResponse(status=404)
 
@@ -361,9 +346,14 @@ class RecordingPlaybackView(LoginRequiredMixin, DetailView):
             timestamp__gte=recording.start_time,
             timestamp__lte=recording.end_time if recording.end_time else timezone.now()
         ).order_by('timestamp')
+        motion_events = list(recording.events.order_by('started_at'))
+        for event in motion_events:
+            # Seconds into the clip, for seeking the player
+            event.offset = max(0.0, (event.started_at - recording.start_time).total_seconds())
         
         context.update({
             'alerts': alerts,
+            'motion_events': motion_events,
             'page_title': f'playback: {recording.camera.name}',
             'current_module': 'cctv',
         })
@@ -587,4 +577,76 @@ def camera_status(request):
     return JsonResponse({
         'cameras': status_data,
         'timestamp': timezone.now().isoformat()
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+def motion_events(request):
+    """Motion events, newest first (filters: camera, since, until, limit)"""
+    events = MotionEvent.objects.filter(camera__user=request.user).select_related('camera')
+    
+    camera_id = request.GET.get('camera')
+    if camera_id:
+        try:
+            events = events.filter(camera_id=uuid.UUID(camera_id))
+        except ValueError:
+            return JsonResponse({'error': 'invalid camera id'}, status=400)
+    
+    for param, lookup in (('since', 'started_at__gte'), ('until', 'started_at__lte')):
+        value = request.GET.get(param)
+        if value:
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                return JsonResponse({'error': f'invalid {param} timestamp'}, status=400)
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            events = events.filter(**{lookup: moment})
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 500)
+    except ValueError:
+        limit = 100
+    
+    event_data = []
+    for event in events[:limit]:
+        event_data.append({
+            'id': str(event.id),
+            'camera_id': str(event.camera_id),
+            'camera': event.camera.name,
+            'started_at': event.started_at.isoformat(),
+            'ended_at': event.ended_at.isoformat() if event.ended_at else None,
+            'duration': event.duration,
+            'peak_score': event.peak_score,
+            'zones': event.zones,
+            'recording_id': str(event.recording_id) if event.recording_id else None,
+            'has_thumbnail': bool(event.thumbnail_path),
+            'thumbnail_url': reverse('cctv:motion_event_thumbnail', args=[event.id]) if event.thumbnail_path else None,
+        })
+    
+    return JsonResponse({
+        'events': event_data,
+        'timestamp': timezone.now().isoformat()
+    })
+
+
+def _file_response(path_value: str, content_type: str) -> FileResponse:
+    """Stream a stored CCTV file, 404 if it is gone"""
+    path = Path(path_value) if path_value else None
+    if path is None or not path.is_file():
+        raise Http404('file not found')
+    return FileResponse(open(path, 'rb'), content_type=content_type)
+
+
+@login_required
+def motion_event_thumbnail(request, event_id):
+    """Keyframe thumbnail of a motion event"""
+    event = get_object_or_404(MotionEvent, id=event_id, camera__user=request.user)
+    return _file_response(event.thumbnail_path, 'image/jpeg')
+
+
+@login_required
+def recording_file(request, pk):
+    """Video file of a recording (used by the playback page)"""
+    recording = get_object_or_404(RecordingSession, pk=pk, user=request.user)
+    return _file_response(recording.file_path, 'video/mp4')
@@ -376,7 +376,7 @@ class BankRateImportLogAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Import Info', {
-            'fields': ('import_type', 'status', 'source_url')
+            'fields': ('import_type', 'status', 'source_url', 'watermark')
         }),
         ('Statistics', {
             'fields': (
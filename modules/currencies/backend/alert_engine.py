@@ -0,0 +1,140 @@
+"""
+Currency alert engine
+Evaluates all active CurrencyAlerts in one pass:
+
+1. One query loads the active alerts (values only, no model instances)
+2. One query loads latest and 24h-ago rates for every distinct pair
+   (correlated LIMIT 1 subqueries on the (base, target, timestamp) index)
+3. Conditions and cooldowns are evaluated as NumPy array operations
+4. One UPDATE marks all triggered alerts; notifications go out in batches
+"""
+
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CurrencyAlert, ExchangeRate
+
+logger = logging.getLogger(__name__)
+
+ALERT_COOLDOWN = timedelta(hours=1)  # Don't re-trigger the same alert more often than this
+CHANGE_WINDOW = timedelta(days=1)  # change_percent compares against the rate this long ago
+NOTIFICATION_BATCH_SIZE = 100  # Alerts per send_alert_notifications_batch task
+
+
+def load_pair_rates(now=None):
+    """
+    Latest and CHANGE_WINDOW-ago rates for each distinct pair with an active alert
+
+    Returns:
+        {(base_code, target_code): (latest_rate or None, old_rate or None)}
+    """
+    now = now or timezone.now()
+    pair_rates = ExchangeRate.objects.filter(
+        base_currency=OuterRef('base_currency'),
+        target_currency=OuterRef('target_currency'),
+    ).order_by('-timestamp').values('rate')[:1]
+
+    rows = CurrencyAlert.objects.filter(is_active=True).values(
+        'base_currency', 'target_currency'
+    ).distinct().annotate(
+        latest_rate=Subquery(pair_rates),
+        old_rate=Subquery(pair_rates.filter(timestamp__lte=now - CHANGE_WINDOW)),
+    ).order_by()
+
+    return {
+        (row['base_currency'], row['target_currency']): (row['latest_rate'], row['old_rate'])
+        for row in rows
+    }
+
+
+def evaluate_alerts(alerts, pair_rates, now=None):
+    """
+    Vectorized condition + cooldown check
+
+    Args:
+        alerts: list of dicts with base_currency, target_currency, alert_type,
+                threshold_value, last_triggered
+        pair_rates: output of load_pair_rates
+
+    Returns:
+        (boolean ndarray of triggered alerts, float ndarray of latest rates)
+    """
+    now = now or timezone.now()
+    if not alerts:
+        return np.zeros(0, dtype=bool), np.zeros(0)
+
+    missing = (None, None)
+    rates = [pair_rates.get((a['base_currency'], a['target_currency']), missing) for a in alerts]
+    latest = np.array([np.nan if r[0] is None else float(r[0]) for r in rates])
+    old = np.array([np.nan if r[1] is None else float(r[1]) for r in rates])
+    threshold = np.array([float(a['threshold_value']) for a in alerts])
+    alert_type = np.array([a['alert_type'] for a in alerts])
+    last_triggered = np.array([
+        a['last_triggered'].timestamp() if a['last_triggered'] else -np.inf for a in alerts
+    ])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = (latest - old) / old * 100
+        condition = np.select(
+            [alert_type == 'above', alert_type == 'below', alert_type == 'change_percent'],
+            [latest > threshold, latest < threshold, np.abs(change_pct) >= np.abs(threshold)],
+            default=False,
+        )
+    # NaN comparisons are False, so pairs without rates (or without 24h history) never trigger
+    cooled_down = (now.timestamp() - last_triggered) >= ALERT_COOLDOWN.total_seconds()
+    return condition & cooled_down, latest
+
+
+def run_alert_check(dispatch=True):
+    """
+    Evaluate all active alerts, mark triggered ones and dispatch notifications
+
+    Returns:
+        dict with checked/triggered counts and triggered alert summaries
+    """
+    now = timezone.now()
+    alerts = list(CurrencyAlert.objects.filter(is_active=True).values(
+        'id', 'user_id', 'base_currency', 'target_currency',
+        'alert_type', 'threshold_value', 'last_triggered',
+    ))
+    pair_rates = load_pair_rates(now=now) if alerts else {}
+    triggered_mask, latest = evaluate_alerts(alerts, pair_rates, now)
+
+    triggered_alerts = []
+    for index in np.flatnonzero(triggered_mask):
+        alert = alerts[index]
+        triggered_alerts.append({
+            'alert_id': str(alert['id']),
+            'user_id': alert['user_id'],
+            'pair': f"{alert['base_currency']}/{alert['target_currency']}",
+            'rate': float(latest[index]),
+            'threshold': float(alert['threshold_value']),
+            'type': alert['alert_type'],
+        })
+
+    if triggered_alerts:
+        triggered_ids = [alerts[index]['id'] for index in np.flatnonzero(triggered_mask)]
+        CurrencyAlert.objects.filter(pk__in=triggered_ids).update(
+            last_triggered=now,
+            trigger_count=F('trigger_count') + 1,
+            updated_at=now,
+        )
+
+        if dispatch:
+            from .tasks import send_alert_notifications_batch
+            payload = [{'alert_id': a['alert_id'], 'rate': a['rate']} for a in triggered_alerts]
+            for start in range(0, len(payload), NOTIFICATION_BATCH_SIZE):
+                send_alert_notifications_batch.delay(payload[start:start + NOTIFICATION_BATCH_SIZE])
+
+    logger.info(f"Checked {len(alerts)} alerts across {len(pair_rates)} pairs, triggered {len(triggered_alerts)}")
+    return {
+        'checked_count': len(alerts),
+        'pair_count': len(pair_rates),
+        'triggered_count': len(triggered_alerts),
+        'triggered_alerts': triggered_alerts,
+        'timestamp': now.isoformat(),
+    }
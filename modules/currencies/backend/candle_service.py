@@ -0,0 +1,227 @@
+"""
+Bank rate candle service
+Maintains pre-aggregated OHLC candles (BankRateCandle) of bank buy rates at
+1m/1h/4h/1d/1w resolutions, per bank and for all banks combined (bank='').
+
+Candles are merged incrementally from newly imported BankExchangeRate rows
+(import_firebase_rates_incremental, in the same transaction as the rows, so a
+failed merge never leaves rates without candles) and can be rebuilt from raw history with
+the build_rate_candles management command. open/close are the true first/last
+observations in each bucket (tracked with open_at/close_at).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BankExchangeRate, BankRateCandle
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '4h': timedelta(hours=4),
+    '1d': timedelta(days=1),
+    '1w': timedelta(weeks=1),
+}
+
+# Chart timeframe -> (candle resolution, lookback window or None for all history, legacy interval name)
+CHART_TIMEFRAMES = {
+    '1H': ('1h', timedelta(hours=24), 'hour'),
+    '4H': ('4h', timedelta(hours=96), '4hour'),
+    '1D': ('1d', timedelta(days=30), 'day'),
+    '1W': ('1w', timedelta(weeks=12), 'week'),
+    '1M': ('1d', timedelta(days=30), 'day'),
+    '3M': ('1d', timedelta(days=90), 'day'),
+    '6M': ('1d', timedelta(days=180), 'day'),
+    '1Y': ('1d', timedelta(days=365), 'day'),
+    'ALL': ('1d', None, 'day'),
+}
+
+CANDLE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'open_at', 'close_at']
+
+
+def bucket_start(timestamp, resolution):
+    """Start of the candle bucket containing timestamp (local time, weeks start Monday)"""
+    local = timezone.localtime(timestamp).replace(second=0, microsecond=0)
+    if resolution == '1m':
+        return local
+    local = local.replace(minute=0)
+    if resolution == '1h':
+        return local
+    if resolution == '4h':
+        return local.replace(hour=local.hour - local.hour % 4)
+    local = local.replace(hour=0)
+    if resolution == '1d':
+        return local
+    return local - timedelta(days=local.weekday())
+
+
+class _Candle:
+    """In-memory OHLC accumulator"""
+    __slots__ = ('open', 'high', 'low', 'close', 'volume', 'open_at', 'close_at')
+
+    def __init__(self, rate, timestamp):
+        self.open = self.high = self.low = self.close = rate
+        self.open_at = self.close_at = timestamp
+        self.volume = 1
+
+    def add(self, rate, timestamp):
+        if timestamp < self.open_at:
+            self.open, self.open_at = rate, timestamp
+        if timestamp >= self.close_at:
+            self.close, self.close_at = rate, timestamp
+        self.high = max(self.high, rate)
+        self.low = min(self.low, rate)
+        self.volume += 1
+
+    def merge_into(self, row):
+        """Merge this partial candle into an existing BankRateCandle row"""
+        if self.open_at < row.open_at:
+            row.open, row.open_at = self.open, self.open_at
+        if self.close_at >= row.close_at:
+            row.close, row.close_at = self.close, self.close_at
+        row.high = max(row.high, self.high)
+        row.low = min(row.low, self.low)
+        row.volume += self.volume
+
+
+def update_candles(observations, include_aggregate=True):
+    """
+    Merge raw rate observations into the candle table
+
+    Args:
+        observations: iterable of (bank, currency_pair, timestamp, buy_rate)
+        include_aggregate: also update the all-banks (bank='') candles
+
+    Returns:
+        Number of candle rows created or updated
+    """
+    partial = {}
+    for bank, currency_pair, timestamp, rate in observations:
+        banks = (bank, '') if include_aggregate else (bank,)
+        for resolution in RESOLUTIONS:
+            start = bucket_start(timestamp, resolution)
+            for candle_bank in banks:
+                key = (candle_bank, currency_pair, resolution, start)
+                candle = partial.get(key)
+                if candle is None:
+                    partial[key] = _Candle(rate, timestamp)
+                else:
+                    candle.add(rate, timestamp)
+
+    if not partial:
+        return 0
+
+    by_resolution = defaultdict(dict)
+    for key, candle in partial.items():
+        by_resolution[key[2]][key] = candle
+
+    touched = 0
+    with transaction.atomic():
+        for resolution, candles in by_resolution.items():
+            existing = BankRateCandle.objects.select_for_update().filter(
+                resolution=resolution,
+                bank__in={key[0] for key in candles},
+                currency_pair__in={key[1] for key in candles},
+                bucket_start__in={key[3] for key in candles},
+            )
+            rows = {
+                (row.bank, row.currency_pair, row.resolution, row.bucket_start): row
+                for row in existing
+            }
+
+            to_create = []
+            to_update = []
+            for key, candle in candles.items():
+                row = rows.get(key)
+                if row is None:
+                    to_create.append(BankRateCandle(
+                        bank=key[0], currency_pair=key[1], resolution=resolution, bucket_start=key[3],
+                        **{field: getattr(candle, field) for field in CANDLE_FIELDS}
+                    ))
+                else:
+                    candle.merge_into(row)
+                    to_update.append(row)
+
+            BankRateCandle.objects.bulk_create(to_create, batch_size=500)
+            BankRateCandle.objects.bulk_update(to_update, CANDLE_FIELDS, batch_size=500)
+            touched += len(to_create) + len(to_update)
+
+    return touched
+
+
+def rebuild_candles(currency_pair=None, bank=None, since=None, chunk_size=20000):
+    """
+    Rebuild candles from raw BankExchangeRate history
+
+    Candles older than the retained raw history are kept: the rebuild starts at
+    the first week covered by raw rows (or `since`, aligned to its week).
+    Rebuilding a single bank leaves the all-banks aggregate untouched.
+    """
+    rates = BankExchangeRate.objects.all()
+    if currency_pair:
+        rates = rates.filter(currency_pair=currency_pair)
+    if bank:
+        rates = rates.filter(bank=bank)
+
+    earliest = rates.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if earliest is None:
+        return 0
+
+    candles = BankRateCandle.objects.all()
+    if currency_pair:
+        candles = candles.filter(currency_pair=currency_pair)
+    if bank:
+        candles = candles.filter(bank=bank)
+
+    start = bucket_start(earliest, '1w')
+    if start < earliest and candles.filter(bucket_start__lt=start).exists():
+        # Raw rows for the first week were already purged; keep its candles
+        start += RESOLUTIONS['1w']
+    if since is not None:
+        start = max(start, bucket_start(since, '1w'))
+
+    candles = candles.filter(bucket_start__gte=start)
+    deleted = candles.delete()[0]
+    logger.info(f"Rebuilding candles from {start.isoformat()} ({deleted} existing candles removed)")
+
+    touched = 0
+    chunk = []
+    rows = rates.filter(timestamp__gte=start).order_by('timestamp').values_list(
+        'bank', 'currency_pair', 'timestamp', 'buy_rate'
+    )
+    for observation in rows.iterator(chunk_size=chunk_size):
+        chunk.append(observation)
+        if len(chunk) >= chunk_size:
+            touched += update_candles(chunk, include_aggregate=not bank)
+            chunk = []
+    if chunk:
+        touched += update_candles(chunk, include_aggregate=not bank)
+    return touched
+
+
+def get_candles(currency_pair, resolution, start=None, end=None, bank=None):
+    """Candle rows for a pair/resolution (bank=None -> all-banks aggregate), oldest first"""
+    candles = BankRateCandle.objects.filter(
+        currency_pair=currency_pair,
+        resolution=resolution,
+        bank=bank or '',
+    )
+    if start is not None:
+        candles = candles.filter(bucket_start__gte=bucket_start(start, resolution))
+    if end is not None:
+        candles = candles.filter(bucket_start__lte=end)
+    return candles.order_by('bucket_start')
+
+
+def prune_minute_candles(days=None):
+    """Drop 1m candles past their retention window (coarser resolutions are kept)"""
+    days = days or getattr(settings, 'CURRENCY_MINUTE_CANDLE_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    return BankRateCandle.objects.filter(resolution='1m', bucket_start__lt=cutoff).delete()[0]
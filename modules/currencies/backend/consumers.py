@@ -4,24 +4,32 @@ Provides real-time currency rates and portfolio updates
 """
 
 import json
-import asyncio
 from decimal import Decimal
 from datetime import datetime
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.core.cache import cache
+from django.conf import settings
 from django.utils import timezone
 from .models import Currency, ExchangeRate, Portfolio, CurrencyAlert
+from .rate_hub import fetch_latest_rates, get_pair_rate, get_rate_hub, get_snapshot, normalize_pair, pair_group
+from .portfolio_valuation import get_valuation_engine, portfolio_group
 from .serializers import ExchangeRateSerializer, PortfolioSerializer
 
 
 class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
-    """Real-time currency exchange rates"""
+    """
+    Real-time currency exchange rates
+
+    Rates come from the shared RateBroadcastHub: each subscribed pair is a
+    channel group, so this consumer only relays and never polls the database.
+    """
     
     async def connect(self):
         """Accept WebSocket connection"""
         self.user = self.scope["user"]
         self.room_group_name = "currency_rates"
+        self.subscriptions = set()
+        self.max_subscriptions = getattr(settings, 'CURRENCY_WS_MAX_SUBSCRIPTIONS', 50)
         
         # Join currency rates group
         await self.channel_layer.group_add(
@@ -34,16 +42,18 @@ class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
         # Send initial rates on connection
         await self.send_initial_rates()
         
-        # Start periodic rate updates
-        self.update_task = asyncio.create_task(self.periodic_rate_update())
+        # Make sure this process runs the shared rate producer
+        get_rate_hub().acquire()
+        self.hub_acquired = True
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnect"""
-        # Cancel periodic updates
-        if hasattr(self, 'update_task'):
-            self.update_task.cancel()
+        if getattr(self, 'hub_acquired', False):
+            get_rate_hub().release()
         
-        # Leave room group
+        # Leave pair groups and the room group
+        for pair in getattr(self, 'subscriptions', ()):
+            await self.channel_layer.group_discard(pair_group(pair), self.channel_name)
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -54,35 +64,39 @@ class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
         message_type = content.get('type')
         
         if message_type == 'subscribe_pair':
-            await self.subscribe_to_currency_pair(content.get('data'))
+            await self.subscribe_to_currency_pair(content.get('data') or {})
         elif message_type == 'unsubscribe_pair':
-            await self.unsubscribe_from_currency_pair(content.get('data'))
+            await self.unsubscribe_from_currency_pair(content.get('data') or {})
         elif message_type == 'get_historical':
-            await self.send_historical_data(content.get('data'))
+            await self.send_historical_data(content.get('data') or {})
     
     async def subscribe_to_currency_pair(self, data):
         """Subscribe to specific currency pair updates"""
-        base_currency = data.get('base_currency')
-        target_currency = data.get('target_currency')
+        pair = normalize_pair(data.get('base_currency'), data.get('target_currency'))
+        if pair is None:
+            return
+        
+        if pair not in self.subscriptions:
+            if len(self.subscriptions) >= self.max_subscriptions:
+                await self.send_json({
+                    'type': 'error',
+                    'message': f'Subscription limit reached ({self.max_subscriptions} pairs)',
+                    'timestamp': timezone.now().isoformat()
+                })
+                return
+            self.subscriptions.add(pair)
+            await self.channel_layer.group_add(pair_group(pair), self.channel_name)
         
-        if base_currency and target_currency:
-            # Store subscription in user's session
-            subscriptions = self.scope.get('subscriptions', set())
-            subscriptions.add(f"{base_currency}/{target_currency}")
-            self.scope['subscriptions'] = subscriptions
-            
-            # Send current rate
-            await self.send_currency_pair_rate(base_currency, target_currency)
+        # Send current rate
+        base_currency, target_currency = pair.split('/')
+        await self.send_currency_pair_rate(base_currency, target_currency)
     
     async def unsubscribe_from_currency_pair(self, data):
         """Unsubscribe from currency pair updates"""
-        base_currency = data.get('base_currency')
-        target_currency = data.get('target_currency')
-        
-        if base_currency and target_currency:
-            subscriptions = self.scope.get('subscriptions', set())
-            subscriptions.discard(f"{base_currency}/{target_currency}")
-            self.scope['subscriptions'] = subscriptions
+        pair = normalize_pair(data.get('base_currency'), data.get('target_currency'))
+        if pair in self.subscriptions:
+            self.subscriptions.discard(pair)
+            await self.channel_layer.group_discard(pair_group(pair), self.channel_name)
     
     async def send_initial_rates(self):
         """Send initial currency rates on connection"""
@@ -126,35 +140,6 @@ class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
             'timestamp': timezone.now().isoformat()
         })
     
-    async def periodic_rate_update(self):
-        """Send periodic rate updates"""
-        while True:
-            try:
-                await asyncio.sleep(10)  # Update every 10 seconds
-                
-                # Get subscribed pairs
-                subscriptions = self.scope.get('subscriptions', set())
-                
-                if subscriptions:
-                    updates = {}
-                    for pair in subscriptions:
-                        base, target = pair.split('/')
-                        rate = await self.get_currency_pair_rate(base, target)
-                        if rate:
-                            updates[pair] = rate
-                    
-                    if updates:
-                        await self.send_json({
-                            'type': 'rate_updates',
-                            'data': updates,
-                            'timestamp': timezone.now().isoformat()
-                        })
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"Error in periodic update: {e}")
-                await asyncio.sleep(30)  # Wait longer on error
-    
     # Group message handlers
     async def rate_update(self, event):
         """Handle rate update from group"""
@@ -164,66 +149,26 @@ class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
             'timestamp': event['timestamp']
         })
     
+    async def rate_changed(self, event):
+        """Relay a changed pair from the rate hub"""
+        await self.send_json({
+            'type': 'rate_updates',
+            'data': {event['pair']: event['rate']},
+            'timestamp': event['timestamp']
+        })
+    
     @database_sync_to_async
     def get_latest_rates(self):
-        """Get latest currency rates from database"""
-        # Try cache first
-        cached_rates = cache.get('latest_currency_rates')
-        if cached_rates:
-            return cached_rates
-        
-        # Get from database
-        rates = {}
-        latest_rates = ExchangeRate.objects.select_related(
-            'base_currency', 'target_currency'
-        ).filter(
-            timestamp__gte=timezone.now() - timezone.timedelta(hours=1)
-        ).order_by('base_currency', 'target_currency', '-timestamp').distinct(
-            'base_currency', 'target_currency'
-        )
-        
-        for rate in latest_rates:
-            pair = f"{rate.base_currency.code}/{rate.target_currency.code}"
-            rates[pair] = {
-                'rate': float(rate.rate),
-                'change_24h': float(rate.change_percentage_24h) if rate.change_percentage_24h else 0,
-                'timestamp': rate.timestamp.isoformat()
-            }
-        
-        # Cache for 1 minute
-        cache.set('latest_currency_rates', rates, 60)
+        """Latest rate of every pair (hub snapshot; one query if nothing is published yet)"""
+        rates = get_snapshot()
+        if not rates:
+            rates = fetch_latest_rates()
         return rates
     
     @database_sync_to_async
     def get_currency_pair_rate(self, base_currency, target_currency):
         """Get rate for specific currency pair"""
-        cache_key = f'rate_{base_currency}_{target_currency}'
-        cached_rate = cache.get(cache_key)
-        
-        if cached_rate:
-            return cached_rate
-        
-        try:
-            rate = ExchangeRate.objects.select_related(
-                'base_currency', 'target_currency'
-            ).filter(
-                base_currency__code=base_currency,
-                target_currency__code=target_currency
-            ).latest('timestamp')
-            
-            rate_data = {
-                'rate': float(rate.rate),
-                'bid': float(rate.bid) if rate.bid else None,
-                'ask': float(rate.ask) if rate.ask else None,
-                'change_24h': float(rate.change_percentage_24h) if rate.change_percentage_24h else 0,
-                'volume_24h': float(rate.volume_24h) if rate.volume_24h else 0,
-                'timestamp': rate.timestamp.isoformat()
-            }
-            
-            cache.set(cache_key, rate_data, 30)
-            return rate_data
-        except ExchangeRate.DoesNotExist:
-            return None
+        return get_pair_rate(f"{base_currency}/{target_currency}")
     
     @database_sync_to_async
     def get_historical_rates(self, base_currency, target_currency, period):
@@ -255,20 +200,27 @@ class CurrencyRatesConsumer(AsyncJsonWebsocketConsumer):
 
 
 class PortfolioConsumer(AsyncJsonWebsocketConsumer):
-    """Real-time portfolio value updates"""
+    """
+    Real-time portfolio value updates
+
+    Values come from the process-wide valuation engine (portfolio_valuation),
+    which revalues on rate changes and holding/transaction edits and pushes
+    diffs to this socket; there is no per-socket polling.
+    """
     
     async def connect(self):
         """Accept WebSocket connection"""
         self.user = self.scope["user"]
         self.portfolio_id = self.scope['url_route']['kwargs']['portfolio_id']
-        self.room_group_name = f"portfolio_{self.portfolio_id}"
+        self.room_group_name = portfolio_group(self.portfolio_id)
+        self.attached = False
         
         # Verify portfolio ownership
         if not await self.verify_portfolio_access():
             await self.close()
             return
         
-        # Join portfolio group
+        # Join portfolio group (transaction and invalidation events)
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
@@ -277,15 +229,19 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
         await self.accept()
         
         # Send initial portfolio state
-        await self.send_portfolio_state()
-        
-        # Start periodic portfolio update
-        self.update_task = asyncio.create_task(self.periodic_portfolio_update())
+        portfolio_data = await get_valuation_engine().attach(self.portfolio_id, self.channel_name)
+        self.attached = portfolio_data is not None
+        if portfolio_data:
+            await self.send_json({
+                'type': 'portfolio_update',
+                'data': portfolio_data,
+                'timestamp': timezone.now().isoformat()
+            })
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnect"""
-        if hasattr(self, 'update_task'):
-            self.update_task.cancel()
+        if getattr(self, 'attached', False):
+            await get_valuation_engine().detach(self.portfolio_id, self.channel_name)
         
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -302,8 +258,8 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
             await self.handle_add_transaction(content.get('data'))
     
     async def send_portfolio_state(self):
-        """Send current portfolio state"""
-        portfolio_data = await self.get_portfolio_data()
+        """Send current portfolio state (from the engine's book, no recalculation)"""
+        portfolio_data = get_valuation_engine().snapshot(self.portfolio_id)
         if portfolio_data:
             await self.send_json({
                 'type': 'portfolio_update',
@@ -311,18 +267,6 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
                 'timestamp': timezone.now().isoformat()
             })
     
-    async def periodic_portfolio_update(self):
-        """Periodically update portfolio value"""
-        while True:
-            try:
-                await asyncio.sleep(30)  # Update every 30 seconds
-                await self.send_portfolio_state()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"Error in portfolio update: {e}")
-                await asyncio.sleep(60)
-    
     async def handle_add_transaction(self, data):
         """Handle new transaction addition"""
         # This would typically validate and add the transaction
@@ -350,6 +294,18 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
             'timestamp': event['timestamp']
         })
     
+    async def portfolio_diff(self, event):
+        """Changed holdings and new total from the valuation engine"""
+        await self.send_json({
+            'type': 'portfolio_diff',
+            'data': event['data'],
+            'timestamp': event['timestamp']
+        })
+    
+    async def portfolio_invalidated(self, event):
+        """Holdings or transactions changed; the engine reloads once per process and pushes the diff"""
+        await get_valuation_engine().reload(self.portfolio_id, event.get('version'))
+    
     async def transaction_added(self, event):
         """Handle new transaction notification"""
         await self.send_json({
@@ -358,8 +314,6 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
             'user': event['user'],
             'timestamp': event['timestamp']
         })
-        # Refresh portfolio state
-        await self.send_portfolio_state()
     
     @database_sync_to_async
     def verify_portfolio_access(self):
@@ -373,41 +327,6 @@ class PortfolioConsumer(AsyncJsonWebsocketConsumer):
         except Portfolio.DoesNotExist:
             return False
     
-    @database_sync_to_async
-    def get_portfolio_data(self):
-        """Get portfolio data with current values"""
-        try:
-            portfolio = Portfolio.objects.prefetch_related(
-                'holdings__currency',
-                'transactions'
-            ).get(id=self.portfolio_id)
-            
-            # Calculate current values
-            total_value = portfolio.calculate_total_value()
-            holdings_data = []
-            
-            for holding in portfolio.holdings.all():
-                current_value = holding.get_current_value()
-                holdings_data.append({
-                    'currency': holding.currency.code,
-                    'amount': float(holding.amount),
-                    'average_buy_price': float(holding.average_buy_price),
-                    'current_value': float(current_value) if current_value else 0,
-                    'profit_loss': float(
-                        (current_value - (holding.amount * holding.average_buy_price))
-                    ) if current_value else 0
-                })
-            
-            return {
-                'id': str(portfolio.id),
-                'name': portfolio.name,
-                'total_value': float(total_value),
-                'holdings': holdings_data,
-                'last_updated': timezone.now().isoformat()
-            }
-        except Portfolio.DoesNotExist:
-            return None
-    
     @database_sync_to_async
     def add_transaction(self, data):
         """Add new transaction to portfolio"""
@@ -0,0 +1,271 @@
+"""
+Crypto Price Aggregator
+Fetches every exchange concurrently and merges the results into one snapshot.
+
+- One batch request per source instead of one per symbol: Binance
+  /ticker/24hr?symbols=[...], CoinGecko /simple/price with all ids and both
+  vs currencies, BTCTurk /ticker (all pairs)
+- Sources run concurrently on one aiohttp session, each under its own timeout
+- Each source has a circuit breaker (state in the cache, shared by all
+  workers): after CRYPTO_API_BREAKER_THRESHOLD consecutive failures it is
+  skipped for CRYPTO_API_BREAKER_COOLDOWN seconds
+
+A refresh costs the slowest source's round trip instead of 4 × symbols
+sequential requests. Base URLs can be overridden (CRYPTO_API_ENDPOINTS or the
+endpoints argument), so tests can run against a local stub server.
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+import pytz
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINTS = {
+    'binance': "https://api.binance.com/api/v3",
+    'binance_us': "https://api.binance.us/api/v3",
+    'coingecko': "https://api.coingecko.com/api/v3",
+    'btcturk': "https://api.btcturk.com/api/v2",
+}
+
+# CoinGecko ids; other symbols are tried as their lowercase name
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'AVAX': 'avalanche-2',
+}
+
+# Result slots per symbol, in the order get_all_prices has always returned them
+PRICE_SLOTS = ('binance_usdt', 'coingecko_usd', 'coingecko_try', 'btcturk_try')
+
+BREAKER_PREFIX = 'crypto_api:breaker'
+USER_AGENT = 'UNIBOS/1.0 (Cryptocurrency Portfolio Manager)'
+
+
+def _from_millis(value):
+    return timezone.make_aware(datetime.fromtimestamp(value / 1000), pytz.utc)
+
+
+def format_binance_ticker(ticker: Dict, symbol: str, quote: str = 'USDT') -> Dict:
+    """Binance 24hr ticker -> price dict"""
+    return {
+        'exchange': 'Binance',
+        'symbol': symbol,
+        'quote': quote,
+        'price': float(ticker.get('lastPrice', 0)),
+        'bid': float(ticker.get('bidPrice', 0)),
+        'ask': float(ticker.get('askPrice', 0)),
+        'volume_24h': float(ticker.get('volume', 0)),
+        'volume_24h_quote': float(ticker.get('quoteVolume', 0)),
+        'change_24h': float(ticker.get('priceChange', 0)),
+        'change_percentage_24h': float(ticker.get('priceChangePercent', 0)),
+        'high_24h': float(ticker.get('highPrice', 0)),
+        'low_24h': float(ticker.get('lowPrice', 0)),
+        'timestamp': _from_millis(ticker.get('closeTime', 0)),
+    }
+
+
+def format_coingecko_price(coin_data: Dict, symbol: str, vs_currency: str) -> Dict:
+    """CoinGecko /simple/price entry of one coin -> price dict for one vs currency"""
+    return {
+        'exchange': 'CoinGecko',
+        'symbol': symbol,
+        'quote': vs_currency.upper(),
+        'price': coin_data.get(vs_currency, 0),
+        'market_cap': coin_data.get(f'{vs_currency}_market_cap', 0),
+        'volume_24h': coin_data.get(f'{vs_currency}_24h_vol', 0),
+        'change_percentage_24h': coin_data.get(f'{vs_currency}_24h_change', 0),
+        'timestamp': timezone.make_aware(datetime.fromtimestamp(coin_data.get('last_updated_at', 0)), pytz.utc),
+    }
+
+
+def format_btcturk_ticker(ticker: Dict, symbol: str) -> Dict:
+    """BTCTurk ticker -> TRY price dict"""
+    timestamp = ticker.get('timestamp')
+    return {
+        'exchange': 'BTCTurk',
+        'symbol': symbol,
+        'quote': 'TRY',
+        'price': float(ticker.get('last', 0)),
+        'bid': float(ticker.get('bid', 0)),
+        'ask': float(ticker.get('ask', 0)),
+        'volume_24h': float(ticker.get('volume', 0)),
+        'change_24h': float(ticker.get('dailyChange', 0)),
+        'change_percentage_24h': float(ticker.get('dailyPercent', 0)),
+        'high_24h': float(ticker.get('high', 0)),
+        'low_24h': float(ticker.get('low', 0)),
+        'timestamp': _from_millis(timestamp) if isinstance(timestamp, (int, float)) else timezone.now(),
+    }
+
+
+def coingecko_id(symbol: str) -> str:
+    return COINGECKO_IDS.get(symbol, symbol.lower())
+
+
+def run_async(coro):
+    """Run a coroutine from sync code, also when the caller already has a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one source, shared by all workers via the cache
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown: int):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures_key = f"{BREAKER_PREFIX}:{name}:failures"
+        self.open_key = f"{BREAKER_PREFIX}:{name}:open"
+
+    def allow(self) -> bool:
+        return not cache.get(self.open_key)
+
+    def record_success(self):
+        cache.delete(self.failures_key)
+
+    def record_failure(self):
+        cache.add(self.failures_key, 0, self.cooldown * 10)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            failures = 1  # Key expired between add and incr
+        if failures >= self.threshold:
+            cache.set(self.open_key, True, self.cooldown)
+            cache.delete(self.failures_key)
+            logger.warning(f"⚠️ {self.name} circuit open after {failures} failures; skipped for {self.cooldown}s")
+
+
+class CryptoPriceAggregator:
+    """
+    Concurrent batch fetch from all sources
+
+    Args:
+        endpoints: base URL overrides by source name (see DEFAULT_ENDPOINTS)
+        timeout: per-source timeout in seconds
+    """
+
+    SOURCES = ('binance', 'coingecko', 'btcturk')
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        self.endpoints = {
+            **DEFAULT_ENDPOINTS,
+            **getattr(settings, 'CRYPTO_API_ENDPOINTS', {}),
+            **(endpoints or {}),
+        }
+        self.timeout = timeout or getattr(settings, 'CRYPTO_API_SOURCE_TIMEOUT', 5)
+        threshold = getattr(settings, 'CRYPTO_API_BREAKER_THRESHOLD', 3)
+        cooldown = getattr(settings, 'CRYPTO_API_BREAKER_COOLDOWN', 300)
+        self.breakers = {name: CircuitBreaker(name, threshold, cooldown) for name in self.SOURCES}
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Prices of all symbols from every available source
+
+        Returns:
+            {symbol: {slot: price dict or None}} for the slots in PRICE_SLOTS
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        sources = [name for name in self.SOURCES if self.breakers[name].allow()]
+        skipped = set(self.SOURCES) - set(sources)
+        if skipped:
+            logger.info(f"Circuit open, skipping: {', '.join(sorted(skipped))}")
+
+        outcomes = run_async(self._fetch_all(sources, symbols)) if sources else {}
+
+        prices = {symbol: {slot: None for slot in PRICE_SLOTS} for symbol in symbols}
+        for name, outcome in outcomes.items():
+            if isinstance(outcome, BaseException):
+                logger.error(f"{name} fetch failed: {type(outcome).__name__}: {outcome}")
+                self.breakers[name].record_failure()
+                continue
+            self.breakers[name].record_success()
+            for symbol, slots in outcome.items():
+                prices[symbol].update(slots)
+        return prices
+
+    async def _fetch_all(self, sources, symbols) -> Dict[str, object]:
+        fetchers = {
+            'binance': self._fetch_binance,
+            'coingecko': self._fetch_coingecko,
+            'btcturk': self._fetch_btcturk,
+        }
+        async with aiohttp.ClientSession(headers={'User-Agent': USER_AGENT}) as session:
+            outcomes = await asyncio.gather(
+                *(asyncio.wait_for(fetchers[name](session, symbols), self.timeout) for name in sources),
+                return_exceptions=True,
+            )
+        return dict(zip(sources, outcomes))
+
+    async def _get_json(self, session, url, params=None):
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def _fetch_binance(self, session, symbols) -> Dict[str, Dict]:
+        pairs = {f"{symbol}USDT": symbol for symbol in symbols}
+        params = {'symbols': json.dumps(list(pairs), separators=(',', ':'))}
+        # Main API is geo-blocked in some regions; Binance US serves the same format
+        for base_url in (self.endpoints['binance'], self.endpoints['binance_us']):
+            try:
+                tickers = await self._get_json(session, f"{base_url}/ticker/24hr", params)
+                break
+            except aiohttp.ClientResponseError as e:
+                if e.status != 400:
+                    error = e
+                    continue
+                # An unlisted symbol rejects the whole batch; take the full ticker list instead
+                tickers = await self._get_json(session, f"{base_url}/ticker/24hr")
+                break
+            except aiohttp.ClientError as e:
+                error = e
+        else:
+            raise error
+        return {
+            pairs[ticker['symbol']]: {'binance_usdt': format_binance_ticker(ticker, pairs[ticker['symbol']])}
+            for ticker in tickers if ticker.get('symbol') in pairs
+        }
+
+    async def _fetch_coingecko(self, session, symbols) -> Dict[str, Dict]:
+        ids = {coingecko_id(symbol): symbol for symbol in symbols}
+        data = await self._get_json(session, f"{self.endpoints['coingecko']}/simple/price", {
+            'ids': ','.join(ids),
+            'vs_currencies': 'usd,try',
+            'include_market_cap': 'true',
+            'include_24hr_vol': 'true',
+            'include_24hr_change': 'true',
+            'include_last_updated_at': 'true',
+        })
+        result = {}
+        for coin_id, coin_data in data.items():
+            symbol = ids.get(coin_id)
+            if symbol is None:
+                continue
+            result[symbol] = {
+                f'coingecko_{vs_currency}': format_coingecko_price(coin_data, symbol, vs_currency)
+                for vs_currency in ('usd', 'try') if vs_currency in coin_data
+            }
+        return result
+
+    async def _fetch_btcturk(self, session, symbols) -> Dict[str, Dict]:
+        pairs = {f"{symbol}TRY": symbol for symbol in symbols}
+        data = await self._get_json(session, f"{self.endpoints['btcturk']}/ticker")
+        return {
+            pairs[ticker['pair']]: {'btcturk_try': format_btcturk_ticker(ticker, pairs[ticker['pair']])}
+            for ticker in data.get('data') or [] if ticker.get('pair') in pairs
+        }
@@ -0,0 +1,250 @@
+"""
+Incremental Firebase bank rate import
+Fetches only entries newer than the last imported Firebase key.
+
+- The watermark (last imported push key) is stored on each completed
+  BankRateImportLog, checked against the key of the newest BankExchangeRate
+- Firebase push keys sort chronologically, so the REST query uses
+  orderBy="$key"/startAt and pages with limitToFirst instead of downloading
+  the whole `kurlar` tree
+- Previous buy/sell rates come from an in-memory map per (bank, pair), seeded
+  by one DISTINCT ON query and advanced as entries are processed
+- Rows are written with bulk_create(ignore_conflicts=True); the unique
+  entry_id makes re-fetching the watermark entry harmless. Each batch is
+  diffed against stored entry_ids first, so only new rows are counted
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+import pytz
+import requests
+from django.apps import apps
+from django.conf import settings
+
+from .models import BankExchangeRate, BankRateImportLog
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_URL = 'https://findmeonphotos-default-rtdb.europe-west1.firebasedatabase.app/kurlar.json'
+
+BANK_MAPPING = {
+    'TCMB': 'TCMB',
+    'Akbank': 'Akbank',
+    'Garanti': 'Garanti',
+    'Garanti BBVA': 'Garanti',
+    'YKB': 'YKB',
+    'Yapı Kredi': 'YKB',
+    'Ziraat': 'Ziraat',
+    'Halkbank': 'Halkbank',
+    'Vakıfbank': 'Vakıfbank',
+    'İş Bankası': 'İşbank',
+    'ING': 'ING',
+    'QNB': 'QNB',
+    'Denizbank': 'Denizbank',
+    'TEB': 'TEB',
+}
+
+CURRENCY_MAPPING = {
+    'USDTRY': 'USDTRY',
+    'EURTRY': 'EURTRY',
+    'XAUTRY': 'XAUTRY',
+    'GBPTRY': 'GBPTRY',
+    'CHFTRY': 'CHFTRY',
+    'JPYTRY': 'JPYTRY',
+}
+
+# How far back the previous-rate map looks before the first new entry
+PREVIOUS_RATE_WINDOW = timedelta(days=7)
+
+ISTANBUL_TZ = pytz.timezone('Europe/Istanbul')
+
+
+def entry_key_from_id(entry_id):
+    """Firebase push key of a BankExchangeRate.entry_id ("<key>_<bank>_<pair>")"""
+    # Push keys may contain '_', bank and pair names never do
+    return entry_id.rsplit('_', 2)[0]
+
+
+def get_watermark():
+    """
+    Last imported Firebase key, or None when nothing has been imported yet
+
+    The newest stored row also counts, so rows written by a failed run (or the
+    manual import command) are not fetched again.
+    """
+    candidates = []
+    # Each run resumes from the previous watermark, so the most recently completed
+    # run holds the newest key; ordering by the key itself would follow the
+    # database collation, which does not sort push keys byte-wise
+    logged = BankRateImportLog.objects.filter(
+        status='completed', completed_at__isnull=False
+    ).exclude(watermark='').order_by('-completed_at').values_list('watermark', flat=True).first()
+    if logged:
+        candidates.append(logged)
+
+    latest = BankExchangeRate.objects.order_by('-timestamp').values_list('entry_id', flat=True).first()
+    if latest:
+        candidates.append(entry_key_from_id(latest))
+    return max(candidates) if candidates else None
+
+
+def fetch_entries(watermark=None, page_size=None, timeout=30):
+    """
+    Yield (key, entry) pairs newer than the watermark, oldest first
+
+    Pages through Firebase with orderBy="$key" + startAt + limitToFirst.
+    startAt is inclusive, so the watermark entry itself is skipped.
+    """
+    page_size = page_size or getattr(settings, 'FIREBASE_IMPORT_PAGE_SIZE', 500)
+    start_key = watermark
+    while True:
+        params = {'orderBy': json.dumps('$key'), 'limitToFirst': page_size}
+        if start_key is not None:
+            params['startAt'] = json.dumps(start_key)
+
+        response = requests.get(FIREBASE_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        page = response.json() or {}
+
+        # REST responses are JSON objects; Firebase does not guarantee their order
+        keys = sorted(page)
+        for key in keys:
+            if key != start_key:
+                yield key, page[key]
+
+        if len(keys) < page_size or keys[-1] == start_key:
+            return
+        start_key = keys[-1]
+
+
+def load_previous_rates(since):
+    """{(bank, pair): (timestamp, buy_rate, sell_rate)} for the latest row of each pair since `since`"""
+    rows = BankExchangeRate.objects.filter(timestamp__gte=since).order_by(
+        'bank', 'currency_pair', '-timestamp'
+    ).distinct('bank', 'currency_pair').values_list(
+        'bank', 'currency_pair', 'timestamp', 'buy_rate', 'sell_rate'
+    )
+    return {(bank, pair): (timestamp, buy, sell) for bank, pair, timestamp, buy, sell in rows}
+
+
+def parse_entry(key, entry_data):
+    """
+    Rates of one Firebase entry
+
+    Returns:
+        (timestamp, [(bank, pair, buy_rate, sell_rate)], failed_count), or None if the entry is invalid
+    """
+    if not isinstance(entry_data, dict) or 'zaman' not in entry_data:
+        return None
+    if not isinstance(entry_data.get('data'), list):
+        return None
+
+    timestamp = datetime.fromtimestamp(entry_data['zaman'] / 1000, tz=ISTANBUL_TZ)
+    rates = []
+    failed = 0
+    for bank_data in entry_data['data']:
+        if not isinstance(bank_data, dict):
+            continue
+        bank_name = BANK_MAPPING.get(bank_data.get('banka', ''))
+        if not bank_name:
+            continue
+
+        for rate_data in bank_data.get('banka_kuru', []):
+            if not isinstance(rate_data, dict):
+                continue
+            currency_pair = CURRENCY_MAPPING.get(rate_data.get('kur', ''))
+            if not currency_pair:
+                continue
+            try:
+                buy_rate = Decimal(str(rate_data.get('alis', 0)))
+                sell_rate = Decimal(str(rate_data.get('satis', 0)))
+            except (ValueError, TypeError, InvalidOperation):
+                failed += 1
+                continue
+            if buy_rate > 0 and sell_rate > 0:
+                rates.append((bank_name, currency_pair, buy_rate, sell_rate))
+    return timestamp, rates, failed
+
+
+def import_new_rates(import_log, batch_size=None):
+    """
+    Import Firebase entries newer than the watermark
+
+    Records the new watermark on import_log (saved by the caller).
+
+    Returns:
+        (stats dict, observations list of (bank, pair, timestamp, buy_rate) for candle updates)
+    """
+    batch_size = batch_size or getattr(settings, 'FIREBASE_IMPORT_BATCH_SIZE', 500)
+    watermark = get_watermark()
+    logger.info(f"Fetching Firebase entries after {watermark or 'the beginning'}")
+
+    stats = {'total': 0, 'new': 0, 'updated': 0, 'failed': 0, 'skipped': 0}
+    observations = []
+    previous_rates = None
+    batch = []
+    last_key = watermark
+
+    def flush():
+        # ignore_conflicts skips rows already stored (e.g. by the manual import); count only new ones
+        existing = set(BankExchangeRate.objects.filter(
+            entry_id__in=[row.entry_id for row in batch]
+        ).values_list('entry_id', flat=True))
+        new_rows = [row for row in batch if row.entry_id not in existing]
+        BankExchangeRate.objects.bulk_create(new_rows, batch_size=batch_size, ignore_conflicts=True)
+        stats['new'] += len(new_rows)
+        stats['skipped'] += len(batch) - len(new_rows)
+        observations.extend((row.bank, row.currency_pair, row.timestamp, row.buy_rate) for row in new_rows)
+        if apps.is_installed('core.base.sync'):
+            from core.base.sync.capture import record_changes
+            record_changes(BankExchangeRate, new_rows)  # bulk_create sends no signals
+        batch.clear()
+
+    for key, entry_data in fetch_entries(watermark):
+        last_key = key
+        try:
+            parsed = parse_entry(key, entry_data)
+        except Exception as e:
+            logger.error(f'Error processing entry {key}: {str(e)}')
+            stats['failed'] += 1
+            continue
+        if parsed is None:
+            stats['skipped'] += 1
+            continue
+
+        timestamp, rates, failed = parsed
+        stats['failed'] += failed
+        if previous_rates is None:
+            previous_rates = load_previous_rates(timestamp - PREVIOUS_RATE_WINDOW)
+
+        for bank_name, currency_pair, buy_rate, sell_rate in rates:
+            previous = previous_rates.get((bank_name, currency_pair))
+            if previous is not None and previous[0] >= timestamp:
+                previous = None  # Out-of-order entry; don't pair it with a later rate
+            else:
+                previous_rates[(bank_name, currency_pair)] = (timestamp, buy_rate, sell_rate)
+
+            batch.append(BankExchangeRate(
+                entry_id=f"{key}_{bank_name}_{currency_pair}",
+                bank=bank_name,
+                currency_pair=currency_pair,
+                buy_rate=buy_rate,
+                sell_rate=sell_rate,
+                date=timestamp.date(),
+                timestamp=timestamp,
+                previous_buy_rate=previous[1] if previous else None,
+                previous_sell_rate=previous[2] if previous else None,
+            ))
+            stats['total'] += 1
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    import_log.watermark = last_key or ''
+    return stats, observations
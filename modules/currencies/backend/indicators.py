@@ -0,0 +1,178 @@
+"""
+Technical indicator engine for currencies
+Vectorized SMA/EMA/RSI/MACD/Bollinger over NumPy price arrays.
+
+Prices are loaded once per (pair, bank, window) with values_list and cached,
+so a dashboard requesting several indicators shares one query.
+"""
+
+import math
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+
+from .models import BankExchangeRate
+
+AVAILABLE_INDICATORS = ['sma', 'ema', 'rsi', 'macd', 'bollinger']
+
+PRICE_CACHE_TIMEOUT = 300  # Firebase import runs every 5 minutes
+MAX_PRICE_DAYS = 365  # Longest price window loaded for indicators
+
+# Largest growth factor allowed inside one EMA block before rebasing (keeps float error tiny)
+_EMA_BLOCK_GROWTH = 1e8
+
+
+def sma(prices: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average via cumulative sums; result[i] covers prices[i:i+period]"""
+    cumsum = np.cumsum(np.insert(prices, 0, 0.0))
+    return (cumsum[period:] - cumsum[:-period]) / period
+
+
+def ema_filter(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """
+    y[t] = alpha * values[t] + (1 - alpha) * y[t-1], with y[-1] = seed
+
+    Solved in closed form block by block: within a block
+    y[j] = d^j * (y0 + alpha * sum_{i<=j} d^-i * x[i]) with d = 1 - alpha,
+    and blocks are short enough that d^-j stays well inside float range.
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = values
+        return out
+
+    block = max(1, int(math.log(_EMA_BLOCK_GROWTH) / -math.log(decay)))
+    powers = decay ** np.arange(1, block + 1)
+    previous = seed
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        p = powers[:len(chunk)]
+        out[start:start + len(chunk)] = p * (previous + alpha * np.cumsum(chunk / p))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+def ema(prices: np.ndarray, period: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first period; result[i] aligns with prices[i + period - 1]"""
+    seed = prices[:period].mean()
+    return np.concatenate(([seed], ema_filter(prices[period:], 2.0 / (period + 1), seed)))
+
+
+def rsi(prices: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI; result[i] aligns with prices[i + period]"""
+    deltas = np.diff(prices)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+
+    alpha = 1.0 / period
+    avg_gain_seed = gains[:period].mean()
+    avg_loss_seed = losses[:period].mean()
+    avg_gain = np.concatenate(([avg_gain_seed], ema_filter(gains[period:], alpha, avg_gain_seed)))
+    avg_loss = np.concatenate(([avg_loss_seed], ema_filter(losses[period:], alpha, avg_loss_seed)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        values = 100.0 - 100.0 / (1.0 + rs)
+    return np.where(avg_loss == 0, 100.0, values)
+
+
+def macd(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD line, signal line and histogram; all aligned with prices[slow + signal - 2:]"""
+    if not 1 <= fast < slow or signal < 1:
+        raise ValueError(f'MACD needs 1 <= fast < slow and signal >= 1 (got {fast}/{slow}/{signal})')
+    fast_ema = ema(prices, fast)[slow - fast:]
+    macd_line = fast_ema - ema(prices, slow)
+    signal_line = ema(macd_line, signal)
+    macd_line = macd_line[signal - 1:]
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger(prices: np.ndarray, period: int, num_std: float = 2.0):
+    """Middle/upper/lower bands (population std); aligned with prices[period - 1:]"""
+    middle = sma(prices, period)
+    # Variance is shift-invariant; centering keeps the cumulative sums well conditioned
+    centered = prices - prices.mean()
+    sums = np.cumsum(np.insert(centered, 0, 0.0))
+    squares = np.cumsum(np.insert(centered * centered, 0, 0.0))
+    window_mean = (sums[period:] - sums[:-period]) / period
+    variance = (squares[period:] - squares[:-period]) / period - window_mean * window_mean
+    std = np.sqrt(np.clip(variance, 0, None))
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def min_points(indicator: str, period: int, params: dict) -> int:
+    """Number of prices needed to produce at least one value"""
+    if indicator == 'rsi':
+        return period + 1
+    if indicator == 'macd':
+        return params.get('slow', 26) + params.get('signal', 9) - 1
+    return period
+
+
+def load_price_series(currency_pair: str, bank=None, days: int = 42):
+    """Buy-rate series as (timestamps list, float ndarray), cached per (pair, bank, window)"""
+    days = max(1, min(int(days), MAX_PRICE_DAYS))
+    cache_key = f'indicators:prices:{currency_pair}:{bank or "all"}:{days}'
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    queryset = BankExchangeRate.objects.filter(
+        currency_pair=currency_pair,
+        timestamp__gte=timezone.now() - timedelta(days=days),
+    )
+    if bank:
+        queryset = queryset.filter(bank=bank)
+
+    rows = list(queryset.order_by('timestamp').values_list('timestamp', 'buy_rate'))
+    timestamps = [row[0].isoformat() for row in rows]
+    prices = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+
+    series = (timestamps, prices)
+    cache.set(cache_key, series, PRICE_CACHE_TIMEOUT)
+    return series
+
+
+def compute_indicators(timestamps, prices: np.ndarray, indicators, period: int, params=None) -> dict:
+    """
+    Compute several indicators over one price series
+
+    Returns:
+        {indicator: [points]}; indicators without enough data map to an error dict
+    """
+    params = params or {}
+    results = {}
+    for indicator in indicators:
+        needed = min_points(indicator, period, params)
+        if len(prices) < needed:
+            results[indicator] = {'error': f'Insufficient data for {indicator} ({needed} points needed)'}
+            continue
+
+        if indicator == 'sma':
+            offset, columns = period - 1, {'value': sma(prices, period)}
+        elif indicator == 'ema':
+            offset, columns = period - 1, {'value': ema(prices, period)}
+        elif indicator == 'rsi':
+            offset, columns = period, {'value': rsi(prices, period)}
+        elif indicator == 'macd':
+            slow, signal = params.get('slow', 26), params.get('signal', 9)
+            line, signal_line, histogram = macd(prices, params.get('fast', 12), slow, signal)
+            offset, columns = slow + signal - 2, {'macd': line, 'signal': signal_line, 'histogram': histogram}
+        else:  # bollinger
+            middle, upper, lower = bollinger(prices, period, params.get('num_std', 2.0))
+            offset, columns = period - 1, {'middle': middle, 'upper': upper, 'lower': lower}
+
+        names = list(columns)
+        stacked = np.column_stack([columns[name] for name in names]).tolist()
+        aligned_prices = prices[offset:].tolist()
+        results[indicator] = [
+            {'time': timestamps[offset + i], **dict(zip(names, row)), 'price': aligned_prices[i]}
+            for i, row in enumerate(stacked)
+        ]
+    return results
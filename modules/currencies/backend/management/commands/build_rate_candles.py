@@ -0,0 +1,54 @@
+"""
+Management command to back-fill OHLC candles from raw bank exchange rates
+Run after a bulk import (import_firebase_rates) or to rebuild after changes
+"""
+
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from modules.currencies.backend.models import BankExchangeRate
+from modules.currencies.backend.candle_service import rebuild_candles
+
+
+class Command(BaseCommand):
+    help = 'Rebuild pre-aggregated OHLC candles (1m/1h/4h/1d/1w) from bank exchange rates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pair',
+            type=str,
+            choices=[choice[0] for choice in BankExchangeRate.CURRENCY_PAIR_CHOICES],
+            help='Only rebuild this currency pair (default: all)'
+        )
+        parser.add_argument(
+            '--bank',
+            type=str,
+            help='Only rebuild candles of this bank (all-banks aggregate is left untouched)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days (default: all retained raw history)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20000,
+            help='Raw rows merged per transaction (default: 20000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['bank'] and options['bank'] not in dict(BankExchangeRate.BANK_CHOICES):
+            raise CommandError(f"Unknown bank: {options['bank']}")
+
+        since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+
+        self.stdout.write('🕯️  Building rate candles...')
+        touched = rebuild_candles(
+            currency_pair=options['pair'],
+            bank=options['bank'],
+            since=since,
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {touched} candle writes completed'))
@@ -11,9 +11,10 @@ import logging
 import pytz
 
 from modules.currencies.backend.models import (
-    Currency, CryptoExchangeRate, Portfolio, PortfolioPerformance
+    Currency, CryptoExchangeRate
 )
 from modules.currencies.backend.real_crypto_service import crypto_service
+from modules.currencies.backend.portfolio_snapshots import capture_snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -169,24 +170,17 @@ class Command(BaseCommand):
     
     def _update_portfolio_snapshots(self, verbose):
         """Update performance snapshots for all active portfolios"""
-        portfolios = Portfolio.objects.filter(
-            holdings__amount__gt=0
-        ).distinct()
-        
-        updated_count = 0
+        try:
+            snapshots = capture_snapshots()
+        except Exception as e:
+            logger.error(f"Error updating portfolio snapshots: {str(e)}")
+            self.stdout.write(self.style.ERROR("✗ Failed to update portfolio snapshots"))
+            return
         
-        for portfolio in portfolios:
-            try:
-                PortfolioPerformance.capture_snapshot(portfolio)
-                updated_count += 1
-                if verbose:
-                    self.stdout.write(f"✓ Updated snapshot for {portfolio.user.username}'s portfolio")
-            except Exception as e:
-                logger.error(f"Error updating portfolio {portfolio.id}: {str(e)}")
-                if verbose:
-                    self.stdout.write(
-                        self.style.ERROR(f"✗ Failed to update {portfolio.user.username}'s portfolio")
-                    )
+        updated_count = len(snapshots)
+        if verbose:
+            for snapshot in snapshots:
+                self.stdout.write(f"✓ Updated snapshot for portfolio {snapshot.portfolio_id}")
         
         self.stdout.write(
             self.style.SUCCESS(f"Updated {updated_count} portfolio snapshots")
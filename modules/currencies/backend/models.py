@@ -8,7 +8,6 @@ from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
-from datetime import timedelta
 from decimal import Decimal
 import uuid
 
@@ -455,96 +454,23 @@ class PortfolioPerformance(models.Model):
     
     @classmethod
     def capture_snapshot(cls, portfolio):
-        """Capture current portfolio performance snapshot"""
-        from .real_crypto_service import crypto_service, portfolio_analytics
+        """Capture current portfolio performance snapshot (see portfolio_snapshots for many portfolios)"""
+        from .portfolio_snapshots import capture_snapshots
         
-        # Get current holdings
-        holdings_data = []
-        for holding in portfolio.holdings.all():
-            holdings_data.append({
-                'symbol': holding.currency.code,
-                'amount': float(holding.amount),
-                'buy_price': float(holding.average_buy_price),
-                'currency': 'USD'  # TODO: Get actual currency
-            })
-        
-        # Calculate current values
-        portfolio_value_usd = crypto_service.calculate_portfolio_value(holdings_data, 'USD')
-        portfolio_value_try = crypto_service.calculate_portfolio_value(holdings_data, 'TRY')
-        
-        # Calculate P&L
-        pnl_data = portfolio_analytics.calculate_pnl(holdings_data)
-        
-        # Get historical performance for comparisons
-        today = timezone.now().date()
-        yesterday = today - timedelta(days=1)
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        year_ago = today - timedelta(days=365)
-        
-        # Get previous snapshots
-        yesterday_snapshot = cls.objects.filter(portfolio=portfolio, snapshot_date=yesterday).first()
-        week_ago_snapshot = cls.objects.filter(portfolio=portfolio, snapshot_date=week_ago).first()
-        month_ago_snapshot = cls.objects.filter(portfolio=portfolio, snapshot_date=month_ago).first()
-        year_ago_snapshot = cls.objects.filter(portfolio=portfolio, snapshot_date=year_ago).first()
-        
-        # Calculate period P&L
-        daily_pnl = daily_pnl_pct = weekly_pnl = weekly_pnl_pct = monthly_pnl = monthly_pnl_pct = yearly_pnl = yearly_pnl_pct = Decimal('0')
-        
-        current_value_usd = Decimal(str(portfolio_value_usd['total_value']))
-        current_value_try = Decimal(str(portfolio_value_try['total_value']))
-        
-        if yesterday_snapshot:
-            daily_pnl = current_value_usd - yesterday_snapshot.total_value_usd
-            if yesterday_snapshot.total_value_usd > 0:
-                daily_pnl_pct = (daily_pnl / yesterday_snapshot.total_value_usd) * 100
-        
-        if week_ago_snapshot:
-            weekly_pnl = current_value_usd - week_ago_snapshot.total_value_usd
-            if week_ago_snapshot.total_value_usd > 0:
-                weekly_pnl_pct = (weekly_pnl / week_ago_snapshot.total_value_usd) * 100
-        
-        if month_ago_snapshot:
-            monthly_pnl = current_value_usd - month_ago_snapshot.total_value_usd
-            if month_ago_snapshot.total_value_usd > 0:
-                monthly_pnl_pct = (monthly_pnl / month_ago_snapshot.total_value_usd) * 100
-        
-        if year_ago_snapshot:
-            yearly_pnl = current_value_usd - year_ago_snapshot.total_value_usd
-            if year_ago_snapshot.total_value_usd > 0:
-                yearly_pnl_pct = (yearly_pnl / year_ago_snapshot.total_value_usd) * 100
+        written = capture_snapshots([portfolio])
+        if not written:
+            # Today's row could not be written (logged); fall back to the latest stored one
+            return cls.objects.filter(portfolio=portfolio).first()
         
-        # Create or update today's snapshot
-        snapshot, created = cls.objects.update_or_create(
-            portfolio=portfolio,
-            snapshot_date=today,
-            defaults={
-                'snapshot_time': timezone.now(),
-                'total_value_usd': current_value_usd,
-                'total_value_try': current_value_try,
-                'total_invested_usd': Decimal(str(pnl_data['total_cost'])),
-                'total_invested_try': Decimal(str(pnl_data['total_cost'])) * Decimal('30'),  # TODO: Use real exchange rate
-                'daily_pnl': daily_pnl,
-                'daily_pnl_percentage': daily_pnl_pct,
-                'weekly_pnl': weekly_pnl,
-                'weekly_pnl_percentage': weekly_pnl_pct,
-                'monthly_pnl': monthly_pnl,
-                'monthly_pnl_percentage': monthly_pnl_pct,
-                'yearly_pnl': yearly_pnl,
-                'yearly_pnl_percentage': yearly_pnl_pct,
-                'total_pnl': Decimal(str(pnl_data['total_pnl'])),
-                'total_pnl_percentage': Decimal(str(pnl_data['total_pnl_percentage'])),
-                'holdings_snapshot': portfolio_value_usd['holdings']
-            }
-        )
+        # Re-read: an upsert keeps the id of the row already stored for today
+        snapshot = cls.objects.get(portfolio=portfolio, snapshot_date=written[0].snapshot_date)
         
-        # Update portfolio cached values
-        portfolio.total_value_usd = current_value_usd
-        portfolio.total_value_try = current_value_try
-        portfolio.daily_pnl = daily_pnl
-        portfolio.daily_pnl_percentage = daily_pnl_pct
-        portfolio.last_calculated = timezone.now()
-        portfolio.save()
+        # Keep the caller's instance in step with the cached totals just written
+        portfolio.total_value_usd = snapshot.total_value_usd
+        portfolio.total_value_try = snapshot.total_value_try
+        portfolio.daily_pnl = snapshot.daily_pnl
+        portfolio.daily_pnl_percentage = snapshot.daily_pnl_percentage
+        portfolio.last_calculated = snapshot.snapshot_time
         
         return snapshot
 
@@ -881,6 +807,43 @@ class BankExchangeRate(models.Model):
         }
 
 
+class BankRateCandle(models.Model):
+    """
+    Pre-aggregated OHLC candles of bank buy rates (maintained by candle_service)
+    bank='' holds the all-banks aggregate for a currency pair
+    """
+    RESOLUTION_CHOICES = [
+        ('1m', '1 Minute'),
+        ('1h', '1 Hour'),
+        ('4h', '4 Hours'),
+        ('1d', '1 Day'),
+        ('1w', '1 Week'),
+    ]
+
+    bank = models.CharField(max_length=20, blank=True, default='')
+    currency_pair = models.CharField(max_length=10, choices=BankExchangeRate.CURRENCY_PAIR_CHOICES)
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    open = models.DecimalField(max_digits=20, decimal_places=6)
+    high = models.DecimalField(max_digits=20, decimal_places=6)
+    low = models.DecimalField(max_digits=20, decimal_places=6)
+    close = models.DecimalField(max_digits=20, decimal_places=6)
+    volume = models.PositiveIntegerField(default=0)  # Number of raw rate observations
+
+    # Timestamps of the observations behind open/close (keeps incremental merges exact)
+    open_at = models.DateTimeField()
+    close_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'bank_rate_candles'
+        unique_together = ['bank', 'currency_pair', 'resolution', 'bucket_start']
+        ordering = ['bucket_start']
+
+    def __str__(self):
+        return f"{self.bank or 'ALL'} - {self.currency_pair} {self.resolution} @ {self.bucket_start}"
+
+
 class BankRateImportLog(models.Model):
     """Log for tracking bank rate imports"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -924,6 +887,10 @@ class BankRateImportLog(models.Model):
     
     # Source information
     source_url = models.URLField(blank=True)
+    watermark = models.CharField(
+        max_length=100, blank=True,
+        help_text="Last Firebase entry key imported (incremental imports resume after it)"
+    )
     
     class Meta:
         db_table = 'bank_rate_import_logs'
@@ -0,0 +1,243 @@
+"""
+Portfolio Performance Snapshots
+Set-based daily snapshots for many portfolios at once.
+
+- One price snapshot for every held asset: live crypto prices with one
+  aggregated fetch (crypto_aggregator), everything else from stored rates
+  (load_prices), converted to USD through USD/TRY
+- Per batch of portfolios: one holdings query and one query for the
+  day/week/month/year-ago snapshot rows; values and P&L are computed in memory
+- Results are written with one upserting bulk_create (unique on
+  portfolio + snapshot_date), falling back to per-portfolio upserts if the
+  batch fails, and one bulk_update of the portfolios' cached totals
+
+Cost per run is a handful of queries per batch instead of four history
+queries and two external price fetches per portfolio.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Currency, Portfolio, PortfolioHolding, PortfolioPerformance
+
+logger = logging.getLogger(__name__)
+
+# P&L periods: (field prefix, days back)
+PERIODS = (('daily', 1), ('weekly', 7), ('monthly', 30), ('yearly', 365))
+
+SNAPSHOT_FIELDS = [
+    'snapshot_time', 'total_value_usd', 'total_value_try',
+    'total_invested_usd', 'total_invested_try',
+    'daily_pnl', 'daily_pnl_percentage', 'weekly_pnl', 'weekly_pnl_percentage',
+    'monthly_pnl', 'monthly_pnl_percentage', 'yearly_pnl', 'yearly_pnl_percentage',
+    'total_pnl', 'total_pnl_percentage', 'holdings_snapshot',
+]
+
+
+# *_pnl_percentage columns are max_digits=10, decimal_places=4
+PERCENTAGE_PLACES = Decimal('0.0001')
+PERCENTAGE_LIMIT = Decimal('999999.9999')
+
+
+def _percentage(part, whole) -> Decimal:
+    """part/whole in percent, quantized and clamped to fit the column (a tiny basis can overflow it)"""
+    if whole <= 0:
+        return Decimal('0')
+    percentage = ((part / whole) * 100).quantize(PERCENTAGE_PLACES)
+    return max(-PERCENTAGE_LIMIT, min(PERCENTAGE_LIMIT, percentage))
+
+
+class PriceSnapshot:
+    """USD and TRY price of each held asset, taken once per run"""
+
+    def __init__(self, usd: Dict[str, Decimal], try_: Dict[str, Decimal], usdtry: Optional[Decimal]):
+        self.usd = usd
+        self.try_ = try_
+        self.usdtry = usdtry
+
+    @classmethod
+    def load(cls, codes: Iterable[str], crypto_codes: Iterable[str] = ()) -> 'PriceSnapshot':
+        from .portfolio_valuation import load_prices
+        from .real_crypto_service import crypto_service
+
+        codes = set(codes) | {'USD'}
+        crypto_codes = set(crypto_codes) & codes
+
+        try_prices = load_prices(list(codes), list(crypto_codes), quote='TRY')
+        usdtry = try_prices.get('USD')
+
+        usd_prices = {}
+        if crypto_codes:
+            live = crypto_service.get_all_prices(sorted(crypto_codes))
+            for code, data in live.items():
+                aggregated = data.get('aggregated') or {}
+                if aggregated.get('usd_price'):
+                    usd_prices[code] = Decimal(str(aggregated['usd_price']))
+                if aggregated.get('try_price'):
+                    try_prices[code] = Decimal(str(aggregated['try_price']))
+
+        if usdtry:
+            for code, price in try_prices.items():
+                usd_prices.setdefault(code, price / usdtry)
+            for code, price in usd_prices.items():
+                try_prices.setdefault(code, price * usdtry)
+        return cls(usd_prices, try_prices, usdtry)
+
+
+def build_snapshot(portfolio_id, holdings, prices: PriceSnapshot, history, today, now) -> PortfolioPerformance:
+    """
+    Today's PortfolioPerformance row for one portfolio (not saved)
+
+    Args:
+        holdings: [(code, amount, average_buy_price)]; buy prices are in USD
+        history: {snapshot_date: total_value_usd} of this portfolio's earlier rows
+    """
+    value_usd = value_try = invested_usd = Decimal('0')
+    details = []
+    for code, amount, average_buy_price in holdings:
+        invested_usd += amount * average_buy_price
+        price_usd = prices.usd.get(code)
+        if not price_usd:
+            continue
+        value = amount * price_usd
+        value_usd += value
+        value_try += amount * prices.try_.get(code, Decimal('0'))
+        details.append({'symbol': code, 'amount': float(amount), 'price': float(price_usd), 'value': float(value)})
+
+    for detail in details:
+        detail['percentage'] = round(detail['value'] / float(value_usd) * 100, 2) if value_usd > 0 else 0
+
+    snapshot = PortfolioPerformance(
+        portfolio_id=portfolio_id,
+        snapshot_date=today,
+        snapshot_time=now,
+        total_value_usd=value_usd,
+        total_value_try=value_try,
+        total_invested_usd=invested_usd,
+        total_invested_try=invested_usd * (prices.usdtry or Decimal('0')),
+        total_pnl=value_usd - invested_usd,
+        total_pnl_percentage=_percentage(value_usd - invested_usd, invested_usd),
+        holdings_snapshot=details,
+    )
+    for prefix, days in PERIODS:
+        previous = history.get(today - timedelta(days=days))
+        if previous is not None:
+            pnl = value_usd - previous
+            setattr(snapshot, f'{prefix}_pnl', pnl)
+            setattr(snapshot, f'{prefix}_pnl_percentage', _percentage(pnl, previous))
+    return snapshot
+
+
+def capture_snapshots(portfolios=None, batch_size=None) -> List[PortfolioPerformance]:
+    """
+    Capture today's snapshot for many portfolios
+
+    Args:
+        portfolios: Portfolio queryset/list (default: every portfolio holding something)
+        batch_size: portfolios per query batch (PORTFOLIO_SNAPSHOT_BATCH_SIZE)
+
+    Returns:
+        The written snapshots
+    """
+    batch_size = batch_size or getattr(settings, 'PORTFOLIO_SNAPSHOT_BATCH_SIZE', 500)
+    if portfolios is None:
+        # Sold-out portfolios still need a zero snapshot to replace stale cached totals
+        portfolios = Portfolio.objects.filter(
+            Exists(PortfolioHolding.objects.filter(portfolio=OuterRef('pk'), amount__gt=0))
+            | Exists(PortfolioPerformance.objects.filter(portfolio=OuterRef('pk')))
+            | ~Q(total_value_usd=0)
+        )
+    portfolio_ids = [portfolio.pk for portfolio in portfolios]
+    if not portfolio_ids:
+        return []
+
+    held = PortfolioHolding.objects.filter(portfolio_id__in=portfolio_ids, amount__gt=0)
+    codes = set(held.values_list('currency_id', flat=True).distinct())
+    crypto_codes = set(
+        Currency.objects.filter(code__in=codes, currency_type='crypto').values_list('code', flat=True)
+    ) | set(held.filter(asset_type='crypto').values_list('currency_id', flat=True).distinct())
+    prices = PriceSnapshot.load(codes, crypto_codes)
+
+    now = timezone.now()
+    today = now.date()
+    history_dates = [today - timedelta(days=days) for _, days in PERIODS]
+
+    written = []
+    for start in range(0, len(portfolio_ids), batch_size):
+        batch = portfolio_ids[start:start + batch_size]
+
+        holdings = defaultdict(list)
+        for row in PortfolioHolding.objects.filter(portfolio_id__in=batch, amount__gt=0).values_list(
+            'portfolio_id', 'currency_id', 'amount', 'average_buy_price'
+        ):
+            holdings[row[0]].append(row[1:])
+
+        history = defaultdict(dict)
+        for portfolio_id, snapshot_date, value in PortfolioPerformance.objects.filter(
+            portfolio_id__in=batch, snapshot_date__in=history_dates
+        ).values_list('portfolio_id', 'snapshot_date', 'total_value_usd'):
+            history[portfolio_id][snapshot_date] = value
+
+        snapshots = [
+            build_snapshot(portfolio_id, holdings[portfolio_id], prices, history[portfolio_id], today, now)
+            for portfolio_id in batch
+        ]
+
+        snapshots = _write_snapshots(snapshots)
+        Portfolio.objects.bulk_update([
+            Portfolio(
+                pk=snapshot.portfolio_id,
+                total_value_usd=snapshot.total_value_usd,
+                total_value_try=snapshot.total_value_try,
+                daily_pnl=snapshot.daily_pnl,
+                daily_pnl_percentage=snapshot.daily_pnl_percentage,
+                last_calculated=now,
+            ) for snapshot in snapshots
+        ], ['total_value_usd', 'total_value_try', 'daily_pnl', 'daily_pnl_percentage', 'last_calculated'])
+        written.extend(snapshots)
+
+    logger.info(f"Captured {len(written)} portfolio snapshots")
+    return written
+
+
+def _write_snapshots(snapshots: List[PortfolioPerformance]) -> List[PortfolioPerformance]:
+    """
+    Upsert a batch of snapshots in one statement
+
+    If the batch fails, falls back to one upsert per portfolio so a single bad
+    row only drops its own snapshot. Returns the snapshots that were written.
+    """
+    try:
+        with transaction.atomic():
+            # Insert, or overwrite today's row if it already exists
+            PortfolioPerformance.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=['portfolio', 'snapshot_date'],
+                update_fields=SNAPSHOT_FIELDS,
+            )
+        return snapshots
+    except DatabaseError as e:
+        logger.warning(f"Snapshot batch of {len(snapshots)} failed, saving per portfolio: {e}")
+
+    written = []
+    for snapshot in snapshots:
+        try:
+            with transaction.atomic():
+                PortfolioPerformance.objects.update_or_create(
+                    portfolio_id=snapshot.portfolio_id,
+                    snapshot_date=snapshot.snapshot_date,
+                    defaults={field: getattr(snapshot, field) for field in SNAPSHOT_FIELDS},
+                )
+            written.append(snapshot)
+        except DatabaseError as e:
+            logger.error(f"Snapshot failed for portfolio {snapshot.portfolio_id}: {e}")
+    return written
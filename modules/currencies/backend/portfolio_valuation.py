@@ -0,0 +1,277 @@
+"""
+Portfolio Valuation Engine
+Event-driven valuation for portfolios with open WebSocket connections.
+
+- Holdings and prices of every watched portfolio are kept in memory per
+  process (PortfolioBook); prices come from the rate hub snapshot, so loading
+  a book is one holdings query plus a price query only for pairs the hub
+  doesn't track
+- The engine has one channel of its own that joins the rate hub's pair
+  groups (currency_rate.<CODE>_TRY) for every held currency. A changed pair
+  revalues only the holdings in that currency and pushes the diff to the
+  local sockets of the affected portfolios.
+- Holding/transaction changes send 'portfolio.invalidated' to the
+  portfolio_<id> group (signals.py); the book is reloaded once per process and
+  the diff pushed the same way
+
+Cost follows price changes and portfolio edits, not the number of open tabs.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Optional
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.utils import timezone
+
+from .models import CryptoExchangeRate, ExchangeRate, Portfolio
+from .rate_hub import get_snapshot, pair_group
+
+logger = logging.getLogger(__name__)
+
+QUOTE_CURRENCY = 'TRY'
+
+
+def portfolio_group(portfolio_id) -> str:
+    return f"portfolio_{portfolio_id}"
+
+
+def load_prices(codes, crypto_codes=(), quote=QUOTE_CURRENCY) -> Dict[str, Decimal]:
+    """
+    Latest price of each code in the quote currency
+
+    Hub snapshot first; missing codes with one DISTINCT ON query, then crypto
+    exchange rates for crypto codes still missing.
+    """
+    snapshot = get_snapshot()
+    prices = {}
+    for code in codes:
+        if code == quote:
+            prices[code] = Decimal('1')
+        elif f"{code}/{quote}" in snapshot:
+            prices[code] = Decimal(str(snapshot[f"{code}/{quote}"]['rate']))
+
+    missing = [code for code in codes if code not in prices]
+    if missing:
+        rates = ExchangeRate.objects.filter(
+            base_currency_id__in=missing, target_currency_id=quote
+        ).order_by('base_currency', '-timestamp').distinct('base_currency').values_list('base_currency_id', 'rate')
+        prices.update(rates)
+
+    missing_crypto = [code for code in crypto_codes if code not in prices]
+    if missing_crypto:
+        rates = CryptoExchangeRate.objects.filter(
+            base_asset__in=missing_crypto, quote_asset=quote
+        ).order_by('base_asset', '-timestamp').distinct('base_asset').values_list('base_asset', 'last_price')
+        prices.update(rates)
+    return prices
+
+
+class PortfolioBook:
+    """In-memory holdings and valuation of one portfolio"""
+
+    def __init__(self, portfolio_id, name, holdings, prices):
+        self.portfolio_id = str(portfolio_id)
+        self.name = name
+        self.holdings = holdings  # code -> {'amount', 'average_buy_price'}
+        self.prices = dict(prices)  # code -> Decimal
+        self.loaded_at = time.time()
+        self.values = {code: self._value(code) for code in holdings}
+        self.total_value = sum((value for value in self.values.values() if value is not None), Decimal('0'))
+
+    @classmethod
+    def load(cls, portfolio_id) -> Optional['PortfolioBook']:
+        try:
+            portfolio = Portfolio.objects.only('id', 'name').get(id=portfolio_id)
+        except Portfolio.DoesNotExist:
+            return None
+        holdings = {}
+        crypto_codes = []
+        for code, asset_type, amount, average_buy_price in portfolio.holdings.values_list(
+            'currency_id', 'asset_type', 'amount', 'average_buy_price'
+        ):
+            holdings[code] = {'amount': amount, 'average_buy_price': average_buy_price}
+            if asset_type == 'crypto':
+                crypto_codes.append(code)
+        return cls(portfolio.id, portfolio.name, holdings, load_prices(list(holdings), crypto_codes))
+
+    def _value(self, code) -> Optional[Decimal]:
+        price = self.prices.get(code)
+        return self.holdings[code]['amount'] * price if price is not None else None
+
+    def holding_state(self, code) -> dict:
+        holding = self.holdings[code]
+        value = self.values.get(code)
+        return {
+            'currency': code,
+            'amount': float(holding['amount']),
+            'average_buy_price': float(holding['average_buy_price']),
+            'current_value': float(value) if value else 0,
+            'profit_loss': float(value - holding['amount'] * holding['average_buy_price']) if value else 0,
+        }
+
+    def snapshot(self) -> dict:
+        """Full state (same shape as the consumer's portfolio_update payload)"""
+        return {
+            'id': self.portfolio_id,
+            'name': self.name,
+            'total_value': float(self.total_value),
+            'holdings': [self.holding_state(code) for code in self.holdings],
+            'last_updated': timezone.now().isoformat(),
+        }
+
+    def apply_price(self, code, price) -> Optional[dict]:
+        """Revalue one currency; returns the diff, or None if nothing changed"""
+        if code not in self.holdings or self.prices.get(code) == price:
+            return None
+        self.prices[code] = price
+        old_value = self.values.get(code) or Decimal('0')
+        self.values[code] = self._value(code)
+        self.total_value += (self.values[code] or Decimal('0')) - old_value
+        return {
+            'total_value': float(self.total_value),
+            'holdings': [self.holding_state(code)],
+            'removed': [],
+        }
+
+    def diff(self, previous: 'PortfolioBook') -> dict:
+        """Changes from an older book of the same portfolio"""
+        changed = [
+            self.holding_state(code) for code in self.holdings
+            if code not in previous.holdings
+            or previous.holdings[code] != self.holdings[code]
+            or previous.values.get(code) != self.values.get(code)
+        ]
+        return {
+            'total_value': float(self.total_value),
+            'holdings': changed,
+            'removed': [code for code in previous.holdings if code not in self.holdings],
+        }
+
+
+class PortfolioValuationEngine:
+    """
+    Per-process books for portfolios with local sockets (singleton per process)
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, quote=QUOTE_CURRENCY):
+        self.quote = quote
+        self.books: Dict[str, PortfolioBook] = {}
+        self.subscribers = defaultdict(set)  # portfolio id -> local consumer channel names
+        self._joined_pairs = set()
+        self._channel = None
+        self._task = None
+        self._lock = None
+
+    @classmethod
+    def get_instance(cls) -> 'PortfolioValuationEngine':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def attach(self, portfolio_id, channel_name) -> Optional[dict]:
+        """Watch a portfolio for a local socket; returns its full state"""
+        portfolio_id = str(portfolio_id)
+        async with self._get_lock():
+            book = self.books.get(portfolio_id)
+            if book is None:
+                book = await database_sync_to_async(PortfolioBook.load)(portfolio_id)
+                if book is None:
+                    return None
+                self.books[portfolio_id] = book
+            self.subscribers[portfolio_id].add(channel_name)
+            await self._sync_pair_groups()
+        return book.snapshot()
+
+    async def detach(self, portfolio_id, channel_name):
+        portfolio_id = str(portfolio_id)
+        async with self._get_lock():
+            self.subscribers[portfolio_id].discard(channel_name)
+            if not self.subscribers[portfolio_id]:
+                self.subscribers.pop(portfolio_id, None)
+                self.books.pop(portfolio_id, None)
+            await self._sync_pair_groups()
+
+    def snapshot(self, portfolio_id) -> Optional[dict]:
+        book = self.books.get(str(portfolio_id))
+        return book.snapshot() if book else None
+
+    async def reload(self, portfolio_id, version=None):
+        """Reload a book after holdings/transactions changed and push the diff (once per process)"""
+        portfolio_id = str(portfolio_id)
+        async with self._get_lock():
+            previous = self.books.get(portfolio_id)
+            if previous is None or (version is not None and previous.loaded_at >= version):
+                return  # Not watched here, or already reloaded for this change
+            book = await database_sync_to_async(PortfolioBook.load)(portfolio_id)
+            if book is None:
+                return
+            self.books[portfolio_id] = book
+            await self._sync_pair_groups()
+        await self._push(portfolio_id, book.diff(previous))
+
+    async def apply_rate(self, pair, rate):
+        """Revalue the holdings affected by one changed pair"""
+        code, _, quote = pair.partition('/')
+        if quote != self.quote:
+            return
+        price = Decimal(str(rate['rate']))
+        for portfolio_id, book in list(self.books.items()):
+            diff = book.apply_price(code, price)
+            if diff:
+                await self._push(portfolio_id, diff)
+
+    async def _push(self, portfolio_id, diff):
+        channel_layer = get_channel_layer()
+        message = {'type': 'portfolio.diff', 'data': diff, 'timestamp': timezone.now().isoformat()}
+        for channel_name in list(self.subscribers.get(portfolio_id, ())):
+            await channel_layer.send(channel_name, message)
+
+    async def _sync_pair_groups(self):
+        """Join the pair groups of held currencies; leave unused ones; run the receive loop while needed"""
+        channel_layer = get_channel_layer()
+        if self._channel is None:
+            self._channel = await channel_layer.new_channel('portfolio-valuation.')
+
+        needed = {
+            f"{code}/{self.quote}"
+            for book in self.books.values() for code in book.holdings if code != self.quote
+        }
+        for pair in needed - self._joined_pairs:
+            await channel_layer.group_add(pair_group(pair), self._channel)
+        for pair in self._joined_pairs - needed:
+            await channel_layer.group_discard(pair_group(pair), self._channel)
+        self._joined_pairs = needed
+
+        if self.books and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        elif not self.books and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        channel_layer = get_channel_layer()
+        while True:
+            message = await channel_layer.receive(self._channel)
+            try:
+                if message.get('type') == 'rate.changed':
+                    await self.apply_rate(message['pair'], message['rate'])
+            except Exception as e:
+                logger.warning(f"portfolio revaluation failed: {e}")
+
+
+def get_valuation_engine() -> PortfolioValuationEngine:
+    return PortfolioValuationEngine.get_instance()
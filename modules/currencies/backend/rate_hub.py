@@ -0,0 +1,181 @@
+"""
+Currency Rate Broadcast Hub
+Shared fan-out of latest exchange rates to WebSocket clients.
+
+- One producer per tick (cache.add lock across all ASGI workers) reads the
+  latest rate of every pair with a single DISTINCT ON query
+- The result is diffed against the published snapshot (kept in the cache);
+  only changed pairs are sent, each to its own channel group
+  (currency_rate.<BASE>_<TARGET>)
+- Consumers join the groups of the pairs they subscribe to and just relay
+
+DB load per tick is one query regardless of the number of connections.
+Rate imports call publish_rate_changes() so clients see new rates without
+waiting for the next tick.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from datetime import timedelta
+from typing import Dict, Optional
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import ExchangeRate
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'currencies:rate_hub:snapshot'
+TICK_LOCK_KEY = 'currencies:rate_hub:tick'
+SNAPSHOT_TTL = 60 * 60 * 24
+
+CURRENCY_CODE = re.compile(r'^[A-Z0-9]{2,10}$')
+
+
+def normalize_pair(base_currency, target_currency) -> Optional[str]:
+    """'USD/TRY' from client input, or None if either code is invalid"""
+    base = str(base_currency or '').upper()
+    target = str(target_currency or '').upper()
+    if not (CURRENCY_CODE.match(base) and CURRENCY_CODE.match(target)):
+        return None
+    return f"{base}/{target}"
+
+
+def pair_group(pair) -> str:
+    """Channel group for one pair (group names allow only [a-zA-Z0-9_.-])"""
+    return f"currency_rate.{pair.replace('/', '_')}"
+
+
+def serialize_rate(rate) -> dict:
+    return {
+        'rate': float(rate.rate),
+        'bid': float(rate.bid) if rate.bid else None,
+        'ask': float(rate.ask) if rate.ask else None,
+        'change_24h': float(rate.change_percentage_24h) if rate.change_percentage_24h else 0,
+        'volume_24h': float(rate.volume_24h) if rate.volume_24h else 0,
+        'timestamp': rate.timestamp.isoformat(),
+    }
+
+
+def fetch_latest_rates(pair=None) -> Dict[str, dict]:
+    """
+    Latest rate per pair in one query
+
+    Only pairs updated within CURRENCY_RATE_HUB_WINDOW_HOURS are scanned,
+    unless a single pair is requested.
+    """
+    queryset = ExchangeRate.objects.order_by('base_currency', 'target_currency', '-timestamp')
+    if pair is not None:
+        base, target = pair.split('/')
+        queryset = queryset.filter(base_currency_id=base, target_currency_id=target)
+    else:
+        window = getattr(settings, 'CURRENCY_RATE_HUB_WINDOW_HOURS', 24)
+        queryset = queryset.filter(timestamp__gte=timezone.now() - timedelta(hours=window))
+
+    # Currency codes are the primary keys, so no join is needed
+    return {
+        f"{rate.base_currency_id}/{rate.target_currency_id}": serialize_rate(rate)
+        for rate in queryset.distinct('base_currency', 'target_currency')
+    }
+
+
+def get_snapshot() -> Dict[str, dict]:
+    """Last published rate of every pair"""
+    return cache.get(SNAPSHOT_KEY) or {}
+
+
+def get_pair_rate(pair) -> Optional[dict]:
+    """Current rate of one pair: snapshot first, database for pairs outside the window"""
+    rate = get_snapshot().get(pair)
+    if rate is None:
+        rate = fetch_latest_rates(pair).get(pair)
+    return rate
+
+
+def compute_changes() -> Dict[str, dict]:
+    """Fetch latest rates, store them as the new snapshot and return the changed pairs"""
+    rates = fetch_latest_rates()
+    previous = get_snapshot()
+    changed = {pair: data for pair, data in rates.items() if previous.get(pair) != data}
+    if changed:
+        cache.set(SNAPSHOT_KEY, {**previous, **rates}, SNAPSHOT_TTL)
+    return changed
+
+
+async def broadcast(changed):
+    """Send each changed pair to its group"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not changed:
+        return
+    timestamp = timezone.now().isoformat()
+    for pair, rate in changed.items():
+        await channel_layer.group_send(pair_group(pair), {
+            'type': 'rate.changed',
+            'pair': pair,
+            'rate': rate,
+            'timestamp': timestamp,
+        })
+
+
+def publish_rate_changes() -> int:
+    """Compute and broadcast changed pairs now (sync; for tasks after a rate import)"""
+    changed = compute_changes()
+    async_to_sync(broadcast)(changed)
+    return len(changed)
+
+
+class RateBroadcastHub:
+    """
+    Per-process producer loop, running while this process has rate connections
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.interval = getattr(settings, 'CURRENCY_RATE_HUB_INTERVAL', 10)
+        self._connections = 0
+        self._task = None
+
+    @classmethod
+    def get_instance(cls) -> 'RateBroadcastHub':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def acquire(self):
+        """Register a connection; starts the loop on the running event loop if needed"""
+        self._connections += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def release(self):
+        self._connections = max(0, self._connections - 1)
+
+    def _claim_tick(self) -> bool:
+        # One producer per tick across all workers
+        return cache.add(TICK_LOCK_KEY, True, max(1, self.interval - 1))
+
+    async def _run(self):
+        while self._connections > 0:
+            await asyncio.sleep(self.interval)
+            try:
+                if await database_sync_to_async(self._claim_tick)():
+                    changed = await database_sync_to_async(compute_changes)()
+                    await broadcast(changed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"rate broadcast tick failed: {e}")
+        self._task = None
+
+
+def get_rate_hub() -> RateBroadcastHub:
+    return RateBroadcastHub.get_instance()
@@ -15,6 +15,11 @@ import json
 import time
 import pytz
 
+from .crypto_aggregator import (
+    COINGECKO_IDS, USER_AGENT, CryptoPriceAggregator,
+    format_binance_ticker, format_btcturk_ticker, format_coingecko_price,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,8 +42,9 @@ class CryptoAPIService:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'UNIBOS/1.0 (Cryptocurrency Portfolio Manager)'
+            'User-Agent': USER_AGENT
         })
+        self.aggregator = CryptoPriceAggregator()
         
     def _make_request(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """Make HTTP request with error handling and caching"""
@@ -90,21 +96,7 @@ class CryptoAPIService:
             data = self._make_request(url, {'symbol': trading_pair})
         
         if data:
-            return {
-                'exchange': 'Binance',
-                'symbol': symbol,
-                'quote': quote,
-                'price': float(data.get('lastPrice', 0)),
-                'bid': float(data.get('bidPrice', 0)),
-                'ask': float(data.get('askPrice', 0)),
-                'volume_24h': float(data.get('volume', 0)),
-                'volume_24h_quote': float(data.get('quoteVolume', 0)),
-                'change_24h': float(data.get('priceChange', 0)),
-                'change_percentage_24h': float(data.get('priceChangePercent', 0)),
-                'high_24h': float(data.get('highPrice', 0)),
-                'low_24h': float(data.get('lowPrice', 0)),
-                'timestamp': timezone.make_aware(datetime.fromtimestamp(data.get('closeTime', 0) / 1000), pytz.utc)
-            }
+            return format_binance_ticker(data, symbol, quote)
         
         return None
     
@@ -120,14 +112,8 @@ class CryptoAPIService:
             Dict with price information or None if failed
         """
         # Map symbols to CoinGecko IDs
-        coin_id_map = {
-            'BTC': 'bitcoin',
-            'ETH': 'ethereum',
-            'AVAX': 'avalanche-2'
-        }
-        
-        if coin_id in coin_id_map:
-            coin_id = coin_id_map[coin_id]
+        symbol = coin_id
+        coin_id = COINGECKO_IDS.get(coin_id, coin_id)
         
         url = f"{self.COINGECKO_API}/simple/price"
         params = {
@@ -142,17 +128,7 @@ class CryptoAPIService:
         data = self._make_request(url, params)
         
         if data and coin_id in data:
-            coin_data = data[coin_id]
-            return {
-                'exchange': 'CoinGecko',
-                'symbol': coin_id.upper(),
-                'quote': vs_currency.upper(),
-                'price': coin_data.get(vs_currency, 0),
-                'market_cap': coin_data.get(f'{vs_currency}_market_cap', 0),
-                'volume_24h': coin_data.get(f'{vs_currency}_24h_vol', 0),
-                'change_percentage_24h': coin_data.get(f'{vs_currency}_24h_change', 0),
-                'timestamp': timezone.make_aware(datetime.fromtimestamp(coin_data.get('last_updated_at', 0)), pytz.utc)
-            }
+            return format_coingecko_price(data[coin_id], symbol, vs_currency)
         
         return None
     
@@ -174,21 +150,7 @@ class CryptoAPIService:
         data = self._make_request(url, params)
         
         if data and 'data' in data and len(data['data']) > 0:
-            ticker = data['data'][0]
-            return {
-                'exchange': 'BTCTurk',
-                'symbol': symbol,
-                'quote': 'TRY',
-                'price': float(ticker.get('last', 0)),
-                'bid': float(ticker.get('bid', 0)),
-                'ask': float(ticker.get('ask', 0)),
-                'volume_24h': float(ticker.get('volume', 0)),
-                'change_24h': float(ticker.get('dailyChange', 0)),
-                'change_percentage_24h': float(ticker.get('dailyPercent', 0)),
-                'high_24h': float(ticker.get('high', 0)),
-                'low_24h': float(ticker.get('low', 0)),
-                'timestamp': timezone.make_aware(datetime.fromtimestamp(ticker.get('timestamp', 0) / 1000), pytz.utc) if isinstance(ticker.get('timestamp'), (int, float)) else timezone.now()
-            }
+            return format_btcturk_ticker(data['data'][0], symbol)
         
         return None
     
@@ -196,6 +158,9 @@ class CryptoAPIService:
         """
         Get prices for multiple cryptocurrencies from all available sources
         
+        All sources are fetched concurrently with one batch request each
+        (see crypto_aggregator); the merged snapshot is cached for CACHE_TTL.
+        
         Args:
             symbols: List of crypto symbols (defaults to SUPPORTED_CRYPTOS)
         
@@ -205,39 +170,18 @@ class CryptoAPIService:
         if not symbols:
             symbols = self.SUPPORTED_CRYPTOS
         
-        prices = {}
+        cache_key = f"crypto_api:all_prices:{','.join(sorted(s.upper() for s in symbols))}"
+        prices = cache.get(cache_key)
+        if prices:
+            return prices
         
-        for symbol in symbols:
-            prices[symbol] = {
-                'binance_usdt': None,
-                'coingecko_usd': None,
-                'coingecko_try': None,
-                'btcturk_try': None,
-                'aggregated': {}
-            }
-            
-            # Fetch from Binance
-            binance_data = self.get_binance_price(symbol, 'USDT')
-            if binance_data:
-                prices[symbol]['binance_usdt'] = binance_data
-            
-            # Fetch from CoinGecko (USD and TRY)
-            coingecko_usd = self.get_coingecko_price(symbol, 'usd')
-            if coingecko_usd:
-                prices[symbol]['coingecko_usd'] = coingecko_usd
-            
-            coingecko_try = self.get_coingecko_price(symbol, 'try')
-            if coingecko_try:
-                prices[symbol]['coingecko_try'] = coingecko_try
-            
-            # Fetch from BTCTurk
-            btcturk_data = self.get_btcturk_price(symbol)
-            if btcturk_data:
-                prices[symbol]['btcturk_try'] = btcturk_data
-            
-            # Calculate aggregated prices
+        prices = self.aggregator.fetch(symbols)
+        for symbol in prices:
             prices[symbol]['aggregated'] = self._aggregate_prices(prices[symbol])
         
+        # Don't cache a snapshot where every source failed
+        if any(prices[symbol]['aggregated']['sources_count'] for symbol in prices):
+            cache.set(cache_key, prices, self.CACHE_TTL)
         return prices
     
     def _aggregate_prices(self, price_data: Dict) -> Dict:
@@ -0,0 +1,53 @@
+"""
+Django Signals for Currencies
+Tell open portfolio sockets when holdings or transactions change
+"""
+
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PortfolioHolding, PortfolioTransaction, Transaction
+from .portfolio_valuation import portfolio_group
+
+logger = logging.getLogger(__name__)
+
+
+def notify_portfolio_changed(portfolio_id):
+    """
+    Send 'portfolio.invalidated' to the portfolio's group once the change is committed
+
+    The version (commit time) lets each process reload the book only once,
+    however many sockets of that portfolio it serves.
+    """
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(portfolio_group(portfolio_id), {
+                'type': 'portfolio.invalidated',
+                'version': time.time(),
+            })
+        except Exception as e:
+            logger.warning(f"portfolio invalidation not sent for {portfolio_id}: {e}")
+
+    transaction.on_commit(send)
+
+
+@receiver(post_save, sender=PortfolioHolding)
+@receiver(post_delete, sender=PortfolioHolding)
+@receiver(post_save, sender=PortfolioTransaction)
+@receiver(post_delete, sender=PortfolioTransaction)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def portfolio_content_changed(sender, instance, raw=False, **kwargs):
+    """Holding/transaction saved or deleted: invalidate the portfolio's valuation"""
+    if raw:
+        return  # Fixture loading
+    notify_portfolio_changed(instance.portfolio_id)
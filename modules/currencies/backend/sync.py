@@ -0,0 +1,15 @@
+"""
+Node sync declarations for currencies
+
+Bank rates are immutable observations that every online node can import
+itself, so sync only fills in rows a node is missing (e.g. an edge node
+that was offline during imports).
+"""
+
+from core.base.sync.registry import register
+
+from .models import BankExchangeRate
+
+CONFLICT_POLICY = 'local_wins'
+
+register(BankExchangeRate, key_field='entry_id')
@@ -7,6 +7,7 @@ from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.utils import timezone
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q
 from decimal import Decimal
 from datetime import timedelta
@@ -49,6 +50,14 @@ def update_exchange_rates(self):
             logger.error(f"Crypto update failed: {e}")
             raise self.retry(exc=e)
         
+        # Push changed pairs to WebSocket subscribers right away
+        try:
+            from .rate_hub import publish_rate_changes
+            published = publish_rate_changes()
+            logger.info(f"Broadcast {published} changed rate pairs")
+        except Exception as e:
+            logger.warning(f"Rate broadcast failed: {e}")
+        
         return {
             'status': 'success',
             'timestamp': timezone.now().isoformat()
@@ -68,77 +77,14 @@ def check_currency_alerts(self):
     try:
         logger.info("Checking currency alerts")
         
-        triggered_alerts = []
-        active_alerts = CurrencyAlert.objects.filter(is_active=True)
-        
-        for alert in active_alerts:
-            try:
-                # Get latest exchange rate
-                latest_rate = ExchangeRate.objects.filter(
-                    base_currency=alert.base_currency,
-                    target_currency=alert.target_currency
-                ).latest('timestamp')
-                
-                # Check if alert should trigger
-                should_trigger = False
-                
-                if alert.alert_type == 'above':
-                    should_trigger = latest_rate.rate > alert.threshold_value
-                elif alert.alert_type == 'below':
-                    should_trigger = latest_rate.rate < alert.threshold_value
-                elif alert.alert_type == 'change_percent':
-                    # Get rate from 24 hours ago
-                    yesterday = timezone.now() - timedelta(days=1)
-                    try:
-                        old_rate = ExchangeRate.objects.filter(
-                            base_currency=alert.base_currency,
-                            target_currency=alert.target_currency,
-                            timestamp__lte=yesterday
-                        ).latest('timestamp')
-                        
-                        change_pct = ((latest_rate.rate - old_rate.rate) / old_rate.rate) * 100
-                        should_trigger = abs(change_pct) >= abs(alert.threshold_value)
-                    except ExchangeRate.DoesNotExist:
-                        continue
-                
-                if should_trigger:
-                    # Check cooldown period (don't trigger too frequently)
-                    if alert.last_triggered:
-                        time_since_last = timezone.now() - alert.last_triggered
-                        if time_since_last.seconds < 3600:  # 1 hour cooldown
-                            continue
-                    
-                    # Trigger alert
-                    alert.last_triggered = timezone.now()
-                    alert.trigger_count += 1
-                    alert.save()
-                    
-                    triggered_alerts.append({
-                        'alert_id': str(alert.id),
-                        'user_id': alert.user.id,
-                        'pair': f"{alert.base_currency.code}/{alert.target_currency.code}",
-                        'rate': float(latest_rate.rate),
-                        'threshold': float(alert.threshold_value),
-                        'type': alert.alert_type
-                    })
-                    
-                    # Send notifications
-                    send_alert_notifications.delay(alert.id)
-                    
-            except ExchangeRate.DoesNotExist:
-                logger.warning(f"No rate found for alert {alert.id}")
-                continue
-            except Exception as e:
-                logger.error(f"Error checking alert {alert.id}: {e}")
-                continue
+        from .alert_engine import run_alert_check
+        result = run_alert_check()
         
-        logger.info(f"Triggered {len(triggered_alerts)} alerts")
+        logger.info(f"Triggered {result['triggered_count']} alerts")
         
         return {
             'status': 'success',
-            'triggered_count': len(triggered_alerts),
-            'triggered_alerts': triggered_alerts,
-            'timestamp': timezone.now().isoformat()
+            **result
         }
         
     except Exception as e:
@@ -146,6 +92,52 @@ def check_currency_alerts(self):
         raise self.retry(exc=e)
 
 
+@shared_task
+def send_alert_notifications_batch(triggered):
+    """
+    Send notifications for a batch of triggered alerts
+    
+    Args:
+        triggered: list of {'alert_id': str, 'rate': float} from the alert engine
+    """
+    from django.core.mail import send_mass_mail
+    from django.conf import settings
+    
+    rates = {item['alert_id']: item['rate'] for item in triggered}
+    alerts = CurrencyAlert.objects.filter(id__in=list(rates)).select_related('user')
+    
+    emails = []
+    for alert in alerts:
+        message = (
+            f"Currency Alert: {alert.base_currency_id}/{alert.target_currency_id} "
+            f"is now {rates[str(alert.id)]:.4f} "
+            f"(threshold: {alert.threshold_value:.4f})"
+        )
+        
+        if alert.notify_email and alert.user.email:
+            emails.append(('UNIBOS Currency Alert', message, settings.DEFAULT_FROM_EMAIL, [alert.user.email]))
+        
+        # Send push notification (implement based on your push service)
+        if alert.notify_push:
+            # send_push_notification(alert.user, message)
+            pass
+        
+        # Create in-app notification (implement based on your notification model)
+        if alert.notify_in_app:
+            # create_in_app_notification(alert.user, message)
+            pass
+    
+    # One SMTP connection for the whole batch
+    if emails:
+        try:
+            send_mass_mail(emails, fail_silently=False)
+            logger.info(f"Sent {len(emails)} alert emails")
+        except Exception as e:
+            logger.error(f"Failed to send alert emails: {e}")
+    
+    logger.info(f"Sent notifications for {len(rates)} alerts")
+
+
 @shared_task
 def send_alert_notifications(alert_id):
     """
@@ -302,38 +294,25 @@ def generate_market_data():
 @shared_task
 def calculate_portfolio_performance():
     """
-    Calculate and cache portfolio performance metrics
+    Capture today's performance snapshot of every portfolio and cache the totals
     Run every 15 minutes
     """
     try:
-        from .models import Portfolio
-        
-        portfolios = Portfolio.objects.filter(
-            holdings__isnull=False
-        ).distinct()
-        
-        updated_count = 0
-        
-        for portfolio in portfolios:
-            try:
-                # Calculate metrics
-                total_value_try = portfolio.calculate_total_value('TRY')
-                total_value_usd = portfolio.calculate_total_value('USD')
-                
-                # Cache the results
-                cache_key = f"portfolio_performance_{portfolio.id}"
-                cache_data = {
-                    'total_value_try': float(total_value_try),
-                    'total_value_usd': float(total_value_usd),
-                    'calculated_at': timezone.now().isoformat()
-                }
-                
-                cache.set(cache_key, cache_data, 900)  # Cache for 15 minutes
-                updated_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to calculate performance for portfolio {portfolio.id}: {e}")
-                continue
+        from .portfolio_snapshots import capture_snapshots
+        
+        # One price snapshot and a few queries per batch for all portfolios
+        snapshots = capture_snapshots()
+        
+        # Cache the results
+        calculated_at = timezone.now().isoformat()
+        cache.set_many({
+            f"portfolio_performance_{snapshot.portfolio_id}": {
+                'total_value_try': float(snapshot.total_value_try),
+                'total_value_usd': float(snapshot.total_value_usd),
+                'calculated_at': calculated_at
+            } for snapshot in snapshots
+        }, 900)  # Cache for 15 minutes
+        updated_count = len(snapshots)
         
         logger.info(f"Updated performance for {updated_count} portfolios")
         
@@ -352,43 +331,10 @@ def import_firebase_rates_incremental(self):
     """
     Import new bank exchange rates from Firebase
     Runs every 5 minutes to check for new data
-    Only imports records that don't exist in database
+    Only fetches entries after the last imported Firebase key (see firebase_import)
     """
-    import requests
-    from datetime import datetime
-    from decimal import Decimal, InvalidOperation
-    from django.db import transaction
-    import pytz
-    from .models import BankExchangeRate, BankRateImportLog
-    
-    FIREBASE_URL = 'https://findmeonphotos-default-rtdb.europe-west1.firebasedatabase.app/kurlar.json'
-    
-    # Bank and currency mappings
-    BANK_MAPPING = {
-        'TCMB': 'TCMB',
-        'Akbank': 'Akbank',
-        'Garanti': 'Garanti',
-        'Garanti BBVA': 'Garanti',
-        'YKB': 'YKB',
-        'Yapı Kredi': 'YKB',
-        'Ziraat': 'Ziraat',
-        'Halkbank': 'Halkbank',
-        'Vakıfbank': 'Vakıfbank',
-        'İş Bankası': 'İşbank',
-        'ING': 'ING',
-        'QNB': 'QNB',
-        'Denizbank': 'Denizbank',
-        'TEB': 'TEB',
-    }
-    
-    CURRENCY_MAPPING = {
-        'USDTRY': 'USDTRY',
-        'EURTRY': 'EURTRY',
-        'XAUTRY': 'XAUTRY',
-        'GBPTRY': 'GBPTRY',
-        'CHFTRY': 'CHFTRY',
-        'JPYTRY': 'JPYTRY',
-    }
+    from .firebase_import import FIREBASE_URL, import_new_rates
+    from .models import BankRateImportLog
     
     # Create import log
     import_log = BankRateImportLog.objects.create(
@@ -400,140 +346,16 @@ def import_firebase_rates_incremental(self):
     try:
         logger.info("Starting incremental Firebase rates import")
         
-        # Fetch data from Firebase
-        response = requests.get(FIREBASE_URL, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not data:
-            raise ValueError('No data received from Firebase')
-        
-        # Get all existing entry IDs in a single query for performance
-        existing_ids = set(BankExchangeRate.objects.values_list('entry_id', flat=True))
-        logger.info(f"Found {len(existing_ids)} existing entries in database")
-        
-        # Get latest timestamp for reference
-        latest_entry = BankExchangeRate.objects.order_by('-timestamp').first()
-        latest_timestamp = latest_entry.timestamp if latest_entry else None
-        
-        stats = {
-            'total': 0,
-            'new': 0,
-            'updated': 0,
-            'failed': 0,
-            'skipped': 0
-        }
-        
-        # Batch for bulk insert
-        batch = []
-        batch_size = 100
-        istanbul_tz = pytz.timezone('Europe/Istanbul')
-        
-        # Process entries
-        for entry_id, entry_data in data.items():
-            try:
-                # Validate entry
-                if not isinstance(entry_data, dict) or 'zaman' not in entry_data:
-                    stats['skipped'] += 1
-                    continue
-                
-                # Parse timestamp
-                timestamp_ms = entry_data['zaman']
-                timestamp = datetime.fromtimestamp(timestamp_ms / 1000, tz=istanbul_tz)
-                
-                # Skip very old entries for performance (only check last 7 days in scheduled task)
-                if latest_timestamp and (latest_timestamp - timestamp).days > 7:
-                    stats['skipped'] += 1
-                    continue
-                
-                date = timestamp.date()
-                
-                # Process bank data
-                if 'data' not in entry_data or not isinstance(entry_data['data'], list):
-                    stats['skipped'] += 1
-                    continue
-                
-                for bank_data in entry_data['data']:
-                    if not isinstance(bank_data, dict):
-                        continue
-                    
-                    bank_name_raw = bank_data.get('banka', '')
-                    bank_name = BANK_MAPPING.get(bank_name_raw)
-                    
-                    if not bank_name:
-                        continue
-                    
-                    # Process each currency rate
-                    for rate_data in bank_data.get('banka_kuru', []):
-                        if not isinstance(rate_data, dict):
-                            continue
-                        
-                        currency_pair_raw = rate_data.get('kur', '')
-                        currency_pair = CURRENCY_MAPPING.get(currency_pair_raw)
-                        
-                        if not currency_pair:
-                            continue
-                        
-                        # Parse rates
-                        try:
-                            buy_rate = Decimal(str(rate_data.get('alis', 0)))
-                            sell_rate = Decimal(str(rate_data.get('satis', 0)))
-                            
-                            # Skip invalid rates
-                            if buy_rate <= 0 or sell_rate <= 0:
-                                stats['skipped'] += 1
-                                continue
-                            
-                        except (ValueError, TypeError, InvalidOperation):
-                            stats['failed'] += 1
-                            continue
-                        
-                        # Create unique entry ID
-                        unique_entry_id = f"{entry_id}_{bank_name}_{currency_pair}"
-                        
-                        # Skip if already exists
-                        if unique_entry_id in existing_ids:
-                            stats['skipped'] += 1
-                            continue
-                        
-                        # Get previous rates for change calculation
-                        previous = BankExchangeRate.objects.filter(
-                            bank=bank_name,
-                            currency_pair=currency_pair,
-                            timestamp__lt=timestamp
-                        ).order_by('-timestamp').first()
-                        
-                        # Create new entry
-                        new_entry = BankExchangeRate(
-                            entry_id=unique_entry_id,
-                            bank=bank_name,
-                            currency_pair=currency_pair,
-                            buy_rate=buy_rate,
-                            sell_rate=sell_rate,
-                            date=date,
-                            timestamp=timestamp,
-                            previous_buy_rate=previous.buy_rate if previous else None,
-                            previous_sell_rate=previous.sell_rate if previous else None
-                        )
-                        
-                        batch.append(new_entry)
-                        stats['new'] += 1
-                        stats['total'] += 1
-                        
-                        # Save batch if reached batch size
-                        if len(batch) >= batch_size:
-                            with transaction.atomic():
-                                BankExchangeRate.objects.bulk_create(batch, batch_size=50)
-                            batch = []
-                
-            except Exception as e:
-                logger.error(f'Error processing entry {entry_id}: {str(e)}')
-                stats['failed'] += 1
-        
-        # Save remaining batch
-        if batch:
-            with transaction.atomic():
-                BankExchangeRate.objects.bulk_create(batch, batch_size=50)
+        # Rates and their candles commit together: if the candle merge fails the
+        # new rates roll back, the watermark stays put and the retry imports them again
+        with transaction.atomic():
+            stats, new_observations = import_new_rates(import_log)
+            
+            # Merge new rates into the pre-aggregated OHLC candles
+            if new_observations:
+                from .candle_service import update_candles
+                candle_count = update_candles(new_observations)
+                logger.info(f"Updated {candle_count} rate candles")
         
         # Update import log
         import_log.total_entries = stats['total']
@@ -557,6 +379,7 @@ def import_firebase_rates_incremental(self):
         if stats['new'] > 0:
             cache.delete('bank_rates:latest')
             cache.delete_pattern('bank_rates:chart:*')
+            cache.delete_pattern('chart:ohlc:*')
             
             # Send notification
             notify_new_bank_rates.delay(stats['new'])
@@ -621,6 +444,11 @@ def cleanup_old_bank_rates():
         
         logger.info(f"Cleaned up {deleted_count} old bank rates")
         
+        # Minute candles are only kept short-term (coarser candles keep the full history)
+        from .candle_service import prune_minute_candles
+        pruned_candles = prune_minute_candles()
+        logger.info(f"Pruned {pruned_candles} old 1m candles")
+        
         return {
             'status': 'success',
             'deleted_count': deleted_count,
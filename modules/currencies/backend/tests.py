@@ -3,7 +3,7 @@ Comprehensive tests for Currencies module
 Tests security, performance, and functionality
 """
 
-from django.test import TestCase, TransactionTestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -638,4 +638,491 @@ class SecurityTests(APITestCase):
             # Check that script tags are escaped
             portfolio = Portfolio.objects.get(id=response.data['id'])
             self.assertNotIn('<script>', portfolio.name)
-            self.assertNotIn('onerror=', portfolio.description)
\ No newline at end of file
+            self.assertNotIn('onerror=', portfolio.description)
+
+
+class TechnicalIndicatorTests(SimpleTestCase):
+    """Test vectorized indicators against straightforward loop implementations"""
+    
+    def setUp(self):
+        import numpy as np
+        rng = np.random.default_rng(42)
+        self.prices = 30 + np.cumsum(rng.normal(0, 0.1, 500))
+        self.period = 14
+    
+    def test_sma_matches_rolling_mean(self):
+        """Test SMA equals the mean of each window"""
+        import numpy as np
+        from .indicators import sma
+        
+        expected = [np.mean(self.prices[i - self.period + 1:i + 1]) for i in range(self.period - 1, len(self.prices))]
+        np.testing.assert_allclose(sma(self.prices, self.period), expected, rtol=1e-10)
+    
+    def test_ema_matches_recursive_definition(self):
+        """Test block-wise EMA equals the recursive EMA"""
+        import numpy as np
+        from .indicators import ema
+        
+        multiplier = 2 / (self.period + 1)
+        value = np.mean(self.prices[:self.period])
+        expected = [value]
+        for price in self.prices[self.period:]:
+            value = price * multiplier + value * (1 - multiplier)
+            expected.append(value)
+        np.testing.assert_allclose(ema(self.prices, self.period), expected, rtol=1e-10)
+    
+    def test_rsi_matches_wilder_smoothing(self):
+        """Test RSI equals Wilder's smoothed RSI"""
+        import numpy as np
+        from .indicators import rsi
+        
+        deltas = np.diff(self.prices)
+        up = np.clip(deltas[:self.period], 0, None).mean()
+        down = np.clip(-deltas[:self.period], 0, None).mean()
+        expected = [100 - 100 / (1 + up / down)]
+        for delta in deltas[self.period:]:
+            up = (up * (self.period - 1) + max(delta, 0)) / self.period
+            down = (down * (self.period - 1) + max(-delta, 0)) / self.period
+            expected.append(100 - 100 / (1 + up / down))
+        np.testing.assert_allclose(rsi(self.prices, self.period), expected, rtol=1e-10)
+    
+    def test_rsi_without_losses_is_100(self):
+        """Test RSI of a strictly rising series"""
+        import numpy as np
+        from .indicators import rsi
+        
+        self.assertTrue(np.all(rsi(np.arange(1.0, 40.0), self.period) == 100.0))
+    
+    def test_compute_multiple_indicators_alignment(self):
+        """Test several indicators share one series and align to price timestamps"""
+        from .indicators import compute_indicators
+        
+        timestamps = [f't{i}' for i in range(len(self.prices))]
+        results = compute_indicators(timestamps, self.prices, ['sma', 'rsi', 'macd', 'bollinger'], self.period)
+        
+        self.assertEqual(results['sma'][0]['time'], f't{self.period - 1}')
+        self.assertEqual(results['rsi'][0]['time'], f't{self.period}')
+        self.assertEqual(results['macd'][0]['time'], 't33')
+        self.assertEqual(results['sma'][-1]['time'], timestamps[-1])
+        self.assertEqual(results['macd'][-1]['time'], timestamps[-1])
+        band = results['bollinger'][-1]
+        self.assertLess(band['lower'], band['middle'])
+        self.assertLess(band['middle'], band['upper'])
+    
+    def test_insufficient_data_reports_error(self):
+        """Test indicators needing more points than available"""
+        from .indicators import compute_indicators
+        
+        results = compute_indicators(['t0', 't1'], self.prices[:2], ['macd'], self.period)
+        self.assertIn('error', results['macd'])
+    
+    def test_macd_rejects_fast_not_below_slow(self):
+        """Test MACD periods are validated"""
+        from .indicators import macd
+        
+        for fast, slow in ((26, 12), (12, 12), (0, 26)):
+            with self.assertRaises(ValueError):
+                macd(self.prices, fast, slow)
+        with self.assertRaises(ValueError):
+            macd(self.prices, 12, 26, 0)
+    
+    @patch('modules.currencies.backend.indicators.cache')
+    def test_price_window_is_clamped(self, mock_cache):
+        """Test oversized day windows are capped before querying"""
+        from .indicators import MAX_PRICE_DAYS, load_price_series
+        
+        mock_cache.get.return_value = (['t0'], self.prices[:1])
+        load_price_series('USDTRY', None, 100000)
+        load_price_series('USDTRY', None, -5)
+        
+        keys = [call.args[0] for call in mock_cache.get.call_args_list]
+        self.assertEqual(keys, [
+            f'indicators:prices:USDTRY:all:{MAX_PRICE_DAYS}',
+            'indicators:prices:USDTRY:all:1',
+        ])
+
+
+class AlertEngineEvaluationTests(SimpleTestCase):
+    """Test vectorized alert evaluation"""
+    
+    def _alert(self, alert_type, threshold, last_triggered=None, pair=('USD', 'TRY')):
+        return {
+            'base_currency': pair[0],
+            'target_currency': pair[1],
+            'alert_type': alert_type,
+            'threshold_value': Decimal(str(threshold)),
+            'last_triggered': last_triggered,
+        }
+    
+    def test_conditions_and_cooldown(self):
+        """Test above/below/change_percent conditions and the 1 hour cooldown"""
+        from .alert_engine import evaluate_alerts
+        
+        now = timezone.now()
+        pair_rates = {('USD', 'TRY'): (Decimal('34.5'), Decimal('33.0'))}
+        alerts = [
+            self._alert('above', 34),
+            self._alert('above', 35),
+            self._alert('below', 35),
+            self._alert('change_percent', 4),
+            self._alert('change_percent', 5),
+            self._alert('above', 34, last_triggered=now - timedelta(minutes=10)),
+            self._alert('above', 34, last_triggered=now - timedelta(days=1, minutes=10)),
+        ]
+        
+        triggered, latest = evaluate_alerts(alerts, pair_rates, now)
+        
+        self.assertEqual(list(triggered), [True, False, True, True, False, False, True])
+        self.assertEqual(latest[0], 34.5)
+    
+    def test_missing_rates_never_trigger(self):
+        """Test pairs without a latest or 24h-ago rate"""
+        from .alert_engine import evaluate_alerts
+        
+        pair_rates = {('EUR', 'TRY'): (Decimal('36.0'), None)}
+        alerts = [
+            self._alert('below', 100, pair=('GBP', 'TRY')),
+            self._alert('change_percent', 0, pair=('EUR', 'TRY')),
+        ]
+        
+        triggered, _ = evaluate_alerts(alerts, pair_rates)
+        
+        self.assertFalse(triggered.any())
+
+
+class FirebaseImportTests(SimpleTestCase):
+    """Test incremental Firebase import helpers"""
+    
+    def test_entry_key_from_id(self):
+        """Test push keys containing underscores survive the split"""
+        from .firebase_import import entry_key_from_id
+        
+        self.assertEqual(entry_key_from_id('-NxA_b9_Akbank_USDTRY'), '-NxA_b9')
+        self.assertEqual(entry_key_from_id('-NxAb9_Akbank_USDTRY'), '-NxAb9')
+    
+    def test_parse_entry(self):
+        """Test bank/currency mapping and invalid rate filtering"""
+        from .firebase_import import parse_entry
+        
+        entry = {
+            'zaman': 1700000000000,
+            'data': [
+                {'banka': 'Yapı Kredi', 'banka_kuru': [
+                    {'kur': 'USDTRY', 'alis': 28.5, 'satis': 28.9},
+                    {'kur': 'EURTRY', 'alis': 0, 'satis': 31.0},
+                    {'kur': 'XXXTRY', 'alis': 1, 'satis': 1},
+                ]},
+                {'banka': 'Unknown', 'banka_kuru': [{'kur': 'USDTRY', 'alis': 1, 'satis': 1}]},
+                {'banka': 'TCMB', 'banka_kuru': [{'kur': 'EURTRY', 'alis': 'n/a', 'satis': 31.0}]},
+            ]
+        }
+        
+        timestamp, rates, failed = parse_entry('-key', entry)
+        
+        self.assertEqual(int(timestamp.timestamp()), 1700000000)
+        self.assertEqual(rates, [('YKB', 'USDTRY', Decimal('28.5'), Decimal('28.9'))])
+        self.assertEqual(failed, 1)
+        self.assertIsNone(parse_entry('-key', {'data': []}))
+
+
+
+class FirebaseWatermarkTests(TestCase):
+    """Test the import watermark follows completion order, not key collation"""
+    
+    def test_latest_completed_log_wins(self):
+        """Test keys that collate differently still resume after the newest run"""
+        from .firebase_import import get_watermark
+        from .models import BankRateImportLog
+        
+        now = timezone.now()
+        # Push keys: '-' < digits < upper < '_' < lower byte-wise; locale collations disagree
+        BankRateImportLog.objects.create(
+            import_type='scheduled', status='completed', watermark='-NxA_older',
+            completed_at=now - timedelta(hours=2)
+        )
+        BankRateImportLog.objects.create(
+            import_type='scheduled', status='completed', watermark='-NxAb_newer',
+            completed_at=now - timedelta(hours=1)
+        )
+        BankRateImportLog.objects.create(
+            import_type='scheduled', status='failed', watermark='-NxZ_failed',
+            completed_at=now
+        )
+        
+        self.assertEqual(get_watermark(), '-NxAb_newer')
+    
+    def test_no_imports(self):
+        """Test an empty log starts from the beginning"""
+        from .firebase_import import get_watermark
+        
+        self.assertIsNone(get_watermark())
+
+
+class RateCandleTests(TestCase):
+    """Test pre-aggregated OHLC candles"""
+    
+    def setUp(self):
+        self.start = timezone.localtime(timezone.now()).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        ) - timedelta(days=1)
+    
+    def test_update_candles_merges_out_of_order_observations(self):
+        """Test open/close follow observation time, not arrival order"""
+        from .candle_service import get_candles, update_candles
+        
+        update_candles([
+            ('Akbank', 'USDTRY', self.start + timedelta(minutes=30), Decimal('30.5')),
+            ('Akbank', 'USDTRY', self.start + timedelta(minutes=10), Decimal('30.0')),
+        ])
+        update_candles([
+            ('Akbank', 'USDTRY', self.start + timedelta(minutes=5), Decimal('29.8')),
+            ('Akbank', 'USDTRY', self.start + timedelta(minutes=50), Decimal('31.0')),
+        ])
+        
+        for bank in ('Akbank', None):
+            candle = get_candles('USDTRY', '1h', bank=bank).get()
+            self.assertEqual(candle.open, Decimal('29.8'))
+            self.assertEqual(candle.close, Decimal('31.0'))
+            self.assertEqual(candle.low, Decimal('29.8'))
+            self.assertEqual(candle.high, Decimal('31.0'))
+            self.assertEqual(candle.volume, 4)
+        self.assertEqual(get_candles('USDTRY', '1m', bank='Akbank').count(), 4)
+    
+    def test_rebuild_matches_incremental_merge(self):
+        """Test rebuilding from raw rows reproduces the incremental candles"""
+        from .candle_service import rebuild_candles, update_candles
+        from .models import BankExchangeRate, BankRateCandle
+        
+        observations = []
+        for minute, rate in ((0, '30.0'), (20, '30.4'), (70, '30.2')):
+            timestamp = self.start + timedelta(minutes=minute)
+            BankExchangeRate.objects.create(
+                entry_id=f'-key{minute}_Akbank_USDTRY', bank='Akbank', currency_pair='USDTRY',
+                buy_rate=Decimal(rate), sell_rate=Decimal(rate) + 1,
+                date=timestamp.date(), timestamp=timestamp
+            )
+            observations.append(('Akbank', 'USDTRY', timestamp, Decimal(rate)))
+        update_candles(observations)
+        fields = ('bank', 'resolution', 'bucket_start', 'open', 'high', 'low', 'close', 'volume')
+        incremental = sorted(BankRateCandle.objects.values_list(*fields))
+        
+        rebuild_candles()
+        
+        self.assertEqual(sorted(BankRateCandle.objects.values_list(*fields)), incremental)
+    
+    @patch('modules.currencies.backend.candle_service.update_candles', side_effect=RuntimeError('candles down'))
+    @patch('modules.currencies.backend.firebase_import.fetch_entries')
+    def test_failed_candle_merge_rolls_back_the_import(self, mock_fetch, _mock_update):
+        """Test rates are not kept without their candles, so the retry imports them again"""
+        from .firebase_import import get_watermark
+        from .models import BankExchangeRate, BankRateImportLog
+        from .tasks import import_firebase_rates_incremental
+        
+        mock_fetch.return_value = iter([('-NxA1', {
+            'zaman': int(self.start.timestamp() * 1000),
+            'data': [{'banka': 'Akbank', 'banka_kuru': [{'kur': 'USDTRY', 'alis': 30.1, 'satis': 30.5}]}],
+        })])
+        
+        with self.assertRaises(RuntimeError):
+            import_firebase_rates_incremental()
+        
+        self.assertFalse(BankExchangeRate.objects.exists())
+        self.assertEqual(BankRateImportLog.objects.get().status, 'failed')
+        self.assertIsNone(get_watermark())
+
+class RateBroadcastHubTests(SimpleTestCase):
+    """Test the shared rate fan-out diffing"""
+    
+    def test_pair_validation_and_group_name(self):
+        """Test client pair input is normalized and mapped to a valid group"""
+        from .rate_hub import normalize_pair, pair_group
+        
+        self.assertEqual(normalize_pair('usd', 'try'), 'USD/TRY')
+        self.assertIsNone(normalize_pair('USD', 'TRY;DROP'))
+        self.assertIsNone(normalize_pair(None, 'TRY'))
+        self.assertEqual(pair_group('USD/TRY'), 'currency_rate.USD_TRY')
+    
+    @patch('modules.currencies.backend.rate_hub.cache')
+    @patch('modules.currencies.backend.rate_hub.fetch_latest_rates')
+    def test_only_changed_pairs_are_published(self, fetch_latest_rates, cache):
+        """Test unchanged pairs are not re-sent"""
+        from .rate_hub import compute_changes
+        
+        cache.get.return_value = {'USD/TRY': {'rate': 32.1}, 'EUR/TRY': {'rate': 35.0}}
+        fetch_latest_rates.return_value = {'USD/TRY': {'rate': 32.1}, 'EUR/TRY': {'rate': 35.2}}
+        
+        self.assertEqual(compute_changes(), {'EUR/TRY': {'rate': 35.2}})
+        stored = cache.set.call_args[0][1]
+        self.assertEqual(stored['EUR/TRY'], {'rate': 35.2})
+
+
+class PortfolioValuationTests(SimpleTestCase):
+    """Test incremental portfolio revaluation"""
+    
+    def make_book(self, prices):
+        from .portfolio_valuation import PortfolioBook
+        
+        holdings = {
+            'USD': {'amount': Decimal('100'), 'average_buy_price': Decimal('30')},
+            'BTC': {'amount': Decimal('0.5'), 'average_buy_price': Decimal('2000000')},
+        }
+        return PortfolioBook('p1', 'Main', holdings, prices)
+    
+    def test_price_tick_revalues_only_that_holding(self):
+        """Test a rate change updates the total incrementally and reports one holding"""
+        book = self.make_book({'USD': Decimal('32'), 'BTC': Decimal('2100000')})
+        self.assertEqual(book.total_value, Decimal('1053200'))
+        
+        diff = book.apply_price('USD', Decimal('33'))
+        self.assertEqual(book.total_value, Decimal('1053300'))
+        self.assertEqual([h['currency'] for h in diff['holdings']], ['USD'])
+        self.assertEqual(diff['holdings'][0]['profit_loss'], 300.0)
+        
+        self.assertIsNone(book.apply_price('USD', Decimal('33')))
+        self.assertIsNone(book.apply_price('EUR', Decimal('36')))
+    
+    def test_reload_diff_reports_changed_and_removed_holdings(self):
+        """Test a reloaded book is diffed against the previous one"""
+        from .portfolio_valuation import PortfolioBook
+        
+        previous = self.make_book({'USD': Decimal('32'), 'BTC': Decimal('2100000')})
+        current = PortfolioBook('p1', 'Main', {
+            'USD': {'amount': Decimal('150'), 'average_buy_price': Decimal('31')},
+        }, {'USD': Decimal('32')})
+        
+        diff = current.diff(previous)
+        self.assertEqual(diff['total_value'], 4800.0)
+        self.assertEqual([h['currency'] for h in diff['holdings']], ['USD'])
+        self.assertEqual(diff['removed'], ['BTC'])
+
+
+class CryptoAggregatorTests(SimpleTestCase):
+    """Test the concurrent exchange aggregator against a local stub server"""
+    
+    RESPONSES = {
+        '/binance/ticker/24hr': [
+            {'symbol': 'BTCUSDT', 'lastPrice': '65000', 'closeTime': 1700000000000},
+            {'symbol': 'ETHUSDT', 'lastPrice': '3500', 'closeTime': 1700000000000},
+        ],
+        '/coingecko/simple/price': {
+            'bitcoin': {'usd': 65100, 'try': 2100000, 'last_updated_at': 1700000000},
+        },
+        '/btcturk/ticker': {'data': [
+            {'pair': 'BTCTRY', 'last': 2110000, 'timestamp': 1700000000000},
+            {'pair': 'XRPTRY', 'last': 20, 'timestamp': 1700000000000},
+        ]},
+    }
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import urlparse
+        
+        responses = cls.RESPONSES
+        
+        class StubHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path not in responses:
+                    self.send_error(503)
+                    return
+                body = json.dumps(responses[path]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def make_aggregator(self, **overrides):
+        from .crypto_aggregator import CryptoPriceAggregator
+        
+        endpoints = {name: f"{self.base_url}/{name}" for name in ('binance', 'binance_us', 'coingecko', 'btcturk')}
+        endpoints.update(overrides)
+        return CryptoPriceAggregator(endpoints=endpoints, timeout=2)
+    
+    def test_sources_are_merged_per_symbol(self):
+        """Test one batch per source is merged into the per-symbol slots"""
+        prices = self.make_aggregator().fetch(['btc', 'eth'])
+        
+        self.assertEqual(prices['BTC']['binance_usdt']['price'], 65000.0)
+        self.assertEqual(prices['BTC']['coingecko_usd']['price'], 65100)
+        self.assertEqual(prices['BTC']['coingecko_try']['price'], 2100000)
+        self.assertEqual(prices['BTC']['btcturk_try']['price'], 2110000.0)
+        self.assertEqual(prices['ETH']['binance_usdt']['price'], 3500.0)
+        self.assertIsNone(prices['ETH']['btcturk_try'])
+    
+    @override_settings(CRYPTO_API_BREAKER_THRESHOLD=2)
+    def test_failing_source_trips_its_breaker(self):
+        """Test a failing source is skipped after repeated failures without affecting the others"""
+        aggregator = self.make_aggregator(coingecko=f"{self.base_url}/down")
+        
+        for _ in range(2):
+            prices = aggregator.fetch(['BTC'])
+            self.assertIsNone(prices['BTC']['coingecko_usd'])
+            self.assertEqual(prices['BTC']['btcturk_try']['price'], 2110000.0)
+        
+        self.assertFalse(aggregator.breakers['coingecko'].allow())
+        self.assertTrue(aggregator.breakers['binance'].allow())
+
+
+class PortfolioSnapshotTests(SimpleTestCase):
+    """Test set-based snapshot computation"""
+    
+    def test_snapshot_values_and_period_pnl(self):
+        """Test values, invested amount and period P&L from prefetched history"""
+        from datetime import date
+        from .portfolio_snapshots import PriceSnapshot, build_snapshot
+        
+        prices = PriceSnapshot(
+            usd={'BTC': Decimal('60000'), 'USD': Decimal('1')},
+            try_={'BTC': Decimal('1920000'), 'USD': Decimal('32')},
+            usdtry=Decimal('32'),
+        )
+        today = date(2025, 1, 31)
+        holdings = [('BTC', Decimal('0.5'), Decimal('50000')), ('USD', Decimal('1000'), Decimal('1')), ('XYZ', Decimal('5'), Decimal('2'))]
+        history = {date(2025, 1, 30): Decimal('30000'), date(2025, 1, 1): Decimal('0')}
+        
+        snapshot = build_snapshot('p1', holdings, prices, history, today, timezone.now())
+        
+        self.assertEqual(snapshot.total_value_usd, Decimal('31000'))
+        self.assertEqual(snapshot.total_value_try, Decimal('992000'))
+        self.assertEqual(snapshot.total_invested_usd, Decimal('26010'))
+        self.assertEqual(snapshot.daily_pnl, Decimal('1000'))
+        self.assertEqual(snapshot.monthly_pnl_percentage, Decimal('0'))
+        self.assertEqual(snapshot.weekly_pnl, 0)
+        self.assertEqual([h['symbol'] for h in snapshot.holdings_snapshot], ['BTC', 'USD'])
+    
+    def test_percentages_fit_the_column_for_a_tiny_basis(self):
+        """Test P&L percentages are clamped to max_digits=10/4dp"""
+        from datetime import date
+        from .portfolio_snapshots import PERCENTAGE_LIMIT, PriceSnapshot, build_snapshot
+        
+        prices = PriceSnapshot(usd={'BTC': Decimal('60000')}, try_={}, usdtry=None)
+        today = date(2025, 1, 31)
+        holdings = [('BTC', Decimal('1'), Decimal('0.00001'))]
+        history = {date(2025, 1, 30): Decimal('0.01')}
+        
+        snapshot = build_snapshot('p1', holdings, prices, history, today, timezone.now())
+        
+        self.assertEqual(snapshot.total_pnl_percentage, PERCENTAGE_LIMIT)
+        self.assertEqual(snapshot.daily_pnl_percentage, PERCENTAGE_LIMIT)
+        self.assertEqual(snapshot.daily_pnl_percentage.as_tuple().exponent, -4)
@@ -576,6 +576,8 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         
         # Get or create today's performance snapshot
         performance = PortfolioPerformance.capture_snapshot(portfolio)
+        if performance is None:
+            return Response({'error': 'Portfolio snapshot unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
         from .real_crypto_service import portfolio_analytics
         
@@ -900,52 +902,14 @@ class CurrencyAlertViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        triggered_count = 0
-        checked_count = 0
-        
         try:
-            active_alerts = CurrencyAlert.objects.filter(is_active=True)
-            
-            for alert in active_alerts:
-                checked_count += 1
-                
-                # Get current rate
-                try:
-                    current_rate = ExchangeRate.objects.filter(
-                        base_currency=alert.base_currency,
-                        target_currency=alert.target_currency
-                    ).latest('timestamp')
-                    
-                    if alert.check_condition(current_rate.rate):
-                        # Trigger alert
-                        alert.last_triggered = timezone.now()
-                        alert.trigger_count += 1
-                        alert.save()
-                        
-                        triggered_count += 1
-                        
-                        # Send notifications (implement based on your notification system)
-                        if alert.notify_email:
-                            # Send email notification
-                            pass
-                        
-                        if alert.notify_push:
-                            # Send push notification
-                            pass
-                        
-                        if alert.notify_in_app:
-                            # Create in-app notification
-                            pass
-                        
-                        logger.info(f"Alert triggered: {alert.id}")
-                
-                except ExchangeRate.DoesNotExist:
-                    logger.warning(f"No rate found for alert {alert.id}")
+            from .alert_engine import run_alert_check
+            result = run_alert_check()
             
             return Response({
-                'checked': checked_count,
-                'triggered': triggered_count,
-                'timestamp': timezone.now().isoformat()
+                'checked': result['checked_count'],
+                'triggered': result['triggered_count'],
+                'timestamp': result['timestamp']
             })
             
         except Exception as e:
@@ -1039,10 +1003,8 @@ class ChartDataViewSet(viewsets.ViewSet):
         Timeframes: 1H, 4H, 1D, 1W, 1M, 3M, 6M, 1Y, ALL
         Currency pairs: USDTRY, EURTRY, XAUTRY, etc.
         """
-        from django.db.models import Max, Min, Avg
-        from django.db.models.functions import TruncHour, TruncDay, TruncWeek, TruncMonth
-        import pytz
-        
+        from .candle_service import CHART_TIMEFRAMES, get_candles
+
         # Validate parameters
         valid_timeframes = ['1H', '4H', '1D', '1W', '1M', '3M', '6M', '1Y', 'ALL']
         if timeframe not in valid_timeframes:
@@ -1068,111 +1030,32 @@ class ChartDataViewSet(viewsets.ViewSet):
         if cached_data:
             return Response(cached_data)
         
-        # Determine date range
-        istanbul_tz = pytz.timezone('Europe/Istanbul')
+        # Read pre-aggregated candles (maintained by the Firebase import task)
+        resolution, window, interval = CHART_TIMEFRAMES[timeframe]
         end_date = timezone.now()
+        start_date = end_date - window if window else None
         
-        if timeframe == '1H':
-            start_date = end_date - timedelta(hours=24)
-            interval = 'hour'
-        elif timeframe == '4H':
-            start_date = end_date - timedelta(hours=96)
-            interval = '4hour'
-        elif timeframe == '1D':
-            start_date = end_date - timedelta(days=30)
-            interval = 'day'
-        elif timeframe == '1W':
-            start_date = end_date - timedelta(weeks=12)
-            interval = 'week'
-        elif timeframe == '1M':
-            start_date = end_date - timedelta(days=30)
-            interval = 'day'
-        elif timeframe == '3M':
-            start_date = end_date - timedelta(days=90)
-            interval = 'day'
-        elif timeframe == '6M':
-            start_date = end_date - timedelta(days=180)
-            interval = 'day'
-        elif timeframe == '1Y':
-            start_date = end_date - timedelta(days=365)
-            interval = 'day'
-        else:  # ALL
-            start_date = BankExchangeRate.objects.filter(
-                currency_pair=currency_pair
-            ).earliest('timestamp').timestamp
-            interval = 'day'
-        
-        # Query data
-        queryset = BankExchangeRate.objects.filter(
-            currency_pair=currency_pair,
-            timestamp__gte=start_date,
-            timestamp__lte=end_date
-        )
-        
-        if bank:
-            queryset = queryset.filter(bank=bank)
-        
-        # Group and aggregate based on interval
-        if interval == 'hour':
-            queryset = queryset.annotate(
-                period=TruncHour('timestamp')
-            )
-        elif interval == '4hour':
-            # Custom 4-hour grouping
-            queryset = queryset.extra(
-                select={'period': "DATE_TRUNC('hour', timestamp) - INTERVAL '1 hour' * (EXTRACT(HOUR FROM timestamp)::INT % 4)"}
-            )
-        elif interval == 'day':
-            queryset = queryset.annotate(
-                period=TruncDay('timestamp')
-            )
-        elif interval == 'week':
-            queryset = queryset.annotate(
-                period=TruncWeek('timestamp')
-            )
-        elif interval == 'month':
-            queryset = queryset.annotate(
-                period=TruncMonth('timestamp')
-            )
-        
-        # Aggregate OHLC data
-        ohlc_data = []
-        
-        if interval != '4hour':
-            grouped = queryset.values('period').annotate(
-                open=Avg('buy_rate'),  # Using average as approximation
-                high=Max('buy_rate'),
-                low=Min('buy_rate'),
-                close=Avg('buy_rate'),  # Last value would be better
-                volume=Count('id')
-            ).order_by('period')
-        else:
-            # Handle 4-hour grouping differently
-            grouped = queryset.values('period').annotate(
-                open=Avg('buy_rate'),
-                high=Max('buy_rate'),
-                low=Min('buy_rate'),
-                close=Avg('buy_rate'),
-                volume=Count('id')
-            ).order_by('period')
+        candles = get_candles(currency_pair, resolution, start=start_date, end=end_date, bank=bank)
         
         # Format for chart library
-        for item in grouped:
-            if item['period']:
-                ohlc_data.append({
-                    'time': item['period'].isoformat(),
-                    'open': float(item['open'] or 0),
-                    'high': float(item['high'] or 0),
-                    'low': float(item['low'] or 0),
-                    'close': float(item['close'] or 0),
-                    'volume': item['volume']
-                })
+        ohlc_data = [
+            {
+                'time': candle['bucket_start'].isoformat(),
+                'open': float(candle['open']),
+                'high': float(candle['high']),
+                'low': float(candle['low']),
+                'close': float(candle['close']),
+                'volume': candle['volume']
+            }
+            for candle in candles.values('bucket_start', 'open', 'high', 'low', 'close', 'volume')
+        ]
         
         result = {
             'currency_pair': currency_pair,
             'timeframe': timeframe,
             'bank': bank,
             'interval': interval,
+            'resolution': resolution,
             'data': ohlc_data,
             'count': len(ohlc_data)
         }
@@ -1348,10 +1231,15 @@ class ChartDataViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'], url_path='indicators/(?P<currency_pair>[^/]+)')
     def technical_indicators(self, request, currency_pair=None):
         """
-        Calculate technical indicators (SMA, EMA, RSI, etc.)
+        Calculate technical indicators (SMA, EMA, RSI, MACD, Bollinger)
+        
+        Query params:
+            indicators: Comma-separated list (e.g. sma,ema,rsi); legacy `indicator` also accepted
+            period: Indicator period (default: 14)
+            days: Price window in days (default: period * 3)
+            bank: Optional bank filter
         """
-        import numpy as np
-        from decimal import Decimal
+        from .indicators import AVAILABLE_INDICATORS, MAX_PRICE_DAYS, compute_indicators, load_price_series
         
         valid_pairs = ['USDTRY', 'EURTRY', 'XAUTRY', 'GBPTRY', 'CHFTRY', 'JPYTRY']
         if currency_pair not in valid_pairs:
@@ -1362,29 +1250,26 @@ class ChartDataViewSet(viewsets.ViewSet):
         
         # Parameters
         bank = request.query_params.get('bank')
-        period = int(request.query_params.get('period', 14))
-        indicator = request.query_params.get('indicator', 'sma')  # sma, ema, rsi
-        
-        # Get data
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=period * 3)  # Get extra data for calculations
-        
-        queryset = BankExchangeRate.objects.filter(
-            currency_pair=currency_pair,
-            timestamp__gte=start_date,
-            timestamp__lte=end_date
-        )
-        
-        if bank:
-            queryset = queryset.filter(bank=bank)
-        
-        # Get prices
-        prices = []
-        timestamps = []
+        try:
+            period = int(request.query_params.get('period', 14))
+            days = int(request.query_params.get('days', period * 3))  # Extra data for calculations
+        except ValueError:
+            return Response({'error': 'period and days must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if period < 2 or days < 1:
+            return Response({'error': 'period must be >= 2 and days >= 1'}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(days, MAX_PRICE_DAYS)
+        
+        requested = request.query_params.get('indicators') or request.query_params.get('indicator', 'sma')
+        indicators = [name.strip().lower() for name in requested.split(',') if name.strip()]
+        invalid = [name for name in indicators if name not in AVAILABLE_INDICATORS]
+        if invalid or not indicators:
+            return Response(
+                {'error': f'Invalid indicator. Valid options: {", ".join(AVAILABLE_INDICATORS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        for item in queryset.order_by('timestamp'):
-            prices.append(float(item.buy_rate))
-            timestamps.append(item.timestamp.isoformat())
+        # One cached price series shared by all requested indicators
+        timestamps, prices = load_price_series(currency_pair, bank, days)
         
         if len(prices) < period:
             return Response(
@@ -1392,82 +1277,21 @@ class ChartDataViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate indicators
-        result_data = []
-        
-        if indicator == 'sma':
-            # Simple Moving Average
-            sma_values = []
-            for i in range(period - 1, len(prices)):
-                sma = np.mean(prices[i - period + 1:i + 1])
-                sma_values.append({
-                    'time': timestamps[i],
-                    'value': float(sma),
-                    'price': prices[i]
-                })
-            result_data = sma_values
-            
-        elif indicator == 'ema':
-            # Exponential Moving Average
-            multiplier = 2 / (period + 1)
-            ema_values = []
-            
-            # Start with SMA for first EMA value
-            ema = np.mean(prices[:period])
-            ema_values.append({
-                'time': timestamps[period - 1],
-                'value': float(ema),
-                'price': prices[period - 1]
-            })
-            
-            # Calculate EMA for remaining values
-            for i in range(period, len(prices)):
-                ema = (prices[i] * multiplier) + (ema * (1 - multiplier))
-                ema_values.append({
-                    'time': timestamps[i],
-                    'value': float(ema),
-                    'price': prices[i]
-                })
-            result_data = ema_values
-            
-        elif indicator == 'rsi':
-            # Relative Strength Index
-            deltas = np.diff(prices)
-            seed = deltas[:period]
-            up = seed[seed >= 0].sum() / period
-            down = -seed[seed < 0].sum() / period
-            rs = up / down if down != 0 else 100
-            rsi_values = [{'time': timestamps[period], 'value': 100 - (100 / (1 + rs)), 'price': prices[period]}]
-            
-            for i in range(period, len(prices) - 1):
-                delta = deltas[i]
-                if delta > 0:
-                    upval = delta
-                    downval = 0
-                else:
-                    upval = 0
-                    downval = -delta
-                
-                up = (up * (period - 1) + upval) / period
-                down = (down * (period - 1) + downval) / period
-                rs = up / down if down != 0 else 100
-                rsi = 100 - (100 / (1 + rs))
-                
-                rsi_values.append({
-                    'time': timestamps[i + 1],
-                    'value': float(rsi),
-                    'price': prices[i + 1]
-                })
-            result_data = rsi_values
+        results = compute_indicators(timestamps, prices, indicators, period)
         
         result = {
             'currency_pair': currency_pair,
             'bank': bank,
-            'indicator': indicator,
             'period': period,
-            'data': result_data
+            'days': days,
+            'indicators': results
         }
         
+        # Single-indicator responses keep the original shape
+        if len(indicators) == 1:
+            result['indicator'] = indicators[0]
+            result['data'] = results[indicators[0]]
+        
         return Response(result)
 
 
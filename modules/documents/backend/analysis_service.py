@@ -18,11 +18,13 @@ from typing import Dict, List, Optional
 from PIL import Image
 import io
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from django.utils import timezone
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from .analysis_store import build_analysis_results, merge_summary, save_method_result
+
 logger = logging.getLogger('documents.analysis')
 
 
@@ -31,7 +33,8 @@ class OCRAnalysisService:
     Comprehensive OCR analysis service that runs multiple OCR methods
     and provides detailed comparison metrics
 
-    Results are stored in the database (Document.analysis_results) instead of cache
+    Results are stored in the database (DocumentAnalysisResult rows, with a compact
+    summary in Document.analysis_results) instead of cache
     """
 
     def __init__(self):
@@ -89,19 +92,22 @@ class OCRAnalysisService:
         else:
             return obj
 
-    def analyze_document(self, document, force_refresh: bool = False, methods_to_run: list = None, max_workers: int = 2) -> Dict:
+    def analyze_document(self, document, force_refresh: bool = False, methods_to_run: list = None, max_workers: int = 2, progress_callback=None) -> Dict:
         """
         Run OCR methods on a document (fast methods by default, or specified methods)
 
         Includes comprehensive error handling and fallbacks for each method
-        Results are stored in database (Document.analysis_results)
+        Results are stored in database (DocumentAnalysisResult + Document.analysis_results summary)
 
         Args:
             document: Document model instance
             force_refresh: If True, re-run analysis even if results exist in database
             methods_to_run: List of methods to run (default: ['paddleocr'] for fast initial load)
                           Available methods: 'paddleocr', 'tesseract', 'llama_vision', 'trocr', 'donut', 'layoutlmv3', 'surya', 'doctr', 'easyocr', 'ocrmypdf', 'hybrid'
-            max_workers: Maximum number of concurrent workers (default: 2, max: 5)
+            max_workers: Concurrent threads when the OCR worker pool is disabled (default: 2, max: 5).
+                         With the pool enabled, memory admission control decides concurrency.
+            progress_callback: Optional callable(method_name, result) invoked after each method
+                               result has been saved (used by OCRJobRunner to track job progress)
 
         Returns:
             Dictionary with analysis results for requested methods
@@ -120,6 +126,7 @@ class OCRAnalysisService:
 
             if all_methods_exist:
                 logger.info(f"Returning existing analysis from database for document {document_id}")
+                existing_results = build_analysis_results(document)
                 existing_results['from_database'] = True
                 existing_results['last_analysis_at'] = document.last_analysis_at.isoformat() if document.last_analysis_at else None
                 return existing_results
@@ -127,9 +134,28 @@ class OCRAnalysisService:
         logger.info(f"Running fresh analysis for document {document_id}")
         analysis_start_time = time.time()  # Track total analysis time
 
-        # Step 1: Assess image quality and get OCR recommendation
+        # Content-addressed cache: duplicate uploads of the same image reuse earlier work
+        from .ocr_result_cache import get_result_cache, file_sha256, CACHEABLE_METHODS
         image_path = document.file_path.path
-        quality_assessment = self.quality_service.assess_quality(image_path)
+        result_cache = get_result_cache()
+        image_hash = None
+        if result_cache:
+            try:
+                image_hash = file_sha256(image_path)
+            except OSError as e:
+                logger.warning(f"Could not hash {image_path} for OCR cache: {e}")
+                result_cache = None
+        quality_params = self.quality_service.cache_params()
+
+        # Step 1: Assess image quality and get OCR recommendation
+        quality_assessment = None
+        if result_cache:
+            quality_key = result_cache.make_key(image_hash, 'quality', quality_params)
+            quality_assessment = result_cache.get(quality_key)
+        if quality_assessment is None:
+            quality_assessment = self._make_json_serializable(self.quality_service.assess_quality(image_path))
+            if result_cache and quality_assessment.get('success'):
+                result_cache.put(quality_key, quality_assessment)
 
         logger.info(f"Quality assessment for {document_id}:")
         logger.info(f"  - Quality level: {quality_assessment.get('quality_level', 'unknown')}")
@@ -141,15 +167,28 @@ class OCRAnalysisService:
         # Step 2: Apply preprocessing if needed
         preprocessed_path = None
         if quality_assessment.get('success') and any(quality_assessment.get('preprocessing_needed', {}).values()):
-            logger.info("Applying preprocessing to improve OCR quality...")
-            preprocessing_result = self.quality_service.preprocess_image(image_path)
-
-            if preprocessing_result.get('success'):
-                preprocessed_path = preprocessing_result['preprocessed_path']
-                logger.info(f"Preprocessing applied: {preprocessing_result['preprocessing_applied']}")
-                logger.info(f"Using preprocessed image: {preprocessed_path}")
-            else:
-                logger.warning(f"Preprocessing failed: {preprocessing_result.get('error')}")
+            preprocess_key = None
+            if result_cache:
+                preprocess_key = result_cache.make_key(image_hash, 'preprocess', {
+                    **quality_params,
+                    'needed': quality_assessment.get('preprocessing_needed'),
+                })
+                preprocessed_path = result_cache.get_file(preprocess_key, '.png')
+                if preprocessed_path:
+                    logger.info(f"Using cached preprocessed image: {preprocessed_path}")
+
+            if not preprocessed_path:
+                logger.info("Applying preprocessing to improve OCR quality...")
+                preprocessing_result = self.quality_service.preprocess_image(image_path)
+
+                if preprocessing_result.get('success'):
+                    preprocessed_path = preprocessing_result['preprocessed_path']
+                    logger.info(f"Preprocessing applied: {preprocessing_result['preprocessing_applied']}")
+                    if preprocess_key:
+                        preprocessed_path = result_cache.put_file(preprocess_key, preprocessed_path, '.png')
+                    logger.info(f"Using preprocessed image: {preprocessed_path}")
+                else:
+                    logger.warning(f"Preprocessing failed: {preprocessing_result.get('error')}")
 
         # Use preprocessed image if available, otherwise use original
         ocr_image_path = preprocessed_path if preprocessed_path else image_path
@@ -176,23 +215,15 @@ class OCRAnalysisService:
             'methods_run': methods_to_run  # Track which methods were executed
         }
 
-        # Map method names to their analysis functions
-        method_map = {
-            'paddleocr': self._analyze_paddleocr,
-            'tesseract': self._analyze_tesseract,
-            'llama_vision': self._analyze_llama_vision,
-            'hybrid': self._analyze_hybrid,
-            'trocr': self._analyze_trocr,
-            'donut': self._analyze_donut,
-            'layoutlmv3': self._analyze_layoutlmv3,
-            'surya': self._analyze_surya,
-            'doctr': self._analyze_doctr,
-            'easyocr': self._analyze_easyocr,
-            'ocrmypdf': self._analyze_ocrmypdf
-        }
-
-        # Execute selected methods in parallel using ThreadPoolExecutor
-        logger.info(f"Running {len(methods_to_run)} methods in parallel: {', '.join(methods_to_run)} (max_workers={max_workers})")
+        # Execute selected methods through the persistent OCR worker pool (engines stay warm,
+        # memory admission control decides how many run at once). Fall back to in-process
+        # threads when the pool is disabled or unavailable.
+        from .ocr_worker_pool import get_worker_pool
+        pool = get_worker_pool()
+        if pool:
+            logger.info(f"Submitting {len(methods_to_run)} methods to OCR worker pool: {', '.join(methods_to_run)}")
+        else:
+            logger.info(f"Running {len(methods_to_run)} methods in-process: {', '.join(methods_to_run)} (max_workers={max_workers})")
 
         # Send WebSocket messages for queued methods
         for method_name in methods_to_run:
@@ -206,50 +237,44 @@ class OCRAnalysisService:
                 'status': 'queued'
             })
 
-        def run_method(method_name: str):
-            """Execute a single OCR method and return results"""
-            method_start = time.time()
-            try:
-                logger.info(f"[{method_name}] ⏱️  Started analysis for document {document.id}")
-
-                # Send WebSocket update: method started
+        # Methods with a cached result for identical image bytes + engine version skip the engines
+        future_to_method = {}
+        methods_to_execute = []
+        for method in methods_to_run:
+            cached = None
+            if result_cache and method in CACHEABLE_METHODS:
+                cached = result_cache.get(result_cache.method_key(image_hash, method))
+            if cached:
+                logger.info(f"[{method}] ♻️  Using cached result for identical image")
                 self._send_websocket_message(document.id, 'status', {
-                    'method': method_name,
+                    'method': method,
                     'status': 'running'
                 })
-                self._send_websocket_message(document.id, 'log', {
-                    'message': f'{method_name} işleniyor...',
-                    'level': 'info',
-                    'timestamp': timezone.now().isoformat()
-                })
+                cached['from_cache'] = True
+                future = Future()
+                future.set_result(cached)
+                future_to_method[future] = method
+            else:
+                methods_to_execute.append(method)
 
-                analysis_func = method_map.get(method_name)
-                if analysis_func:
-                    result = method_name, analysis_func(document)
-                    method_elapsed = time.time() - method_start
-                    logger.info(f"[{method_name}] ✅ Completed in {method_elapsed:.2f}s (wall clock)")
-                    return result
-                else:
-                    logger.warning(f"[{method_name}] ❌ Unknown method")
-                    return method_name, self._get_error_result(f"Unknown method: {method_name}")
-            except Exception as e:
-                method_elapsed = time.time() - method_start
-                logger.error(f"[{method_name}] ❌ Failed after {method_elapsed:.2f}s: {e}")
-                return method_name, self._get_error_result(str(e))
-
-        # Execute methods in parallel (max 2 concurrent workers to avoid memory issues)
-        # Each deep learning model (TrOCR, LayoutLMv3, EasyOCR) can use 1-3GB RAM
-        # Running too many in parallel causes OOM crashes (exit code 251)
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all method tasks
-            future_to_method = {
-                executor.submit(run_method, method): method
-                for method in methods_to_run
-            }
+        executor = None
+        if pool:
+            for method in methods_to_execute:
+                future_to_method[pool.submit(method, document.pk)] = method
+        elif methods_to_execute:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            for method in methods_to_execute:
+                future_to_method[executor.submit(self.run_method, method, document)] = method
 
+        try:
             # Collect results as they complete and save to database incrementally
             for future in as_completed(future_to_method):
-                method_name, result = future.result()
+                method_name = future_to_method[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"[{method_name}] ❌ Worker failure: {e}")
+                    result = self._get_error_result(str(e))
                 # Add timestamp to each method result
                 result['analyzed_at'] = timezone.now().isoformat()
                 results[method_name] = result
@@ -277,36 +302,23 @@ class OCRAnalysisService:
                     'data': self._make_json_serializable(result)
                 })
 
-                # Save to database incrementally after each method completes
-                # This allows polling endpoint to see real-time progress
+                # Save to database incrementally after each method completes: upsert this
+                # method's row and merge its summary key (polling endpoint sees real-time progress)
                 try:
-                    # Refresh document from DB to avoid race conditions
-                    document.refresh_from_db()
-
-                    # Convert current results to JSON-serializable format
-                    serializable_results = self._make_json_serializable(results)
-
-                    # Merge with existing results if they exist
-                    if document.analysis_results:
-                        merged_results = document.analysis_results.copy()
-                        merged_results[method_name] = serializable_results[method_name]
-                        # Update meta fields
-                        merged_results['document_id'] = serializable_results['document_id']
-                        merged_results['filename'] = serializable_results['filename']
-                        merged_results['quality_assessment'] = serializable_results['quality_assessment']
-                        merged_results['preprocessed'] = serializable_results['preprocessed']
-                        merged_results['analysis_errors'] = serializable_results['analysis_errors']
-                        document.analysis_results = merged_results
-                    else:
-                        document.analysis_results = serializable_results
-
-                    document.last_analysis_at = timezone.now()
-                    document.save(update_fields=['analysis_results', 'last_analysis_at'])
-
+                    save_method_result(document, method_name, self._make_json_serializable(result))
                     logger.info(f"💾 Saved {method_name} results to database (incremental save)")
                 except Exception as save_error:
                     logger.error(f"Failed to save {method_name} results incrementally: {save_error}")
 
+                if progress_callback:
+                    try:
+                        progress_callback(method_name, result)
+                    except Exception as callback_error:
+                        logger.error(f"Progress callback failed for {method_name}: {callback_error}")
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
+
         # Check if any method is still processing
         try:
             results['has_processing'] = any(
@@ -317,30 +329,12 @@ class OCRAnalysisService:
             logger.error(f"Processing status check failed: {e}")
             results['has_processing'] = False
 
-        # Save results to database
-        # Convert to JSON-serializable format (handle numpy types)
+        # Save summary meta fields (method results were saved as they completed)
         serializable_results = self._make_json_serializable(results)
-
-        # Merge with existing results if they exist (to preserve previously run methods)
-        if document.analysis_results:
-            # Merge new results with existing ones
-            merged_results = document.analysis_results.copy()
-            for method in methods_to_run:
-                if method in serializable_results:
-                    merged_results[method] = serializable_results[method]
-            # Update meta fields
-            merged_results['document_id'] = serializable_results['document_id']
-            merged_results['filename'] = serializable_results['filename']
-            merged_results['quality_assessment'] = serializable_results['quality_assessment']
-            merged_results['preprocessed'] = serializable_results['preprocessed']
-            merged_results['has_processing'] = serializable_results['has_processing']
-            merged_results['analysis_errors'] = serializable_results['analysis_errors']
-            document.analysis_results = merged_results
-        else:
-            document.analysis_results = serializable_results
-
-        document.last_analysis_at = timezone.now()
-        document.save(update_fields=['analysis_results', 'last_analysis_at'])
+        merge_summary(document, {
+            field: serializable_results[field]
+            for field in ('document_id', 'filename', 'quality_assessment', 'preprocessed', 'has_processing', 'analysis_errors')
+        })
 
         total_analysis_time = time.time() - analysis_start_time
         logger.info(f"✅ Analysis completed for document {document_id} in {total_analysis_time:.2f}s (wall clock time)")
@@ -358,6 +352,73 @@ class OCRAnalysisService:
 
         return results
 
+    def run_method(self, method_name: str, document) -> Dict:
+        """Execute a single OCR method and return its result (used by OCR pool workers)"""
+        method_map = {
+            'paddleocr': self._analyze_paddleocr,
+            'tesseract': self._analyze_tesseract,
+            'llama_vision': self._analyze_llama_vision,
+            'hybrid': self._analyze_hybrid,
+            'trocr': self._analyze_trocr,
+            'donut': self._analyze_donut,
+            'layoutlmv3': self._analyze_layoutlmv3,
+            'surya': self._analyze_surya,
+            'doctr': self._analyze_doctr,
+            'easyocr': self._analyze_easyocr,
+            'ocrmypdf': self._analyze_ocrmypdf
+        }
+
+        method_start = time.time()
+        try:
+            logger.info(f"[{method_name}] ⏱️  Started analysis for document {document.id}")
+
+            # Send WebSocket update: method started
+            self._send_websocket_message(document.id, 'status', {
+                'method': method_name,
+                'status': 'running'
+            })
+            self._send_websocket_message(document.id, 'log', {
+                'message': f'{method_name} işleniyor...',
+                'level': 'info',
+                'timestamp': timezone.now().isoformat()
+            })
+
+            analysis_func = method_map.get(method_name)
+            if analysis_func:
+                result = analysis_func(document)
+                method_elapsed = time.time() - method_start
+                logger.info(f"[{method_name}] ✅ Completed in {method_elapsed:.2f}s (wall clock)")
+                self._store_cached_result(method_name, document, result)
+                return result
+            else:
+                logger.warning(f"[{method_name}] ❌ Unknown method")
+                return self._get_error_result(f"Unknown method: {method_name}")
+        except Exception as e:
+            method_elapsed = time.time() - method_start
+            logger.error(f"[{method_name}] ❌ Failed after {method_elapsed:.2f}s: {e}")
+            return self._get_error_result(str(e))
+
+    def _store_cached_result(self, method_name: str, document, result: Dict):
+        """
+        Store a successful method result in the content-addressed OCR cache
+
+        Only engine output for the image bytes is cached; results built from text
+        stored on this document (from_document) would leak into its duplicates.
+        """
+        from .ocr_result_cache import get_result_cache, file_sha256, CACHEABLE_METHODS
+
+        if method_name not in CACHEABLE_METHODS or result.get('status') != 'success':
+            return
+        if result.get('from_document'):
+            return
+        try:
+            result_cache = get_result_cache()
+            if result_cache:
+                key = result_cache.method_key(file_sha256(document.file_path.path), method_name)
+                result_cache.put(key, self._make_json_serializable(result))
+        except Exception as e:
+            logger.warning(f"[{method_name}] Failed to cache result: {e}")
+
     def _get_error_result(self, error_msg: str) -> Dict:
         """Return standardized error result structure"""
         return {
@@ -424,7 +485,7 @@ class OCRAnalysisService:
     def _analyze_llama_vision(self, document) -> Dict:
         """Analyze using Llama 3.2-Vision (Meta's primary vision model)"""
         try:
-            from .ollama_service import OllamaService
+            from .ocr_worker_pool import get_ollama_service
 
             # Check if Ollama result exists for llama3.2-vision
             if document.ollama_text and document.ollama_model == 'llama3.2-vision':
@@ -439,11 +500,12 @@ class OCRAnalysisService:
                     'char_count': len(text) if text else 0,
                     'word_count': len(text.split()) if text else 0,
                     'processing_time': 0,  # Already processed
+                    'from_document': True,
                     **findings
                 }
 
             # Run fresh Llama 3.2-Vision analysis
-            ollama = OllamaService()
+            ollama = get_ollama_service()
             if not ollama.is_available():
                 return {
                     'status': 'error',
@@ -507,19 +569,20 @@ class OCRAnalysisService:
     def _analyze_hybrid(self, document) -> Dict:
         """Analyze using Hybrid approach (PaddleOCR + Llama Vision parsing)"""
         try:
-            from .ollama_service import OllamaService
-            from .paddleocr_service import PaddleOCRService
+            from .ocr_worker_pool import get_engine, get_ollama_service
 
             # Get PaddleOCR text (run it inline if needed)
             paddle_text = None
+            from_document = False
 
             # Try to get PaddleOCR text from document if it was stored
             if hasattr(document, 'paddle_text') and document.paddle_text:
                 paddle_text = document.paddle_text
+                from_document = True
             else:
                 # Run PaddleOCR inline to get the text
                 try:
-                    paddle = PaddleOCRService(lang='en', use_structure=False)
+                    paddle = get_engine('paddleocr_plain')
                     if paddle.is_available():
                         ocr_result = paddle.get_text_with_layout(document.file_path.path)
                         if ocr_result:
@@ -535,7 +598,7 @@ class OCRAnalysisService:
                     'fields_extracted': 0
                 }
 
-            ollama = OllamaService()
+            ollama = get_ollama_service()
             if not ollama.is_available():
                 return {
                     'status': 'error',
@@ -615,6 +678,7 @@ class OCRAnalysisService:
                     'fields_extracted': fields_count,
                     'processing_time': processing_time,
                     'model_info': 'PaddleOCR + Llama 3.2-Vision',  # Model combination used
+                    'from_document': from_document,
                     **findings
                 }
             else:
@@ -637,7 +701,7 @@ class OCRAnalysisService:
     def _analyze_paddleocr(self, document) -> Dict:
         """Analyze using PaddleOCR (multilingual OCR with 80+ language support)"""
         try:
-            from .paddleocr_service import PaddleOCRService
+            from .ocr_worker_pool import get_engine
 
             # Check if already processed
             if hasattr(document, 'paddle_text') and document.paddle_text:
@@ -652,11 +716,12 @@ class OCRAnalysisService:
                     'char_count': len(text) if text else 0,
                     'word_count': len(text.split()) if text else 0,
                     'processing_time': 0,  # Already processed
+                    'from_document': True,
                     **findings
                 }
 
-            # Initialize PaddleOCR service with PP-Structure support
-            paddle = PaddleOCRService(lang='en', use_structure=True)
+            # Shared PaddleOCR engine with PP-Structure support (stays warm across requests)
+            paddle = get_engine('paddleocr')
 
             if not paddle.is_available():
                 return {
@@ -1111,11 +1176,10 @@ class OCRAnalysisService:
         This provides much better results than processing the entire image at once
         """
         try:
-            from .trocr_service import TrOCRService
-            from .paddleocr_service import PaddleOCRService
+            from .ocr_worker_pool import get_engine
             from PIL import Image
 
-            trocr = TrOCRService(language='tr')
+            trocr = get_engine('trocr')
             if not trocr.is_available():
                 return {
                     'status': 'error',
@@ -1129,9 +1193,8 @@ class OCRAnalysisService:
 
             # Use PaddleOCR to detect text regions (bounding boxes)
             logger.info("TrOCR: Using PaddleOCR for line detection")
-            paddle = PaddleOCRService(lang='en')
+            paddle = get_engine('paddleocr_plain')
             if paddle.is_available():
-                paddle.initialize_ocr()
                 paddle_result = paddle.process_image(document.file_path.path)
 
                 if paddle_result.get('success') and paddle_result.get('lines'):
@@ -1208,9 +1271,9 @@ class OCRAnalysisService:
     def _analyze_donut(self, document) -> Dict:
         """Analyze using Donut (OCR-free document understanding)"""
         try:
-            from .donut_service import DonutService
+            from .ocr_worker_pool import get_engine
 
-            donut = DonutService(language='tr')
+            donut = get_engine('donut')
             if not donut.is_available():
                 return {
                     'status': 'error',
@@ -1280,9 +1343,9 @@ class OCRAnalysisService:
     def _analyze_layoutlmv3(self, document) -> Dict:
         """Analyze using LayoutLMv3 (layout-aware extraction)"""
         try:
-            from .layoutlmv3_service import LayoutLMv3Service
+            from .ocr_worker_pool import get_engine
 
-            layoutlm = LayoutLMv3Service(language='tr')
+            layoutlm = get_engine('layoutlmv3')
             if not layoutlm.is_available():
                 return {
                     'status': 'error',
@@ -1339,9 +1402,9 @@ class OCRAnalysisService:
     def _analyze_surya(self, document) -> Dict:
         """Analyze using Surya OCR (all-in-one solution with 90+ language support)"""
         try:
-            from .surya_service import SuryaOCRService
+            from .ocr_worker_pool import get_engine
 
-            surya = SuryaOCRService()
+            surya = get_engine('surya')
 
             # Check if Surya is available
             if not surya.is_available():
@@ -1402,9 +1465,9 @@ class OCRAnalysisService:
     def _analyze_doctr(self, document) -> Dict:
         """Analyze using DocTR (modern PyTorch-based OCR)"""
         try:
-            from .doctr_service import DocTROCRService
+            from .ocr_worker_pool import get_engine
 
-            doctr = DocTROCRService()
+            doctr = get_engine('doctr')
             start_time = time.time()
             result = doctr.process_image(document.file_path.path)
             processing_time = time.time() - start_time
@@ -1453,9 +1516,9 @@ class OCRAnalysisService:
     def _analyze_easyocr(self, document) -> Dict:
         """Analyze using EasyOCR (multilingual fallback OCR)"""
         try:
-            from .easyocr_service import EasyOCRService
+            from .ocr_worker_pool import get_engine
 
-            easyocr = EasyOCRService()
+            easyocr = get_engine('easyocr')
             start_time = time.time()
             result = easyocr.process_image(document.file_path.path)
             processing_time = time.time() - start_time
@@ -1505,9 +1568,9 @@ class OCRAnalysisService:
     def _analyze_ocrmypdf(self, document) -> Dict:
         """Analyze using OCRMyPDF (PDF-optimized OCR with Tesseract backend)"""
         try:
-            from .ocrmypdf_service import OCRMyPDFService
+            from .ocr_worker_pool import get_engine
 
-            ocrmypdf = OCRMyPDFService()
+            ocrmypdf = get_engine('ocrmypdf')
             start_time = time.time()
             result = ocrmypdf.process_image(document.file_path.path)
             processing_time = time.time() - start_time
@@ -0,0 +1,110 @@
+"""
+Analysis Result Store - per-method OCR comparison results
+
+Full method payloads are upserted into DocumentAnalysisResult (one row per
+document + method). Document.analysis_results only keeps a compact summary
+(quality/meta fields plus status, counts and timing per method), merged
+key-by-key with a single JSONB `||` UPDATE so concurrently finishing methods
+never read-modify-write the whole document.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Document, DocumentAnalysisResult
+
+logger = logging.getLogger('documents.analysis')
+
+ANALYSIS_METHODS = [
+    'tesseract', 'paddleocr', 'llama_vision', 'hybrid', 'trocr', 'donut',
+    'layoutlmv3', 'surya', 'doctr', 'easyocr', 'ocrmypdf',
+]
+
+# Per-method keys copied into the Document summary
+SUMMARY_FIELDS = (
+    'status', 'error', 'char_count', 'word_count', 'confidence',
+    'processing_time', 'analyzed_at', 'from_cache',
+)
+
+
+def summarize_result(result: Dict) -> Dict:
+    """Compact summary of a method result for Document.analysis_results"""
+    return {field: result.get(field) for field in SUMMARY_FIELDS if field in result}
+
+
+def merge_summary(document, patch: Dict):
+    """Atomically merge top-level keys into Document.analysis_results and bump last_analysis_at"""
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {Document._meta.db_table} "
+                "SET analysis_results = COALESCE(analysis_results, '{}'::jsonb) || %s::jsonb, "
+                "last_analysis_at = %s WHERE id = %s",
+                [json.dumps(patch, default=str), now, document.pk],
+            )
+    else:
+        with transaction.atomic():
+            current = Document.objects.select_for_update().values_list(
+                'analysis_results', flat=True
+            ).get(pk=document.pk) or {}
+            Document.objects.filter(pk=document.pk).update(
+                analysis_results={**current, **patch}, last_analysis_at=now
+            )
+
+    # Keep the in-memory instance in step without re-reading the row
+    document.analysis_results = {**(document.analysis_results or {}), **patch}
+    document.last_analysis_at = now
+
+
+def save_method_result(document, method: str, result: Dict):
+    """Upsert one method's full result and merge its summary into the document"""
+    DocumentAnalysisResult.objects.update_or_create(
+        document=document,
+        method=method,
+        defaults={
+            'status': result.get('status') or 'success',
+            'result': result,
+            'analyzed_at': timezone.now(),
+        },
+    )
+    merge_summary(document, {method: summarize_result(result)})
+
+
+def load_method_results(document, methods: Optional[Iterable[str]] = None, since=None) -> Dict:
+    """
+    Full per-method results for a document
+
+    Args:
+        methods: Restrict to these methods (default: all)
+        since: Only rows updated after this datetime (for incremental polling)
+
+    Returns:
+        {'results': {method: result}, 'cursor': latest updated_at (or since)}
+    """
+    queryset = DocumentAnalysisResult.objects.filter(document=document)
+    if methods is not None:
+        queryset = queryset.filter(method__in=list(methods))
+    if since is not None:
+        queryset = queryset.filter(updated_at__gt=since)
+
+    results = {}
+    cursor = since
+    for method, result, updated_at in queryset.values_list('method', 'result', 'updated_at'):
+        results[method] = result
+        if cursor is None or updated_at > cursor:
+            cursor = updated_at
+    return {'results': results, 'cursor': cursor}
+
+
+def build_analysis_results(document) -> Dict:
+    """Summary meta fields combined with full method payloads (legacy analysis_results shape)"""
+    results = dict(document.analysis_results or {})
+    for method in ANALYSIS_METHODS:
+        results[method] = {}
+    results.update(load_method_results(document)['results'])
+    return results
@@ -9,16 +9,15 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.db import models
 from decimal import Decimal
 import json
 import logging
-import threading
 
 from .models import Document, ProcessingStatus
 from .ocr_service import OCRProcessor
 from .utils import ThumbnailGenerator
 from .thumbnail_service import EnhancedThumbnailGenerator
+from .search_service import search_documents as run_document_search
 
 logger = logging.getLogger('documents.api')
 
@@ -474,11 +473,7 @@ def search_documents(request):
         documents = Document.objects.filter(user=request.user)
         
         if query:
-            documents = documents.filter(
-                models.Q(original_filename__icontains=query) |
-                models.Q(ocr_text__icontains=query) |
-                models.Q(parsed_receipt__store_name__icontains=query)
-            )
+            documents = run_document_search(documents, query, highlight=True)
         
         if doc_type:
             documents = documents.filter(document_type=doc_type)
@@ -498,6 +493,9 @@ def search_documents(request):
                 'has_ocr': bool(doc.ocr_text),
                 'thumbnail_url': doc.thumbnail_path.url if doc.thumbnail_path else None
             }
+            if query:
+                result['rank'] = round(float(doc.search_rank or 0), 4)
+                result['highlight'] = doc.search_headline or ''
             
             # Add receipt data if available
             if hasattr(doc, 'parsed_receipt'):
@@ -944,7 +942,7 @@ def run_analysis_methods(request, document_id):
         force_refresh: Boolean to force re-run even if cached
 
     Returns:
-        JSON response with analysis results for requested methods
+        JSON response with the queued OCR jobs (results arrive via WebSocket)
     """
     try:
         document = get_object_or_404(Document, id=document_id, user=request.user, is_deleted=False)
@@ -958,7 +956,7 @@ def run_analysis_methods(request, document_id):
         # Get requested methods
         methods_to_run = data.get('methods', [])
         force_refresh = data.get('force_refresh', False)
-        max_workers = data.get('max_workers', 2)  # Get user-defined max_workers (default: 2)
+        max_workers = data.get('max_workers', 2)  # Accepted for compatibility - the OCR worker pool controls concurrency
 
         # Validate methods parameter
         if not methods_to_run or not isinstance(methods_to_run, list):
@@ -984,57 +982,30 @@ def run_analysis_methods(request, document_id):
                 'error': f'Invalid methods: {", ".join(invalid_methods)}. Valid methods: {", ".join(valid_methods)}'
             }, status=400)
 
-        logger.info(f"Running on-demand analysis for document {document_id} with methods: {', '.join(methods_to_run)} (max_workers={max_workers})")
+        logger.info(f"Running on-demand analysis for document {document_id} with methods: {', '.join(methods_to_run)}")
 
-        # Define background analysis function
-        def run_analysis_in_background():
-            """Run analysis in background thread - continues even if HTTP connection is lost"""
-            import asyncio
-            try:
-                # Create new event loop for this thread (required for Django Channels WebSocket)
-                # Background threads don't have event loops by default
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-
-                from .analysis_service import OCRAnalysisService
-                analyzer = OCRAnalysisService()
-                analyzer.analyze_document(
-                    document,
-                    force_refresh=force_refresh,
-                    methods_to_run=methods_to_run,
-                    max_workers=max_workers
-                )
-                logger.info(f"✅ Background analysis completed for document {document_id}")
-            except Exception as e:
-                logger.error(f"❌ Background analysis failed for document {document_id}: {str(e)}", exc_info=True)
-            finally:
-                # Clean up event loop
-                try:
-                    if loop and not loop.is_closed():
-                        loop.close()
-                except:
-                    pass
-
-        # Start analysis in background daemon thread
-        # Daemon thread will continue even if HTTP connection is lost (page refresh)
-        analysis_thread = threading.Thread(
-            target=run_analysis_in_background,
-            daemon=True,
-            name=f"analysis-{document_id}"
+        # Queue durable OCR jobs (deduplicated per document + method) instead of a daemon thread.
+        # OCRJobRunner executes them and streams progress via WebSocket (ocr_analysis_<id>).
+        from .models import OCRJob
+        from .ocr_job_queue import enqueue_analysis, serialize_job
+        queued = enqueue_analysis(
+            document,
+            methods_to_run,
+            user=request.user,
+            priority=OCRJob.PRIORITY_INTERACTIVE,
+            force_refresh=force_refresh
         )
-        analysis_thread.start()
 
-        logger.info(f"🚀 Analysis started in background thread for document {document_id}")
+        logger.info(f"🚀 Analysis queued for document {document_id} (created: {queued['created']}, deduplicated: {queued['deduplicated']})")
 
         # Return immediately - frontend will receive updates via WebSocket
         return JsonResponse({
             'success': True,
-            'message': f'Analysis started for {len(methods_to_run)} methods. Real-time updates via WebSocket.',
+            'message': f'Analysis queued for {len(methods_to_run)} methods. Real-time updates via WebSocket.',
             'methods': methods_to_run,
-            'document_id': document_id
+            'document_id': document_id,
+            'jobs': [serialize_job(job) for job in queued['jobs']],
+            'deduplicated': queued['deduplicated']
         })
 
     except Exception as e:
@@ -1051,29 +1022,44 @@ def get_analysis_status(request, document_id):
     GET endpoint to check current analysis status and results
     Legacy endpoint - WebSocket provides real-time updates
 
+    Query params:
+        since: Cursor from a previous response - only method results updated after it are returned
+
     Returns:
         JSON response with current analysis results from database
     """
     try:
         document = get_object_or_404(Document, id=document_id, user=request.user, is_deleted=False)
 
-        # Get current analysis results from database
+        # Compact summary lives on the document; full method payloads are separate rows
         analysis_results = document.analysis_results or {}
 
-        # Extract method results
-        method_results = {}
-        for method in ['tesseract', 'paddleocr', 'llama_vision', 'hybrid', 'trocr', 'donut', 'layoutlmv3', 'surya', 'doctr', 'easyocr', 'ocrmypdf']:
-            if method in analysis_results:
-                method_results[method] = analysis_results[method]
-
-        # Check if any methods are still processing
-        has_processing = analysis_results.get('has_processing', False)
+        since = None
+        if request.GET.get('since'):
+            from django.utils.dateparse import parse_datetime
+            since = parse_datetime(request.GET['since'])
+            if since is None:
+                return JsonResponse({'success': False, 'error': 'Invalid since cursor'}, status=400)
+
+        from .analysis_store import load_method_results, ANALYSIS_METHODS
+        changed = load_method_results(document, methods=ANALYSIS_METHODS, since=since)
+        method_results = changed['results']
+
+        # Check if any methods are still processing (stored flag or pending queue jobs)
+        from .ocr_job_queue import get_document_jobs
+        jobs = get_document_jobs(document)
+        has_processing = analysis_results.get('has_processing', False) or any(
+            job['status'] in ('queued', 'running') for job in jobs
+        )
 
         return JsonResponse({
             'success': True,
             'results': method_results,
+            'summary': {method: analysis_results[method] for method in ANALYSIS_METHODS if method in analysis_results},
+            'cursor': changed['cursor'].isoformat() if changed['cursor'] else None,
             'last_analysis_at': document.last_analysis_at.isoformat() if document.last_analysis_at else None,
             'has_processing': has_processing,
+            'jobs': jobs,
             'document': {
                 'id': str(document.id),
                 'filename': document.original_filename
@@ -6,7 +6,9 @@ UNIBOS Module Integration
 """
 
 from django.apps import AppConfig
+from django.conf import settings
 from pathlib import Path
+import os
 import sys
 
 
@@ -26,10 +28,32 @@ class DocumentsConfig(AppConfig):
         # Initialize UNIBOS module
         self._initialize_module()
 
-        # Import and register signals
-        # Note: documents module doesn't have a signals.py currently
-        # If you add signals in the future, uncomment:
-        # from . import signals  # noqa
+        # Import and register signals (search index maintenance)
+        from . import signals  # noqa
+
+        # Resume queued and abandoned OCR jobs without waiting for the next enqueue
+        self._start_ocr_job_runner()
+
+    def _start_ocr_job_runner(self):
+        """
+        Start the embedded OCR job runner in serving processes
+
+        Only when OCR_JOB_RUNNER_EMBEDDED is on and this is a web server process
+        (runserver child, uvicorn, gunicorn or daphne); management commands such
+        as migrate never start it. With the runner disabled, run
+        `manage.py run_ocr_jobs` as its own service instead.
+        """
+        if not getattr(settings, 'OCR_JOB_RUNNER_EMBEDDED', True):
+            return
+
+        program = os.path.basename(sys.argv[0]) if sys.argv else ''
+        is_server = os.environ.get('RUN_MAIN') == 'true' or \
+            any(server in program for server in ('uvicorn', 'gunicorn', 'daphne'))
+        if not is_server:
+            return
+
+        from .ocr_job_queue import OCRJobRunner
+        OCRJobRunner.get_instance().start()
 
     def _add_sdk_to_path(self):
         """Add UNIBOS SDK to Python path if not already there"""
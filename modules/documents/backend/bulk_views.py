@@ -15,7 +15,7 @@ import json
 import csv
 import logging
 
-from .models import Document
+from .models import Document, DocumentBatch
 from core.system.web_ui.backend.views import BaseUIView
 
 logger = logging.getLogger('documents.bulk')
@@ -57,7 +57,7 @@ class BulkDeleteView(LoginRequiredMixin, View):
 
 
 class BulkReprocessView(LoginRequiredMixin, View):
-    """Handle bulk OCR reprocessing"""
+    """Queue bulk OCR reprocessing and return the batch id immediately"""
 
     def post(self, request):
         try:
@@ -74,52 +74,17 @@ class BulkReprocessView(LoginRequiredMixin, View):
                 is_deleted=False
             )
 
-            processed = 0
-            failed = 0
+            # Queue for the OCR job runner - progress streams to ws/ocr/batch/<batch_id>/
+            from .ocr_job_queue import enqueue_reprocess
+            queued = enqueue_reprocess(documents, request.user)
 
-            # Import OCR processor
-            from .ocr_service import OCRProcessor
-            ocr_processor = OCRProcessor()
-
-            # Process each document
-            for doc in documents:
-                try:
-                    # Process with OCR
-                    result = ocr_processor.process_document(
-                        doc.file_path.path,
-                        document_type=doc.document_type,
-                        force_ocr=True,
-                        document_instance=doc
-                    )
-
-                    if result and result.get('success'):
-                        # OCR processor already saved the document with dual results
-                        # Just refresh from DB to get updated values
-                        doc.refresh_from_db()
-
-                        # Check if document was deleted during processing
-                        if doc.is_deleted:
-                            logger.info(f"document {doc.id} was deleted during processing, skipping")
-                            continue
-
-                        processed += 1
-                    else:
-                        doc.processing_status = 'failed'
-                        doc.save()
-                        failed += 1
-
-                except Exception as e:
-                    logger.error(f"error processing document {doc.id}: {e}")
-                    doc.processing_status = 'failed'
-                    doc.save()
-                    failed += 1
-
-            logger.info(f"user {request.user.id} processed {processed} documents, {failed} failed")
+            logger.info(f"user {request.user.id} queued {queued['queued']} documents for reprocessing (batch {queued['batch'].pk})")
 
             return JsonResponse({
                 'success': True,
-                'processed': processed,
-                'failed': failed
+                'batch_id': queued['batch'].pk,
+                'queued': queued['queued'],
+                'deduplicated': queued['deduplicated']
             })
 
         except Exception as e:
@@ -128,7 +93,7 @@ class BulkReprocessView(LoginRequiredMixin, View):
 
 
 class BulkReprocessPendingView(LoginRequiredMixin, View):
-    """Handle bulk OCR reprocessing for all pending documents"""
+    """Queue OCR reprocessing for all pending documents and return the batch id immediately"""
 
     def post(self, request):
         try:
@@ -139,52 +104,17 @@ class BulkReprocessPendingView(LoginRequiredMixin, View):
                 processing_status='pending'
             )
 
-            processed = 0
-            failed = 0
+            # Queue for the OCR job runner - progress streams to ws/ocr/batch/<batch_id>/
+            from .ocr_job_queue import enqueue_reprocess
+            queued = enqueue_reprocess(documents, request.user, batch_name='reprocess pending')
 
-            # Import OCR processor
-            from .ocr_service import OCRProcessor
-            ocr_processor = OCRProcessor()
-
-            # Process each document
-            for doc in documents:
-                try:
-                    # Process with OCR
-                    result = ocr_processor.process_document(
-                        doc.file_path.path,
-                        document_type=doc.document_type,
-                        force_ocr=True,
-                        document_instance=doc
-                    )
-
-                    if result and result.get('success'):
-                        # OCR processor already saved the document with dual results
-                        # Just refresh from DB to get updated values
-                        doc.refresh_from_db()
-
-                        # Check if document was deleted during processing
-                        if doc.is_deleted:
-                            logger.info(f"document {doc.id} was deleted during processing, skipping")
-                            continue
-
-                        processed += 1
-                    else:
-                        doc.processing_status = 'failed'
-                        doc.save()
-                        failed += 1
-
-                except Exception as e:
-                    logger.error(f"error processing document {doc.id}: {e}")
-                    doc.processing_status = 'failed'
-                    doc.save()
-                    failed += 1
-
-            logger.info(f"user {request.user.id} processed {processed} pending documents, {failed} failed")
+            logger.info(f"user {request.user.id} queued {queued['queued']} pending documents for reprocessing (batch {queued['batch'].pk})")
 
             return JsonResponse({
                 'success': True,
-                'processed': processed,
-                'failed': failed
+                'batch_id': queued['batch'].pk,
+                'queued': queued['queued'],
+                'deduplicated': queued['deduplicated']
             })
 
         except Exception as e:
@@ -192,6 +122,22 @@ class BulkReprocessPendingView(LoginRequiredMixin, View):
             return JsonResponse({'success': False, 'error': str(e)})
 
 
+class BulkReprocessStatusView(LoginRequiredMixin, View):
+    """Progress of a bulk reprocess batch (polling fallback for the batch WebSocket)"""
+
+    def get(self, request, batch_id):
+        try:
+            batch = DocumentBatch.objects.get(pk=batch_id, user=request.user)
+        except DocumentBatch.DoesNotExist:
+            return JsonResponse({'success': False, 'error': 'batch not found'}, status=404)
+
+        from .ocr_job_queue import get_batch_progress
+        return JsonResponse({
+            'success': True,
+            **get_batch_progress(batch)
+        })
+
+
 class RecycleBinView(LoginRequiredMixin, BaseUIView):
     """View for recycle bin (soft deleted documents)"""
     template_name = 'documents/recycle_bin.html'
@@ -3,8 +3,11 @@ WebSocket consumers for real-time OCR analysis updates
 """
 import json
 import logging
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .models import DocumentBatch
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,3 +86,80 @@ class OCRAnalysisConsumer(AsyncWebsocketConsumer):
             'type': 'complete',
             'message': event.get('message', 'Analysis completed')
         }))
+
+
+class OCRBatchConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for bulk reprocess progress
+
+    Frontend connects to: ws://localhost:8000/ws/ocr/batch/<batch_id>/
+
+    Messages sent to frontend:
+    - progress: {"type": "progress", "document_id": "...", "status": "completed", "processed": 3, "failed": 0, "total": 10}
+    - complete: {"type": "complete", "processed": 9, "failed": 1, "total": 10}
+    """
+
+    async def connect(self):
+        """Accept WebSocket connection and join batch-specific group"""
+        self.user = self.scope.get('user')
+        self.batch_id = self.scope['url_route']['kwargs']['batch_id']
+        self.room_group_name = f'ocr_batch_{self.batch_id}'
+        self.joined = False
+
+        # Only the owner of the batch may follow its progress
+        if not await self.verify_batch_access():
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+
+        self.joined = True
+        await self.accept()
+        logger.info(f"WebSocket connected for batch {self.batch_id}")
+
+    async def disconnect(self, close_code):
+        """Leave batch group on disconnect"""
+        if not self.joined:
+            return
+        await self.channel_layer.group_discard(
+            self.room_group_name,
+            self.channel_name
+        )
+
+    async def receive(self, text_data):
+        """Handle messages from WebSocket (not used in this implementation)"""
+        pass
+
+    async def batch_progress(self, event):
+        """Send per-document progress to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'progress',
+            'document_id': event['document_id'],
+            'status': event['status'],
+            'error': event.get('error', ''),
+            'processed': event['processed'],
+            'failed': event['failed'],
+            'total': event['total']
+        }))
+
+    async def batch_complete(self, event):
+        """Send batch completion to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'complete',
+            'processed': event['processed'],
+            'failed': event['failed'],
+            'total': event['total']
+        }))
+
+    @database_sync_to_async
+    def verify_batch_access(self):
+        """Verify the connecting user owns the batch"""
+        if self.user is None or not self.user.is_authenticated:
+            return False
+        try:
+            return DocumentBatch.objects.filter(id=self.batch_id, user=self.user).exists()
+        except (ValueError, TypeError):
+            return False
@@ -27,6 +27,9 @@ class ImageQualityService:
     MIN_DPI_HIGH_QUALITY = 200
     MIN_DPI_MEDIUM_QUALITY = 150
 
+    # Bump when assessment/preprocessing logic changes (invalidates cached outputs)
+    PREPROCESSING_VERSION = 1
+
     def __init__(self):
         """Initialize the image quality service"""
         self.cv2_available = False
@@ -38,6 +41,18 @@ class ImageQualityService:
         except ImportError:
             logger.warning("OpenCV not available. Install with: pip install opencv-python")
 
+    def cache_params(self) -> Dict:
+        """Parameters that determine assessment/preprocessing output (part of OCR cache keys)"""
+        return {
+            'version': self.PREPROCESSING_VERSION,
+            'cv2': self.cv2_available,
+            'blur_high': self.BLUR_THRESHOLD_HIGH,
+            'blur_low': self.BLUR_THRESHOLD_LOW,
+            'contrast_low': self.CONTRAST_THRESHOLD_LOW,
+            'dpi_high': self.MIN_DPI_HIGH_QUALITY,
+            'dpi_medium': self.MIN_DPI_MEDIUM_QUALITY,
+        }
+
     def assess_quality(self, image_path: str) -> Dict:
         """
         Assess image quality and recommend OCR method
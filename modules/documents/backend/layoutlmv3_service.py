@@ -239,10 +239,10 @@ class LayoutLMv3Service:
         """
         try:
             # Use PaddleOCR to get words and boxes
-            from .paddleocr_service import PaddleOCRService
+            from .ocr_worker_pool import get_engine
 
-            paddle = PaddleOCRService(lang='en', use_structure=False)
-            if not paddle.is_available() or not paddle.initialize_ocr():
+            paddle = get_engine('paddleocr_plain')
+            if not paddle.is_available() or (paddle.ocr is None and not paddle.initialize_ocr()):
                 return {
                     'success': False,
                     'error': 'PaddleOCR not available for text extraction',
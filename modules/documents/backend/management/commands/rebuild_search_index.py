@@ -0,0 +1,46 @@
+"""
+Management command to (re)build the documents full-text search index
+Migration 0015 backfills existing documents; run after changing normalization/search config
+"""
+
+from django.core.management.base import BaseCommand
+from modules.documents.backend.models import Document
+from modules.documents.backend.search_service import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search_vector/search_text for documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of documents to index per batch'
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only index documents that have never been indexed'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        queryset = Document.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        document_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        total_count = len(document_ids)
+        if total_count == 0:
+            self.stdout.write(self.style.WARNING('No documents to index'))
+            return
+
+        self.stdout.write(f'🔎 Indexing {total_count} documents...')
+        indexed = 0
+        for i in range(0, total_count, batch_size):
+            indexed += update_search_index(document_ids[i:i + batch_size])
+            self.stdout.write(f'  {indexed}/{total_count}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Indexed {indexed} documents'))
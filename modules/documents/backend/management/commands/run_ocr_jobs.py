@@ -0,0 +1,45 @@
+"""
+OCR job runner management command
+Runs the durable OCR job queue in a dedicated process
+"""
+
+import logging
+from django.core.management.base import BaseCommand
+from modules.documents.backend.ocr_job_queue import OCRJobRunner
+
+logger = logging.getLogger('documents.ocr_jobs')
+
+
+class Command(BaseCommand):
+    help = 'Process queued OCR analysis jobs (use with OCR_JOB_RUNNER_EMBEDDED = False in web processes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Documents analyzed concurrently (default: OCR_JOB_RUNNER_CONCURRENCY)'
+        )
+
+    def handle(self, *args, **options):
+        runner = OCRJobRunner(concurrency=options['concurrency'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 starting ocr job runner {runner.runner_id} (concurrency: {runner.concurrency})'
+        ))
+
+        requeued = runner.requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'  ↻ requeued {requeued} stale jobs'))
+
+        try:
+            runner.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                '\n⚠️  stopping ocr job runner...'
+            ))
+            runner.stop()
+
+        self.stdout.write(self.style.SUCCESS(
+            '👋 ocr job runner stopped'
+        ))
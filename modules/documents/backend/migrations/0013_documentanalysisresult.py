@@ -0,0 +1,76 @@
+# Generated by Django 5.0.1 on 2026-10-16 12:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+ANALYSIS_METHODS = [
+    'tesseract', 'paddleocr', 'llama_vision', 'hybrid', 'trocr', 'donut',
+    'layoutlmv3', 'surya', 'doctr', 'easyocr', 'ocrmypdf',
+]
+SUMMARY_FIELDS = [
+    'status', 'error', 'char_count', 'word_count', 'confidence',
+    'processing_time', 'analyzed_at', 'from_cache',
+]
+
+
+def split_analysis_results(apps, schema_editor):
+    """Move full per-method payloads out of Document.analysis_results into their own rows"""
+    Document = apps.get_model('documents', 'Document')
+    DocumentAnalysisResult = apps.get_model('documents', 'DocumentAnalysisResult')
+
+    documents = Document.objects.exclude(analysis_results__isnull=True).only('id', 'analysis_results', 'last_analysis_at')
+    for document in documents.iterator(chunk_size=200):
+        summary = dict(document.analysis_results or {})
+        rows = []
+        for method in ANALYSIS_METHODS:
+            result = summary.get(method)
+            if not isinstance(result, dict) or not result:
+                summary.pop(method, None)
+                continue
+            rows.append(DocumentAnalysisResult(
+                document_id=document.id,
+                method=method,
+                status=result.get('status') or 'success',
+                result=result,
+                analyzed_at=document.last_analysis_at or django.utils.timezone.now(),
+            ))
+            summary[method] = {field: result.get(field) for field in SUMMARY_FIELDS if field in result}
+
+        DocumentAnalysisResult.objects.bulk_create(rows, ignore_conflicts=True)
+        summary.pop('methods_run', None)
+        Document.objects.filter(pk=document.pk).update(analysis_results=summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_ocrjob_batch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='analysis_results',
+            field=models.JSONField(blank=True, help_text='Compact OCR comparison summary: quality/meta fields plus status, counts and timing per method (full results in DocumentAnalysisResult)', null=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentAnalysisResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=20)),
+                ('status', models.CharField(default='success', max_length=20)),
+                ('result', models.JSONField(default=dict)),
+                ('analyzed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='method_results', to='documents.document')),
+            ],
+            options={
+                'ordering': ['method'],
+                'indexes': [models.Index(fields=['document', 'updated_at'], name='documents_d_documen_171f35_idx')],
+                'constraints': [models.UniqueConstraint(fields=('document', 'method'), name='unique_document_analysis_method')],
+            },
+        ),
+        migrations.RunPython(split_analysis_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+import unicodedata
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+
+BATCH_SIZE = 500
+
+# Frozen copy of search_service normalization as of this migration
+_TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+_TURKISH_FOLD = str.maketrans({'ı': 'i', 'ç': 'c', 'ğ': 'g', 'ö': 'o', 'ş': 's', 'ü': 'u'})
+
+
+def _normalize(text):
+    if not text:
+        return ''
+    text = text.translate(_TURKISH_LOWER).lower().translate(_TURKISH_FOLD)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+
+def backfill_search_index(apps, schema_editor):
+    from django.conf import settings
+
+    Document = apps.get_model('documents', 'Document')
+    ParsedReceipt = apps.get_model('documents', 'ParsedReceipt')
+    ReceiptItem = apps.get_model('documents', 'ReceiptItem')
+    config = getattr(settings, 'DOCUMENT_SEARCH_CONFIG', 'simple')
+
+    document_ids = list(
+        Document.objects.filter(search_vector__isnull=True).order_by('pk').values_list('pk', flat=True)
+    )
+    for i in range(0, len(document_ids), BATCH_SIZE):
+        batch = document_ids[i:i + BATCH_SIZE]
+        receipts = {
+            document_id: (receipt_id, store_name)
+            for receipt_id, document_id, store_name in ParsedReceipt.objects.filter(
+                document_id__in=batch
+            ).values_list('pk', 'document_id', 'store_name')
+        }
+        items = {}
+        for receipt_id, name in ReceiptItem.objects.filter(
+            receipt_id__in=[receipt_id for receipt_id, _ in receipts.values()]
+        ).values_list('receipt_id', 'name'):
+            items.setdefault(receipt_id, []).append(name or '')
+
+        for pk, filename, ocr_text in Document.objects.filter(pk__in=batch).values_list(
+            'pk', 'original_filename', 'ocr_text'
+        ):
+            receipt_id, store_name = receipts.get(pk, (None, ''))
+            sections = {
+                'A': _normalize(' '.join([filename or '', store_name or ''])),
+                'B': _normalize(' '.join(items.get(receipt_id, []))),
+                'C': _normalize(ocr_text or ''),
+            }
+            Document.objects.filter(pk=pk).update(
+                search_vector=(
+                    SearchVector(Value(sections['A']), config=config, weight='A')
+                    + SearchVector(Value(sections['B']), config=config, weight='B')
+                    + SearchVector(Value(sections['C']), config=config, weight='C')
+                ),
+                search_text=' '.join(part for part in sections.values() if part),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0014_document_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,8 @@ Handles receipts, invoices, and all document processing
 
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.files.storage import default_storage
 from django.utils import timezone
 from decimal import Decimal
@@ -95,10 +97,14 @@ class Document(models.Model):
     ai_confidence = models.FloatField(null=True, blank=True)
     ai_processed_at = models.DateTimeField(null=True, blank=True)
 
-    # OCR Analysis Comparison Results (stores results from all OCR methods)
-    analysis_results = models.JSONField(null=True, blank=True, help_text='Stores comparison results from all OCR methods (tesseract, paddleocr, llama_vision, trocr, donut, layoutlmv3, surya, doctr, easyocr, ocrmypdf, hybrid)')
+    # OCR Analysis Comparison summary (full per-method payloads live in DocumentAnalysisResult)
+    analysis_results = models.JSONField(null=True, blank=True, help_text='Compact OCR comparison summary: quality/meta fields plus status, counts and timing per method (full results in DocumentAnalysisResult)')
     last_analysis_at = models.DateTimeField(null=True, blank=True, help_text='Timestamp of the last OCR analysis comparison')
 
+    # Full-text search (maintained by search_service on OCR/receipt changes)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False, help_text='Normalized searchable text (trigram indexed)')
+
     # Timestamps
     uploaded_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -117,6 +123,8 @@ class Document(models.Model):
         indexes = [
             models.Index(fields=['user', '-uploaded_at']),
             models.Index(fields=['document_type', 'processing_status']),
+            GinIndex(fields=['search_vector'], name='documents_search_vector_gin'),
+            GinIndex(fields=['search_text'], name='documents_search_text_trgm', opclasses=['gin_trgm_ops']),
         ]
     
     def __str__(self):
@@ -219,6 +227,82 @@ class DocumentBatch(models.Model):
         return f"{self.batch_name} - {self.processed_documents}/{self.total_documents}"
 
 
+class OCRJobStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+    CANCELLED = 'cancelled', 'Cancelled'
+
+
+class OCRJob(models.Model):
+    """Durable OCR analysis job - one row per (document, method), executed by OCRJobRunner"""
+    PRIORITY_BULK = 0
+    PRIORITY_NORMAL = 5
+    PRIORITY_INTERACTIVE = 10
+
+    # Pseudo-method: full dual OCR (OCRProcessor.process_document) used by bulk reprocessing
+    METHOD_REPROCESS = 'reprocess'
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='ocr_jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ocr_jobs')
+    batch = models.ForeignKey(DocumentBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='ocr_jobs')
+    method = models.CharField(max_length=20)
+    priority = models.IntegerField(default=PRIORITY_NORMAL)
+    force_refresh = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=20, choices=OCRJobStatus.choices, default=OCRJobStatus.QUEUED)
+    attempts = models.IntegerField(default=0)
+    runner_id = models.CharField(max_length=100, blank=True, default='')  # host:pid of the runner holding the lease
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-priority', 'created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'created_at']),
+            models.Index(fields=['status', 'heartbeat_at']),
+            models.Index(fields=['document', 'status']),
+        ]
+        constraints = [
+            # Deduplicate identical (document, method) work while it is pending
+            models.UniqueConstraint(
+                fields=['document', 'method'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_ocr_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.method} - {self.document_id} ({self.status})"
+
+
+class DocumentAnalysisResult(models.Model):
+    """Full result of one OCR comparison method for a document (one row per method, upserted)"""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='method_results')
+    method = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, default='success')
+    result = models.JSONField(default=dict)
+    analyzed_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['method']
+        indexes = [
+            models.Index(fields=['document', 'updated_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'method'], name='unique_document_analysis_method'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} - {self.document_id} ({self.status})"
+
+
 class OCRTemplate(models.Model):
     """Templates for parsing specific store/company receipts"""
     store_name = models.CharField(max_length=255, unique=True)
@@ -0,0 +1,580 @@
+"""
+OCR Job Queue - Durable, prioritized OCR analysis jobs
+
+Replaces the thread-per-request model of the on-demand analysis endpoint.
+Jobs are stored in the database (OCRJob, one row per document + method), so
+they survive gunicorn worker recycles, and are executed by OCRJobRunner:
+
+- Priority: higher priority first (interactive > normal > bulk)
+- Fairness: within a priority, users with the fewest running jobs go first
+- Deduplication: an identical (document, method) job that is still queued or
+  running is reused instead of creating a new one
+- Resumable: every method result is persisted as soon as it finishes; jobs
+  whose runner stops heart-beating are requeued (up to OCR_JOB_MAX_ATTEMPTS)
+
+Progress is still published to the ocr_analysis_<document_id> WebSocket group.
+
+Settings (all optional):
+    OCR_JOB_RUNNER_EMBEDDED     - run a runner thread in web processes, started at app startup and
+                                  on enqueue (default: True); otherwise run `manage.py run_ocr_jobs`
+    OCR_JOB_RUNNER_CONCURRENCY  - documents analyzed concurrently per runner (default: 2)
+    OCR_JOB_LEASE_SECONDS       - heartbeat age after which a running job is requeued (default: 300)
+    OCR_JOB_MAX_ATTEMPTS        - attempts before a job is marked failed (default: 3)
+    OCR_JOB_POLL_INTERVAL       - seconds between queue polls when idle (default: 2)
+    OCR_BULK_BATCH_SIZE         - reprocess jobs claimed and run as one engine batch (default: 8)
+"""
+
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import Document, DocumentBatch, OCRJob, OCRJobStatus, ProcessingStatus
+
+logger = logging.getLogger('documents.ocr_jobs')
+
+ACTIVE_STATUSES = [OCRJobStatus.QUEUED, OCRJobStatus.RUNNING]
+FAIRNESS_WINDOW = 50  # queued jobs considered per claim
+
+
+def _send_websocket_message(document_id, message_type: str, data: dict):
+    """Send a message to the ocr_analysis_<document_id> group (same format as OCRAnalysisService)"""
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer:
+            async_to_sync(channel_layer.group_send)(
+                f'ocr_analysis_{str(document_id)}',
+                {
+                    'type': f'analysis_{message_type}',
+                    **data
+                }
+            )
+    except Exception as e:
+        logger.error(f"Failed to send WebSocket message to {document_id}: {e}")
+
+
+def enqueue_analysis(document, methods: List[str], user=None, priority: int = OCRJob.PRIORITY_NORMAL,
+                     force_refresh: bool = False, batch=None) -> Dict:
+    """
+    Queue OCR analysis methods for a document
+
+    Args:
+        document: Document model instance
+        methods: Analysis method names (see OCRAnalysisService.methods)
+        user: Owner used for fairness (default: document.user)
+        priority: OCRJob.PRIORITY_* value
+        force_refresh: Re-run methods even if results already exist
+        batch: Optional DocumentBatch the jobs report progress to
+
+    Returns:
+        {'jobs': [OCRJob, ...], 'created': [...method names], 'deduplicated': [...method names]}
+    """
+    user = user or document.user
+    jobs, created, deduplicated = [], [], []
+
+    for method in methods:
+        existing = OCRJob.objects.filter(document=document, method=method, status__in=ACTIVE_STATUSES).first()
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    job = OCRJob.objects.create(
+                        document=document,
+                        user=user,
+                        method=method,
+                        priority=priority,
+                        force_refresh=force_refresh,
+                        batch=batch,
+                    )
+                created.append(method)
+                jobs.append(job)
+                continue
+            except IntegrityError:
+                # Another request queued the same (document, method) concurrently
+                existing = OCRJob.objects.filter(document=document, method=method, status__in=ACTIVE_STATUSES).first()
+                if existing is None:
+                    raise
+
+        # Identical job already pending - raise its priority and force_refresh if needed
+        upgrade = {}
+        if priority > existing.priority:
+            upgrade['priority'] = priority
+        if force_refresh and not existing.force_refresh:
+            upgrade['force_refresh'] = True
+        if upgrade and existing.status == OCRJobStatus.QUEUED:
+            if OCRJob.objects.filter(pk=existing.pk, status=OCRJobStatus.QUEUED).update(**upgrade):
+                for field, value in upgrade.items():
+                    setattr(existing, field, value)
+        deduplicated.append(method)
+        jobs.append(existing)
+
+    for job in jobs:
+        _send_websocket_message(document.id, 'status', {
+            'method': job.method,
+            'status': job.status
+        })
+    if created:
+        _send_websocket_message(document.id, 'log', {
+            'message': f'{", ".join(created)} kuyruğa alındı',
+            'level': 'info',
+            'timestamp': timezone.now().isoformat()
+        })
+
+    logger.info(f"Queued OCR jobs for document {document.id}: created={created} deduplicated={deduplicated}")
+    _start_runner()
+
+    return {'jobs': jobs, 'created': created, 'deduplicated': deduplicated}
+
+
+def enqueue_reprocess(documents, user, batch_name: str = None) -> Dict:
+    """
+    Queue bulk dual-OCR reprocessing for many documents and return immediately
+
+    Progress is tracked on a DocumentBatch and streamed to the ocr_batch_<batch_id>
+    WebSocket group as each document finishes.
+
+    Returns:
+        {'batch': DocumentBatch, 'queued': int, 'deduplicated': [document ids]}
+    """
+    documents = list(documents)
+    batch = DocumentBatch.objects.create(
+        user=user,
+        batch_name=batch_name or f'reprocess {timezone.now():%Y-%m-%d %H:%M}',
+        total_documents=0,
+        status=ProcessingStatus.PROCESSING,
+    )
+
+    queued, deduplicated = 0, []
+    for document in documents:
+        try:
+            with transaction.atomic():
+                OCRJob.objects.create(
+                    document=document,
+                    user=user,
+                    batch=batch,
+                    method=OCRJob.METHOD_REPROCESS,
+                    priority=OCRJob.PRIORITY_BULK,
+                    force_refresh=True,
+                )
+            queued += 1
+        except IntegrityError:
+            # Already queued for reprocessing (possibly by another batch)
+            deduplicated.append(str(document.id))
+
+    if queued:
+        DocumentBatch.objects.filter(pk=batch.pk).update(total_documents=queued)
+        batch.total_documents = queued
+        Document.objects.filter(
+            pk__in=[document.pk for document in documents if str(document.id) not in deduplicated]
+        ).update(processing_status=ProcessingStatus.PROCESSING)
+    else:
+        DocumentBatch.objects.filter(pk=batch.pk).update(status=ProcessingStatus.COMPLETED, completed_at=timezone.now())
+        batch.status = ProcessingStatus.COMPLETED
+
+    logger.info(f"Queued bulk reprocess batch {batch.pk}: {queued} documents, {len(deduplicated)} deduplicated")
+    _start_runner()
+
+    return {'batch': batch, 'queued': queued, 'deduplicated': deduplicated}
+
+
+def get_batch_progress(batch: DocumentBatch) -> Dict:
+    """Current counters and per-document job states for a bulk batch"""
+    batch.refresh_from_db()
+    return {
+        'batch_id': batch.pk,
+        'status': batch.status,
+        'total': batch.total_documents,
+        'processed': batch.processed_documents,
+        'failed': batch.failed_documents,
+        'completed_at': batch.completed_at.isoformat() if batch.completed_at else None,
+        'documents': [
+            {'document_id': str(job.document_id), **serialize_job(job)}
+            for job in batch.ocr_jobs.order_by('created_at')
+        ],
+    }
+
+
+def _record_batch_progress(job: OCRJob, success: bool, error: str = ''):
+    """Update DocumentBatch counters for a finished reprocess job and stream it to the batch group"""
+    if not job.batch_id:
+        return
+
+    counter = 'processed_documents' if success else 'failed_documents'
+    DocumentBatch.objects.filter(pk=job.batch_id).update(**{counter: F(counter) + 1})
+    batch = DocumentBatch.objects.get(pk=job.batch_id)
+
+    done = batch.processed_documents + batch.failed_documents
+    if done >= batch.total_documents and batch.status == ProcessingStatus.PROCESSING:
+        updated = DocumentBatch.objects.filter(pk=batch.pk, status=ProcessingStatus.PROCESSING).update(
+            status=ProcessingStatus.COMPLETED if batch.failed_documents == 0 else ProcessingStatus.MANUAL_REVIEW,
+            completed_at=timezone.now(),
+        )
+        finished = bool(updated)
+    else:
+        finished = False
+
+    _send_batch_message(batch.pk, 'progress', {
+        'document_id': str(job.document_id),
+        'status': 'completed' if success else 'failed',
+        'error': error,
+        'processed': batch.processed_documents,
+        'failed': batch.failed_documents,
+        'total': batch.total_documents,
+    })
+    if finished:
+        _send_batch_message(batch.pk, 'complete', {
+            'processed': batch.processed_documents,
+            'failed': batch.failed_documents,
+            'total': batch.total_documents,
+        })
+
+
+def _send_batch_message(batch_id, message_type: str, data: dict):
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer:
+            async_to_sync(channel_layer.group_send)(
+                f'ocr_batch_{batch_id}',
+                {
+                    'type': f'batch_{message_type}',
+                    **data
+                }
+            )
+    except Exception as e:
+        logger.error(f"Failed to send WebSocket message to batch {batch_id}: {e}")
+
+
+def _start_runner():
+    if getattr(settings, 'OCR_JOB_RUNNER_EMBEDDED', True):
+        OCRJobRunner.get_instance().start()
+    OCRJobRunner.wake()
+
+
+def get_document_jobs(document) -> List[Dict]:
+    """Return the latest job state for each method of a document"""
+    latest = {}
+    for job in OCRJob.objects.filter(document=document).order_by('created_at'):
+        latest[job.method] = job
+    return [serialize_job(job) for job in latest.values()]
+
+
+def serialize_job(job: OCRJob) -> Dict:
+    return {
+        'id': job.id,
+        'method': job.method,
+        'status': job.status,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class OCRJobRunner:
+    """
+    Executes queued OCRJobs in this process
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several runners
+    (embedded in web processes or started with `manage.py run_ocr_jobs`) can
+    share one queue. All queued methods of the claimed document are analyzed
+    together so OCRAnalysisService can share quality assessment and
+    preprocessing between them.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+    _wake_event = threading.Event()
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or getattr(settings, 'OCR_JOB_RUNNER_CONCURRENCY', 2)
+        self.lease_seconds = getattr(settings, 'OCR_JOB_LEASE_SECONDS', 300)
+        self.max_attempts = getattr(settings, 'OCR_JOB_MAX_ATTEMPTS', 3)
+        self.poll_interval = getattr(settings, 'OCR_JOB_POLL_INTERVAL', 2)
+        self.bulk_batch_size = getattr(settings, 'OCR_BULK_BATCH_SIZE', 8)
+        self.runner_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        self._executor = None
+        self._thread = None
+        self._running = False
+        self._active = {}  # first job id of each claimed group -> [job ids]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'OCRJobRunner':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def wake(cls):
+        cls._wake_event.set()
+
+    def start(self):
+        """Start the background runner thread (no-op if already running)"""
+        with self._lock:
+            # A thread started before a fork (gunicorn --preload) does not exist in the child
+            if self._running and self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self.runner_id = f'{socket.gethostname()}:{os.getpid()}'
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='ocr-job')
+            self._thread = threading.Thread(target=self.run_forever, name='ocr-job-runner', daemon=True)
+            self._thread.start()
+        logger.info(f"🚀 OCR job runner {self.runner_id} started (concurrency={self.concurrency})")
+
+    def stop(self):
+        self._running = False
+        self.wake()
+
+    def run_forever(self):
+        """Main loop: heartbeat, requeue stale jobs, claim and dispatch new work"""
+        if self._executor is None:
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='ocr-job')
+
+        while self._running:
+            try:
+                close_old_connections()
+                self._heartbeat()
+                self.requeue_stale_jobs()
+
+                dispatched = False
+                if not cache.get('ocr_processing_paused', False):
+                    while self._free_slots() > 0:
+                        jobs = self.claim_next()
+                        if not jobs:
+                            break
+                        with self._lock:
+                            self._active[jobs[0].pk] = [job.pk for job in jobs]
+                        self._executor.submit(self._run_jobs, jobs)
+                        dispatched = True
+
+                if not dispatched:
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+            except Exception as e:
+                logger.error(f"OCR job runner loop error: {e}", exc_info=True)
+                self._wake_event.wait(self.poll_interval * 2)
+                self._wake_event.clear()
+
+        self._executor.shutdown(wait=True)
+        logger.info(f"OCR job runner {self.runner_id} stopped")
+
+    def _free_slots(self) -> int:
+        with self._lock:
+            return self.concurrency - len(self._active)
+
+    def _heartbeat(self):
+        with self._lock:
+            job_ids = [pk for ids in self._active.values() for pk in ids]
+        if job_ids:
+            OCRJob.objects.filter(pk__in=job_ids, status=OCRJobStatus.RUNNING).update(heartbeat_at=timezone.now())
+
+    def requeue_stale_jobs(self) -> int:
+        """Requeue running jobs whose runner stopped heart-beating (e.g. worker recycle)"""
+        cutoff = timezone.now() - timedelta(seconds=self.lease_seconds)
+        requeued = 0
+        with transaction.atomic():
+            stale = list(
+                OCRJob.objects.select_for_update(skip_locked=True)
+                .filter(status=OCRJobStatus.RUNNING, heartbeat_at__lt=cutoff)
+            )
+            for job in stale:
+                if job.attempts >= self.max_attempts:
+                    job.status = OCRJobStatus.FAILED
+                    job.error = f'Abandoned by runner {job.runner_id} after {job.attempts} attempts'
+                    job.finished_at = timezone.now()
+                else:
+                    job.status = OCRJobStatus.QUEUED
+                    requeued += 1
+                job.runner_id = ''
+                job.save(update_fields=['status', 'error', 'finished_at', 'runner_id'])
+
+        for job in stale:
+            logger.warning(f"Stale OCR job {job.pk} ({job.method}) -> {job.status}")
+            if job.status == OCRJobStatus.FAILED:
+                if job.method == OCRJob.METHOD_REPROCESS:
+                    Document.objects.filter(pk=job.document_id).update(processing_status=ProcessingStatus.FAILED)
+                _record_batch_progress(job, success=False, error=job.error)
+            _send_websocket_message(job.document_id, 'status', {
+                'method': job.method,
+                'status': job.status
+            })
+        return requeued
+
+    def claim_next(self) -> List[OCRJob]:
+        """
+        Claim the next group of queued jobs by priority, then per-user fairness, then age
+
+        Analysis jobs are grouped per document; bulk reprocess jobs are grouped per
+        batch (up to OCR_BULK_BATCH_SIZE documents) so engines run over them together.
+        """
+        # A document is analyzed by one group at a time; its other queued jobs wait
+        document_busy = Exists(OCRJob.objects.filter(
+            document_id=OuterRef('document_id'), status=OCRJobStatus.RUNNING
+        ))
+        with transaction.atomic():
+            candidates = list(
+                OCRJob.objects.select_for_update(skip_locked=True)
+                .filter(status=OCRJobStatus.QUEUED)
+                .exclude(document_busy)
+                .order_by('-priority', 'created_at')[:FAIRNESS_WINDOW]
+            )
+            if not candidates:
+                return []
+
+            running_by_user = {
+                row['user_id']: row['count']
+                for row in OCRJob.objects.filter(status=OCRJobStatus.RUNNING)
+                .values('user_id').annotate(count=Count('id'))
+            }
+            head = min(candidates, key=lambda job: (-job.priority, running_by_user.get(job.user_id, 0), job.created_at))
+
+            if head.method == OCRJob.METHOD_REPROCESS:
+                jobs = list(
+                    OCRJob.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(status=OCRJobStatus.QUEUED, method=OCRJob.METHOD_REPROCESS,
+                            batch_id=head.batch_id, user_id=head.user_id)
+                    .exclude(document_busy)
+                    .select_related('document')
+                    .order_by('created_at')[:self.bulk_batch_size]
+                )
+            else:
+                jobs = list(
+                    OCRJob.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(status=OCRJobStatus.QUEUED, document_id=head.document_id)
+                    .exclude(method=OCRJob.METHOD_REPROCESS)
+                    .exclude(document_busy)
+                    .select_related('document')
+                )
+            now = timezone.now()
+            for job in jobs:
+                job.status = OCRJobStatus.RUNNING
+                job.attempts += 1
+                job.runner_id = self.runner_id
+                job.started_at = now
+                job.heartbeat_at = now
+                job.save(update_fields=['status', 'attempts', 'runner_id', 'started_at', 'heartbeat_at'])
+            return jobs
+
+    def _run_jobs(self, jobs: List[OCRJob]):
+        if jobs[0].method == OCRJob.METHOD_REPROCESS:
+            return self._run_reprocess_jobs(jobs)
+
+        document = jobs[0].document
+        job_by_method = {job.method: job for job in jobs}
+        methods = list(job_by_method.keys())
+
+        def on_method_complete(method_name: str, result: Dict):
+            job = job_by_method.get(method_name)
+            if job is None:
+                return
+            failed = result.get('status') == 'error'
+            OCRJob.objects.filter(pk=job.pk, status=OCRJobStatus.RUNNING).update(
+                status=OCRJobStatus.FAILED if failed else OCRJobStatus.COMPLETED,
+                error=(result.get('error') or '') if failed else '',
+                finished_at=timezone.now(),
+            )
+
+        try:
+            close_old_connections()
+            if document.is_deleted:
+                OCRJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status=OCRJobStatus.CANCELLED, finished_at=timezone.now()
+                )
+                return
+
+            from .analysis_service import OCRAnalysisService
+            OCRAnalysisService().analyze_document(
+                document,
+                force_refresh=any(job.force_refresh for job in jobs),
+                methods_to_run=methods,
+                progress_callback=on_method_complete,
+            )
+
+            # Methods answered from stored results never reach the callback
+            OCRJob.objects.filter(pk__in=[job.pk for job in jobs], status=OCRJobStatus.RUNNING).update(
+                status=OCRJobStatus.COMPLETED, finished_at=timezone.now()
+            )
+            logger.info(f"✅ OCR jobs completed for document {document.id}: {', '.join(methods)}")
+
+        except Exception as e:
+            logger.error(f"❌ OCR jobs failed for document {document.id}: {e}", exc_info=True)
+            for job in jobs:
+                retry = job.attempts < self.max_attempts
+                OCRJob.objects.filter(pk=job.pk, status=OCRJobStatus.RUNNING).update(
+                    status=OCRJobStatus.QUEUED if retry else OCRJobStatus.FAILED,
+                    error=str(e),
+                    runner_id='',
+                    finished_at=None if retry else timezone.now(),
+                )
+        finally:
+            self._release(jobs)
+
+    def _run_reprocess_jobs(self, jobs: List[OCRJob]):
+        """Bulk dual OCR for a group of documents, grouped per engine by OCRProcessor"""
+        job_by_document = {job.document_id: job for job in jobs}
+
+        def on_document_complete(document, result: Dict):
+            job = job_by_document[document.id]
+            success = bool(result.get('success'))
+            if not success:
+                Document.objects.filter(pk=document.pk).update(processing_status=ProcessingStatus.FAILED)
+            OCRJob.objects.filter(pk=job.pk, status=OCRJobStatus.RUNNING).update(
+                status=OCRJobStatus.COMPLETED if success else OCRJobStatus.FAILED,
+                error='' if success else (result.get('error') or 'OCR failed'),
+                finished_at=timezone.now(),
+            )
+            _record_batch_progress(job, success, '' if success else (result.get('error') or 'OCR failed'))
+
+        try:
+            close_old_connections()
+            documents = [job.document for job in jobs if not job.document.is_deleted]
+            deleted = [job for job in jobs if job.document.is_deleted]
+            for job in deleted:
+                OCRJob.objects.filter(pk=job.pk).update(status=OCRJobStatus.CANCELLED, finished_at=timezone.now())
+                _record_batch_progress(job, success=False, error='document deleted')
+
+            from .ocr_service import OCRProcessor
+            OCRProcessor().process_documents_batch(documents, force_ocr=True, progress_callback=on_document_complete)
+            logger.info(f"✅ Bulk reprocess group finished: {len(documents)} documents")
+
+        except Exception as e:
+            logger.error(f"❌ Bulk reprocess group failed: {e}", exc_info=True)
+            for job in jobs:
+                retry = job.attempts < self.max_attempts
+                updated = OCRJob.objects.filter(pk=job.pk, status=OCRJobStatus.RUNNING).update(
+                    status=OCRJobStatus.QUEUED if retry else OCRJobStatus.FAILED,
+                    error=str(e),
+                    runner_id='',
+                    finished_at=None if retry else timezone.now(),
+                )
+                if not updated:
+                    continue
+                # Don't leave the document stuck in PROCESSING; a retry starts it over
+                Document.objects.filter(pk=job.document_id).update(
+                    processing_status=ProcessingStatus.PENDING if retry else ProcessingStatus.FAILED
+                )
+                if not retry:
+                    _record_batch_progress(job, success=False, error=str(e))
+        finally:
+            self._release(jobs)
+
+    def _release(self, jobs: List[OCRJob]):
+        with self._lock:
+            self._active.pop(jobs[0].pk, None)
+        close_old_connections()
+        self.wake()
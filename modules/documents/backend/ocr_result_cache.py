@@ -0,0 +1,237 @@
+"""
+OCR Result Cache - Content-addressed, size-bounded on-disk cache
+
+Document.analysis_results only helps when the same row is analyzed again.
+Re-uploads and duplicate receipt photos are different rows with identical
+bytes, so results are additionally cached by content:
+
+    key = sha256(image hash, stage, parameters, engine + model version)
+
+Stages:
+- quality:     ImageQualityService.assess_quality output
+- preprocess:  preprocessed image file
+- <method>:    per-method OCR result (only successful results are stored)
+
+Entries live under OCR_RESULT_CACHE_DIR (default: data/cache/ocr), sharded by
+key prefix. Reads bump the file mtime; when the store grows past
+OCR_RESULT_CACHE_MAX_MB the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger('documents.ocr_cache')
+
+# Bump when result post-processing in analysis_service changes, to invalidate old entries
+ANALYSIS_CACHE_VERSION = 2
+
+# Python packages whose versions are part of each method's cache key
+METHOD_PACKAGES = {
+    'paddleocr': ['paddleocr', 'paddlepaddle'],
+    'hybrid': ['paddleocr', 'paddlepaddle'],
+    'llama_vision': [],
+    'trocr': ['transformers', 'torch', 'paddleocr'],
+    'donut': ['transformers', 'torch'],
+    'layoutlmv3': ['transformers', 'torch', 'paddleocr'],
+    'surya': ['surya-ocr'],
+    'doctr': ['python-doctr'],
+    'easyocr': ['easyocr'],
+    'ocrmypdf': ['ocrmypdf'],
+}
+
+# Models used by each method (keep in sync with the service defaults)
+METHOD_MODELS = {
+    'paddleocr': 'pp-ocr+pp-structurev3',
+    'hybrid': 'pp-ocr+llama3.2-vision',
+    'llama_vision': 'llama3.2-vision',
+    'trocr': 'microsoft/trocr-base-printed',
+    'donut': 'naver-clova-ix/donut-base-finetuned-cord-v2',
+    'layoutlmv3': 'microsoft/layoutlmv3-base',
+    'surya': 'surya',
+    'doctr': 'db_resnet50+crnn_vgg16_bn',
+    'easyocr': 'en+tr',
+    'ocrmypdf': 'tesseract',
+}
+
+# Tesseract results come from the upload pipeline (stored on the document) and are cheap
+CACHEABLE_METHODS = set(METHOD_MODELS.keys())
+
+_hash_lock = threading.Lock()
+_hash_memo = OrderedDict()  # (path, size, mtime) -> sha256
+_HASH_MEMO_SIZE = 1024
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's bytes, memoized per (path, size, mtime)"""
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = value
+        while len(_hash_memo) > _HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _package_version(package: str) -> str:
+    try:
+        from importlib.metadata import version
+        return version(package)
+    except Exception:
+        return 'missing'
+
+
+@lru_cache(maxsize=None)
+def engine_version(method: str) -> str:
+    """Engine + model version string for a method's cache key"""
+    packages = ','.join(f'{name}={_package_version(name)}' for name in METHOD_PACKAGES.get(method, []))
+    return f"{method}|{METHOD_MODELS.get(method, '')}|{packages}|v{ANALYSIS_CACHE_VERSION}"
+
+
+class OCRResultCache:
+    """Content-addressed JSON/file store with LRU eviction by total size"""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size = None  # computed lazily on first write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_hash: str, stage: str, params: Optional[Dict] = None, version: str = '') -> str:
+        payload = json.dumps([image_hash, stage, params or {}, version], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def method_key(self, image_hash: str, method: str) -> str:
+        # Analysis methods read the original upload, so there are no preprocessing parameters
+        return self.make_key(image_hash, method, {'preprocessing': 'original'}, engine_version(method))
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key, '.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        self._touch(path)
+        return value
+
+    def put(self, key: str, value: Dict):
+        data = json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+        self._write(self._path(key, '.json'), data)
+
+    def get_file(self, key: str, suffix: str) -> Optional[str]:
+        path = self._path(key, suffix)
+        if not path.exists():
+            return None
+        self._touch(path)
+        return str(path)
+
+    def put_file(self, key: str, source_path: str, suffix: str) -> str:
+        with open(source_path, 'rb') as f:
+            data = f.read()
+        path = self._path(key, suffix)
+        self._write(path, data)
+        return str(path)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f'{key}{suffix}'
+
+    def _touch(self, path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path: Path, data: bytes):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"OCR cache write failed for {path.name}: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in self.root.glob('*/*'):
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self):
+        """Remove least recently used entries until the store is at 90% of its budget"""
+        entries = []
+        for entry in self.root.glob('*/*'):
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            except OSError:
+                pass
+        entries.sort(key=lambda item: item[0])
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self._size = total
+        logger.info(f"♻️  OCR cache evicted {removed} entries ({total / 1024 / 1024:.1f}MB remaining)")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[OCRResultCache]:
+    """Process-wide cache instance, or None when disabled"""
+    global _cache
+    from django.conf import settings
+    if not getattr(settings, 'OCR_RESULT_CACHE_ENABLED', True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            default_root = Path(getattr(settings, 'CACHE_DIR', Path(settings.BASE_DIR) / 'cache')) / 'ocr'
+            _cache = OCRResultCache(
+                root=getattr(settings, 'OCR_RESULT_CACHE_DIR', default_root),
+                max_bytes=getattr(settings, 'OCR_RESULT_CACHE_MAX_MB', 2048) * 1024 * 1024,
+            )
+        return _cache
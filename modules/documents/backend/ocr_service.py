@@ -20,14 +20,6 @@ except ImportError:
     ADVANCED_PARSER_AVAILABLE = False
     print("Warning: Advanced parser not available.")
 
-# Import AI enhancer
-try:
-    from .ai_ocr_enhancer import AIReceiptAnalyzer
-    AI_ENHANCER_AVAILABLE = True
-except ImportError:
-    AI_ENHANCER_AVAILABLE = False
-    print("Warning: AI enhancer not available.")
-
 # OCR libraries - graceful degradation if not available
 try:
     import pytesseract
@@ -101,20 +93,20 @@ class OCRProcessor:
         self.ai_enhancer = None
         self.ollama_service = None
 
-        # Initialize AI enhancer if available
-        if AI_ENHANCER_AVAILABLE:
-            try:
-                # Default to Hugging Face for free usage
-                self.ai_enhancer = AIReceiptAnalyzer(provider="huggingface")
-                logger.info("AI enhancer initialized with Hugging Face")
-            except Exception as e:
-                logger.warning(f"Failed to initialize AI enhancer: {e}")
-                self.ai_enhancer = None
+        # Initialize AI enhancer if available (shared per process, see ocr_worker_pool)
+        try:
+            # Default to Hugging Face for free usage
+            from .ocr_worker_pool import get_engine
+            self.ai_enhancer = get_engine('ai_enhancer')
+            logger.info("AI enhancer initialized with Hugging Face")
+        except Exception as e:
+            logger.warning(f"Failed to initialize AI enhancer: {e}")
+            self.ai_enhancer = None
 
-        # Initialize Ollama service for direct LLM OCR
+        # Initialize Ollama service for direct LLM OCR (availability probe cached with a TTL)
         try:
-            from .ollama_service import OllamaService
-            self.ollama_service = OllamaService()
+            from .ocr_worker_pool import get_ollama_service
+            self.ollama_service = get_ollama_service()
             if self.ollama_service.is_available():
                 logger.info(f"Ollama service initialized with models: {self.ollama_service.models}")
             else:
@@ -178,74 +170,7 @@ class OCRProcessor:
 
             ollama_result = self._process_with_ollama(image_path, document_type)
 
-            # Store both results in document instance if provided
-            if document_instance:
-                # Save Tesseract results
-                document_instance.tesseract_text = tesseract_result.get('text', '')
-                document_instance.tesseract_confidence = tesseract_result.get('confidence', 0)
-                document_instance.tesseract_parsed_data = tesseract_result.get('parsed_data', {})
-
-                # Save Ollama results
-                document_instance.ollama_text = ollama_result.get('text', '')
-                document_instance.ollama_confidence = ollama_result.get('confidence', 0)
-                document_instance.ollama_parsed_data = ollama_result.get('parsed_data', {})
-                document_instance.ollama_model = ollama_result.get('model', '')
-
-                # Set default OCR text based on preferred method or best confidence
-                if document_instance.preferred_ocr_method == 'tesseract':
-                    document_instance.ocr_text = tesseract_result.get('text', '')
-                    document_instance.ocr_confidence = tesseract_result.get('confidence', 0)
-                    ocr_method = 'tesseract (preferred)'
-                elif document_instance.preferred_ocr_method == 'ollama':
-                    document_instance.ocr_text = ollama_result.get('text', '')
-                    document_instance.ocr_confidence = ollama_result.get('confidence', 0)
-                    ocr_method = 'ollama (preferred)'
-                else:
-                    # Auto-select best result
-                    if ollama_result.get('confidence', 0) > tesseract_result.get('confidence', 0):
-                        document_instance.ocr_text = ollama_result.get('text', '')
-                        document_instance.ocr_confidence = ollama_result.get('confidence', 0)
-                        ocr_method = 'ollama (auto-selected)'
-                    else:
-                        document_instance.ocr_text = tesseract_result.get('text', '')
-                        document_instance.ocr_confidence = tesseract_result.get('confidence', 0)
-                        ocr_method = 'tesseract (auto-selected)'
-
-                # Mark as completed
-                from django.utils import timezone
-                document_instance.processing_status = 'completed'
-                document_instance.ocr_processed_at = timezone.now()
-
-                # Save the document
-                document_instance.save()
-
-                logger.info(f"Dual OCR complete - Tesseract: {len(tesseract_result.get('text', ''))} chars, "
-                           f"Ollama: {len(ollama_result.get('text', ''))} chars - Using: {ocr_method}")
-
-            # Use preferred or best result for parsed_data
-            if ollama_result.get('success') and ollama_result.get('confidence', 0) > tesseract_result.get('confidence', 0):
-                parsed_data = ollama_result.get('parsed_data', {})
-                confidence = ollama_result.get('confidence', 0)
-                ocr_text = ollama_result.get('text', '')
-            else:
-                parsed_data = tesseract_result.get('parsed_data', {})
-                confidence = tesseract_result.get('confidence', 0)
-                ocr_text = tesseract_result.get('text', '')
-
-            # Create ParsedReceipt if document instance is provided and type is receipt
-            if document_instance and document_type == 'receipt' and parsed_data and ocr_text:
-                self.create_parsed_receipt(document_instance, parsed_data)
-
-            return {
-                'success': True,
-                'ocr_text': ocr_text,
-                'parsed_data': parsed_data,
-                'confidence': confidence,
-                'ocr_method': ocr_method if document_instance else 'dual',
-                'text_length': len(ocr_text),
-                'tesseract_result': tesseract_result,
-                'ollama_result': ollama_result
-            }
+            return self._finalize_dual_result(tesseract_result, ollama_result, document_type, document_instance)
 
         except Exception as e:
             logger.error(f"OCR processing failed with exception: {str(e)}", exc_info=True)
@@ -257,6 +182,187 @@ class OCRProcessor:
                 'confidence': 0
             }
 
+    def _finalize_dual_result(self, tesseract_result: Dict, ollama_result: Dict, document_type: str, document_instance=None) -> Dict:
+        """Store Tesseract/Ollama results on the document, pick the primary text and build the result dict"""
+        # Store both results in document instance if provided
+        if document_instance:
+            # Save Tesseract results
+            document_instance.tesseract_text = tesseract_result.get('text', '')
+            document_instance.tesseract_confidence = tesseract_result.get('confidence', 0)
+            document_instance.tesseract_parsed_data = tesseract_result.get('parsed_data', {})
+
+            # Save Ollama results
+            document_instance.ollama_text = ollama_result.get('text', '')
+            document_instance.ollama_confidence = ollama_result.get('confidence', 0)
+            document_instance.ollama_parsed_data = ollama_result.get('parsed_data', {})
+            document_instance.ollama_model = ollama_result.get('model', '')
+
+            # Set default OCR text based on preferred method or best confidence
+            if document_instance.preferred_ocr_method == 'tesseract':
+                document_instance.ocr_text = tesseract_result.get('text', '')
+                document_instance.ocr_confidence = tesseract_result.get('confidence', 0)
+                ocr_method = 'tesseract (preferred)'
+            elif document_instance.preferred_ocr_method == 'ollama':
+                document_instance.ocr_text = ollama_result.get('text', '')
+                document_instance.ocr_confidence = ollama_result.get('confidence', 0)
+                ocr_method = 'ollama (preferred)'
+            else:
+                # Auto-select best result
+                if ollama_result.get('confidence', 0) > tesseract_result.get('confidence', 0):
+                    document_instance.ocr_text = ollama_result.get('text', '')
+                    document_instance.ocr_confidence = ollama_result.get('confidence', 0)
+                    ocr_method = 'ollama (auto-selected)'
+                else:
+                    document_instance.ocr_text = tesseract_result.get('text', '')
+                    document_instance.ocr_confidence = tesseract_result.get('confidence', 0)
+                    ocr_method = 'tesseract (auto-selected)'
+
+            # Mark as completed
+            from django.utils import timezone
+            document_instance.processing_status = 'completed'
+            document_instance.ocr_processed_at = timezone.now()
+
+            # Save the document
+            document_instance.save()
+
+            logger.info(f"Dual OCR complete - Tesseract: {len(tesseract_result.get('text', ''))} chars, "
+                       f"Ollama: {len(ollama_result.get('text', ''))} chars - Using: {ocr_method}")
+
+        # Use preferred or best result for parsed_data
+        if ollama_result.get('success') and ollama_result.get('confidence', 0) > tesseract_result.get('confidence', 0):
+            parsed_data = ollama_result.get('parsed_data', {})
+            confidence = ollama_result.get('confidence', 0)
+            ocr_text = ollama_result.get('text', '')
+        else:
+            parsed_data = tesseract_result.get('parsed_data', {})
+            confidence = tesseract_result.get('confidence', 0)
+            ocr_text = tesseract_result.get('text', '')
+
+        # Create ParsedReceipt if document instance is provided and type is receipt
+        if document_instance and document_type == 'receipt' and parsed_data and ocr_text:
+            self.create_parsed_receipt(document_instance, parsed_data)
+
+        return {
+            'success': True,
+            'ocr_text': ocr_text,
+            'parsed_data': parsed_data,
+            'confidence': confidence,
+            'ocr_method': ocr_method if document_instance else 'dual',
+            'text_length': len(ocr_text),
+            'tesseract_result': tesseract_result,
+            'ollama_result': ollama_result
+        }
+
+    def process_documents_batch(self, documents: List, force_ocr: bool = True, progress_callback=None) -> Dict:
+        """
+        Dual OCR for many documents, grouped per engine instead of per document
+
+        Each stage runs over the whole batch before the next one starts, so every
+        engine is warmed once per batch: preprocessing and Tesseract fan out over
+        the OCR worker pool (in-process threads when the pool is disabled), then
+        the batch goes through the single Ollama vision model back-to-back.
+
+        Args:
+            documents: Document model instances
+            force_ocr: Apply forced image enhancement (rescan)
+            progress_callback: Optional callable(document, result) after each document is saved
+
+        Returns:
+            Dict mapping document id to the same result dict process_document returns
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from django.core.cache import cache
+        from .ocr_worker_pool import BATCH_TESSERACT, get_worker_pool
+
+        results = {}
+        pending = []
+        for document in documents:
+            image_path = document.file_path.path
+            if not os.path.exists(image_path):
+                logger.error(f"File not found: {image_path}")
+                results[document.id] = {
+                    'success': False,
+                    'error': f'File not found: {image_path}',
+                    'ocr_text': '',
+                    'parsed_data': {},
+                    'confidence': 0
+                }
+                if progress_callback:
+                    progress_callback(document, results[document.id])
+            else:
+                pending.append((document, image_path))
+
+        if not pending:
+            return results
+
+        # Stage 1 + 2: preprocessing and Tesseract across the batch
+        pool = get_worker_pool()
+        if pool:
+            logger.info(f"Batch dual OCR for {len(pending)} documents (preprocessing/Tesseract on the OCR worker pool)")
+            futures = [pool.submit(BATCH_TESSERACT, document.pk, force_ocr=force_ocr) for document, _ in pending]
+            tesseract_results = []
+            for (document, _), future in zip(pending, futures):
+                try:
+                    tesseract_results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Batch Tesseract failed for {document.id}: {e}")
+                    tesseract_results.append(self._batch_tesseract_error(e))
+        else:
+            workers = min(len(pending), os.cpu_count() or 2)
+            logger.info(f"Batch dual OCR for {len(pending)} documents ({workers} threads for preprocessing/Tesseract)")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                tesseract_results = list(executor.map(
+                    lambda item: self.run_batch_tesseract(item[0], force_ocr=force_ocr), pending
+                ))
+
+        # Stage 3: Ollama vision model, back-to-back while it stays loaded
+        for (document, image_path), tesseract_result in zip(pending, tesseract_results):
+            if cache.get('ocr_processing_paused', False):
+                logger.info("OCR processing paused - stopping batch before Ollama processing")
+                result = {
+                    'success': False,
+                    'error': 'Processing paused by user',
+                    'ocr_text': '',
+                    'parsed_data': {},
+                    'confidence': 0
+                }
+            else:
+                try:
+                    ollama_result = self._process_with_ollama(image_path, document.document_type)
+                    result = self._finalize_dual_result(tesseract_result, ollama_result, document.document_type, document)
+                except Exception as e:
+                    logger.error(f"Batch OCR failed for document {document.id}: {e}", exc_info=True)
+                    result = {
+                        'success': False,
+                        'error': str(e),
+                        'ocr_text': '',
+                        'parsed_data': {},
+                        'confidence': 0
+                    }
+
+            results[document.id] = result
+            if progress_callback:
+                progress_callback(document, result)
+
+        return results
+
+    def run_batch_tesseract(self, document, force_ocr: bool = True) -> Dict:
+        """Preprocessing + Tesseract stage of process_documents_batch for one document"""
+        image_path = document.file_path.path
+        try:
+            if self.cv2_available:
+                processed_image = self.preprocess_image(image_path, force_enhance=force_ocr)
+            else:
+                processed_image = image_path
+            return self._process_with_tesseract(processed_image, image_path, document.document_type)
+        except Exception as e:
+            logger.error(f"Batch Tesseract failed for {document.id}: {e}")
+            return self._batch_tesseract_error(e)
+
+    @staticmethod
+    def _batch_tesseract_error(error: Exception) -> Dict:
+        return {'success': False, 'text': '', 'parsed_data': {}, 'confidence': 0, 'error': str(error)}
+
     def _process_with_tesseract(self, processed_image: str, original_image: str, document_type: str) -> Dict:
         """Process document using Tesseract OCR"""
         try:
@@ -881,45 +987,48 @@ class OCRProcessor:
         """
         from .models import ParsedReceipt, ReceiptItem
         from decimal import Decimal
-        
+        from django.db import transaction
+
         try:
-            # Delete existing parsed receipt if exists
-            if hasattr(document_instance, 'parsed_receipt'):
-                document_instance.parsed_receipt.delete()
-            
-            # Create new ParsedReceipt
-            receipt = ParsedReceipt.objects.create(
-                document=document_instance,
-                store_name=parsed_data.get('store_name', ''),
-                store_address=parsed_data.get('store_address', ''),
-                store_phone=parsed_data.get('store_phone', ''),
-                store_tax_id=parsed_data.get('store_tax_id', ''),
-                transaction_date=parsed_data.get('transaction_date'),
-                receipt_number=parsed_data.get('receipt_number', ''),
-                cashier_id=parsed_data.get('cashier_id', ''),
-                subtotal=Decimal(str(parsed_data['total_amount'])) if parsed_data.get('total_amount') else None,
-                tax_amount=parsed_data.get('tax_amount'),
-                discount_amount=parsed_data.get('discount_amount'),
-                total_amount=Decimal(str(parsed_data['total_amount'])) if parsed_data.get('total_amount') else None,
-                payment_method=parsed_data.get('payment_method', ''),
-                card_last_digits=parsed_data.get('card_last_digits', ''),
-                currency=parsed_data.get('currency', 'TRY'),
-                raw_ocr_data=parsed_data
-            )
-            
-            # Create ReceiptItems
-            for item_data in parsed_data.get('items', []):
-                ReceiptItem.objects.create(
-                    receipt=receipt,
-                    name=item_data.get('name', ''),
-                    quantity=Decimal(str(item_data.get('quantity', 1))),
-                    unit_price=Decimal(str(item_data.get('unit_price', 0))),
-                    total_price=Decimal(str(item_data.get('total_price', 0))),
-                    category=item_data.get('category', ''),
-                    barcode=item_data.get('barcode', ''),
-                    discount_amount=Decimal(str(item_data.get('discount', 0))) if item_data.get('discount') else None
+            # One transaction: search index is refreshed once for receipt + items
+            with transaction.atomic():
+                # Delete existing parsed receipt if exists
+                if hasattr(document_instance, 'parsed_receipt'):
+                    document_instance.parsed_receipt.delete()
+
+                # Create new ParsedReceipt
+                receipt = ParsedReceipt.objects.create(
+                    document=document_instance,
+                    store_name=parsed_data.get('store_name', ''),
+                    store_address=parsed_data.get('store_address', ''),
+                    store_phone=parsed_data.get('store_phone', ''),
+                    store_tax_id=parsed_data.get('store_tax_id', ''),
+                    transaction_date=parsed_data.get('transaction_date'),
+                    receipt_number=parsed_data.get('receipt_number', ''),
+                    cashier_id=parsed_data.get('cashier_id', ''),
+                    subtotal=Decimal(str(parsed_data['total_amount'])) if parsed_data.get('total_amount') else None,
+                    tax_amount=parsed_data.get('tax_amount'),
+                    discount_amount=parsed_data.get('discount_amount'),
+                    total_amount=Decimal(str(parsed_data['total_amount'])) if parsed_data.get('total_amount') else None,
+                    payment_method=parsed_data.get('payment_method', ''),
+                    card_last_digits=parsed_data.get('card_last_digits', ''),
+                    currency=parsed_data.get('currency', 'TRY'),
+                    raw_ocr_data=parsed_data
                 )
-            
+
+                # Create ReceiptItems
+                for item_data in parsed_data.get('items', []):
+                    ReceiptItem.objects.create(
+                        receipt=receipt,
+                        name=item_data.get('name', ''),
+                        quantity=Decimal(str(item_data.get('quantity', 1))),
+                        unit_price=Decimal(str(item_data.get('unit_price', 0))),
+                        total_price=Decimal(str(item_data.get('total_price', 0))),
+                        category=item_data.get('category', ''),
+                        barcode=item_data.get('barcode', ''),
+                        discount_amount=Decimal(str(item_data.get('discount', 0))) if item_data.get('discount') else None
+                    )
+
             logger.info(f"Created ParsedReceipt for document {document_instance.id} with {len(parsed_data.get('items', []))} items")
             return receipt
             
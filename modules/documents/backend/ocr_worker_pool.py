@@ -0,0 +1,660 @@
+"""
+OCR Worker Pool - Persistent, process-isolated OCR engines
+
+Deep learning OCR engines (PaddleOCR, TrOCR, LayoutLMv3, EasyOCR, ...) each
+load 1-3GB of model weights. Building them per request made first-request
+latency dominated by model load and forced a hard-coded max_workers=2 limit
+to avoid OOM crashes.
+
+This module keeps engines warm instead:
+1. EngineRegistry - per-process engine cache with an LRU memory budget;
+   engines are shared by threads, so calls into one engine are serialized
+2. get_ollama_service() - Ollama availability probe cached with a TTL
+3. OCRWorkerPool - long-lived spawn workers; each method is routed to an
+   idle worker that already has the required engines loaded, and admission
+   control only dispatches work when the host-wide memory budget allows it
+4. HostMemoryLedger - engine memory of every pool on the host (one per web
+   process), so N gunicorn workers share one OCR_POOL_MEMORY_BUDGET_MB
+
+Settings (all optional):
+    OCR_WORKER_POOL_ENABLED      - use worker processes (default: True)
+    OCR_WORKER_POOL_SIZE         - number of worker processes (default: 2)
+    OCR_WORKER_MEMORY_BUDGET_MB  - engine budget per worker (default: 4096)
+    OCR_POOL_MEMORY_BUDGET_MB    - engine budget for all pools on the host (default: 6144)
+    OCR_POOL_LEDGER_PATH         - host-wide reservation file (default: <tmpdir>/unibos-ocr-pool-memory.json)
+    OCR_WORKER_PRELOAD           - engines each worker loads at startup (default: ['paddleocr'])
+"""
+
+import atexit
+import copy
+import gc
+import inspect
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: reservations stay per process
+    fcntl = None
+
+logger = logging.getLogger('documents.ocr_pool')
+
+# Estimated resident memory per engine (MB) - used for budgets, not enforced by the OS
+ENGINE_MEMORY_MB = {
+    'paddleocr': 1200,
+    'paddleocr_plain': 600,
+    'trocr': 1500,
+    'donut': 2000,
+    'layoutlmv3': 1800,
+    'surya': 2500,
+    'doctr': 1200,
+    'easyocr': 1500,
+    'ocrmypdf': 100,
+}
+DEFAULT_ENGINE_MEMORY_MB = 500
+
+# Bulk reprocess stage (preprocessing + Tesseract) run by OCRProcessor.process_documents_batch
+BATCH_TESSERACT = 'batch_tesseract'
+
+# Engines each analysis method needs (tesseract/llama_vision only read stored text or call Ollama)
+METHOD_ENGINES = {
+    'paddleocr': ['paddleocr'],
+    'tesseract': [],
+    'llama_vision': [],
+    'hybrid': ['paddleocr_plain'],
+    'trocr': ['trocr', 'paddleocr_plain'],
+    'donut': ['donut'],
+    'layoutlmv3': ['layoutlmv3', 'paddleocr_plain'],
+    'surya': ['surya'],
+    'doctr': ['doctr'],
+    'easyocr': ['easyocr'],
+    'ocrmypdf': ['ocrmypdf'],
+    BATCH_TESSERACT: [],
+}
+
+OLLAMA_PROBE_TTL = 60  # seconds between Ollama /api/tags probes
+
+
+def _build_paddleocr():
+    from .paddleocr_service import PaddleOCRService
+    return PaddleOCRService(lang='en', use_structure=True)
+
+
+def _build_paddleocr_plain():
+    # Line detection/recognition only (hybrid, TrOCR and LayoutLMv3 inputs), no PP-Structure
+    from .paddleocr_service import PaddleOCRService
+    return PaddleOCRService(lang='en', use_structure=False)
+
+
+def _build_trocr():
+    from .trocr_service import TrOCRService
+    return TrOCRService(language='tr')
+
+
+def _build_donut():
+    from .donut_service import DonutService
+    return DonutService(language='tr')
+
+
+def _build_layoutlmv3():
+    from .layoutlmv3_service import LayoutLMv3Service
+    return LayoutLMv3Service(language='tr')
+
+
+def _build_surya():
+    from .surya_service import SuryaOCRService
+    return SuryaOCRService()
+
+
+def _build_doctr():
+    from .doctr_service import DocTROCRService
+    return DocTROCRService()
+
+
+def _build_easyocr():
+    from .easyocr_service import EasyOCRService
+    return EasyOCRService()
+
+
+def _build_ocrmypdf():
+    from .ocrmypdf_service import OCRMyPDFService
+    return OCRMyPDFService()
+
+
+def _build_ai_enhancer():
+    from .ai_ocr_enhancer import AIReceiptAnalyzer
+    return AIReceiptAnalyzer(provider="huggingface")
+
+
+ENGINE_FACTORIES: Dict[str, Callable] = {
+    'paddleocr': _build_paddleocr,
+    'paddleocr_plain': _build_paddleocr_plain,
+    'trocr': _build_trocr,
+    'donut': _build_donut,
+    'layoutlmv3': _build_layoutlmv3,
+    'surya': _build_surya,
+    'doctr': _build_doctr,
+    'easyocr': _build_easyocr,
+    'ocrmypdf': _build_ocrmypdf,
+    'ai_enhancer': _build_ai_enhancer,
+}
+
+
+def _warm_engine(engine):
+    """Load model weights for engines that initialize lazily"""
+    if getattr(engine, 'ocr', False) is None and hasattr(engine, 'initialize_ocr'):
+        engine.initialize_ocr()
+    elif getattr(engine, 'model', False) is None and hasattr(engine, 'initialize_model'):
+        engine.initialize_model()
+
+
+class _SerializedEngine:
+    """
+    Thread-safe handle to a shared engine
+
+    PaddleOCR and most model wrappers are not thread-safe, and in-process
+    fallback threads share one registry, so every method call holds the
+    engine's lock. Other attributes (including callable model objects) pass
+    through unchanged.
+    """
+
+    def __init__(self, engine):
+        object.__setattr__(self, '_engine', engine)
+        object.__setattr__(self, '_lock', threading.RLock())
+
+    def __getattr__(self, name):
+        attribute = getattr(self._engine, name)
+        if not inspect.ismethod(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._engine, name, value)
+
+
+def engine_memory_mb(name: str) -> int:
+    return ENGINE_MEMORY_MB.get(name, DEFAULT_ENGINE_MEMORY_MB)
+
+
+def method_memory_mb(method: str) -> int:
+    return sum(engine_memory_mb(name) for name in METHOD_ENGINES.get(method, []))
+
+
+def _setting(name: str, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class EngineRegistry:
+    """
+    Per-process cache of constructed OCR engines
+
+    Engines are kept in LRU order. Before a new engine is built, least recently
+    used engines are dropped until the new one fits the memory budget. Engines
+    touched by the current task are never evicted to make room for each other.
+    """
+
+    def __init__(self, memory_budget_mb: int):
+        self.memory_budget_mb = memory_budget_mb
+        self._engines = OrderedDict()
+        self._touched = set()
+        self._lock = threading.RLock()
+
+    def get(self, name: str):
+        with self._lock:
+            self._touched.add(name)
+            if name in self._engines:
+                self._engines.move_to_end(name)
+                return self._engines[name]
+
+            factory = ENGINE_FACTORIES.get(name)
+            if factory is None:
+                raise KeyError(f"Unknown OCR engine: {name}")
+
+            self._make_room(engine_memory_mb(name))
+            start = time.time()
+            engine = _SerializedEngine(factory())
+            self._engines[name] = engine
+            logger.info(f"🔥 Engine {name} constructed in {time.time() - start:.2f}s (pid={os.getpid()})")
+            return engine
+
+    def preload(self, names: List[str]):
+        """Construct and warm engines ahead of the first request"""
+        for name in names:
+            try:
+                _warm_engine(self.get(name))
+            except Exception as e:
+                logger.warning(f"Failed to preload engine {name}: {e}")
+        self.begin_task()
+
+    def begin_task(self):
+        """Reset the set of engines protected from eviction"""
+        with self._lock:
+            self._touched = set()
+
+    def resident_mb(self) -> int:
+        with self._lock:
+            return sum(engine_memory_mb(name) for name in self._engines)
+
+    def warm_engines(self) -> List[str]:
+        with self._lock:
+            return list(self._engines.keys())
+
+    def _make_room(self, needed_mb: int):
+        evicted = False
+        for name in list(self._engines.keys()):
+            if self.resident_mb() + needed_mb <= self.memory_budget_mb:
+                break
+            if name in self._touched:
+                continue
+            del self._engines[name]
+            evicted = True
+            logger.info(f"♻️  Evicted engine {name} to stay within {self.memory_budget_mb}MB budget")
+        if evicted:
+            gc.collect()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_engine_registry() -> EngineRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = EngineRegistry(_setting('OCR_WORKER_MEMORY_BUDGET_MB', 4096))
+        return _registry
+
+
+def get_engine(name: str):
+    """Return a warm engine instance for this process, constructing it on first use"""
+    return get_engine_registry().get(name)
+
+
+_ollama_lock = threading.Lock()
+_ollama_service = None
+_ollama_checked_at = 0.0
+
+
+def get_ollama_service():
+    """
+    Return an OllamaService whose availability was probed at most OLLAMA_PROBE_TTL ago
+
+    A shallow copy is returned so callers can switch current_model without
+    affecting each other.
+    """
+    global _ollama_service, _ollama_checked_at
+    with _ollama_lock:
+        if _ollama_service is None or time.monotonic() - _ollama_checked_at > OLLAMA_PROBE_TTL:
+            from .ollama_service import OllamaService
+            _ollama_service = OllamaService()
+            _ollama_checked_at = time.monotonic()
+        return copy.copy(_ollama_service)
+
+
+class HostMemoryLedger:
+    """
+    Engine memory reserved by each OCR pool on this host
+
+    A JSON file of {pid: MB} guarded by an exclusive flock; entries of
+    processes that no longer exist are dropped on every update. Without
+    fcntl (Windows) other processes are not seen and budgets are per process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = str(os.getpid())
+
+    @contextmanager
+    def _locked(self):
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path) as f:
+                        entries = json.load(f)
+                except (OSError, ValueError):
+                    entries = {}
+                yield entries
+                with open(self.path, 'w') as f:
+                    json.dump(entries, f)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _alive(pid: str) -> bool:
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            return True
+        return True
+
+    def update(self, reserved_mb: int) -> int:
+        """Record this process's reservation; returns the MB reserved by other processes"""
+        if fcntl is None:
+            return 0
+        try:
+            with self._locked() as entries:
+                for pid in [pid for pid in entries if pid != self.pid and not self._alive(pid)]:
+                    del entries[pid]
+                entries[self.pid] = reserved_mb
+                return sum(mb for pid, mb in entries.items() if pid != self.pid)
+        except OSError as e:
+            logger.warning(f"OCR pool memory ledger unavailable ({self.path}): {e}")
+            return 0
+
+    def others_mb(self) -> int:
+        """MB reserved by other processes (this process's entry is left as is)"""
+        if fcntl is None:
+            return 0
+        try:
+            with self._locked() as entries:
+                return sum(mb for pid, mb in entries.items() if pid != self.pid and self._alive(pid))
+        except OSError as e:
+            logger.warning(f"OCR pool memory ledger unavailable ({self.path}): {e}")
+            return 0
+
+    def release(self):
+        if fcntl is None:
+            return
+        try:
+            with self._locked() as entries:
+                entries.pop(self.pid, None)
+        except OSError:
+            pass
+
+
+def _worker_main(worker_id: int, task_queue, result_queue, memory_budget_mb: int, preload: List[str]):
+    """Worker process entry point - keeps engines warm across tasks"""
+    global _registry
+    import django
+    django.setup()
+    from django.db import close_old_connections
+
+    from .analysis_service import OCRAnalysisService
+    from .models import Document
+    from .ocr_service import OCRProcessor
+
+    _registry = EngineRegistry(memory_budget_mb)
+    _registry.preload(preload)
+    analyzer = OCRAnalysisService()
+    processor = None
+    result_queue.put(('ready', worker_id, None, None, _registry.warm_engines()))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, method, document_id, options = task
+        _registry.begin_task()
+        close_old_connections()
+        try:
+            document = Document.objects.get(pk=document_id)
+            if method == BATCH_TESSERACT:
+                processor = processor or OCRProcessor()
+                result = processor.run_batch_tesseract(document, **options)
+            else:
+                result = analyzer.run_method(method, document)
+        except Exception as e:
+            logger.error(f"[worker {worker_id}] {method} failed for document {document_id}: {e}", exc_info=True)
+            result = analyzer._get_error_result(str(e))
+
+        result_queue.put(('result', worker_id, task_id, analyzer._make_json_serializable(result), _registry.warm_engines()))
+
+    close_old_connections()
+
+
+class _WorkerHandle:
+    def __init__(self, worker_id: int, process, task_queue):
+        self.worker_id = worker_id
+        self.process = process
+        self.task_queue = task_queue
+        self.task_id = None
+        self.warm = set()
+        self.reserved_mb = 0  # Projected footprint of the in-flight task
+
+    @property
+    def idle(self) -> bool:
+        return self.task_id is None
+
+    def resident_mb(self) -> int:
+        return sum(engine_memory_mb(name) for name in self.warm)
+
+    def footprint_mb(self) -> int:
+        return max(self.resident_mb(), self.reserved_mb)
+
+
+class OCRWorkerPool:
+    """
+    Pool of long-lived OCR worker processes with memory admission control
+
+    submit() returns a Future immediately. Tasks wait in a FIFO queue until an
+    idle worker exists and the projected engine memory of this pool plus every
+    other pool on the host (HostMemoryLedger) stays within
+    OCR_POOL_MEMORY_BUDGET_MB. A pool with all workers idle still takes one
+    task so it always makes progress. Workers that already hold the engines a
+    method needs are preferred. Crashed workers (e.g. OOM-killed) fail their
+    in-flight task and are restarted; they are checked on every dispatch.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size: int, worker_budget_mb: int, pool_budget_mb: int, preload: List[str] = None):
+        self.size = size
+        self.worker_budget_mb = worker_budget_mb
+        self.pool_budget_mb = pool_budget_mb
+        self.preload = preload or []
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._result_queue = self._ctx.Queue()
+        self._workers: Dict[int, _WorkerHandle] = {}
+        self._queue = deque()
+        self._futures: Dict[int, Future] = {}
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._running = True
+        self._ledger = HostMemoryLedger(_setting(
+            'OCR_POOL_LEDGER_PATH', os.path.join(tempfile.gettempdir(), 'unibos-ocr-pool-memory.json')
+        ))
+
+        for worker_id in range(size):
+            self._start_worker(worker_id)
+
+        self._collector = threading.Thread(target=self._collect_results, name='ocr-pool-collector', daemon=True)
+        self._collector.start()
+        logger.info(f"🚀 OCR worker pool started: {size} workers, {worker_budget_mb}MB/worker, {pool_budget_mb}MB total")
+
+    @classmethod
+    def get_instance(cls) -> Optional['OCRWorkerPool']:
+        """Return the process-wide pool, or None when disabled or unable to start"""
+        if not _setting('OCR_WORKER_POOL_ENABLED', True):
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                try:
+                    cls._instance = cls(
+                        size=_setting('OCR_WORKER_POOL_SIZE', 2),
+                        worker_budget_mb=_setting('OCR_WORKER_MEMORY_BUDGET_MB', 4096),
+                        pool_budget_mb=_setting('OCR_POOL_MEMORY_BUDGET_MB', 6144),
+                        preload=_setting('OCR_WORKER_PRELOAD', ['paddleocr']),
+                    )
+                    atexit.register(cls._instance.shutdown)
+                except Exception as e:
+                    logger.error(f"Failed to start OCR worker pool, falling back to in-process engines: {e}")
+                    return None
+            return cls._instance
+
+    def submit(self, method: str, document_id, **options) -> Future:
+        """Queue an analysis method for a document; the Future resolves to the method result dict"""
+        future = Future()
+        with self._lock:
+            if not self._running:
+                raise RuntimeError('OCR worker pool is shut down')
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+            self._queue.append((task_id, method, str(document_id), options))
+        self._reap_dead_workers()  # Also dispatches
+        return future
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.size,
+                'busy': sum(1 for w in self._workers.values() if not w.idle),
+                'queued': len(self._queue),
+                'resident_mb': self._resident_mb_locked(),
+                'host_other_mb': self._ledger.others_mb(),
+                'pool_budget_mb': self.pool_budget_mb,
+                'warm': {w.worker_id: sorted(w.warm) for w in self._workers.values()},
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            workers = list(self._workers.values())
+        self._ledger.release()
+        for worker in workers:
+            try:
+                worker.task_queue.put(None)
+            except Exception:
+                pass
+        for worker in workers:
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def _start_worker(self, worker_id: int):
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, task_queue, self._result_queue, self.worker_budget_mb, self.preload),
+            name=f'ocr-worker-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = _WorkerHandle(worker_id, process, task_queue)
+
+    def _resident_mb_locked(self) -> int:
+        return sum(w.footprint_mb() for w in self._workers.values())
+
+    def _worker_projected_mb(self, worker: _WorkerHandle, method: str) -> int:
+        """Worker memory once it has loaded the engines the method needs"""
+        needed = METHOD_ENGINES.get(method, [])
+        missing_mb = sum(engine_memory_mb(name) for name in needed if name not in worker.warm)
+        return min(worker.resident_mb() + missing_mb, max(self.worker_budget_mb, method_memory_mb(method)))
+
+    def _projected_mb_locked(self, worker: _WorkerHandle, method: str) -> int:
+        """Pool memory if this worker takes the method"""
+        return self._resident_mb_locked() - worker.footprint_mb() + self._worker_projected_mb(worker, method)
+
+    def _publish_locked(self) -> int:
+        """Record this pool's footprint host-wide; returns the MB used by other pools"""
+        return self._ledger.update(self._resident_mb_locked())
+
+    def _admits_locked(self, worker: _WorkerHandle, method: str, others_mb: int) -> bool:
+        if all(w.idle for w in self._workers.values()):
+            return True  # Always make progress, even for methods larger than the budget
+        if others_mb + self._projected_mb_locked(worker, method) > self.pool_budget_mb:
+            return False
+
+        missing_mb = sum(engine_memory_mb(name) for name in METHOD_ENGINES.get(method, []) if name not in worker.warm)
+        if missing_mb:
+            try:
+                import psutil
+                if psutil.virtual_memory().available < missing_mb * 1024 * 1024:
+                    return False
+            except ImportError:
+                pass
+        return True
+
+    def _pick_worker_locked(self, method: str) -> Optional[_WorkerHandle]:
+        idle = [w for w in self._workers.values() if w.idle and w.process.is_alive()]
+        if not idle:
+            return None
+        needed = set(METHOD_ENGINES.get(method, []))
+        # Most engines already warm first, then the smallest footprint (least to evict)
+        return max(idle, key=lambda w: (len(needed & w.warm), -w.resident_mb()))
+
+    def _dispatch_locked(self):
+        others_mb = self._publish_locked()
+        while self._queue:
+            task_id, method, document_id, options = self._queue[0]
+            worker = self._pick_worker_locked(method)
+            if worker is None or not self._admits_locked(worker, method, others_mb):
+                return
+            self._queue.popleft()
+            worker.task_id = task_id
+            worker.reserved_mb = self._worker_projected_mb(worker, method)
+            others_mb = self._publish_locked()
+            worker.task_queue.put((task_id, method, document_id, options))
+            logger.info(f"[{method}] dispatched to ocr-worker-{worker.worker_id} (warm: {sorted(worker.warm)})")
+
+    def _collect_results(self):
+        while self._running:
+            try:
+                kind, worker_id, task_id, result, warm = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                self._reap_dead_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            with self._lock:
+                worker = self._workers.get(worker_id)
+                if worker is not None:
+                    worker.warm = set(warm or [])
+                    if kind == 'result' and worker.task_id == task_id:
+                        worker.task_id = None
+                        worker.reserved_mb = 0
+                future = self._futures.pop(task_id, None) if kind == 'result' else None
+
+            if future is not None:
+                future.set_result(result)
+            self._reap_dead_workers()  # Also dispatches
+
+    def _reap_dead_workers(self):
+        failed = []
+        with self._lock:
+            if not self._running:
+                return
+            for worker_id, worker in list(self._workers.items()):
+                if worker.process.is_alive():
+                    continue
+                logger.error(f"❌ ocr-worker-{worker_id} exited (code {worker.process.exitcode}), restarting")
+                if worker.task_id is not None:
+                    future = self._futures.pop(worker.task_id, None)
+                    if future is not None:
+                        failed.append((future, worker.process.exitcode))
+                self._start_worker(worker_id)
+            self._dispatch_locked()
+
+        for future, exitcode in failed:
+            future.set_exception(RuntimeError(f'OCR worker exited unexpectedly (exit code {exitcode})'))
+
+
+def get_worker_pool() -> Optional[OCRWorkerPool]:
+    return OCRWorkerPool.get_instance()
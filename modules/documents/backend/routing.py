@@ -7,4 +7,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/ocr/analysis/(?P<document_id>[0-9a-f-]+)/$', consumers.OCRAnalysisConsumer.as_asgi()),
+    re_path(r'ws/ocr/batch/(?P<batch_id>\d+)/$', consumers.OCRBatchConsumer.as_asgi()),
 ]
@@ -0,0 +1,184 @@
+"""
+Document Search Service - PostgreSQL full-text + trigram search
+
+Each document keeps two maintained search columns:
+- search_vector: weighted tsvector (A: filename + store name, B: receipt items, C: OCR text)
+- search_text:   the same content as one normalized string, GIN trigram indexed
+                 so substring matches (the old icontains behaviour) use an index
+
+Text is normalized Turkish-aware before indexing and querying: Turkish casing
+(I -> ı, İ -> i) then diacritics folded (ç/ğ/ı/ö/ş/ü -> c/g/i/o/s/u), so
+"ŞOK", "sok" and "Şok" all match and OCR output that lost diacritics still hits.
+
+Index rows are refreshed via signals (signals.py) after OCR text, filename,
+store name or receipt items change; `rebuild_search_index` backfills.
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Value
+
+logger = logging.getLogger('documents.search')
+
+_TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+_TURKISH_FOLD = str.maketrans({'ı': 'i', 'ç': 'c', 'ğ': 'g', 'ö': 'o', 'ş': 's', 'ü': 'u'})
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Query tokens shorter than this are ignored for the tsquery (still used for trigram match)
+MIN_TOKEN_LENGTH = 2
+
+
+def get_search_config() -> str:
+    """Text search configuration for normalized text ('simple': unstemmed, prefix queries cover suffixes)"""
+    return getattr(settings, 'DOCUMENT_SEARCH_CONFIG', 'simple')
+
+
+def normalize_search_text(text: str) -> str:
+    """Turkish-aware lowercase + diacritic folding + whitespace collapse"""
+    if not text:
+        return ''
+    text = text.translate(_TURKISH_LOWER).lower().translate(_TURKISH_FOLD)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+
+def build_search_query(query: str):
+    """Prefix tsquery (all tokens must match) from a user query, or None if no usable tokens"""
+    tokens = [t for t in _TOKEN_RE.findall(normalize_search_text(query)) if len(t) >= MIN_TOKEN_LENGTH]
+    if not tokens:
+        return None
+    return SearchQuery(' & '.join(f'{token}:*' for token in tokens), config=get_search_config(), search_type='raw')
+
+
+def _document_sections(document) -> dict:
+    """Searchable text of a document grouped by weight"""
+    primary = [document.original_filename or '']
+    items = []
+    receipt = getattr(document, 'parsed_receipt', None)
+    if receipt is not None:
+        primary.append(receipt.store_name or '')
+        items = [item.name for item in receipt.items.all()]
+    return {
+        'A': normalize_search_text(' '.join(primary)),
+        'B': normalize_search_text(' '.join(items)),
+        'C': normalize_search_text(document.ocr_text or ''),
+    }
+
+
+def update_search_index(document_ids: Iterable):
+    """Recompute search columns for the given documents (one UPDATE per document)"""
+    from .models import Document
+
+    config = get_search_config()
+    documents = (
+        Document.objects.filter(pk__in=list(document_ids))
+        .select_related('parsed_receipt')
+        .prefetch_related('parsed_receipt__items')
+        .only('id', 'original_filename', 'ocr_text', 'parsed_receipt__id', 'parsed_receipt__store_name')
+    )
+    updated = 0
+    for document in documents:
+        sections = _document_sections(document)
+        vector = (
+            SearchVector(Value(sections['A']), config=config, weight='A')
+            + SearchVector(Value(sections['B']), config=config, weight='B')
+            + SearchVector(Value(sections['C']), config=config, weight='C')
+        )
+        Document.objects.filter(pk=document.pk).update(
+            search_vector=vector,
+            search_text=' '.join(part for part in sections.values() if part),
+        )
+        updated += 1
+    return updated
+
+
+_pending = threading.local()
+
+
+def schedule_search_update(document_id=None, receipt_id=None):
+    """
+    Reindex a document after the current transaction commits (coalesces repeated saves)
+
+    Receipt item saves pass receipt_id; receipts are resolved to documents
+    with one query per flush instead of one per saved item.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _update_safely(_resolve_documents({document_id} - {None}, {receipt_id} - {None}))
+        return
+
+    # Reuse this transaction's pending sets while its flush callback is still registered
+    # (a rolled back savepoint drops the callback, so start fresh sets then)
+    pending = getattr(_pending, 'ids', None)
+    if pending is None or not any(entry[1] is _flush_pending for entry in connection.run_on_commit):
+        pending = _pending.ids = {'documents': set(), 'receipts': set()}
+        transaction.on_commit(_flush_pending)
+    if document_id is not None:
+        pending['documents'].add(document_id)
+    if receipt_id is not None:
+        pending['receipts'].add(receipt_id)
+
+
+def _resolve_documents(document_ids, receipt_ids):
+    if receipt_ids:
+        from .models import ParsedReceipt
+        document_ids = set(document_ids) | set(
+            ParsedReceipt.objects.filter(pk__in=receipt_ids).values_list('document_id', flat=True)
+        )
+    return document_ids
+
+
+def _flush_pending():
+    pending = getattr(_pending, 'ids', None)
+    _pending.ids = None
+    if pending:
+        document_ids = _resolve_documents(pending['documents'], pending['receipts'])
+        if document_ids:
+            _update_safely(document_ids)
+
+
+def _update_safely(document_ids):
+    if not document_ids:
+        return
+    try:
+        update_search_index(document_ids)
+    except Exception as e:
+        logger.error(f"Search index update failed for {len(document_ids)} documents: {e}")
+
+
+def search_documents(queryset, query: str, highlight: bool = False):
+    """
+    Filter a Document queryset by a search query, ranked by relevance
+
+    Matches the tsvector (prefix terms) or a trigram-indexed substring of the
+    normalized text. Adds `search_rank`, and `search_headline` when highlight=True.
+    """
+    normalized = normalize_search_text(query)
+    if not normalized:
+        return queryset
+
+    search_query = build_search_query(query)
+    condition = Q(search_text__contains=normalized)
+    if search_query is not None:
+        condition |= Q(search_vector=search_query)
+        queryset = queryset.filter(condition).annotate(search_rank=SearchRank(F('search_vector'), search_query))
+    else:
+        queryset = queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if highlight:
+        # Headlines are built from the original OCR text with the language config
+        headline_config = getattr(settings, 'DOCUMENT_SEARCH_HEADLINE_CONFIG', 'turkish')
+        queryset = queryset.annotate(search_headline=SearchHeadline(
+            'ocr_text', SearchQuery(query, config=headline_config),
+            config=headline_config, start_sel='<mark>', stop_sel='</mark>', max_fragments=2,
+        ))
+
+    return queryset.order_by('-search_rank', '-uploaded_at')
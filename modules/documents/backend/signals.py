@@ -0,0 +1,40 @@
+"""
+Django Signals for Documents
+Keep the full-text search index in step with OCR text, filenames and receipt data
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Document, ParsedReceipt, ReceiptItem
+from .search_service import schedule_search_update
+
+# Document fields that feed the search index
+SEARCH_SOURCE_FIELDS = {'ocr_text', 'original_filename'}
+
+
+@receiver(post_save, sender=Document)
+def document_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Reindex when searchable document fields may have changed (skips status-only saves)"""
+    if update_fields is not None and not SEARCH_SOURCE_FIELDS.intersection(update_fields):
+        return
+    schedule_search_update(instance.pk)
+
+
+@receiver(post_save, sender=ParsedReceipt)
+@receiver(post_delete, sender=ParsedReceipt)
+def parsed_receipt_changed(sender, instance, **kwargs):
+    """Store name is indexed with weight A"""
+    schedule_search_update(instance.document_id)
+
+
+@receiver(post_save, sender=ReceiptItem)
+@receiver(post_delete, sender=ReceiptItem)
+def receipt_item_changed(sender, instance, **kwargs):
+    """Item names are indexed with weight B"""
+    receipt = instance._state.fields_cache.get('receipt')
+    if receipt is not None:
+        schedule_search_update(receipt.document_id)
+    else:
+        # Resolved to its document together with other pending receipts on commit
+        schedule_search_update(receipt_id=instance.receipt_id)
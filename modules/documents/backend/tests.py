@@ -0,0 +1,500 @@
+"""
+Tests for Documents module
+OCR batch processing, job queue, result cache and search
+"""
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from concurrent.futures import Future
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import os
+import tempfile
+import time
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from .analysis_service import OCRAnalysisService
+from .analysis_store import build_analysis_results, load_method_results, merge_summary, save_method_result
+from .models import Document, DocumentAnalysisResult, DocumentBatch, OCRJob, OCRJobStatus, ParsedReceipt, ReceiptItem
+from .ocr_job_queue import OCRJobRunner, enqueue_analysis, enqueue_reprocess
+from .ocr_result_cache import OCRResultCache, engine_version
+from .ocr_service import OCRProcessor
+from .ocr_worker_pool import BATCH_TESSERACT, METHOD_ENGINES, EngineRegistry
+from .routing import websocket_urlpatterns
+from .search_service import build_search_query, normalize_search_text, search_documents
+
+User = get_user_model()
+
+
+class OCRBatchConsumerTests(TransactionTestCase):
+    """Batch progress sockets are only accepted for the batch owner"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.other = User.objects.create_user(username='other', password='x')
+        self.batch = DocumentBatch.objects.create(user=self.owner, batch_name='bulk', total_documents=2)
+
+    def _connect(self, user, batch_id):
+        async def run():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/ocr/batch/{batch_id}/')
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+        return async_to_sync(run)()
+
+    def test_owner_is_accepted(self):
+        self.assertTrue(self._connect(self.owner, self.batch.id))
+
+    def test_other_user_is_rejected(self):
+        self.assertFalse(self._connect(self.other, self.batch.id))
+
+    def test_anonymous_is_rejected(self):
+        self.assertFalse(self._connect(AnonymousUser(), self.batch.id))
+
+    def test_unknown_batch_is_rejected(self):
+        self.assertFalse(self._connect(self.owner, self.batch.id + 1000))
+
+
+class BatchTesseractRoutingTests(SimpleTestCase):
+    """process_documents_batch runs its Tesseract stage on the OCR worker pool"""
+
+    def _document(self, pk, path):
+        document = MagicMock()
+        document.pk = document.id = pk
+        document.document_type = 'receipt'
+        document.file_path.path = path
+        return document
+
+    def _processor(self):
+        with patch('modules.documents.backend.ocr_worker_pool.get_engine', side_effect=RuntimeError), \
+                patch('modules.documents.backend.ocr_worker_pool.get_ollama_service', side_effect=RuntimeError):
+            processor = OCRProcessor()
+        processor._process_with_ollama = MagicMock(return_value={'success': False, 'confidence': 0})
+        processor._finalize_dual_result = MagicMock(side_effect=lambda tesseract, *args: tesseract)
+        return processor
+
+    @patch('os.path.exists', return_value=True)
+    def test_stage_is_submitted_to_pool(self, _exists):
+        documents = [self._document(1, '/a.jpg'), self._document(2, '/b.jpg')]
+        pool = MagicMock()
+
+        def submit(method, document_id, **options):
+            future = Future()
+            future.set_result({'success': True, 'text': f'doc {document_id}', 'force': options['force_ocr']})
+            return future
+        pool.submit.side_effect = submit
+
+        processor = self._processor()
+        processor.run_batch_tesseract = MagicMock()
+        with patch('modules.documents.backend.ocr_worker_pool.get_worker_pool', return_value=pool):
+            results = processor.process_documents_batch(documents, force_ocr=False)
+
+        self.assertEqual([c.args[0] for c in pool.submit.call_args_list], [BATCH_TESSERACT, BATCH_TESSERACT])
+        processor.run_batch_tesseract.assert_not_called()
+        self.assertEqual(results[1]['text'], 'doc 1')
+        self.assertFalse(results[2]['force'])
+
+    @patch('os.path.exists', return_value=True)
+    def test_worker_failure_fails_only_that_document(self, _exists):
+        documents = [self._document(1, '/a.jpg'), self._document(2, '/b.jpg')]
+        pool = MagicMock()
+
+        def submit(method, document_id, **options):
+            future = Future()
+            if document_id == 1:
+                future.set_exception(RuntimeError('worker died'))
+            else:
+                future.set_result({'success': True, 'text': 'ok'})
+            return future
+        pool.submit.side_effect = submit
+
+        processor = self._processor()
+        with patch('modules.documents.backend.ocr_worker_pool.get_worker_pool', return_value=pool):
+            results = processor.process_documents_batch(documents)
+
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(results[1]['error'], 'worker died')
+        self.assertTrue(results[2]['success'])
+
+    @patch('os.path.exists', return_value=True)
+    def test_in_process_fallback_without_pool(self, _exists):
+        documents = [self._document(1, '/a.jpg')]
+        processor = self._processor()
+        processor.run_batch_tesseract = MagicMock(return_value={'success': True, 'text': 'local'})
+        with patch('modules.documents.backend.ocr_worker_pool.get_worker_pool', return_value=None):
+            results = processor.process_documents_batch(documents, force_ocr=True)
+
+        processor.run_batch_tesseract.assert_called_once_with(documents[0], force_ocr=True)
+        self.assertEqual(results[1]['text'], 'local')
+
+
+class OCRResultCacheTests(SimpleTestCase):
+    """Content-addressed OCR cache: keys, round trips and LRU eviction"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = OCRResultCache(self.tmp.name, max_bytes=10 * 1024)
+
+    def test_round_trip(self):
+        key = self.cache.method_key('a' * 64, 'paddleocr')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {'status': 'success', 'text': 'FİŞ'})
+        self.assertEqual(self.cache.get(key), {'status': 'success', 'text': 'FİŞ'})
+
+    def test_keys_differ_by_image_method_and_version(self):
+        keys = {
+            self.cache.method_key('a' * 64, 'paddleocr'),
+            self.cache.method_key('b' * 64, 'paddleocr'),
+            self.cache.method_key('a' * 64, 'easyocr'),
+            self.cache.make_key('a' * 64, 'paddleocr', {'preprocessing': 'original'}, 'other-version'),
+        }
+        self.assertEqual(len(keys), 4)
+        self.assertIn('paddleocr', engine_version('paddleocr'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        first, second, third = (self.cache.make_key(str(i), 'stage') for i in range(3))
+        self.cache.put(first, {'text': 'x' * 4000})
+        self.cache.put(second, {'text': 'x' * 4000})
+        past = time.time() - 60
+        os.utime(self.cache._path(first, '.json'), (past, past))
+        os.utime(self.cache._path(second, '.json'), (past - 60, past - 60))
+        # Reading bumps the entry, so the second one is now the least recently used
+        self.assertIsNotNone(self.cache.get(first))
+
+        self.cache.put(third, {'text': 'x' * 4000})
+
+        self.assertIsNone(self.cache.get(second))
+        self.assertIsNotNone(self.cache.get(first))
+        self.assertIsNotNone(self.cache.get(third))
+
+
+class StoreCachedResultTests(SimpleTestCase):
+    """Only engine output is written to the content-addressed cache"""
+
+    def setUp(self):
+        self.service = OCRAnalysisService.__new__(OCRAnalysisService)
+        self.document = MagicMock()
+        self.document.file_path.path = '/receipt.jpg'
+        self.cache = MagicMock()
+        self.cache.method_key.return_value = 'key'
+        patchers = [
+            patch('modules.documents.backend.ocr_result_cache.get_result_cache', return_value=self.cache),
+            patch('modules.documents.backend.ocr_result_cache.file_sha256', return_value='a' * 64),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_engine_output_is_cached(self):
+        self.service._store_cached_result('paddleocr', self.document, {'status': 'success', 'text': 'engine'})
+        self.cache.put.assert_called_once_with('key', {'status': 'success', 'text': 'engine'})
+
+    def test_results_from_stored_document_text_are_not_cached(self):
+        result = {'status': 'success', 'text': 'stored', 'from_document': True}
+        self.service._store_cached_result('paddleocr', self.document, result)
+        self.service._store_cached_result('hybrid', self.document, result)
+        self.cache.put.assert_not_called()
+
+    def test_failures_and_uncacheable_methods_are_skipped(self):
+        self.service._store_cached_result('paddleocr', self.document, {'status': 'error'})
+        self.service._store_cached_result('tesseract', self.document, {'status': 'success', 'text': 'stored'})
+        self.cache.put.assert_not_called()
+
+    def test_stored_llama_text_is_marked(self):
+        self.document.ollama_text = 'stored vision text'
+        self.document.ollama_model = 'llama3.2-vision'
+        self.document.ollama_confidence = 80
+        result = self.service._analyze_llama_vision(self.document)
+        self.assertTrue(result['from_document'])
+
+
+class EngineRegistryTests(SimpleTestCase):
+    """Warm engine cache: one instance per configuration, LRU within the budget"""
+
+    def setUp(self):
+        self.built = []
+
+        def factory(name):
+            def build():
+                self.built.append(name)
+                return MagicMock(name=name)
+            return build
+
+        factories = {name: factory(name) for name in ('paddleocr', 'paddleocr_plain', 'trocr', 'donut')}
+        patcher = patch.dict('modules.documents.backend.ocr_worker_pool.ENGINE_FACTORIES', factories, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_engine_is_built_once(self):
+        registry = EngineRegistry(memory_budget_mb=10000)
+        registry.get('paddleocr')
+        registry.get('paddleocr')
+        self.assertEqual(self.built, ['paddleocr'])
+
+    def test_structure_and_plain_paddle_are_separate_engines(self):
+        registry = EngineRegistry(memory_budget_mb=10000)
+        self.assertIsNot(registry.get('paddleocr'), registry.get('paddleocr_plain'))
+        self.assertEqual(METHOD_ENGINES['paddleocr'], ['paddleocr'])
+        for method in ('hybrid', 'trocr', 'layoutlmv3'):
+            self.assertIn('paddleocr_plain', METHOD_ENGINES[method])
+            self.assertNotIn('paddleocr', METHOD_ENGINES[method])
+
+    def test_least_recently_used_engine_is_evicted(self):
+        registry = EngineRegistry(memory_budget_mb=3600)  # paddleocr + trocr fit, donut needs one evicted
+        registry.get('paddleocr')
+        registry.get('trocr')
+        registry.begin_task()
+        registry.get('paddleocr')
+        registry.begin_task()
+        registry.get('donut')  # 2000MB: trocr is the least recently used
+        self.assertEqual(sorted(registry.warm_engines()), ['donut', 'paddleocr'])
+
+    def test_engines_of_the_current_task_are_not_evicted(self):
+        registry = EngineRegistry(memory_budget_mb=2000)
+        registry.get('trocr')
+        registry.get('paddleocr')  # Over budget, but trocr belongs to the same task
+        self.assertEqual(sorted(registry.warm_engines()), ['paddleocr', 'trocr'])
+
+    def test_unknown_engine(self):
+        with self.assertRaises(KeyError):
+            EngineRegistry(memory_budget_mb=1000).get('missing')
+
+
+@patch('modules.documents.backend.ocr_job_queue._send_batch_message')
+@patch('modules.documents.backend.ocr_job_queue._send_websocket_message')
+@patch('modules.documents.backend.ocr_job_queue._start_runner')
+class OCRJobQueueTests(TestCase):
+    """Durable job queue: deduplication on enqueue and fair claiming"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='x')
+        self.bob = User.objects.create_user(username='bob', password='x')
+        self.runner = OCRJobRunner(concurrency=1)
+
+    def _document(self, user, name='receipt.jpg'):
+        return Document.objects.create(user=user, original_filename=name, file_path=f'documents/{name}')
+
+    def test_enqueue_deduplicates_pending_methods(self, *mocks):
+        document = self._document(self.alice)
+        first = enqueue_analysis(document, ['paddleocr', 'hybrid'])
+        second = enqueue_analysis(document, ['paddleocr', 'easyocr'])
+
+        self.assertEqual(first['created'], ['paddleocr', 'hybrid'])
+        self.assertEqual(second['created'], ['easyocr'])
+        self.assertEqual(second['deduplicated'], ['paddleocr'])
+        self.assertEqual(OCRJob.objects.filter(document=document).count(), 3)
+
+    def test_deduplicated_job_is_upgraded(self, *mocks):
+        document = self._document(self.alice)
+        enqueue_analysis(document, ['paddleocr'], priority=OCRJob.PRIORITY_BULK)
+        result = enqueue_analysis(document, ['paddleocr'], priority=OCRJob.PRIORITY_INTERACTIVE, force_refresh=True)
+
+        job = OCRJob.objects.get(document=document)
+        self.assertEqual(job.priority, OCRJob.PRIORITY_INTERACTIVE)
+        self.assertTrue(job.force_refresh)
+        self.assertTrue(result['jobs'][0].force_refresh)
+
+    def test_deduplication_never_downgrades(self, *mocks):
+        document = self._document(self.alice)
+        enqueue_analysis(document, ['paddleocr'], priority=OCRJob.PRIORITY_INTERACTIVE, force_refresh=True)
+        enqueue_analysis(document, ['paddleocr'], priority=OCRJob.PRIORITY_BULK)
+
+        job = OCRJob.objects.get(document=document)
+        self.assertEqual(job.priority, OCRJob.PRIORITY_INTERACTIVE)
+        self.assertTrue(job.force_refresh)
+
+    def test_finished_jobs_do_not_deduplicate(self, *mocks):
+        document = self._document(self.alice)
+        enqueue_analysis(document, ['paddleocr'])
+        OCRJob.objects.update(status=OCRJobStatus.COMPLETED)
+
+        self.assertEqual(enqueue_analysis(document, ['paddleocr'])['created'], ['paddleocr'])
+
+    def test_claim_groups_methods_of_one_document(self, *mocks):
+        document = self._document(self.alice)
+        other = self._document(self.alice, 'other.jpg')
+        enqueue_analysis(document, ['paddleocr', 'hybrid'])
+        enqueue_analysis(other, ['paddleocr'])
+
+        jobs = self.runner.claim_next()
+
+        self.assertEqual({job.document_id for job in jobs}, {document.id})
+        self.assertEqual({job.method for job in jobs}, {'paddleocr', 'hybrid'})
+        for job in OCRJob.objects.filter(document=document):
+            self.assertEqual(job.status, OCRJobStatus.RUNNING)
+            self.assertEqual(job.attempts, 1)
+            self.assertEqual(job.runner_id, self.runner.runner_id)
+
+    def test_claim_skips_documents_already_running(self, *mocks):
+        document = self._document(self.alice)
+        enqueue_analysis(document, ['paddleocr'])
+        self.runner.claim_next()
+        enqueue_analysis(document, ['hybrid'])
+
+        self.assertEqual(self.runner.claim_next(), [])
+
+    def test_claim_prefers_priority_then_users_with_less_running_work(self, *mocks):
+        busy = self._document(self.alice, 'busy.jpg')
+        enqueue_analysis(busy, ['paddleocr'])
+        self.runner.claim_next()
+
+        alice_doc = self._document(self.alice)
+        bob_doc = self._document(self.bob)
+        urgent = self._document(self.alice, 'urgent.jpg')
+        enqueue_analysis(alice_doc, ['paddleocr'])
+        enqueue_analysis(bob_doc, ['paddleocr'])
+        enqueue_analysis(urgent, ['paddleocr'], priority=OCRJob.PRIORITY_INTERACTIVE)
+
+        self.assertEqual(self.runner.claim_next()[0].document_id, urgent.id)
+        # Same priority: bob has nothing running, alice already has two jobs
+        self.assertEqual(self.runner.claim_next()[0].document_id, bob_doc.id)
+
+    def test_reprocess_jobs_are_claimed_per_batch(self, *mocks):
+        documents = [self._document(self.alice, f'{i}.jpg') for i in range(3)]
+        result = enqueue_reprocess(documents, self.alice)
+        self.runner.bulk_batch_size = 2
+
+        jobs = self.runner.claim_next()
+
+        self.assertEqual(len(jobs), 2)
+        self.assertTrue(all(job.method == OCRJob.METHOD_REPROCESS for job in jobs))
+        self.assertTrue(all(job.batch_id == result['batch'].pk for job in jobs))
+
+    def test_stale_running_jobs_are_requeued(self, *mocks):
+        document = self._document(self.alice)
+        enqueue_analysis(document, ['paddleocr'])
+        self.runner.claim_next()
+        OCRJob.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(self.runner.requeue_stale_jobs(), 1)
+        self.assertEqual(OCRJob.objects.get().status, OCRJobStatus.QUEUED)
+
+
+class AnalysisStoreTests(TestCase):
+    """Per-method results are upserted; the document keeps a merged summary"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='owner', password='x')
+        self.document = Document.objects.create(user=user, original_filename='r.jpg', file_path='documents/r.jpg')
+
+    def test_method_results_merge_without_overwriting_each_other(self):
+        merge_summary(self.document, {'quality_assessment': {'quality_level': 'good'}})
+        save_method_result(self.document, 'paddleocr', {'status': 'success', 'text': 'A' * 500, 'char_count': 500})
+        # A second, stale instance finishing another method must not drop the first summary
+        stale = Document.objects.get(pk=self.document.pk)
+        stale.analysis_results = {}
+        save_method_result(stale, 'easyocr', {'status': 'error', 'error': 'boom'})
+
+        self.document.refresh_from_db()
+        summary = self.document.analysis_results
+        self.assertEqual(summary['quality_assessment'], {'quality_level': 'good'})
+        self.assertEqual(summary['paddleocr'], {'status': 'success', 'char_count': 500})
+        self.assertEqual(summary['easyocr'], {'status': 'error', 'error': 'boom'})
+        self.assertNotIn('text', summary['paddleocr'])
+        self.assertIsNotNone(self.document.last_analysis_at)
+
+    def test_rerun_upserts_one_row_per_method(self):
+        save_method_result(self.document, 'paddleocr', {'status': 'error', 'error': 'first'})
+        save_method_result(self.document, 'paddleocr', {'status': 'success', 'text': 'second'})
+
+        row = DocumentAnalysisResult.objects.get(document=self.document)
+        self.assertEqual(row.status, 'success')
+        self.assertEqual(row.result['text'], 'second')
+
+    def test_incremental_loading_and_legacy_shape(self):
+        save_method_result(self.document, 'paddleocr', {'status': 'success', 'text': 'p'})
+        first = load_method_results(self.document)
+        self.assertEqual(set(first['results']), {'paddleocr'})
+
+        DocumentAnalysisResult.objects.filter(document=self.document).update(
+            updated_at=first['cursor'] - timedelta(seconds=1)
+        )
+        save_method_result(self.document, 'hybrid', {'status': 'success', 'text': 'h'})
+        later = load_method_results(self.document, since=first['cursor'] - timedelta(milliseconds=500))
+        self.assertEqual(set(later['results']), {'hybrid'})
+
+        results = build_analysis_results(self.document)
+        self.assertEqual(results['paddleocr']['text'], 'p')
+        self.assertEqual(results['hybrid']['text'], 'h')
+        self.assertEqual(results['donut'], {})
+
+
+class SearchNormalizationTests(SimpleTestCase):
+    """Turkish-aware normalization shared by indexing and queries"""
+
+    def test_turkish_case_and_diacritics_fold(self):
+        self.assertEqual(normalize_search_text('ŞOK Market'), 'sok market')
+        self.assertEqual(normalize_search_text('İSTANBUL  ığdır'), 'istanbul igdir')
+        self.assertEqual(normalize_search_text('Çay\nGÜBRE'), 'cay gubre')
+        self.assertEqual(normalize_search_text(None), '')
+
+    def test_query_tokens_become_prefix_terms(self):
+        self.assertIsNone(build_search_query('a !'))
+        self.assertIn("Value('sok:* & market:*')", str(build_search_query('Şok market')))
+
+
+class DocumentSearchTests(TestCase):
+    """Search columns follow document and receipt edits and rank by weight"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='x')
+
+    def _document(self, name, ocr_text=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Document.objects.create(
+                user=self.user, original_filename=name, file_path=f'documents/{name}', ocr_text=ocr_text
+            )
+
+    def _search(self, query):
+        return list(search_documents(Document.objects.all(), query).values_list('original_filename', flat=True))
+
+    def test_documents_are_indexed_on_save(self):
+        self._document('fis.jpg', ocr_text='MİGROS TİCARET A.Ş. TOPLAM 120,50')
+        self._document('other.jpg', ocr_text='BIM BIRLESIK MAGAZALAR')
+
+        self.assertEqual(self._search('migros'), ['fis.jpg'])
+        self.assertEqual(self._search('ticaret'), ['fis.jpg'])
+        self.assertEqual(self._search('birleşik'), ['other.jpg'])
+        self.assertEqual(self._search('nothing here'), [])
+
+    def test_receipt_edits_reindex_the_document(self):
+        document = self._document('receipt.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            receipt = ParsedReceipt.objects.create(document=document, store_name='Şok Market')
+            for name in ('Süt', 'Ekmek'):
+                ReceiptItem.objects.create(receipt=receipt, name=name, unit_price=Decimal('1'), total_price=Decimal('1'))
+
+        self.assertEqual(self._search('sok'), ['receipt.jpg'])
+        self.assertEqual(self._search('sut'), ['receipt.jpg'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReceiptItem.objects.filter(name='Süt').delete()
+        self.assertEqual(self._search('sut'), [])
+
+    def test_receipt_item_saves_coalesce_into_one_update(self):
+        document = self._document('receipt.jpg')
+        with patch('modules.documents.backend.search_service.update_search_index') as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                receipt = ParsedReceipt.objects.create(document=document, store_name='A101')
+                for index in range(5):
+                    ReceiptItem.objects.create(
+                        receipt=receipt, name=f'item {index}', unit_price=Decimal('1'), total_price=Decimal('1')
+                    )
+        update.assert_called_once_with({document.pk})
+
+    def test_store_name_outranks_ocr_text(self):
+        by_store = self._document('store.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            ParsedReceipt.objects.create(document=by_store, store_name='Carrefour')
+        self._document('text.jpg', ocr_text='paid at carrefour')
+
+        self.assertEqual(self._search('carrefour'), ['store.jpg', 'text.jpg'])
+
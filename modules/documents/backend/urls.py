@@ -39,6 +39,7 @@ from .bulk_views import (
     BulkDeleteView,
     BulkReprocessView,
     BulkReprocessPendingView,
+    BulkReprocessStatusView,
     RecycleBinView,
     RestoreDocumentView,
     PermanentDeleteView,
@@ -100,6 +101,7 @@ urlpatterns = [
     path('bulk/delete/', BulkDeleteView.as_view(), name='bulk_delete'),
     path('bulk/reprocess/', BulkReprocessView.as_view(), name='bulk_reprocess'),
     path('bulk/reprocess-pending/', BulkReprocessPendingView.as_view(), name='bulk_reprocess_pending'),
+    path('bulk/reprocess/<int:batch_id>/status/', BulkReprocessStatusView.as_view(), name='bulk_reprocess_status'),
     path('bulk/export/', DocumentExportView.as_view(), name='export'),
     
     # Recycle bin
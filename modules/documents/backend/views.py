@@ -27,6 +27,7 @@ from .models import (
 )
 from modules.documents.backend.ocr_service import OCRProcessor, BatchProcessor, CrossModuleIntegrator
 from modules.documents.backend.utils import ThumbnailGenerator, DocumentHelper, PaginationHelper
+from modules.documents.backend.search_service import search_documents
 
 logger = logging.getLogger('documents.views')
 
@@ -55,14 +56,11 @@ class DocumentsDashboardView(LoginRequiredMixin, BaseUIView):
         if status:
             documents = documents.filter(processing_status=status)
         if search:
-            documents = documents.filter(
-                Q(original_filename__icontains=search) |
-                Q(ocr_text__icontains=search) |
-                Q(parsed_receipt__store_name__icontains=search)
-            )
-        
-        # Order by upload date
-        documents = documents.order_by('-uploaded_at')
+            # Indexed full-text search, ordered by relevance
+            documents = search_documents(documents, search)
+        else:
+            # Order by upload date
+            documents = documents.order_by('-uploaded_at')
         
         # Enhanced pagination with dynamic page size
         paginator = Paginator(documents, page_size)
@@ -182,10 +180,7 @@ class DocumentListView(LoginRequiredMixin, BaseUIView):
         if status:
             documents = documents.filter(processing_status=status)
         if search:
-            documents = documents.filter(
-                Q(original_filename__icontains=search) |
-                Q(ocr_text__icontains=search)
-            )
+            documents = search_documents(documents, search)
         
         # Dynamic pagination
         page_size = PaginationHelper.get_page_size(request)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the lazily loaded CLI command group (core.profiles.dev.lazy)
+"""
+
+import sys
+import types
+from pathlib import Path
+
+import click
+from click.testing import CliRunner
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.profiles.dev.lazy import LazyGroup
+
+COMMANDS_MODULE = 'unibos_lazy_group_test_commands'
+
+
+@click.command()
+def hello():
+    """Say hello"""
+    click.echo('hello from lazy command')
+
+
+def make_group(lazy_commands):
+    @click.group(cls=LazyGroup, lazy_commands=lazy_commands)
+    def cli():
+        """Test CLI"""
+
+    return cli
+
+
+def install_commands_module(monkeypatch, **attributes):
+    module = types.ModuleType(COMMANDS_MODULE)
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    monkeypatch.setitem(sys.modules, COMMANDS_MODULE, module)
+    return module
+
+
+def test_help_lists_commands_without_importing_them():
+    # The target module does not exist: --help must not try to import it
+    cli = make_group({'deploy': ('does_not_exist.deploy:deploy_group', 'deployment commands')})
+
+    result = CliRunner().invoke(cli, ['--help'])
+
+    assert result.exit_code == 0
+    assert 'deploy' in result.output and 'deployment commands' in result.output
+    assert 'does_not_exist.deploy' not in sys.modules
+
+
+def test_running_a_command_imports_only_that_command(monkeypatch):
+    install_commands_module(monkeypatch, hello=hello)
+    cli = make_group({
+        'hello': (f'{COMMANDS_MODULE}:hello', 'Say hello'),
+        'broken': ('does_not_exist.broken:command', 'never loaded'),
+    })
+
+    result = CliRunner().invoke(cli, ['hello'])
+
+    assert result.exit_code == 0
+    assert 'hello from lazy command' in result.output
+    assert 'broken' not in cli.commands
+
+
+def test_target_that_is_not_a_command_is_rejected(monkeypatch):
+    install_commands_module(monkeypatch, not_a_command=object())
+    cli = make_group({'bad': (f'{COMMANDS_MODULE}:not_a_command', 'bad target')})
+
+    result = CliRunner().invoke(cli, ['bad'])
+
+    assert result.exit_code != 0
+    assert 'is not a click command' in result.output
+
+
+def test_eager_and_lazy_commands_are_listed_together():
+    cli = make_group({'zeta': ('does_not_exist.zeta:command', 'lazy one')})
+    cli.add_command(hello)
+
+    ctx = click.Context(cli)
+    assert cli.list_commands(ctx) == ['hello', 'zeta']
+
+
+def test_completion_reads_the_table():
+    cli = make_group({
+        'deploy': ('does_not_exist.deploy:deploy_group', 'deployment commands'),
+        'db': ('does_not_exist.db:db_group', 'database commands'),
+        'status': ('does_not_exist.status:status_command', 'system status'),
+    })
+
+    ctx = click.Context(cli)
+    items = cli.shell_complete(ctx, 'd')
+
+    assert [item.value for item in items] == ['db', 'deploy']
+    assert items[0].help == 'database commands'
+
+
+def test_dev_cli_table_has_help_for_every_command():
+    from core.profiles.dev.main import LAZY_COMMANDS, cli
+
+    result = CliRunner().invoke(cli, ['--no-splash', '--help'])
+
+    assert result.exit_code == 0
+    for name, (target, short_help) in LAZY_COMMANDS.items():
+        assert ':' in target
+        assert short_help
+        assert name in result.output
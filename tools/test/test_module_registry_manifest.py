@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test the module registry scan cache (core.base.registry manifest)
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.base.registry.registry import ModuleRegistry
+
+
+def make_module(modules_dir, module_id, enabled=False, **extra):
+    module_dir = modules_dir / module_id
+    module_dir.mkdir(parents=True)
+    (module_dir / 'module.json').write_text(json.dumps({'id': module_id, 'name': module_id, **extra}))
+    if enabled:
+        (module_dir / '.enabled').touch()
+    return module_dir
+
+
+def bump_mtime(path, seconds=10):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_scan_is_written_to_the_manifest(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv', enabled=True, capabilities={'backend': True})
+    make_module(modules_dir, 'music')
+    manifest = tmp_path / 'manifest.json'
+
+    registry = ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    assert sorted(registry.modules) == ['cctv', 'music']
+    assert registry.get_django_apps() == ['modules.cctv.backend']
+    data = json.loads(manifest.read_text())
+    assert str(modules_dir.resolve()) in data['registries']
+
+
+def test_unchanged_tree_is_loaded_without_reading_module_json(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv', enabled=True, version='1.2.0')
+    manifest = tmp_path / 'manifest.json'
+    ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    with patch.object(ModuleRegistry, '_load_module_info', side_effect=AssertionError('module.json read')):
+        registry = ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    module = registry.get_module('cctv')
+    assert module.version == '1.2.0'
+    assert module.enabled
+    assert module.json_path == modules_dir / 'cctv' / 'module.json'
+
+
+def test_edited_module_json_triggers_a_rescan(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    module_dir = make_module(modules_dir, 'cctv', version='1.0.0')
+    manifest = tmp_path / 'manifest.json'
+    ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    json_file = module_dir / 'module.json'
+    json_file.write_text(json.dumps({'id': 'cctv', 'version': '2.0.0'}))
+    bump_mtime(json_file)
+
+    assert ModuleRegistry(modules_dir, manifest_path=manifest).get_module('cctv').version == '2.0.0'
+
+
+def test_new_module_directory_triggers_a_rescan(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv')
+    manifest = tmp_path / 'manifest.json'
+    ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    make_module(modules_dir, 'music')
+    bump_mtime(modules_dir)
+
+    assert sorted(ModuleRegistry(modules_dir, manifest_path=manifest).modules) == ['cctv', 'music']
+
+
+def test_enable_and_disable_are_reflected_in_the_manifest(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv')
+    manifest = tmp_path / 'manifest.json'
+
+    assert ModuleRegistry(modules_dir, manifest_path=manifest).enable_module('cctv')
+    assert ModuleRegistry(modules_dir, manifest_path=manifest).get_module('cctv').enabled
+
+    assert ModuleRegistry(modules_dir, manifest_path=manifest).disable_module('cctv')
+    assert not ModuleRegistry(modules_dir, manifest_path=manifest).get_module('cctv').enabled
+
+
+def test_corrupt_manifest_falls_back_to_a_scan(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv')
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text('{not json')
+
+    registry = ModuleRegistry(modules_dir, manifest_path=manifest)
+
+    assert list(registry.modules) == ['cctv']
+    assert json.loads(manifest.read_text())['registries']
+
+
+def test_no_manifest_path_always_scans(tmp_path):
+    modules_dir = tmp_path / 'modules'
+    make_module(modules_dir, 'cctv')
+
+    registry = ModuleRegistry(modules_dir, manifest_path=None)
+
+    assert list(registry.modules) == ['cctv']
+    assert not (tmp_path / 'manifest.json').exists()
+
+
+def test_default_modules_dir_is_found_from_the_git_root(tmp_path, monkeypatch):
+    (tmp_path / '.git').mkdir()
+    nested = tmp_path / 'core' / 'profiles'
+    nested.mkdir(parents=True)
+    monkeypatch.delenv('UNIBOS_ROOT', raising=False)
+    monkeypatch.chdir(nested)
+
+    with patch('subprocess.run', side_effect=AssertionError('subprocess spawned')):
+        assert ModuleRegistry._default_modules_dir() == tmp_path / 'modules'
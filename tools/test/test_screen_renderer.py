@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test the diff-based TUI screen buffer (core.clients.tui.framework.screen)
+"""
+
+import io
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.clients.tui.framework import screen as screen_module
+from core.clients.tui.framework.screen import ScreenRenderer
+
+
+def make_renderer(cols=20, lines=5):
+    stream = io.StringIO()
+    renderer = ScreenRenderer(stream=stream)
+    patcher = patch.object(screen_module, 'get_terminal_size', return_value=(cols, lines))
+    patcher.start()
+    return renderer, stream, patcher
+
+
+def draw(renderer, stream, *texts):
+    """Run one frame and return only what it wrote"""
+    stream.seek(0)
+    stream.truncate()
+    with renderer.frame():
+        for text in texts:
+            sys.stdout.write(text)
+    return stream.getvalue()
+
+
+def row_text(renderer, row):
+    return ''.join(char for char, style in renderer.front[row] if style is not None)
+
+
+def test_first_frame_clears_once_and_paints():
+    renderer, stream, patcher = make_renderer()
+    try:
+        output = draw(renderer, stream, '\033[2;3Hhello')
+        assert output.count('\033[2J') == 1
+        assert '\033[2;3H' in output and 'hello' in output
+        assert row_text(renderer, 1).startswith('  hello')
+    finally:
+        patcher.stop()
+
+
+def test_unchanged_frame_writes_nothing():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1Hstatic')
+        assert draw(renderer, stream, '\033[1;1Hstatic') == ''
+    finally:
+        patcher.stop()
+
+
+def test_only_changed_cells_are_written():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1Hcounter 10', '\033[3;1Hfooter')
+        output = draw(renderer, stream, '\033[1;1Hcounter 11', '\033[3;1Hfooter')
+        assert '\033[1;10H' in output
+        assert output.count('H') == 1  # One cursor move: only the changed digit
+        assert 'footer' not in output
+        assert '\033[2J' not in output
+    finally:
+        patcher.stop()
+
+
+def test_style_changes_are_diffed():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1Habc')
+        output = draw(renderer, stream, '\033[1;1H\033[31mabc\033[0m')
+        assert '\033[31m' in output
+        assert renderer.front[0][0] == ('a', '\033[31m')
+    finally:
+        patcher.stop()
+
+
+def test_wide_characters_take_two_cells():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1H📁x')
+        assert renderer.front[0][0][0] == '📁'
+        assert renderer.front[0][1] == ('', None)
+        assert renderer.front[0][2][0] == 'x'
+    finally:
+        patcher.stop()
+
+
+def test_erase_line_blanks_the_rest_of_the_row():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1Hlong text here')
+        draw(renderer, stream, '\033[1;1Hlong text here', '\033[1;5H\033[K')
+        assert row_text(renderer, 0).rstrip() == 'long'
+    finally:
+        patcher.stop()
+
+
+def test_invalidate_and_resize_repaint_everything():
+    renderer, stream, patcher = make_renderer()
+    try:
+        draw(renderer, stream, '\033[1;1Hsame')
+        renderer.invalidate()
+        assert renderer.needs_repaint
+        output = draw(renderer, stream, '\033[1;1Hsame')
+        assert '\033[2J' in output and 'same' in output
+    finally:
+        patcher.stop()
+
+    resized = patch.object(screen_module, 'get_terminal_size', return_value=(30, 6))
+    resized.start()
+    try:
+        assert renderer.needs_repaint
+        output = draw(renderer, stream, '\033[1;1Hsame')
+        assert '\033[2J' in output
+        assert len(renderer.front) == 6 and len(renderer.front[0]) == 30
+    finally:
+        resized.stop()
+
+
+def test_nested_frames_write_once():
+    renderer, stream, patcher = make_renderer()
+    try:
+        with renderer.frame():
+            sys.stdout.write('\033[1;1Houter')
+            with renderer.frame():
+                sys.stdout.write('\033[2;1Hinner')
+            assert stream.getvalue() == ''
+        output = stream.getvalue()
+        assert 'outer' in output and 'inner' in output
+    finally:
+        patcher.stop()
+
+
+def test_output_outside_the_screen_is_clipped():
+    renderer, stream, patcher = make_renderer(cols=5, lines=2)
+    try:
+        draw(renderer, stream, '\033[1;1Htoolong', '\033[9;1Hoffscreen')
+        assert row_text(renderer, 0) == 'toolo'
+        assert row_text(renderer, 1).strip() == ''
+    finally:
+        patcher.stop()